@@ -2,6 +2,7 @@ from fastapi import APIRouter
 
 from app.api.v1.endpoints.system import router as system_router
 from app.api.v1.endpoints.actors import router as actors_router
+from app.api.v1.endpoints.media import router as media_router
 
 api_router = APIRouter()
 
@@ -11,6 +12,9 @@ api_router.include_router(system_router, prefix="/system", tags=["system"])
 # 注册演员模块API路由
 api_router.include_router(actors_router, prefix="/actors", tags=["actors"])
 
+# 注册媒体模块API路由
+api_router.include_router(media_router, prefix="/media", tags=["media"])
+
 # 注册演员基本信息API路由
 # api_router.include_router(basic.router, prefix="/actors", tags=["actors"])
 
@@ -56,7 +56,7 @@ def get_current_user(
         )
 
 # 临时解决方案：跳过身份验证的依赖函数
-async def get_current_user_optional(
+def get_current_user_optional(
     db: Session = Depends(get_db),
     token: Optional[str] = Depends(oauth2_scheme)
 ) -> Optional[User]:
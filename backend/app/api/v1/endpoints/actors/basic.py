@@ -1,20 +1,43 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Query
+from fastapi import APIRouter, HTTPException, Depends, status, Query, UploadFile, File, Header, Response
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert, select, update, literal, exists, func
+from sqlalchemy.exc import SQLAlchemyError
+from pydantic import ValidationError
 from typing import List, Optional
-import uuid
+import csv
 import datetime
 import json
 import logging
 import traceback
 
-from app.core.database import get_db
-from app.models.actor import Actor, ActorProfessionalInfo, ActorContactInfo, ActorContractInfo
+from app.core.database import get_db, get_async_db
+from app.models.actor import Actor, ActorProfessionalInfo, ActorContactInfo, ActorContractInfo, ActorStatusHistory
+from app.models.media import ActorMedia
 from app.models.user import User
-from app.schemas.actor import ActorCreate, ActorBasicUpdate, ActorOut, ActorProfessionalUpdate, ActorContactUpdate
-from app.api.v1.dependencies import get_current_user, get_current_user_optional
+from app.schemas.actor import (
+    ActorCreate, ActorBasicUpdate, ActorOut, ActorProfessionalUpdate, ActorContactUpdate,
+    ActorImportResult, ActorImportError, ActorStatusBulkUpdate, ActorStatusBulkOut, ActorPatchOut
+)
+from app.api.v1.dependencies import get_current_user, get_current_user_optional, get_current_manager
+from app.api.v1.endpoints.actors.utils import (
+    split_actor_data, build_actor_filter_conditions, serialize_json_fields,
+    GENDER_MAPPING, PROFESSIONAL_JSON_FIELDS, CONTACT_JSON_FIELDS
+)
+from app.core.id_generator import generate_actor_id, generate_actor_ids
+from app.utils.import_utils import detect_import_format, iter_import_rows, normalize_import_row
+from app.utils.file_utils import build_srcset
 
 router = APIRouter()
 
+# 批量导入时每批写入数据库的行数
+IMPORT_CHUNK_SIZE = 1000
+
+# 数据库枚举字段的有效值
+ACTOR_GENDERS = ('male', 'female', 'other')
+ACTOR_STATUSES = ('active', 'inactive', 'suspended', 'retired', 'blacklisted', 'deleted')
+ACTOR_RANKS = ('主角', '角色', '特约', '群演', '无经验')
+
 
 @router.post("/", response_model=ActorOut, status_code=status.HTTP_201_CREATED)
 def create_actor(
@@ -33,58 +56,12 @@ def create_actor(
     try:
         logging.info(f"创建演员请求数据: {actor.model_dump()}")
         
-        # 创建基本信息
-        actor_data = actor.model_dump()
-        
-        # 将中文性别转换为英文
-        gender_mapping = {
-            '男': 'male',
-            '女': 'female',
-            '其他': 'other'
-        }
-        if actor_data.get('gender') in gender_mapping:
-            actor_data['gender'] = gender_mapping[actor_data['gender']]
-        
-        # 提取专业信息和联系信息
-        professional_info = {}
-        contact_info = {}
-        
-        # 专业信息字段
-        professional_fields = ['bio', 'skills', 'experience', 'education', 'awards', 'languages', 'current_rank', 'minimum_fee']
-        for field in professional_fields:
-            if field in actor_data:
-                # 处理JSON字段
-                if field in ['skills', 'experience', 'education', 'awards', 'languages'] and actor_data[field] is not None:
-                    try:
-                        professional_info[field] = json.dumps(actor_data[field], ensure_ascii=False)
-                    except Exception as e:
-                        logging.error(f"JSON序列化字段 {field} 失败: {str(e)}")
-                        professional_info[field] = None
-                else:
-                    professional_info[field] = actor_data[field]
-                actor_data.pop(field)
-        
-        # 联系信息字段
-        contact_fields = ['phone', 'email', 'address', 'wechat', 'social_media', 'emergency_contact', 'emergency_phone']
-        for field in contact_fields:
-            if field in actor_data:
-                # 处理JSON字段
-                if field == 'social_media' and actor_data[field] is not None:
-                    try:
-                        contact_info[field] = json.dumps(actor_data[field], ensure_ascii=False)
-                    except Exception as e:
-                        logging.error(f"JSON序列化字段 {field} 失败: {str(e)}")
-                        contact_info[field] = None
-                else:
-                    contact_info[field] = actor_data[field]
-                actor_data.pop(field)
+        # 创建基本信息，拆分出专业信息和联系信息
+        actor_data, professional_info, contact_info = split_actor_data(actor.model_dump())
         
         # 生成唯一ID (如果没有提供)
         if not actor_data.get('id'):
-            # 生成基于时间的ID: AC + 年月日 + 随机字符
-            current_date = datetime.datetime.now().strftime('%Y%m%d')
-            random_str = str(uuid.uuid4())[:8]  # 取前8位作为随机字符
-            actor_data['id'] = f"AC{current_date}{random_str}"
+            actor_data['id'] = generate_actor_id()
         
         # 处理用户关联，如果提供了user_id
         if actor.user_id:
@@ -229,6 +206,275 @@ def create_actor(
         raise
 
 
+@router.post("/import", response_model=ActorImportResult)
+def import_actors(
+    file: UploadFile = File(...),
+    agent_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_manager)
+):
+    """
+    批量导入演员
+    
+    - 支持CSV、XLSX、JSONL格式，列名/键名与创建演员API的字段一致
+    - 文件按行流式解析，每行使用ActorCreate校验，校验失败的行不会写入，并在结果中返回行号和原因
+    - 通过校验的行按批次使用多行INSERT写入演员、专业信息、联系信息和合同信息，每批提交一次
+    - 如果是经纪人导入，演员自动归属于该经纪人；如果是管理员导入，可以通过agent_id指定归属的经纪人
+    """
+    file_format = detect_import_format(file.filename)
+    if not file_format:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="不支持的文件格式，仅支持CSV、XLSX和JSONL文件"
+        )
+    
+    # 确定导入演员归属的经纪人
+    contract_agent_id = None
+    if current_user.role == "manager":
+        contract_agent_id = current_user.id
+    elif agent_id:
+        agent = db.query(User).filter(User.id == agent_id, User.role == "manager").first()
+        if not agent:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="指定的经纪人不存在或不是经纪人角色"
+            )
+        contract_agent_id = agent_id
+    
+    report = ActorImportResult()
+    chunk = []
+    
+    try:
+        for row_number, raw_row in iter_import_rows(file.file, file_format):
+            report.total_rows += 1
+            try:
+                chunk.append(_prepare_import_row(row_number, raw_row))
+            except ValueError as e:
+                _record_import_error(report, row_number, e)
+                continue
+            
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                _write_import_chunk(db, chunk, contract_agent_id, report)
+                chunk = []
+        
+        if chunk:
+            _write_import_chunk(db, chunk, contract_agent_id, report)
+    except (ValueError, csv.Error) as e:
+        logging.error(f"解析导入文件失败: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"解析导入文件失败: {str(e)}，已成功导入{report.imported}条记录"
+        )
+    
+    report.errors.sort(key=lambda error: error.row)
+    logging.info(f"批量导入演员完成: 总行数={report.total_rows}, 成功={report.imported}, 失败={report.failed}")
+    return report
+
+
+def _prepare_import_row(row_number: int, raw_row) -> dict:
+    """校验导入文件中的一行，返回拆分后的演员、专业信息和联系信息"""
+    if isinstance(raw_row, Exception):
+        raise ValueError(f"JSON解析失败: {str(raw_row)}")
+    if not isinstance(raw_row, dict):
+        raise ValueError("行数据必须是对象")
+    
+    actor = ActorCreate(**normalize_import_row(raw_row))
+    actor_data, professional_info, contact_info = split_actor_data(actor.model_dump())
+    
+    if actor_data['gender'] not in ACTOR_GENDERS:
+        raise ValueError(f"无效的性别: {actor_data['gender']}")
+    if actor_data['status'] not in ACTOR_STATUSES:
+        raise ValueError(f"无效的状态: {actor_data['status']}")
+    if professional_info.get('current_rank') and professional_info['current_rank'] not in ACTOR_RANKS:
+        raise ValueError(f"无效的演员等级: {professional_info['current_rank']}")
+    
+    return {
+        "row": row_number,
+        "actor": actor_data,
+        "professional": professional_info,
+        "contact": contact_info
+    }
+
+
+def _record_import_error(report: ActorImportResult, row_number: int, error, actor_id: Optional[str] = None):
+    """记录导入失败的行"""
+    if isinstance(error, ValidationError):
+        messages = [f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in error.errors()]
+    else:
+        messages = [str(error)]
+    report.failed += 1
+    report.errors.append(ActorImportError(row=row_number, actor_id=actor_id, errors=messages))
+
+
+def _write_import_chunk(db: Session, chunk: List[dict], contract_agent_id: Optional[int], report: ActorImportResult):
+    """
+    将一批已校验的行写入数据库
+    
+    每张表只执行一次多行INSERT，整批在同一个事务中提交；整批失败时回滚并逐行重试，
+    只有被数据库拒绝的行记录为失败
+    """
+    # 一次性检查本批次中显式指定的演员ID和关联用户是否有效
+    explicit_ids = [item["actor"]["id"] for item in chunk if item["actor"].get("id")]
+    existing_ids = set()
+    if explicit_ids:
+        existing_ids = {actor_id for (actor_id,) in db.query(Actor.id).filter(Actor.id.in_(explicit_ids))}
+    
+    user_ids = {item["actor"]["user_id"] for item in chunk if item["actor"].get("user_id")}
+    valid_user_ids = set()
+    if user_ids:
+        valid_user_ids = {user_id for (user_id,) in db.query(User.id).filter(User.id.in_(user_ids))}
+    
+    rows = []
+    seen_ids = set()
+    for item in chunk:
+        actor_id = item["actor"].get("id")
+        user_id = item["actor"].get("user_id")
+        if actor_id and (actor_id in existing_ids or actor_id in seen_ids):
+            _record_import_error(report, item["row"], "演员ID已存在", actor_id)
+            continue
+        if user_id and user_id not in valid_user_ids:
+            _record_import_error(report, item["row"], "关联的用户不存在", actor_id)
+            continue
+        if actor_id:
+            seen_ids.add(actor_id)
+        rows.append(item)
+    
+    if not rows:
+        return
+    
+    # 为未指定ID的行一次性分配一段连续ID
+    new_ids = iter(generate_actor_ids(sum(1 for item in rows if not item["actor"].get("id"))))
+    actor_rows, professional_rows, contact_rows, contract_rows = [], [], [], []
+    for item in rows:
+        actor_row = dict(item["actor"])
+        if not actor_row.get("id"):
+            actor_row["id"] = next(new_ids)
+        actor_rows.append(actor_row)
+        professional_rows.append({**item["professional"], "actor_id": actor_row["id"]})
+        contact_rows.append({**item["contact"], "actor_id": actor_row["id"]})
+        if contract_agent_id:
+            contract_rows.append({"actor_id": actor_row["id"], "agent_id": contract_agent_id})
+    
+    try:
+        _insert_import_rows(db, actor_rows, professional_rows, contact_rows, contract_rows)
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        logging.error(f"批量写入演员失败，逐行重试: {str(e)}")
+        _write_import_rows_one_by_one(db, rows, actor_rows, professional_rows, contact_rows, contract_rows, report)
+        return
+    
+    report.imported += len(actor_rows)
+    report.actor_ids.extend(actor_row["id"] for actor_row in actor_rows)
+
+
+def _insert_import_rows(db: Session, actor_rows, professional_rows, contact_rows, contract_rows):
+    """每张表执行一次多行INSERT"""
+    db.execute(insert(Actor.__table__), actor_rows)
+    db.execute(insert(ActorProfessionalInfo.__table__), professional_rows)
+    db.execute(insert(ActorContactInfo.__table__), contact_rows)
+    if contract_rows:
+        db.execute(insert(ActorContractInfo.__table__), contract_rows)
+
+
+def _write_import_rows_one_by_one(db: Session, rows, actor_rows, professional_rows, contact_rows, contract_rows, report: ActorImportResult):
+    """
+    整批写入失败后逐行重试
+    
+    每行在一个保存点中写入，被数据库拒绝的行只回滚该行并记录原因，其余行在同一事务中提交
+    """
+    contracts = {contract_row["actor_id"]: contract_row for contract_row in contract_rows}
+    imported_ids = []
+    for item, actor_row, professional_row, contact_row in zip(rows, actor_rows, professional_rows, contact_rows):
+        contract_row = contracts.get(actor_row["id"])
+        try:
+            with db.begin_nested():
+                _insert_import_rows(db, [actor_row], [professional_row], [contact_row], [contract_row] if contract_row else [])
+        except SQLAlchemyError as e:
+            _record_import_error(report, item["row"], f"写入数据库失败: {getattr(e, 'orig', e)}", actor_row["id"])
+            continue
+        imported_ids.append(actor_row["id"])
+    
+    try:
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        logging.error(f"逐行写入演员后提交失败: {str(e)}")
+        for item, actor_row in zip(rows, actor_rows):
+            if actor_row["id"] in imported_ids:
+                _record_import_error(report, item["row"], f"写入数据库失败: {e.__class__.__name__}", actor_row["id"])
+        return
+    
+    report.imported += len(imported_ids)
+    report.actor_ids.extend(imported_ids)
+
+
+@router.post("/status/bulk", response_model=ActorStatusBulkOut)
+def bulk_update_actor_status(
+    status_data: ActorStatusBulkUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_manager)
+):
+    """
+    批量更新演员状态
+    
+    - 通过actor_ids指定演员，或通过filter按条件筛选（如合同到期的演员），两者同时提供时取交集
+    - 状态已经是目标状态的演员会被跳过
+    - 每个发生变更的演员都会写入一条状态变更历史，记录变更前状态、原因和操作人
+    - 经纪人只能更新自己旗下演员的状态
+    
+    状态历史通过一条INSERT ... SELECT写入，演员状态通过一条UPDATE更新，两者在同一事务中提交
+    """
+    if status_data.actor_ids is None and status_data.filter is None:
+        raise HTTPException(status_code=400, detail="必须提供actor_ids或filter")
+    
+    if status_data.status not in ACTOR_STATUSES or status_data.status == "deleted":
+        raise HTTPException(status_code=400, detail=f"无效的状态: {status_data.status}")
+    
+    conditions = build_actor_filter_conditions(status_data.actor_ids, status_data.filter, current_user)
+    conditions.append(Actor.status != status_data.status)
+    now = datetime.datetime.utcnow()
+    
+    try:
+        # 先根据当前状态写入历史记录，再更新状态
+        history_rows = select(
+            Actor.id,
+            Actor.status,
+            literal(status_data.status),
+            literal(status_data.reason),
+            literal(current_user.id),
+            literal(now)
+        ).where(*conditions)
+        history_result = db.execute(
+            insert(ActorStatusHistory.__table__).from_select(
+                ["actor_id", "previous_status", "new_status", "reason", "changed_by", "created_at"],
+                history_rows
+            )
+        )
+        
+        update_result = db.execute(
+            update(Actor.__table__)
+            .where(*conditions)
+            .values(status=status_data.status, version=Actor.version + 1, updated_at=now)
+        )
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        logging.error(f"批量更新演员状态失败: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"批量更新演员状态失败: {str(e)}"
+        )
+    
+    logging.info(f"批量更新演员状态: 新状态={status_data.status}, 更新={update_result.rowcount}, 历史记录={history_result.rowcount}")
+    
+    return {
+        "status": status_data.status,
+        "updated": update_result.rowcount,
+        "history_records": history_result.rowcount
+    }
+
+
 @router.get("/without-agent", response_model=List[ActorOut])
 async def list_actors_without_agent(
     skip: int = 0, 
@@ -239,7 +485,7 @@ async def list_actors_without_agent(
     height_min: Optional[int] = None,
     height_max: Optional[int] = None,
     count_only: bool = False,  # 添加count_only参数
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     获取未签约经纪人的演员列表
@@ -247,30 +493,27 @@ async def list_actors_without_agent(
     可选参数:
     - count_only: 如果为True，则只返回符合条件的记录数（用于分页）
     """
-    # 查询所有已签约的演员ID
-    contracted_actor_ids = db.query(ActorContractInfo.actor_id).filter(
+    # 查询未签约的演员（不存在带经纪人的合同记录）
+    conditions = [~exists().where(
+        ActorContractInfo.actor_id == Actor.id,
         ActorContractInfo.agent_id.isnot(None)
-    ).all()
-    contracted_actor_ids = [actor_id for (actor_id,) in contracted_actor_ids]
-    
-    # 查询未签约的演员
-    query = db.query(Actor).filter(~Actor.id.in_(contracted_actor_ids) if contracted_actor_ids else True)
+    )]
     
     # 应用筛选条件
     if name:
-        query = query.filter(Actor.real_name.like(f"%{name}%"))
+        conditions.append(Actor.real_name.like(f"%{name}%"))
     if age_min is not None:
-        query = query.filter(Actor.age >= age_min)
+        conditions.append(Actor.age >= age_min)
     if age_max is not None:
-        query = query.filter(Actor.age <= age_max)
+        conditions.append(Actor.age <= age_max)
     if height_min is not None:
-        query = query.filter(Actor.height >= height_min)
+        conditions.append(Actor.height >= height_min)
     if height_max is not None:
-        query = query.filter(Actor.height <= height_max)
+        conditions.append(Actor.height <= height_max)
     
     # 如果仅需计数，返回符合条件的记录总数
     if count_only:
-        total_count = query.count()
+        total_count = await db.scalar(select(func.count()).select_from(Actor).where(*conditions))
         # 返回一个示例演员，但设置total_count属性
         sample_actor = {"id": "count", "real_name": "计数", "gender": "male", "status": "active", "total_count": total_count}
         return [sample_actor]
@@ -280,12 +523,12 @@ async def list_actors_without_agent(
         # 如果limit=0，返回所有匹配的记录ID和总数量，而不是完整对象
         # 这用于获取总数而不传输大量数据
         if limit == 0:
-            ids = query.with_entities(Actor.id).all()
-            return [{"id": id[0]} for id in ids]
+            ids = await db.scalars(select(Actor.id).where(*conditions))
+            return [{"id": actor_id} for actor_id in ids]
         else:
             limit = 100  # 对于其他无效值，设置一个合理的最大值
     
-    actors = query.offset(skip).limit(limit).all()
+    actors = (await db.scalars(select(Actor).where(*conditions).offset(skip).limit(limit))).all()
     
     # 处理每个演员的合约信息，确保以字典形式返回
     result_actors = []
@@ -513,6 +756,9 @@ def list_actors(
     
     actors = query.offset(skip).limit(limit).all()
     
+    # 一次查询当前页所有演员的头像变体
+    avatar_variants = _load_avatar_variants(db, [actor.id for actor in actors])
+    
     # 处理每个演员的合约信息，确保以字典形式返回
     result_actors = []
     for actor in actors:
@@ -520,6 +766,10 @@ def list_actors(
         if '_sa_instance_state' in actor_dict:
             del actor_dict['_sa_instance_state']
         
+        variants = avatar_variants.get(actor.id)
+        actor_dict['avatar_variants'] = variants
+        actor_dict['avatar_srcset'] = build_srcset(variants)
+        
         # 获取合约信息并转换为字典
         contract_info = db.query(ActorContractInfo).filter(ActorContractInfo.actor_id == actor.id).first()
         if contract_info:
@@ -551,15 +801,32 @@ def list_actors(
     return result_actors
 
 
+def _load_avatar_variants(db: Session, actor_ids: List[str]) -> dict:
+    """批量查询演员头像的响应式变体，返回 {演员ID: 变体映射}"""
+    if not actor_ids:
+        return {}
+    rows = db.query(ActorMedia.actor_id, ActorMedia.variants).filter(
+        ActorMedia.actor_id.in_(actor_ids),
+        ActorMedia.type == "avatar",
+        ActorMedia.variants.isnot(None)
+    ).all()
+    return {actor_id: json.loads(variants) for actor_id, variants in rows}
+
+
 @router.get("/{actor_id}", response_model=ActorOut)
-def get_actor(actor_id: str, db: Session = Depends(get_db)):
+def get_actor(actor_id: str, db: Session = Depends(get_db), response: Response = None):
     """
     获取演员详情
+    
+    响应头ETag为演员当前版本号，可用于PATCH请求的If-Match
     """
     actor = db.query(Actor).filter(Actor.id == actor_id).first()
     if not actor:
         raise HTTPException(status_code=404, detail="演员不存在")
     
+    if response is not None:
+        response.headers["ETag"] = f'"{actor.version}"'
+    
     # 获取专业信息
     professional_info = db.query(ActorProfessionalInfo).filter(ActorProfessionalInfo.actor_id == actor_id).first()
     
@@ -705,6 +972,7 @@ def update_actor_basic_info(
     # 更新非空字段
     for key, value in actor_info.model_dump(exclude_unset=True).items():
         setattr(db_actor, key, value)
+    db_actor.version = Actor.version + 1
     
     db.commit()
     db.refresh(db_actor)
@@ -713,6 +981,156 @@ def update_actor_basic_info(
     return get_actor(actor_id, db)
 
 
+@router.patch("/{actor_id}/basic-info", response_model=ActorPatchOut)
+def patch_actor_basic_info(
+    actor_id: str,
+    actor_info: ActorBasicUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    version: Optional[int] = Query(None, description="期望的当前版本号，与If-Match二选一"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    局部更新演员基本信息（乐观并发控制）
+    
+    - 只更新请求中提供的字段
+    - 必须通过If-Match请求头或version参数提供当前版本号，版本不一致时返回409
+    - 权限与PUT接口相同
+    """
+    changes = actor_info.model_dump(exclude_unset=True)
+    if changes.get('gender') in GENDER_MAPPING:
+        changes['gender'] = GENDER_MAPPING[changes['gender']]
+    
+    return _patch_actor(db, Actor.__table__, actor_id, changes, if_match, version, current_user, response)
+
+
+@router.patch("/{actor_id}/professional", response_model=ActorPatchOut)
+def patch_actor_professional(
+    actor_id: str,
+    actor_professional: ActorProfessionalUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    version: Optional[int] = Query(None, description="期望的当前版本号，与If-Match二选一"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    局部更新演员专业信息（乐观并发控制）
+    """
+    changes = serialize_json_fields(actor_professional.model_dump(exclude_unset=True), PROFESSIONAL_JSON_FIELDS)
+    return _patch_actor(db, ActorProfessionalInfo.__table__, actor_id, changes, if_match, version, current_user, response)
+
+
+@router.patch("/{actor_id}/contact", response_model=ActorPatchOut)
+def patch_actor_contact(
+    actor_id: str,
+    actor_contact: ActorContactUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    version: Optional[int] = Query(None, description="期望的当前版本号，与If-Match二选一"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    局部更新演员联系信息（乐观并发控制）
+    """
+    changes = serialize_json_fields(actor_contact.model_dump(exclude_unset=True), CONTACT_JSON_FIELDS)
+    return _patch_actor(db, ActorContactInfo.__table__, actor_id, changes, if_match, version, current_user, response)
+
+
+def _parse_expected_version(if_match: Optional[str], version: Optional[int]) -> int:
+    """从If-Match请求头（如 "3" 或 W/"3"）或version参数中解析期望的版本号"""
+    if if_match:
+        value = if_match.strip()
+        if value.startswith('W/'):
+            value = value[2:]
+        try:
+            return int(value.strip('"'))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="无效的If-Match请求头")
+    if version is not None:
+        return version
+    raise HTTPException(
+        status_code=status.HTTP_428_PRECONDITION_REQUIRED,
+        detail="缺少版本号，请通过If-Match请求头或version参数提供"
+    )
+
+
+def _actor_write_conditions(current_user: User) -> list:
+    """当前用户可写演员的条件，与PUT接口的权限检查一致"""
+    if current_user.role == 'performer':
+        return [Actor.user_id == current_user.id]
+    if current_user.role == 'manager':
+        return [exists().where(
+            ActorContractInfo.actor_id == Actor.id,
+            ActorContractInfo.agent_id == current_user.id
+        )]
+    return []
+
+
+def _patch_actor(db: Session, table, actor_id: str, changes: dict, if_match: Optional[str],
+                 version: Optional[int], current_user: User, response: Response) -> dict:
+    """
+    以带版本和权限条件的UPDATE完成局部更新、版本检查、权限检查和版本号递增
+    
+    更新专业/联系信息时在同一事务中先递增演员版本号（版本和权限条件都在这条语句上，
+    同时锁定演员行，并发的更新依次进行），再更新信息表，信息记录尚不存在时插入。
+    只有在没有行被更新时才会额外查询，以区分演员不存在、无权限和版本冲突
+    """
+    if not changes:
+        raise HTTPException(status_code=400, detail="没有需要更新的字段")
+    
+    expected_version = _parse_expected_version(if_match, version)
+    now = datetime.datetime.utcnow()
+    conditions = [Actor.id == actor_id, Actor.version == expected_version] + _actor_write_conditions(current_user)
+    
+    if table is Actor.__table__:
+        stmt = update(Actor.__table__).where(*conditions).values(
+            **changes, version=Actor.version + 1, updated_at=now
+        )
+    else:
+        stmt = update(Actor.__table__).where(*conditions).values(version=Actor.version + 1)
+    
+    result = db.execute(stmt)
+    if result.rowcount == 0:
+        db.rollback()
+        _raise_patch_failure(db, actor_id, expected_version, current_user)
+    
+    if table is not Actor.__table__:
+        result = db.execute(update(table).where(table.c.actor_id == actor_id).values(**changes, updated_at=now))
+        if result.rowcount == 0:
+            db.execute(insert(table).values(actor_id=actor_id, **changes, updated_at=now))
+    db.commit()
+    
+    new_version = expected_version + 1
+    response.headers["ETag"] = f'"{new_version}"'
+    return {"id": actor_id, "version": new_version, "updated_fields": list(changes.keys())}
+
+
+def _raise_patch_failure(db: Session, actor_id: str, expected_version: int, current_user: User):
+    """更新未命中任何行时，判断具体原因并抛出对应的错误"""
+    actor = db.query(Actor.version, Actor.user_id).filter(Actor.id == actor_id).first()
+    if not actor:
+        raise HTTPException(status_code=404, detail="演员不存在")
+    
+    if current_user.role == 'performer' and actor.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="您只能更新自己的演员信息")
+    if current_user.role == 'manager':
+        contract_info = db.query(ActorContractInfo).filter(
+            ActorContractInfo.actor_id == actor_id,
+            ActorContractInfo.agent_id == current_user.id
+        ).first()
+        if not contract_info:
+            raise HTTPException(status_code=403, detail="您没有权限更新该演员的信息")
+    
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"演员信息已被修改，当前版本为{actor.version}，请求的版本为{expected_version}，请刷新后重试",
+        headers={"ETag": f'"{actor.version}"'}
+    )
+
+
 @router.delete("/actors/{actor_id}", response_model=dict)
 def delete_actor(actor_id: str, db: Session = Depends(get_db)):
     db_actor = db.query(Actor).filter(Actor.id == actor_id).first()
@@ -792,6 +1210,7 @@ def update_actor_professional(
         professional_data['actor_id'] = actor_id
         professional_info = ActorProfessionalInfo(**professional_data)
         db.add(professional_info)
+    actor.version = Actor.version + 1
     
     db.commit()
     
@@ -863,6 +1282,7 @@ def update_actor_contact(
         contact_data['actor_id'] = actor_id
         contact_info = ActorContactInfo(**contact_data)
         db.add(contact_info)
+    actor.version = Actor.version + 1
     
     db.commit()
     
@@ -894,51 +1314,8 @@ def performer_update_self_info(
     try:
         logging.info(f"演员自行更新信息请求数据: {actor.model_dump()}")
         
-        # 创建基本信息
-        actor_data = actor.model_dump()
-        
-        # 将中文性别转换为英文
-        gender_mapping = {
-            '男': 'male',
-            '女': 'female',
-            '其他': 'other'
-        }
-        if actor_data.get('gender') in gender_mapping:
-            actor_data['gender'] = gender_mapping[actor_data['gender']]
-        
-        # 提取专业信息和联系信息
-        professional_info = {}
-        contact_info = {}
-        
-        # 专业信息字段
-        professional_fields = ['bio', 'skills', 'experience', 'education', 'awards', 'languages', 'current_rank', 'minimum_fee']
-        for field in professional_fields:
-            if field in actor_data:
-                # 处理JSON字段
-                if field in ['skills', 'experience', 'education', 'awards', 'languages'] and actor_data[field] is not None:
-                    try:
-                        professional_info[field] = json.dumps(actor_data[field], ensure_ascii=False)
-                    except Exception as e:
-                        logging.error(f"JSON序列化字段 {field} 失败: {str(e)}")
-                        professional_info[field] = None
-                else:
-                    professional_info[field] = actor_data[field]
-                actor_data.pop(field)
-        
-        # 联系信息字段
-        contact_fields = ['phone', 'email', 'address', 'wechat', 'social_media', 'emergency_contact', 'emergency_phone']
-        for field in contact_fields:
-            if field in actor_data:
-                # 处理JSON字段
-                if field == 'social_media' and actor_data[field] is not None:
-                    try:
-                        contact_info[field] = json.dumps(actor_data[field], ensure_ascii=False)
-                    except Exception as e:
-                        logging.error(f"JSON序列化字段 {field} 失败: {str(e)}")
-                        contact_info[field] = None
-                else:
-                    contact_info[field] = actor_data[field]
-                actor_data.pop(field)
+        # 创建基本信息，拆分出专业信息和联系信息
+        actor_data, professional_info, contact_info = split_actor_data(actor.model_dump())
                 
         # 查找是否已经存在该用户关联的演员信息
         existing_actor = db.query(Actor).filter(Actor.user_id == current_user.id).first()
@@ -981,6 +1358,7 @@ def performer_update_self_info(
                     db.add(db_contact)
             
             # 不修改合同信息，保持与经纪人的关系不变
+            existing_actor.version = Actor.version + 1
             db_actor = existing_actor
             
         else:
@@ -990,10 +1368,7 @@ def performer_update_self_info(
             
             # 生成唯一ID (如果没有提供)
             if not actor_data.get('id'):
-                # 生成基于时间的ID: AC + 年月日 + 随机字符
-                current_date = datetime.datetime.now().strftime('%Y%m%d')
-                random_str = str(uuid.uuid4())[:8]  # 取前8位作为随机字符
-                actor_data['id'] = f"AC{current_date}{random_str}"
+                actor_data['id'] = generate_actor_id()
             
             # 创建演员记录
             db_actor = Actor(**actor_data)
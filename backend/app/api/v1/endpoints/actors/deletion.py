@@ -8,8 +8,8 @@ from app.core.database import get_db
 from app.models.actor import Actor
 from app.models.media import ActorMedia
 from app.schemas.actor import ActorOut
-from app.core.storage import minio_client
-from app.core.config import settings
+from app.utils.media_refs import releasable_actor_objects
+from app.utils.storage_deletions import journal_deletions, storage_deletion_drainer
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -46,24 +46,16 @@ def delete_actor(
     
     # 如果需要删除关联的媒体文件
     if delete_media:
-        # 查询该演员的所有媒体文件
-        media_files = db.query(ActorMedia).filter(ActorMedia.actor_id == actor_id).all()
-        logger.info(f"准备删除演员 {actor_id} 的 {len(media_files)} 个媒体文件")
+        # 收集可以删除的对象（原文件、缩略图、变体和转码结果），仍被其他演员的记录引用的内容不删除
+        objects_to_remove = releasable_actor_objects(db, actor_id)
         
-        # 先删除MinIO中的文件
-        for media in media_files:
-            try:
-                bucket_name = media.bucket_name or settings.MINIO_BUCKET
-                object_name = media.object_name
-                
-                if bucket_name and object_name:
-                    logger.info(f"从MinIO删除文件: {bucket_name}/{object_name}")
-                    minio_client.remove_object(bucket_name, object_name)
-            except Exception as e:
-                logger.error(f"删除MinIO文件失败: {str(e)}")
-                # 继续处理其他文件，不中断流程
+        # 存储中的文件与数据库修改在同一事务中写入删除日志，提交后由后台清理协程批量删除
+        for bucket_name in sorted({bucket_name for bucket_name, _ in objects_to_remove}):
+            journal_deletions(db, bucket_name, sorted(name for bucket, name in objects_to_remove if bucket == bucket_name))
+        logger.info(f"已记录待删除的存储文件: {len(objects_to_remove)}个")
         
-        # 不需要手动删除数据库中的媒体记录，因为会通过级联关系自动删除
+        # 软删除时演员记录保留，媒体记录也要删除，否则仍指向已删除的对象，清理时也会被当作仍在引用
+        db.query(ActorMedia).filter(ActorMedia.actor_id == actor_id).delete(synchronize_session=False)
     
     # 执行删除操作
     if permanent:
@@ -76,5 +68,7 @@ def delete_actor(
         db_actor.deleted_at = datetime.datetime.now()
     
     db.commit()
+    if delete_media:
+        storage_deletion_drainer.notify()
     
     return actor_copy
@@ -1,30 +1,84 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, BackgroundTasks, Header
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, BackgroundTasks, Header, Query, Request, Response
 from typing import List, Optional, Dict
-from pathlib import Path
-import aiofiles
 import os
 import uuid
-import magic
-from datetime import datetime
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select, func, update, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+import json
+import asyncio
 import logging
 import tempfile
+import weakref
 
-from ...dependencies import get_current_user, get_current_user_optional
+from ...dependencies import get_current_user, get_current_user_optional, get_current_admin
 from app.models.actor import Actor, ActorContractInfo
-from app.models.media import ActorMedia
+from app.models.media import ActorMedia, MediaAlbum, MediaJob, UploadSession
 from app.models.user import User
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.utils.file_utils import (
     validate_file_type, 
     compress_image, 
-    create_thumbnail, 
-    create_video_thumbnail,
-    upload_file_to_minio
+    upload_file_to_minio,
+    save_upload_file,
+    sniff_content_type,
+    generate_image_variants,
+    build_srcset,
+    smallest_variant_url,
+    streaming_fields,
+    perceptual_hash
+)
+from app.core.storage import run_storage_io
+from app.utils.storage_backends import get_storage_backend, ObjectNotFound
+from app.utils.media_jobs import media_job_pool, get_incoming_dir
+from app.utils.media_refs import (
+    find_media_by_hash,
+    reference_fields,
+    releasable_object_names,
+    content_object_name,
+    content_variants_prefix
+)
+from app.utils.near_duplicates import find_near_duplicates, cluster_near_duplicates
+from app.utils.media_albums import album_name, ensure_album, album_summaries, after_cursor, fetch_page
+from app.utils.storage_deletions import journal_deletions, storage_deletion_drainer
+from app.utils.direct_uploads import (
+    staging_object_name,
+    presigned_post,
+    ensure_upload_bucket,
+    inspect_uploaded_object,
+    remove_staged_object,
+    direct_upload_expired_before
+)
+from app.utils.resumable_uploads import (
+    buffer_path,
+    uploaded_bytes,
+    recoverable_offset,
+    append_stream,
+    create_multipart_upload,
+    upload_buffer_part,
+    complete_multipart_upload,
+    abort_multipart_upload,
+    remove_buffer
+)
+from app.utils.range_requests import (
+    RangeNotSatisfiable,
+    parse_range,
+    if_range_matches,
+    http_date
+)
+from app.schemas.media import (
+    MediaResponse,
+    MediaList,
+    MediaJobOut,
+    MediaAlbumUpdate,
+    PresignedUploadRequest,
+    PresignedUploadOut,
+    UploadSessionCreate,
+    UploadSessionOut
 )
-from app.schemas.media import MediaResponse, MediaList
 
 # 配置日志记录器
 logger = logging.getLogger(__name__)
@@ -42,12 +96,15 @@ MAX_VIDEO_SIZE = 100 * 1024 * 1024  # 100MB
 MAX_PHOTOS_COUNT = 50
 MAX_VIDEOS_COUNT = 20
 
+# 同一上传会话的分块串行处理（单进程部署，跨进程的修改由提交时的行锁和偏移量检查发现）
+_upload_locks = weakref.WeakValueDictionary()
+
 @router.post("/{actor_id}/media/avatar", response_model=dict)
 async def upload_avatar(
     actor_id: str,
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user),  # 启用身份验证
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """上传演员头像
     
@@ -61,7 +118,7 @@ async def upload_avatar(
     - 数量: 每个演员只能有一个头像
     """
     # 检查演员是否存在
-    actor = db.query(Actor).filter(Actor.id == actor_id).first()
+    actor = await db.scalar(select(Actor).where(Actor.id == actor_id))
     if not actor:
         raise HTTPException(status_code=404, detail="演员不存在")
     
@@ -73,83 +130,81 @@ async def upload_avatar(
     if not file.filename:
         raise HTTPException(status_code=400, detail="无效的文件")
     
-    mime_type = validate_file_type(file.filename, ALLOWED_IMAGE_TYPES)
-    if not mime_type:
-        raise HTTPException(status_code=400, detail="不支持的文件类型，仅支持JPG、PNG、GIF和WEBP格式图片")
-    
-    # 保存文件到临时目录
-    file_extension = os.path.splitext(file.filename)[1]
-    temp_filename = f"{uuid.uuid4()}{file_extension}"
-    temp_filepath = os.path.join(settings.MEDIA_ROOT, temp_filename)
-    
-    os.makedirs(os.path.dirname(temp_filepath), exist_ok=True)
-    
-    # 异步写入文件
-    async with aiofiles.open(temp_filepath, 'wb') as out_file:
-        content = await file.read()
-        await out_file.write(content)
-    
-    # 获取文件大小
-    file_size = os.path.getsize(temp_filepath)
+    # 保存文件到临时目录，写入前按扩展名和文件头部验证类型
+    try:
+        temp_filepath, file_size, content_hash, mime_type = await save_upload_file(
+            file, settings.MEDIA_ROOT, allowed_mime_types=ALLOWED_IMAGE_TYPES
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"{e}，仅支持JPG、PNG、GIF、WEBP和HEIC格式图片")
+    bucket_name = "actor-avatars"
     
     try:
         # 获取现有头像
-        existing_avatar = db.query(ActorMedia).filter(
+        existing_avatar = await db.scalar(select(ActorMedia).where(
             ActorMedia.actor_id == actor_id,
             ActorMedia.type == "avatar"
-        ).first()
+        ))
         
-        # 如果存在则删除
-        if existing_avatar:
-            # 删除存储的文件
-            try:
-                if settings.USE_MINIO:
-                    minio_client = create_minio_client()
-                    if existing_avatar.bucket_name and existing_avatar.object_name:
-                        minio_client.remove_object(existing_avatar.bucket_name, existing_avatar.object_name)
-                else:
-                    avatar_path = Path(settings.UPLOAD_DIR) / "avatars" / actor_id / existing_avatar.file_name
-                    if avatar_path.exists():
-                        avatar_path.unlink()
-            except Exception as e:
-                logger.error(f"删除旧头像失败: {str(e)}")
+        # 相同内容已存储过时直接引用，否则压缩后上传到内容寻址的对象键
+        same_content = await find_media_by_hash(db, content_hash, bucket_name)
+        if same_content:
+            media_fields = reference_fields(same_content)
+        else:
+            # 压缩图片
+            compressed_filepath = await compress_image(temp_filepath)
             
-            # 删除数据库记录
-            db.delete(existing_avatar)
-        
-        # 压缩图片
-        compressed_filepath = await compress_image(temp_filepath)
-        
-        # 上传到MinIO
-        object_name = f"avatars/{actor_id}/{os.path.basename(compressed_filepath)}"
-        bucket_name = "actor-avatars"
-        
-        file_url = await upload_file_to_minio(compressed_filepath, bucket_name, object_name)
+            # 上传到MinIO
+            object_name = content_object_name("avatars", content_hash, os.path.splitext(compressed_filepath)[1])
+            file_url = await upload_file_to_minio(compressed_filepath, bucket_name, object_name)
+            
+            # 生成并上传响应式变体
+            variants = await generate_image_variants(compressed_filepath, bucket_name, content_variants_prefix(content_hash))
+            
+            media_fields = {
+                "file_name": os.path.basename(compressed_filepath),
+                "file_path": file_url,
+                "file_size": file_size,
+                "mime_type": mime_type,
+                "bucket_name": bucket_name,
+                "object_name": object_name,
+                "variants": json.dumps(variants) if variants else None,
+                "content_hash": content_hash
+            }
         
         # 更新数据库
         media = ActorMedia(
             actor_id=actor_id,
             type="avatar",
-            file_name=os.path.basename(compressed_filepath),
-            file_path=file_url,
-            file_size=file_size,
-            mime_type=mime_type,
             is_public=True,
-            bucket_name=bucket_name,
-            object_name=object_name,
-            uploaded_by=None
+            uploaded_by=None,
+            **media_fields
         )
         db.add(media)
-        db.commit()
-        db.refresh(media)
+        await db.flush()
+        
+        # 新记录写入后再删除旧头像，旧对象仍被其他记录引用时保留；存储对象由后台清理协程删除
+        if existing_avatar:
+            journal_deletions(db, existing_avatar.bucket_name, await releasable_object_names(db, existing_avatar))
+            
+            # 删除数据库记录
+            await db.delete(existing_avatar)
+        
+        await db.commit()
+        storage_deletion_drainer.notify()
+        await db.refresh(media)
+        file_url = media.file_path
+        variants = json.loads(media.variants) if media.variants else None
         
         # 更新演员头像URL
         actor.avatar_url = file_url
-        db.commit()
+        await db.commit()
         
         return {
             "id": media.id,
             "url": file_url,
+            "variants": variants,
+            "srcset": build_srcset(variants),
             "file_name": media.file_name,
             "file_size": media.file_size,
             "mime_type": media.mime_type,
@@ -167,13 +222,13 @@ async def upload_avatar(
         if os.path.exists(temp_filepath):
             os.remove(temp_filepath)
 
-@router.post("/{actor_id}/media/photos", response_model=List[dict])
+@router.post("/{actor_id}/media/photos", response_model=List[dict], status_code=202)
 async def upload_photos(
     actor_id: str,
     files: List[UploadFile] = File(...),
     album: Optional[str] = Form(None),
     current_user: User = Depends(get_current_user),  # 启用身份验证
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """上传演员照片
     
@@ -185,9 +240,12 @@ async def upload_photos(
     - 大小: 每张最大10MB
     - 格式: JPG, PNG, GIF, WebP, HEIC, HEIF
     - 数量: 每次最多上传10张
+    
+    文件保存后立即返回202和处理任务ID，压缩、缩略图生成和上传在后台完成，
+    可通过 GET /actors/media/jobs/{job_id} 查询处理状态；未能接收的文件以status为rejected的条目返回
     """
     # 检查演员是否存在
-    actor = db.query(Actor).filter(Actor.id == actor_id).first()
+    actor = await db.scalar(select(Actor).where(Actor.id == actor_id))
     if not actor:
         raise HTTPException(status_code=404, detail="演员不存在")
     
@@ -195,107 +253,52 @@ async def upload_photos(
     if current_user.role == 'performer' and actor.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="您没有权限上传此演员的媒体资料")
     
-    # 获取当前照片数量
-    current_photos_count = db.query(ActorMedia).filter(ActorMedia.actor_id == actor_id, ActorMedia.type == "photo").count()
+    # 获取当前照片数量（包括尚未处理完成的照片）
+    current_photos_count = await _count_media_with_pending_jobs(db, actor_id, "photo")
     if current_photos_count + len(files) > MAX_PHOTOS_COUNT:
         raise HTTPException(status_code=400, detail=f"照片数量超过限制，每个演员最多允许{MAX_PHOTOS_COUNT}张照片")
     
-    result = []
-    for file in files:
-        if not file.filename:
-            continue
-        
-        # 验证文件类型
-        mime_type = validate_file_type(file.filename, ALLOWED_IMAGE_TYPES)
-        if not mime_type:
-            continue
-        
-        # 保存文件到临时目录
-        file_extension = os.path.splitext(file.filename)[1]
-        temp_filename = f"{uuid.uuid4()}{file_extension}"
-        temp_filepath = os.path.join(settings.MEDIA_ROOT, temp_filename)
-        
-        os.makedirs(os.path.dirname(temp_filepath), exist_ok=True)
-        
-        # 异步写入文件
-        async with aiofiles.open(temp_filepath, 'wb') as out_file:
-            content = await file.read()
-            await out_file.write(content)
-        
-        # 获取文件大小
-        file_size = os.path.getsize(temp_filepath)
-        
-        try:
-            # 压缩图片
-            compressed_filepath = await compress_image(temp_filepath)
-            
-            # 生成缩略图
-            thumbnail_filepath = await create_thumbnail(compressed_filepath)
-            
-            # 上传到MinIO
-            album_path = f"{album}/" if album else ""
-            object_name = f"photos/{actor_id}/{album_path}{os.path.basename(compressed_filepath)}"
-            bucket_name = "actor-photos"
-            
-            # 上传原图
-            file_url = await upload_file_to_minio(compressed_filepath, bucket_name, object_name)
-            
-            # 上传缩略图
-            thumbnail_object_name = f"thumbnails/{actor_id}/{album_path}{os.path.basename(thumbnail_filepath)}"
-            thumbnail_url = await upload_file_to_minio(thumbnail_filepath, bucket_name, thumbnail_object_name)
-            
-            # 更新数据库
-            media = ActorMedia(
-                actor_id=actor_id,
-                type="photo",
-                file_name=os.path.basename(compressed_filepath),
-                file_path=file_url,
-                file_size=file_size,
-                mime_type=mime_type,
-                description=album,  # 使用album作为description存储
-                is_public=True,
-                bucket_name=bucket_name,
-                object_name=object_name,
-                uploaded_by=None
-            )
-            db.add(media)
-            db.commit()
-            db.refresh(media)
-            
-            result.append({
-                "id": media.id,
-                "url": file_url,
-                "thumbnail_url": thumbnail_url,
-                "file_name": media.file_name,
-                "file_size": media.file_size,
-                "mime_type": media.mime_type,
-                "album": album,
-                "uploaded_at": media.created_at
-            })
-            
-        except Exception as e:
-            # 发生错误时删除临时文件
-            if os.path.exists(temp_filepath):
-                os.remove(temp_filepath)
+    # 并发保存原始文件，由后台任务处理
+    saved = await _gather_per_file(lambda file: _save_incoming_file(file, ALLOWED_IMAGE_TYPES), files)
+    
+    jobs = []
+    results = []
+    for file, outcome in zip(files, saved):
+        if isinstance(outcome, Exception):
+            results.append(_file_rejected(file, outcome))
             continue
         
-        finally:
-            # 删除临时文件
-            if os.path.exists(temp_filepath):
-                os.remove(temp_filepath)
+        source_path, file_size, content_hash, mime_type = outcome
+        job = MediaJob(
+            actor_id=actor_id,
+            job_type="photo",
+            source_path=source_path,
+            file_name=file.filename,
+            file_size=file_size,
+            mime_type=mime_type,
+            content_hash=content_hash,
+            params=json.dumps({"album": album}, ensure_ascii=False),
+            created_by=current_user.id
+        )
+        db.add(job)
+        jobs.append(job)
+        results.append(job)
     
-    if not result:
+    if not jobs:
         raise HTTPException(status_code=400, detail="没有成功上传的照片")
     
-    return result
+    await db.commit()
+    media_job_pool.notify()
+    
+    return [_job_accepted(item) if isinstance(item, MediaJob) else item for item in results]
 
-@router.post("/{actor_id}/media/videos", response_model=List[dict])
+@router.post("/{actor_id}/media/videos", response_model=List[dict], status_code=202)
 async def upload_videos(
     actor_id: str,
     files: List[UploadFile] = File(...),
     category: Optional[str] = Form(None),
     current_user: User = Depends(get_current_user),  # 启用身份验证
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """上传演员视频
     
@@ -307,9 +310,12 @@ async def upload_videos(
     - 大小: 每个最大100MB
     - 格式: MP4, MOV, AVI, 3GP, MKV
     - 数量: 每次最多上传5个
+    
+    文件保存后立即返回202和处理任务ID，缩略图生成和上传在后台完成，
+    可通过 GET /actors/media/jobs/{job_id} 查询处理状态；未能接收的文件以status为rejected的条目返回
     """
     # 检查演员是否存在
-    actor = db.query(Actor).filter(Actor.id == actor_id).first()
+    actor = await db.scalar(select(Actor).where(Actor.id == actor_id))
     if not actor:
         raise HTTPException(status_code=404, detail="演员不存在")
     
@@ -317,100 +323,726 @@ async def upload_videos(
     if current_user.role == 'performer' and actor.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="您没有权限上传此演员的媒体资料")
     
-    # 获取当前视频数量
-    current_videos_count = db.query(ActorMedia).filter(ActorMedia.actor_id == actor_id, ActorMedia.type == "video").count()
+    # 获取当前视频数量（包括尚未处理完成的视频）
+    current_videos_count = await _count_media_with_pending_jobs(db, actor_id, "video")
     if current_videos_count + len(files) > MAX_VIDEOS_COUNT:
         raise HTTPException(status_code=400, detail=f"视频数量超过限制，每个演员最多允许{MAX_VIDEOS_COUNT}个视频")
     
-    result = []
-    for file in files:
-        if not file.filename:
-            continue
-        
-        # 验证文件类型
-        mime_type = validate_file_type(file.filename, ALLOWED_VIDEO_TYPES)
-        if not mime_type:
+    # 并发保存原始文件，由后台任务处理
+    saved = await _gather_per_file(
+        lambda file: _save_incoming_file(file, ALLOWED_VIDEO_TYPES, settings.MAX_UPLOAD_SIZE), files
+    )
+    
+    jobs = []
+    results = []
+    for file, outcome in zip(files, saved):
+        if isinstance(outcome, Exception):
+            results.append(_file_rejected(file, outcome))
             continue
         
-        # 保存文件到临时目录
-        file_extension = os.path.splitext(file.filename)[1]
-        temp_filename = f"{uuid.uuid4()}{file_extension}"
-        temp_filepath = os.path.join(settings.MEDIA_ROOT, temp_filename)
-        
-        os.makedirs(os.path.dirname(temp_filepath), exist_ok=True)
-        
-        # 异步写入文件
-        async with aiofiles.open(temp_filepath, 'wb') as out_file:
-            content = await file.read()
-            await out_file.write(content)
-        
-        # 获取文件大小
-        file_size = os.path.getsize(temp_filepath)
-        
-        # 检查文件大小
-        if file_size > settings.MAX_UPLOAD_SIZE:
-            raise HTTPException(status_code=400, detail=f"文件过大，最大允许上传{settings.MAX_UPLOAD_SIZE/1024/1024}MB")
-        
+        source_path, file_size, content_hash, mime_type = outcome
+        job = MediaJob(
+            actor_id=actor_id,
+            job_type="video",
+            source_path=source_path,
+            file_name=file.filename,
+            file_size=file_size,
+            mime_type=mime_type,
+            content_hash=content_hash,
+            params=json.dumps({"category": category}, ensure_ascii=False),
+            created_by=current_user.id
+        )
+        db.add(job)
+        jobs.append(job)
+        results.append(job)
+    
+    if not jobs:
+        raise HTTPException(status_code=400, detail="没有成功上传的视频")
+    
+    await db.commit()
+    media_job_pool.notify()
+    
+    return [_job_accepted(item) if isinstance(item, MediaJob) else item for item in results]
+
+@router.post("/{actor_id}/media/presign", response_model=PresignedUploadOut)
+async def presign_media_upload(
+    actor_id: str,
+    upload: PresignedUploadRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """申请把照片或视频直接上传到MinIO
+    
+    1. 调用本接口获得预签名表单（限制了对象键、文件类型和大小）
+    2. 客户端把表单字段和文件以 multipart/form-data POST 到返回的url
+    3. 调用 finalize_url 确认上传，服务端检查文件后放入后台处理队列（202），之后与普通上传一样查询任务状态
+    
+    文件内容不经过API服务，适合大文件和经过内网穿透的访问
+    """
+    # 检查演员是否存在
+    actor = await db.scalar(select(Actor).where(Actor.id == actor_id))
+    if not actor:
+        raise HTTPException(status_code=404, detail="演员不存在")
+    
+    # 权限检查：管理员可以上传任何演员的媒体，演员只能上传自己的媒体
+    if current_user.role == 'performer' and actor.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="您没有权限上传此演员的媒体资料")
+    
+    if not get_storage_backend().supports_direct_upload:
+        raise HTTPException(status_code=400, detail="当前存储后端不支持直传，请使用普通上传接口")
+    allowed_types, max_size, max_count = _direct_upload_limits(upload.media_type)
+    mime_type = validate_file_type(upload.file_name, allowed_types)
+    if not mime_type:
+        raise HTTPException(status_code=400, detail="不支持的文件类型")
+    if upload.file_size > max_size:
+        raise HTTPException(status_code=400, detail=f"文件过大，最大允许上传{max_size/1024/1024}MB")
+    
+    # 数量限制（包括尚未上传完成和处理完成的文件）
+    if await _count_media_with_pending_jobs(db, actor_id, upload.media_type) + 1 > max_count:
+        raise HTTPException(status_code=400, detail=f"数量超过限制，每个演员最多允许{max_count}个")
+    
+    try:
+        await run_storage_io(ensure_upload_bucket)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"无法创建暂存存储桶: {str(e)}")
+    
+    object_name = staging_object_name(actor_id, upload.file_name)
+    url, fields, expires_at = presigned_post(object_name, mime_type, upload.file_size)
+    
+    params = {"album": upload.album} if upload.media_type == "photo" else {"category": upload.category}
+    job = MediaJob(
+        actor_id=actor_id,
+        job_type=upload.media_type,
+        status="awaiting_upload",
+        source_object=object_name,
+        file_name=upload.file_name,
+        file_size=upload.file_size,
+        mime_type=mime_type,
+        params=json.dumps(params, ensure_ascii=False),
+        created_by=current_user.id
+    )
+    db.add(job)
+    await db.commit()
+    
+    return {
+        "job_id": job.id,
+        "object_name": object_name,
+        "url": url,
+        "fields": fields,
+        "expires_at": expires_at,
+        "finalize_url": f"{settings.API_V1_STR}/actors/media/jobs/{job.id}/finalize"
+    }
+
+@router.post("/jobs/{job_id}/finalize", response_model=dict, status_code=202)
+async def finalize_media_upload(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """确认客户端直传的文件已上传完成
+    
+    检查MinIO中对象的大小和实际内容类型，通过后放入后台处理队列；
+    不合格的文件会被删除，任务标记为失败。超过预签名有效期才确认时返回410，需要重新申请上传
+    """
+    job = await db.scalar(select(MediaJob).where(MediaJob.id == job_id))
+    if not job:
+        raise HTTPException(status_code=404, detail="处理任务不存在")
+    if current_user.role != 'admin' and job.created_by != current_user.id:
+        raise HTTPException(status_code=403, detail="您没有权限确认此上传")
+    if job.status != "awaiting_upload":
+        raise HTTPException(status_code=409, detail="该任务已确认过上传")
+    
+    if job.created_at < direct_upload_expired_before():
+        values = {"status": "failed", "error": "上传已过期"}
+    else:
         try:
-            # 生成视频缩略图
-            thumbnail_filepath = await create_video_thumbnail(temp_filepath)
-            
-            # 上传到MinIO
-            category_path = f"{category}/" if category else ""
-            object_name = f"videos/{actor_id}/{category_path}{os.path.basename(temp_filepath)}"
-            bucket_name = "actor-videos"
-            
-            # 上传视频
-            file_url = await upload_file_to_minio(temp_filepath, bucket_name, object_name)
-            
-            # 上传缩略图
-            thumbnail_object_name = f"thumbnails/{actor_id}/{category_path}{os.path.basename(thumbnail_filepath)}"
-            thumbnail_url = await upload_file_to_minio(thumbnail_filepath, bucket_name, thumbnail_object_name)
-            
-            # 更新数据库
-            media = ActorMedia(
-                actor_id=actor_id,
-                type="video",
-                file_name=os.path.basename(temp_filepath),
-                file_path=file_url,
-                file_size=file_size,
-                mime_type=mime_type,
-                description=category,  # 使用category作为description存储
-                is_public=True,
-                bucket_name=bucket_name,
-                object_name=object_name,
-                uploaded_by=None
+            values = await _inspect_staged_upload(job)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    # 检查对象期间任务可能已被并发的确认请求或过期清理处理，只在仍等待上传时更新
+    result = await db.execute(
+        update(MediaJob)
+        .where(MediaJob.id == job.id, MediaJob.status == "awaiting_upload")
+        .values(**values)
+    )
+    if result.rowcount == 0:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="该任务已确认过上传")
+    await db.commit()
+    await db.refresh(job)
+    
+    if job.status == "failed":
+        await _remove_staged_upload(job)
+        if values["error"] == "上传已过期":
+            raise HTTPException(status_code=410, detail="上传已过期，请重新申请上传")
+        raise HTTPException(status_code=400, detail=job.error)
+    media_job_pool.notify()
+    
+    return _job_accepted(job)
+
+async def _inspect_staged_upload(job: MediaJob) -> dict:
+    """
+    检查暂存桶中已上传完成的对象，返回要写入任务的字段
+    
+    对象不存在时抛出ValueError；大小或实际类型不合格时返回失败状态和原因，通过时返回等待处理状态
+    """
+    from app.core.storage import minio_client
+    try:
+        size, mime_type = await run_storage_io(inspect_uploaded_object, minio_client, job.source_object)
+    except Exception:
+        raise ValueError("文件尚未上传到存储服务")
+    
+    allowed_types, max_size, _ = _direct_upload_limits(job.job_type)
+    if size > max_size:
+        return {"status": "failed", "error": f"文件过大，最大允许上传{max_size/1024/1024}MB"}
+    if mime_type not in allowed_types:
+        return {"status": "failed", "error": f"文件内容与允许的类型不符: {mime_type}"}
+    
+    return {"status": "pending", "file_size": size, "mime_type": mime_type, "available_at": datetime.utcnow()}
+
+async def _remove_staged_upload(job: MediaJob):
+    """删除不再处理的暂存对象"""
+    from app.core.storage import minio_client
+    try:
+        await run_storage_io(remove_staged_object, minio_client, job.source_object)
+    except Exception as e:
+        logger.warning(f"删除暂存对象失败: {job.source_object}, 错误={str(e)}")
+
+@router.post("/uploads", response_model=UploadSessionOut, status_code=201)
+async def create_upload_session(
+    upload: UploadSessionCreate,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """创建可续传的分块上传会话
+    
+    1. 创建会话，响应头 Location 为会话地址
+    2. 按顺序 PATCH 会话地址，请求头 Upload-Offset 为该分块在文件中的起始位置，请求体为分块内容
+    3. 中断后 HEAD 会话地址，从响应头 Upload-Offset 给出的位置继续上传
+    4. 最后一个分块上传后文件自动进入后台处理队列，响应中的job为处理任务
+    """
+    # 检查演员是否存在
+    actor = await db.scalar(select(Actor).where(Actor.id == upload.actor_id))
+    if not actor:
+        raise HTTPException(status_code=404, detail="演员不存在")
+    
+    # 权限检查：管理员可以上传任何演员的媒体，演员只能上传自己的媒体
+    if current_user.role == 'performer' and actor.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="您没有权限上传此演员的媒体资料")
+    
+    if not get_storage_backend().supports_direct_upload:
+        raise HTTPException(status_code=400, detail="当前存储后端不支持直传，请使用普通上传接口")
+    allowed_types, max_size, max_count = _direct_upload_limits(upload.media_type)
+    mime_type = validate_file_type(upload.file_name, allowed_types)
+    if not mime_type:
+        raise HTTPException(status_code=400, detail="不支持的文件类型")
+    if upload.file_size > max_size:
+        raise HTTPException(status_code=400, detail=f"文件过大，最大允许上传{max_size/1024/1024}MB")
+    if await _count_media_with_pending_jobs(db, upload.actor_id, upload.media_type) + 1 > max_count:
+        raise HTTPException(status_code=400, detail=f"数量超过限制，每个演员最多允许{max_count}个")
+    
+    from app.core.storage import minio_client
+    object_name = staging_object_name(upload.actor_id, upload.file_name)
+    try:
+        multipart_upload_id = await run_storage_io(create_multipart_upload, minio_client, object_name, mime_type)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"创建分片上传失败: {str(e)}")
+    
+    params = {"album": upload.album} if upload.media_type == "photo" else {"category": upload.category}
+    session = UploadSession(
+        id=str(uuid.uuid4()),
+        actor_id=upload.actor_id,
+        media_type=upload.media_type,
+        file_name=upload.file_name,
+        mime_type=mime_type,
+        total_size=upload.file_size,
+        offset=0,
+        object_name=object_name,
+        multipart_upload_id=multipart_upload_id,
+        parts="[]",
+        params=json.dumps(params, ensure_ascii=False),
+        created_by=current_user.id,
+        expires_at=datetime.utcnow() + timedelta(seconds=settings.UPLOAD_SESSION_EXPIRES)
+    )
+    db.add(session)
+    await db.commit()
+    
+    response.headers.update(_upload_headers(session))
+    response.headers["Location"] = f"{settings.API_V1_STR}/actors/media/uploads/{session.id}"
+    return _upload_session_out(session)
+
+@router.head("/uploads/{upload_id}")
+async def get_upload_offset(
+    upload_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """查询上传会话已接收的字节数（响应头 Upload-Offset）"""
+    session = await _get_upload_session(db, upload_id, current_user)
+    if session.status == "uploading":
+        session.offset = recoverable_offset(session.offset, json.loads(session.parts), buffer_path(session.id))
+        await db.commit()
+    return Response(status_code=200, headers=_upload_headers(session))
+
+@router.patch("/uploads/{upload_id}", response_model=UploadSessionOut)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """上传一个分块
+    
+    Upload-Offset 必须等于已接收的字节数，否则返回409，响应头中给出正确的偏移量；
+    客户端中途断开时已收到的部分会被保留，重新查询偏移量后继续即可
+    """
+    # 同一会话的分块串行处理；整个请求体接收期间不持有行锁和数据库连接
+    lock = _upload_lock(upload_id)
+    if lock.locked():
+        raise HTTPException(status_code=409, detail="该上传会话正在接收其他分块")
+    async with lock:
+        return await _receive_chunk(upload_id, request, upload_offset, current_user, db)
+
+async def _receive_chunk(upload_id: str, request: Request, upload_offset: int, current_user: User, db: AsyncSession):
+    """接收一个分块，上传已满的分片并提交会话的偏移量"""
+    session = await _get_upload_session(db, upload_id, current_user)
+    if session.status != "uploading":
+        raise HTTPException(status_code=409, detail="上传会话已结束", headers=_upload_headers(session))
+    if session.expires_at < datetime.utcnow():
+        raise HTTPException(status_code=410, detail="上传会话已过期")
+    
+    parts = json.loads(session.parts)
+    path = buffer_path(session.id)
+    offset = recoverable_offset(session.offset, parts, path)
+    if upload_offset != offset:
+        session.offset = offset
+        await db.commit()
+        raise HTTPException(status_code=409, detail="偏移量不一致", headers=_upload_headers(session))
+    # 结束读取会话的事务，释放数据库连接
+    read_offset, read_parts = session.offset, session.parts
+    await db.commit()
+    
+    # 写入本地缓冲文件
+    received, overflow = await append_stream(path, offset, request.stream(), session.total_size - offset)
+    if overflow:
+        raise HTTPException(status_code=413, detail="上传的内容超过了文件总大小", headers=_upload_headers(session))
+    offset += received
+    complete = offset == session.total_size
+    
+    # 未上传的字节每满一个分片上传一次，文件接收完毕时上传剩余部分；每次只读入一个分片
+    from app.core.storage import minio_client
+    uploaded = uploaded_bytes(parts)
+    error = None
+    while offset - uploaded >= settings.UPLOAD_PART_SIZE or (complete and offset > uploaded):
+        size = min(settings.UPLOAD_PART_SIZE, offset - uploaded)
+        part_number = len(parts) + 1
+        try:
+            etag = await run_storage_io(
+                upload_buffer_part, minio_client, session.object_name, session.multipart_upload_id,
+                part_number, path, uploaded, size
             )
-            db.add(media)
-            db.commit()
-            db.refresh(media)
-            
-            result.append({
-                "id": media.id,
-                "url": file_url,
-                "thumbnail_url": thumbnail_url,
-                "file_name": media.file_name,
-                "file_size": media.file_size,
-                "mime_type": media.mime_type,
-                "category": category,
-                "uploaded_at": media.created_at
-            })
-            
         except Exception as e:
-            # 发生错误时删除临时文件
-            if os.path.exists(temp_filepath):
-                os.remove(temp_filepath)
-            continue
-        
-        finally:
-            # 删除临时文件
-            if os.path.exists(temp_filepath):
-                os.remove(temp_filepath)
+            error = e
+            break
+        parts.append({"part_number": part_number, "etag": etag, "size": size})
+        uploaded += size
+    
+    # 提交时才锁定会话，确认接收期间会话没有被放弃、过期清理或修改
+    session = await _get_upload_session(db, upload_id, current_user, lock=True)
+    if session.status != "uploading" or session.offset != read_offset or session.parts != read_parts:
+        headers = _upload_headers(session)
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="上传会话已变化，请重新查询偏移量", headers=headers)
+    session.offset = offset
+    session.parts = json.dumps(parts)
+    if error is not None:
+        # 未上传的数据仍在缓冲文件中，提交偏移量后客户端可以继续
+        await db.commit()
+        raise HTTPException(status_code=502, detail=f"上传分片失败: {str(error)}", headers=_upload_headers(session))
+    
+    job = None
+    if complete:
+        job = await _complete_upload_session(db, session, parts)
+    
+    await db.commit()
+    if job is not None:
+        remove_buffer(session.id)
+        if job.status == "pending":
+            media_job_pool.notify()
+    
+    return JSONResponse(
+        content=jsonable_encoder(_upload_session_out(session, job)),
+        headers=_upload_headers(session)
+    )
+
+@router.delete("/uploads/{upload_id}", response_model=UploadSessionOut)
+async def abort_upload_session(
+    upload_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """放弃上传，删除已上传的分片和本地缓冲"""
+    session = await _get_upload_session(db, upload_id, current_user, lock=True)
+    if session.status != "uploading":
+        raise HTTPException(status_code=409, detail="上传会话已结束")
     
-    if not result:
-        raise HTTPException(status_code=400, detail="没有成功上传的视频")
+    from app.core.storage import minio_client
+    try:
+        await run_storage_io(abort_multipart_upload, minio_client, session.object_name, session.multipart_upload_id)
+    except Exception as e:
+        logger.warning(f"放弃分片上传失败: {session.object_name}, 错误={str(e)}")
+    session.status = "aborted"
+    await db.commit()
+    remove_buffer(session.id)
     
-    return result
+    return _upload_session_out(session)
+
+async def _get_upload_session(db: AsyncSession, upload_id: str, current_user: User, lock: bool = False) -> UploadSession:
+    """获取上传会话并检查权限，lock为True时锁定该行并重新读取，避免与其他请求同时修改会话"""
+    query = select(UploadSession).where(UploadSession.id == upload_id)
+    if lock:
+        query = query.with_for_update().execution_options(populate_existing=True)
+    session = await db.scalar(query)
+    if not session:
+        raise HTTPException(status_code=404, detail="上传会话不存在")
+    if current_user.role != 'admin' and session.created_by != current_user.id:
+        raise HTTPException(status_code=403, detail="您没有权限访问此上传会话")
+    return session
+
+async def _complete_upload_session(db: AsyncSession, session: UploadSession, parts: List[dict]) -> MediaJob:
+    """合并分片并创建处理任务，文件不合格时任务标记为失败"""
+    from app.core.storage import minio_client
+    try:
+        await run_storage_io(
+            complete_multipart_upload, minio_client, session.object_name, session.multipart_upload_id, parts
+        )
+    except Exception as e:
+        await db.commit()
+        raise HTTPException(status_code=502, detail=f"合并分片失败: {str(e)}", headers=_upload_headers(session))
+    
+    job = MediaJob(
+        actor_id=session.actor_id,
+        job_type=session.media_type,
+        status="awaiting_upload",
+        source_object=session.object_name,
+        file_name=session.file_name,
+        file_size=session.total_size,
+        mime_type=session.mime_type,
+        params=session.params,
+        created_by=session.created_by
+    )
+    try:
+        values = await _inspect_staged_upload(job)
+    except ValueError as e:
+        # 任务保持等待上传，超过有效期后由过期清理标记为失败
+        logger.warning(f"续传上传的文件未通过检查: 会话ID={session.id}, 错误={str(e)}")
+        values = {}
+    for key, value in values.items():
+        setattr(job, key, value)
+    if job.status == "failed":
+        logger.warning(f"续传上传的文件未通过检查: 会话ID={session.id}, 错误={job.error}")
+        await _remove_staged_upload(job)
+    db.add(job)
+    await db.flush()
+    
+    session.status = "completed"
+    session.job_id = job.id
+    return job
+
+def _upload_lock(upload_id: str) -> asyncio.Lock:
+    lock = _upload_locks.get(upload_id)
+    if lock is None:
+        lock = asyncio.Lock()
+        _upload_locks[upload_id] = lock
+    return lock
+
+def _upload_headers(session: UploadSession) -> Dict[str, str]:
+    """续传协议的响应头"""
+    return {
+        "Upload-Offset": str(session.offset),
+        "Upload-Length": str(session.total_size),
+        "Cache-Control": "no-store"
+    }
+
+def _upload_session_out(session: UploadSession, job: Optional[MediaJob] = None) -> dict:
+    return {
+        "upload_id": session.id,
+        "status": session.status,
+        "offset": session.offset,
+        "total_size": session.total_size,
+        "expires_at": session.expires_at,
+        "job": _job_accepted(job) if job is not None else None
+    }
+
+def _direct_upload_limits(media_type: str):
+    """直传的允许类型、单个文件大小上限和每个演员的数量上限"""
+    if media_type == "photo":
+        return ALLOWED_IMAGE_TYPES, MAX_PHOTO_SIZE, MAX_PHOTOS_COUNT
+    return ALLOWED_VIDEO_TYPES, MAX_VIDEO_SIZE, MAX_VIDEOS_COUNT
+
+@router.get("/jobs/{job_id}", response_model=MediaJobOut)
+async def get_media_job(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """查询媒体后台处理任务的状态
+    
+    - status: awaiting_upload(等待客户端直传) / pending(等待处理) / processing(处理中) / completed(已完成) / failed(失败)
+    - 完成后result中包含媒体ID、文件URL和缩略图URL
+    """
+    job = await db.scalar(select(MediaJob).where(MediaJob.id == job_id))
+    if not job:
+        raise HTTPException(status_code=404, detail="处理任务不存在")
+    
+    # 权限检查：管理员可以查看所有任务，其他用户只能查看自己提交的任务或自己演员资料的任务
+    if current_user.role != 'admin' and job.created_by != current_user.id:
+        actor = await db.scalar(select(Actor).where(Actor.id == job.actor_id))
+        if not actor or actor.user_id != current_user.id:
+            raise HTTPException(status_code=403, detail="您没有权限查看此任务")
+    
+    return {
+        "id": job.id,
+        "actor_id": job.actor_id,
+        "job_type": job.job_type,
+        "status": job.status,
+        "file_name": job.file_name,
+        "attempts": job.attempts,
+        "media_id": job.media_id,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at
+    }
+
+@router.get("/duplicates", response_model=dict)
+async def list_duplicate_photos(
+    actor_id: Optional[str] = None,
+    threshold: Optional[int] = Query(None, ge=0, le=64, description="汉明距离阈值，默认使用PHASH_DUPLICATE_THRESHOLD"),
+    current_user: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """列出近似重复的照片簇（仅管理员）
+    
+    - actor_id: 只检查指定演员的照片，不指定时检查全部照片（包括不同演员之间的重复）
+    - 每个簇包含两张及以上感知哈希距离在阈值内的照片，按簇大小从大到小排列
+    """
+    if threshold is None:
+        threshold = settings.PHASH_DUPLICATE_THRESHOLD
+    
+    query = select(ActorMedia.id, ActorMedia.actor_id, ActorMedia.phash, ActorMedia.file_path).where(
+        ActorMedia.type == "photo",
+        ActorMedia.phash.isnot(None)
+    )
+    if actor_id:
+        query = query.where(ActorMedia.actor_id == actor_id)
+    rows = (await db.execute(query)).all()
+    
+    photos = {row.id: row for row in rows}
+    clusters = cluster_near_duplicates(((row.id, row.phash) for row in rows), threshold)
+    
+    return {
+        "threshold": threshold,
+        "total_photos": len(rows),
+        "clusters": [
+            {
+                "size": len(member_ids),
+                "media": [
+                    {
+                        "id": photos[media_id].id,
+                        "actor_id": photos[media_id].actor_id,
+                        "file_path": photos[media_id].file_path,
+                        "phash": photos[media_id].phash
+                    }
+                    for media_id in member_ids
+                ]
+            }
+            for member_ids in clusters
+        ]
+    }
+
+@router.api_route("/{media_id}/stream", methods=["GET", "HEAD"])
+async def stream_media(
+    media_id: int,
+    request: Request,
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """按字节范围读取媒体文件，用于视频播放时拖动进度条
+    
+    - 支持Range（206 Partial Content）、If-Range和HEAD，单次只支持一个范围
+    - 本地文件（local存储后端或旧的本地记录）用 FileResponse 直接发送文件，服务器支持时为零拷贝
+    - 其他后端只读取请求的范围，按 MEDIA_STREAM_CHUNK_SIZE 分块转发，不把整个文件读入内存
+    - 未公开的媒体需要登录后访问
+    """
+    media = await db.scalar(select(ActorMedia).where(ActorMedia.id == media_id))
+    if not media:
+        raise HTTPException(status_code=404, detail="媒体文件不存在")
+    if not media.is_public and current_user is None:
+        raise HTTPException(status_code=403, detail="该媒体文件未公开")
+    
+    cache_control = "public, max-age=86400" if media.is_public else "private, max-age=86400"
+    backend = get_storage_backend()
+    local_path = None
+    if media.bucket_name and media.object_name:
+        local_path = backend.local_path(media.bucket_name, media.object_name)
+    else:
+        local_path = _local_media_path(media)
+        if not local_path:
+            raise HTTPException(status_code=404, detail="媒体文件不存在")
+    if local_path:
+        # FileResponse 自行处理Range、If-Range和HEAD
+        return FileResponse(local_path, headers={"Cache-Control": cache_control}, media_type=media.mime_type)
+    
+    try:
+        info = await backend.stat(media.bucket_name, media.object_name)
+    except ObjectNotFound:
+        raise HTTPException(status_code=404, detail="媒体文件不存在")
+    except Exception as e:
+        logger.error(f"读取媒体文件信息失败: 媒体ID={media_id}, 错误={str(e)}")
+        raise HTTPException(status_code=502, detail="读取媒体文件失败")
+    size = info.size
+    etag = f'"{info.etag}"'
+    last_modified = http_date(info.last_modified)
+    content_type = info.content_type or media.mime_type
+    
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Cache-Control": cache_control
+    }
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    
+    # If-Range与当前内容不一致时忽略Range，返回完整内容
+    byte_range = None
+    if if_range_matches(request.headers.get("if-range"), etag, last_modified):
+        try:
+            byte_range = parse_range(request.headers.get("range"), size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    
+    if byte_range:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    else:
+        start, end = 0, size - 1
+        status_code = 200
+    headers["Content-Length"] = str(end - start + 1)
+    
+    if request.method == "HEAD" or size == 0:
+        return Response(status_code=status_code, headers=headers, media_type=content_type)
+    
+    try:
+        body = await backend.stream(
+            media.bucket_name, media.object_name, start, end - start + 1, settings.MEDIA_STREAM_CHUNK_SIZE
+        )
+    except Exception as e:
+        logger.error(f"读取媒体文件失败: 媒体ID={media_id}, 错误={str(e)}")
+        raise HTTPException(status_code=502, detail="读取媒体文件失败")
+    
+    return StreamingResponse(body, status_code=status_code, headers=headers, media_type=content_type)
+
+def _local_media_path(media: ActorMedia) -> Optional[str]:
+    """本地存储的媒体文件路径（URL形如 /media/videos/...），文件不存在时返回None"""
+    media_url = f"{settings.MEDIA_URL}/"
+    if not media.file_path or not media.file_path.startswith(media_url):
+        return None
+    local_path = os.path.join(settings.MEDIA_ROOT, media.file_path[len(media_url):])
+    return local_path if os.path.isfile(local_path) else None
+
+async def _count_media_with_pending_jobs(db: AsyncSession, actor_id: str, media_type: str) -> int:
+    """统计演员已有的媒体数量和尚未完成的处理任务数量，已过期的直传任务不计入"""
+    media_count = await db.scalar(
+        select(func.count()).select_from(ActorMedia).where(ActorMedia.actor_id == actor_id, ActorMedia.type == media_type)
+    )
+    pending_count = await db.scalar(
+        select(func.count()).select_from(MediaJob).where(
+            MediaJob.actor_id == actor_id,
+            MediaJob.job_type == media_type,
+            or_(
+                MediaJob.status.in_(["pending", "processing"]),
+                and_(MediaJob.status == "awaiting_upload", MediaJob.created_at >= direct_upload_expired_before())
+            )
+        )
+    )
+    return media_count + pending_count
+
+def _variant_fields(media: ActorMedia) -> dict:
+    """媒体列表中的缩略图URL和响应式变体，缩略图优先使用最小的变体；视频附带HLS清单等播放信息"""
+    variants = json.loads(media.variants) if media.variants else None
+    fields = {
+        "thumbnail_url": smallest_variant_url(variants) or media.file_path,
+        "variants": variants,
+        "srcset": build_srcset(variants)
+    }
+    if media.type == "video":
+        fields.update(streaming_fields(json.loads(media.streaming) if media.streaming else None))
+        fields["thumbnail_url"] = fields["poster_url"] or fields["thumbnail_url"]
+    return fields
+
+async def _save_incoming_file(file: UploadFile, allowed_types: List[str], max_size: Optional[int] = None):
+    """验证并保存一个待后台处理的文件，返回 (文件路径, 文件大小, 内容哈希, MIME类型)，不合格时抛出ValueError"""
+    if not file.filename:
+        raise ValueError("无效的文件")
+    
+    # 按扩展名和文件头部验证文件类型，验证通过后才写入磁盘
+    source_path, file_size, content_hash, mime_type = await save_upload_file(
+        file, get_incoming_dir(), allowed_mime_types=allowed_types
+    )
+    
+    # 检查文件大小
+    if max_size and file_size > max_size:
+        os.remove(source_path)
+        raise ValueError(f"文件过大，最大允许上传{max_size/1024/1024}MB")
+    
+    return source_path, file_size, content_hash, mime_type
+
+def _file_rejected(file: UploadFile, error: Exception) -> dict:
+    """上传接口中未能接收的文件"""
+    return {
+        "job_id": None,
+        "file_name": file.filename,
+        "status": "rejected",
+        "error": str(error)
+    }
+
+def _job_accepted(job: MediaJob) -> dict:
+    """上传接口返回的任务信息"""
+    return {
+        "job_id": job.id,
+        "file_name": job.file_name,
+        "file_size": job.file_size,
+        "mime_type": job.mime_type,
+        "status": job.status,
+        "status_url": f"{settings.API_V1_STR}/actors/media/jobs/{job.id}"
+    }
+
+async def _gather_per_file(handler, files: List[UploadFile]) -> list:
+    """
+    并发处理一次请求中的多个文件，同时处理的文件数不超过 UPLOAD_CONCURRENCY
+    
+    返回与files一一对应的结果，单个文件抛出的异常作为结果返回，不影响其他文件
+    """
+    semaphore = asyncio.Semaphore(max(settings.UPLOAD_CONCURRENCY, 1))
+    
+    async def run(file):
+        async with semaphore:
+            return await handler(file)
+    
+    return await asyncio.gather(*(run(file) for file in files), return_exceptions=True)
+
+async def _write_temp_file(content: bytes, suffix: str) -> str:
+    """把内容写入临时文件（在线程中执行），返回文件路径"""
+    def write():
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+            temp_file.write(content)
+            return temp_file.name
+    return await asyncio.to_thread(write)
 
 @router.get("/{actor_id}/media", response_model=dict)
 async def get_media_list(
@@ -418,34 +1050,28 @@ async def get_media_list(
     file_type: Optional[str] = None,
     album: Optional[str] = None,
     category: Optional[str] = None,
-    current_user: User = Depends(get_current_user_optional),  # 允许可选的用户认证
-    db: Session = Depends(get_db)
+    limit: int = Query(settings.MEDIA_PAGE_SIZE, ge=1, le=settings.MEDIA_PAGE_SIZE_MAX, description="每页数量"),
+    cursor: Optional[str] = Query(None, description="上一页返回的next_cursor"),
+    current_user: Optional[User] = Depends(get_current_user_optional),  # 允许可选的用户认证
+    db: AsyncSession = Depends(get_async_db)
 ):
     """获取演员的媒体文件列表
     
-    可以根据文件类型、相册或分类筛选结果
+    可以根据文件类型、相册（照片）或分类（视频）筛选结果，相册和分类按名称精确匹配。
+    按上传时间倒序分页，next_cursor 不为空时把它作为cursor参数请求下一页
     """
     # 检查演员是否存在
-    actor = db.query(Actor).filter(Actor.id == actor_id).first()
+    actor = await db.scalar(select(Actor).where(Actor.id == actor_id))
     if not actor:
         raise HTTPException(status_code=404, detail="演员不存在")
     
-    # 基本查询
-    query = db.query(ActorMedia).filter(ActorMedia.actor_id == actor_id)
-    
-    if file_type:
-        query = query.filter(ActorMedia.type == file_type)
-    
-    if album:
-        query = query.filter(ActorMedia.description.contains(album))
-    
-    if category:
-        query = query.filter(ActorMedia.description.contains(category))
-    
     # 执行查询
     try:
-        media_list = query.order_by(ActorMedia.created_at.desc()).all()
+        query = _media_list_query(actor_id, file_type, album, category, cursor)
+        media_list, next_cursor = await fetch_page(db, query, limit)
         logger.info(f"查询到{len(media_list)}个媒体文件")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"查询媒体文件时出错: {str(e)}")
         raise HTTPException(status_code=500, detail=f"查询媒体文件时出错: {str(e)}")
@@ -454,7 +1080,8 @@ async def get_media_list(
     result = {
         "actor_id": actor_id,
         "actor_name": actor.real_name,
-        "items": []
+        "items": [],
+        "next_cursor": next_cursor
     }
     
     for media in media_list:
@@ -463,21 +1090,21 @@ async def get_media_list(
             "id": media.id,
             "file_type": media.type,
             "file_url": media.file_path,
-            "thumbnail_url": media.file_path,
+            **_variant_fields(media),
             "created_at": media.created_at.isoformat() if media.created_at else None,
             "updated_at": media.updated_at.isoformat() if media.updated_at else None,
         }
         
         # 为照片添加额外信息
         if media.type == "photo":
-            if hasattr(media, 'description') and media.description:
-                media_info["album"] = media.description
+            if media.album:
+                media_info["album"] = media.album
             media_info["file_name"] = media.file_name
             media_info["file_size"] = media.file_size
             media_info["mime_type"] = media.mime_type
         elif media.type == "video":
-            if hasattr(media, 'description') and media.description:
-                media_info["category"] = media.description
+            if media.album:
+                media_info["category"] = media.album
             media_info["file_name"] = media.file_name
             media_info["file_size"] = media.file_size
             media_info["mime_type"] = media.mime_type
@@ -486,16 +1113,82 @@ async def get_media_list(
     
     return result
 
+def _media_list_query(actor_id: str, file_type: Optional[str], album: Optional[str], category: Optional[str], cursor: Optional[str]):
+    """媒体列表的查询条件：相册只筛选照片，分类只筛选视频，都是索引上的等值条件"""
+    query = select(ActorMedia).where(ActorMedia.actor_id == actor_id)
+    if album:
+        query = query.where(ActorMedia.type == "photo", ActorMedia.album == album_name(album))
+    elif category:
+        query = query.where(ActorMedia.type == "video", ActorMedia.album == album_name(category))
+    if file_type:
+        query = query.where(ActorMedia.type == file_type)
+    return after_cursor(query, cursor)
+
+@router.get("/{actor_id}/albums", response_model=dict)
+async def get_albums(
+    actor_id: str,
+    media_type: Optional[str] = Query(None, pattern="^(photo|video)$", description="photo: 相册，video: 视频分类"),
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """获取演员的相册和视频分类，按显示顺序排列，包含媒体数量和封面"""
+    actor = await db.scalar(select(Actor).where(Actor.id == actor_id))
+    if not actor:
+        raise HTTPException(status_code=404, detail="演员不存在")
+    
+    return {"actor_id": actor_id, "albums": await album_summaries(db, actor_id, media_type)}
+
+@router.patch("/{actor_id}/albums/{album_id}", response_model=dict)
+async def update_album(
+    actor_id: str,
+    album_id: int,
+    update: MediaAlbumUpdate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """修改相册的显示顺序或封面，封面必须是该相册中的媒体"""
+    actor = await db.scalar(select(Actor).where(Actor.id == actor_id))
+    if not actor:
+        raise HTTPException(status_code=404, detail="演员不存在")
+    
+    # 权限检查：管理员可以修改任何演员的相册，演员只能修改自己的相册
+    if current_user.role == 'performer' and actor.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="您没有权限修改此演员的相册")
+    
+    album = await db.scalar(select(MediaAlbum).where(MediaAlbum.id == album_id, MediaAlbum.actor_id == actor_id))
+    if not album:
+        raise HTTPException(status_code=404, detail="相册不存在")
+    
+    # cover_media_id 可以设为null（恢复默认封面），sort_order 为null时不修改
+    fields = update.model_dump(exclude_unset=True)
+    if fields.get("sort_order", 0) is None:
+        del fields["sort_order"]
+    if fields.get("cover_media_id") is not None:
+        cover = await db.scalar(select(ActorMedia.id).where(
+            ActorMedia.id == fields["cover_media_id"],
+            ActorMedia.actor_id == actor_id,
+            ActorMedia.type == album.media_type,
+            ActorMedia.album == album.name
+        ))
+        if not cover:
+            raise HTTPException(status_code=400, detail="封面必须是该相册中的媒体")
+    for field, value in fields.items():
+        setattr(album, field, value)
+    await db.commit()
+    
+    summaries = await album_summaries(db, actor_id, album.media_type)
+    return next(summary for summary in summaries if summary["id"] == album_id)
+
 @router.delete("/{actor_id}/media/{media_id}", response_model=dict)
 async def delete_media(
     actor_id: str,
     media_id: int,
     current_user: User = Depends(get_current_user),  # 启用身份验证
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """删除演员媒体文件"""
     # 检查演员是否存在
-    actor = db.query(Actor).filter(Actor.id == actor_id).first()
+    actor = await db.scalar(select(Actor).where(Actor.id == actor_id))
     if not actor:
         raise HTTPException(status_code=404, detail="演员不存在")
     
@@ -520,10 +1213,10 @@ async def delete_media(
     elif current_user.role == 'manager':
         # 经纪人只能删除自己旗下演员的媒体
         print(f"删除媒体 - 用户是经纪人，检查是否有权限")
-        contract_info = db.query(ActorContractInfo).filter(
+        contract_info = await db.scalar(select(ActorContractInfo).where(
             ActorContractInfo.actor_id == actor_id,
             ActorContractInfo.agent_id == current_user.id
-        ).first()
+        ))
         
         print(f"删除媒体 - 合同信息: {contract_info}")
         if contract_info:
@@ -539,34 +1232,39 @@ async def delete_media(
         raise HTTPException(status_code=403, detail="您没有权限执行此操作")
     
     # 查找指定的媒体文件
-    media = db.query(ActorMedia).filter(ActorMedia.id == media_id, ActorMedia.actor_id == actor_id).first()
+    media = await db.scalar(select(ActorMedia).where(ActorMedia.id == media_id, ActorMedia.actor_id == actor_id))
     if not media:
         raise HTTPException(status_code=404, detail="未找到指定的媒体文件")
     
-    # 删除MinIO中的文件(TODO: 实现异步删除)
-    try:
-        from app.core.storage import minio_client
-        bucket_name = media.bucket_name or settings.MINIO_BUCKET
-        object_name = media.object_name
-        
-        if bucket_name and object_name:
-            minio_client.remove_object(bucket_name, object_name)
-    except Exception as e:
-        # 即使删除MinIO文件失败，也继续删除数据库记录
-        pass
+    # 原文件、缩略图和响应式变体与数据库记录在同一事务中写入删除日志，由后台清理协程删除；
+    # 仍被其他记录引用的内容不删除
+    await _journal_media_objects(db, media)
     
     # 删除数据库记录
-    db.delete(media)
-    db.commit()
+    await db.delete(media)
+    await db.commit()
+    storage_deletion_drainer.notify()
     
     return {"message": "媒体文件已删除"}
 
+async def _journal_media_objects(db: AsyncSession, media: ActorMedia):
+    """记录媒体在存储中可以删除的对象，旧的本地存储记录直接删除本地文件"""
+    if media.bucket_name:
+        journal_deletions(db, media.bucket_name, await releasable_object_names(db, media))
+        return
+    local_path = _local_media_path(media)
+    if local_path:
+        try:
+            os.remove(local_path)
+        except OSError as e:
+            logger.error(f"删除本地文件失败: {local_path}, 错误={str(e)}")
+
 # 专门用于演员自行上传媒体资料的API，以避免与经纪人/管理员上传冲突
 @self_router.post("/avatar", response_model=dict)
 async def performer_upload_avatar(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     authorization: Optional[str] = Header(None)
 ):
     """
@@ -586,7 +1284,7 @@ async def performer_upload_avatar(
         )
     
     # 获取当前用户关联的演员
-    actor = db.query(Actor).filter(Actor.user_id == current_user.id).first()
+    actor = await db.scalar(select(Actor).where(Actor.user_id == current_user.id))
     if not actor:
         raise HTTPException(
             status_code=404,
@@ -605,7 +1303,7 @@ async def performer_upload_avatar(
             )
         
         # 检查文件类型
-        mime_type = magic.from_buffer(content, mime=True)
+        mime_type = sniff_content_type(content)
         if mime_type not in ALLOWED_IMAGE_TYPES:
             raise HTTPException(
                 status_code=400, 
@@ -614,7 +1312,7 @@ async def performer_upload_avatar(
         
         # 检查演员是否存在
         actor_id = actor.id
-        db_actor = db.query(Actor).filter(Actor.id == actor_id).first()
+        db_actor = await db.scalar(select(Actor).where(Actor.id == actor_id))
         if not db_actor:
             raise HTTPException(
                 status_code=404, 
@@ -625,71 +1323,38 @@ async def performer_upload_avatar(
         timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
         filename = f"{actor_id}_avatar_{timestamp}_{uuid.uuid4()}.jpg"
         
-        # 创建文件保存路径
-        use_minio = hasattr(settings, 'MINIO_URL') and settings.MINIO_URL
-        if use_minio:
-            # 使用MinIO服务
-            # 先保存到临时文件
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as temp_file:
-                temp_file.write(content)
-                temp_file_path = temp_file.name
-            
-            try:
-                # 使用临时文件路径上传到MinIO
-                file_url = await upload_file_to_minio(temp_file_path, "actor-avatars", filename)
-                
-                # 处理路径，确保URL可访问
-                if not file_url.startswith('http'):
-                    file_url = f"{settings.MINIO_EXTERNAL_URL}/actor-avatars/{filename}"
-                
-                bucket_name = "actor-avatars"
-                object_name = filename
-            finally:
-                # 清理临时文件
-                if os.path.exists(temp_file_path):
-                    os.unlink(temp_file_path)
-        else:
-            # 本地存储
-            media_root = Path(settings.MEDIA_ROOT) if hasattr(settings, 'MEDIA_ROOT') else Path("./media")
-            upload_dir = media_root / "avatars" / actor_id
-            upload_dir.mkdir(parents=True, exist_ok=True)
-            
-            file_path = upload_dir / filename
-            async with aiofiles.open(file_path, 'wb') as f:
-                await f.write(content)
-            
-            # 生成缩略图
-            thumbnail_path = upload_dir / f"thumb_{filename}"
-            await create_thumbnail(file_path, thumbnail_path)
+        # 先保存到临时文件，再上传到存储后端
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as temp_file:
+            temp_file.write(content)
+            temp_file_path = temp_file.name
+        
+        bucket_name = "actor-avatars"
+        object_name = filename
+        try:
+            # 内容类型沿用上面检测的结果
+            file_url = await upload_file_to_minio(temp_file_path, bucket_name, object_name, mime_type)
             
-            # 文件URL (相对路径)
-            file_url = f"/media/avatars/{actor_id}/{filename}"
-            bucket_name = None
-            object_name = None
+            # 生成并上传响应式变体
+            variants = await generate_image_variants(
+                temp_file_path, bucket_name, f"variants/{actor_id}/{os.path.splitext(filename)[0]}"
+            )
+        finally:
+            # 清理临时文件
+            if os.path.exists(temp_file_path):
+                os.unlink(temp_file_path)
         
         # 检查现有头像媒体记录
-        existing_avatar = db.query(ActorMedia).filter(
+        existing_avatar = await db.scalar(select(ActorMedia).where(
             ActorMedia.actor_id == actor_id,
             ActorMedia.type == "avatar"
-        ).first()
+        ))
         
-        # 如果存在则删除
+        # 如果存在则删除，存储的文件由后台清理协程删除
         if existing_avatar:
-            # 删除存储的文件
-            try:
-                if settings.USE_MINIO:
-                    minio_client = create_minio_client()
-                    if existing_avatar.bucket_name and existing_avatar.object_name:
-                        minio_client.remove_object(existing_avatar.bucket_name, existing_avatar.object_name)
-                else:
-                    avatar_path = Path(settings.UPLOAD_DIR) / "avatars" / actor_id / existing_avatar.file_name
-                    if avatar_path.exists():
-                        avatar_path.unlink()
-            except Exception as e:
-                logger.error(f"删除旧头像失败: {str(e)}")
+            await _journal_media_objects(db, existing_avatar)
             
             # 删除数据库记录
-            db.delete(existing_avatar)
+            await db.delete(existing_avatar)
         
         # 创建媒体记录
         new_media = ActorMedia(
@@ -702,6 +1367,7 @@ async def performer_upload_avatar(
             description="演员头像",
             bucket_name=bucket_name,
             object_name=object_name,
+            variants=json.dumps(variants) if variants else None,
             uploaded_by=current_user.id
         )
         
@@ -709,11 +1375,14 @@ async def performer_upload_avatar(
         
         # 更新演员头像URL
         db_actor.avatar_url = file_url
-        db.commit()
+        await db.commit()
+        storage_deletion_drainer.notify()
         
         return {
             "success": True,
             "avatar_url": file_url,
+            "variants": variants,
+            "srcset": build_srcset(variants),
             "message": "头像上传成功",
             "id": new_media.id
         }
@@ -726,12 +1395,87 @@ async def performer_upload_avatar(
         )
 
 
+async def _store_performer_photo(file: UploadFile, actor_id: str) -> dict:
+    """检查并保存演员自行上传的一张照片，返回失败信息或用于创建媒体记录的字段"""
+    logger.info(f"开始处理照片: 演员ID={actor_id}, 文件名={file.filename}")
+    
+    # 读取文件内容
+    content = await file.read()
+    await file.seek(0)
+    
+    # 检查文件大小
+    if len(content) > MAX_PHOTO_SIZE:
+        logger.warning(f"文件过大: 文件名={file.filename}, 大小={len(content)}")
+        return {
+            "filename": file.filename,
+            "success": False,
+            "message": f"文件过大，不能超过{MAX_PHOTO_SIZE / 1024 / 1024}MB"
+        }
+    
+    # 检查文件类型
+    try:
+        mime_type = sniff_content_type(content)
+        logger.info(f"检测到文件类型: 文件名={file.filename}, MIME类型={mime_type}")
+        
+        if mime_type not in ALLOWED_IMAGE_TYPES:
+            logger.warning(f"文件类型不支持: 文件名={file.filename}, MIME类型={mime_type}")
+            return {
+                "filename": file.filename,
+                "success": False,
+                "message": f"文件类型错误，仅支持以下格式: {', '.join(ALLOWED_IMAGE_TYPES)}"
+            }
+    except Exception as e:
+        logger.error(f"检测文件类型时出错: 文件名={file.filename}, 错误={str(e)}")
+        return {
+            "filename": file.filename,
+            "success": False,
+            "message": f"检测文件类型失败: {str(e)}"
+        }
+    
+    # 生成唯一文件名
+    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+    filename = f"{actor_id}_photo_{timestamp}_{uuid.uuid4()}.jpg"
+    logger.info(f"生成唯一文件名: {filename}")
+    
+    # 先保存到临时文件，再上传到存储后端
+    temp_file_path = await _write_temp_file(content, '.jpg')
+    bucket_name = "actor-photos"
+    object_name = filename
+    try:
+        phash = await perceptual_hash(temp_file_path)
+        
+        # 内容类型沿用上面检测的结果
+        file_url = await upload_file_to_minio(temp_file_path, bucket_name, object_name, mime_type)
+        thumbnail_url = file_url  # 不单独生成缩略图，使用原图
+    except Exception as e:
+        logger.error(f"保存文件时出错: 文件名={filename}, 错误={str(e)}")
+        return {
+            "filename": file.filename,
+            "success": False,
+            "message": f"保存文件失败: {str(e)}"
+        }
+    finally:
+        # 清理临时文件
+        if os.path.exists(temp_file_path):
+            os.unlink(temp_file_path)
+    
+    return {
+        "success": True,
+        "file_url": file_url,
+        "thumbnail_url": thumbnail_url,
+        "file_size": len(content),
+        "mime_type": mime_type,
+        "bucket_name": bucket_name,
+        "object_name": object_name,
+        "phash": phash
+    }
+
 @self_router.post("/photos", response_model=List[dict])
 async def performer_upload_photos(
     files: List[UploadFile] = File(...),
     album: Optional[str] = Form(None),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     authorization: Optional[str] = Header(None)
 ):
     """
@@ -752,7 +1496,7 @@ async def performer_upload_photos(
     
     try:
         # 获取当前用户关联的演员
-        actor = db.query(Actor).filter(Actor.user_id == current_user.id).first()
+        actor = await db.scalar(select(Actor).where(Actor.user_id == current_user.id))
         if not actor:
             logger.warning(f"找不到与用户关联的演员信息: 用户ID={current_user.id}")
             raise HTTPException(
@@ -764,7 +1508,7 @@ async def performer_upload_photos(
         logger.info(f"找到与用户关联的演员: 演员ID={actor_id}")
         
         # 检查演员是否存在
-        db_actor = db.query(Actor).filter(Actor.id == actor_id).first()
+        db_actor = await db.scalar(select(Actor).where(Actor.id == actor_id))
         if not db_actor:
             logger.warning(f"演员记录不存在: 演员ID={actor_id}")
             raise HTTPException(
@@ -773,10 +1517,10 @@ async def performer_upload_photos(
             )
         
         # 检查当前照片数量是否超过限制
-        current_photos_count = db.query(ActorMedia).filter(
+        current_photos_count = await db.scalar(select(func.count()).select_from(ActorMedia).where(
             ActorMedia.actor_id == actor_id,
             ActorMedia.type == "photo"
-        ).count()
+        ))
         
         if current_photos_count + len(files) > MAX_PHOTOS_COUNT:
             logger.warning(f"照片数量超过限制: 当前={current_photos_count}, 新增={len(files)}, 最大={MAX_PHOTOS_COUNT}")
@@ -785,170 +1529,136 @@ async def performer_upload_photos(
                 detail=f"照片数量超过限制，每个演员最多可以上传{MAX_PHOTOS_COUNT}张照片"
             )
         
+        # 并发处理每个文件（类型检查、保存和上传），数据库记录随后依次写入
+        stored = await _gather_per_file(lambda file: _store_performer_photo(file, actor_id), files)
+        
         # 上传结果
         result = []
+        album = album_name(album, "photo")
         
-        for file in files:
+        for file, outcome in zip(files, stored):
+            if isinstance(outcome, Exception):
+                logger.error(f"处理照片时出现未处理的异常: 文件名={file.filename}, 错误={str(outcome)}")
+                result.append({
+                    "filename": file.filename,
+                    "success": False,
+                    "message": f"照片上传失败: {str(outcome)}"
+                })
+                continue
+            if not outcome["success"]:
+                result.append(outcome)
+                continue
+            
             try:
-                logger.info(f"开始处理照片: 演员ID={actor_id}, 文件名={file.filename}")
-                
-                # 读取文件内容
-                content = await file.read()
-                await file.seek(0)
-                
-                # 检查文件大小
-                if len(content) > MAX_PHOTO_SIZE:
-                    logger.warning(f"文件过大: 文件名={file.filename}, 大小={len(content)}")
-                    result.append({
-                        "filename": file.filename,
-                        "success": False,
-                        "message": f"文件过大，不能超过{MAX_PHOTO_SIZE / 1024 / 1024}MB"
-                    })
-                    continue
+                # 检查与已有照片近似重复的情况
+                near_duplicates = await find_near_duplicates(db, actor_id, outcome["phash"])
                 
-                # 检查文件类型
-                try:
-                    mime_type = magic.from_buffer(content, mime=True)
-                    logger.info(f"检测到文件类型: 文件名={file.filename}, MIME类型={mime_type}")
-                    
-                    if mime_type not in ALLOWED_IMAGE_TYPES:
-                        logger.warning(f"文件类型不支持: 文件名={file.filename}, MIME类型={mime_type}")
-                        result.append({
-                            "filename": file.filename,
-                            "success": False,
-                            "message": f"文件类型错误，仅支持以下格式: {', '.join(ALLOWED_IMAGE_TYPES)}"
-                        })
-                        continue
-                except Exception as e:
-                    logger.error(f"检测文件类型时出错: 文件名={file.filename}, 错误={str(e)}")
-                    result.append({
-                        "filename": file.filename,
-                        "success": False,
-                        "message": f"检测文件类型失败: {str(e)}"
-                    })
-                    continue
+                # 创建媒体记录
+                logger.info(f"创建媒体记录: 演员ID={actor_id}, 文件URL={outcome['file_url']}")
+                new_media = ActorMedia(
+                    actor_id=actor_id,
+                    type="photo",
+                    file_path=outcome["file_url"],
+                    file_name=file.filename,
+                    file_size=outcome["file_size"],
+                    mime_type=outcome["mime_type"],
+                    album=album,
+                    bucket_name=outcome["bucket_name"],
+                    object_name=outcome["object_name"],
+                    phash=outcome["phash"],
+                    uploaded_by=current_user.id
+                )
                 
-                # 生成唯一文件名
-                timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-                filename = f"{actor_id}_photo_{timestamp}_{uuid.uuid4()}.jpg"
-                logger.info(f"生成唯一文件名: {filename}")
+                db.add(new_media)
+                await db.flush()
                 
-                # 创建文件保存路径
-                use_minio = hasattr(settings, 'MINIO_URL') and settings.MINIO_URL
-                if use_minio:
-                    logger.info(f"使用MinIO保存文件: {filename}")
-                    # 使用MinIO服务
-                    # 先保存到临时文件
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as temp_file:
-                        temp_file.write(content)
-                        temp_file_path = temp_file.name
-                    
-                    try:
-                        # 使用临时文件路径上传到MinIO
-                        file_url = await upload_file_to_minio(temp_file_path, "actor-photos", filename)
-                        
-                        # 处理路径，确保URL可访问
-                        if not file_url.startswith('http'):
-                            file_url = f"{settings.MINIO_EXTERNAL_URL}/actor-photos/{filename}"
-                        
-                        thumbnail_url = file_url  # MinIO不自动生成缩略图，使用原图
-                        bucket_name = "actor-photos"
-                        object_name = filename
-                    finally:
-                        # 清理临时文件
-                        if os.path.exists(temp_file_path):
-                            os.unlink(temp_file_path)
-                else:
-                    logger.info(f"使用本地文件系统保存文件: {filename}")
-                    # 本地存储
-                    media_root = Path(settings.MEDIA_ROOT) if hasattr(settings, 'MEDIA_ROOT') else Path("./media")
-                    upload_dir = media_root / "photos" / actor_id
-                    upload_dir.mkdir(parents=True, exist_ok=True)
-                    
-                    try:
-                        file_path = upload_dir / filename
-                        async with aiofiles.open(file_path, 'wb') as f:
-                            await f.write(content)
-                        
-                        # 生成缩略图
-                        thumbnail_filename = f"thumb_{filename}"
-                        thumbnail_path = upload_dir / thumbnail_filename
-                        await create_thumbnail(file_path, thumbnail_path)
-                        
-                        # 文件URL (相对路径)
-                        file_url = f"/media/photos/{actor_id}/{filename}"
-                        thumbnail_url = f"/media/photos/{actor_id}/{thumbnail_filename}"
-                        bucket_name = None
-                        object_name = None
-                    except Exception as e:
-                        logger.error(f"保存文件时出错: 文件名={filename}, 错误={str(e)}")
-                        result.append({
-                            "filename": file.filename,
-                            "success": False,
-                            "message": f"保存文件失败: {str(e)}"
-                        })
-                        continue
-                
-                try:
-                    # 创建媒体记录
-                    logger.info(f"创建媒体记录: 演员ID={actor_id}, 文件URL={file_url}")
-                    new_media = ActorMedia(
-                        actor_id=actor_id,
-                        type="photo",
-                        file_path=file_url,
-                        file_name=file.filename,
-                        file_size=len(content),
-                        mime_type=mime_type,
-                        description=album or "默认相册",
-                        bucket_name=bucket_name,
-                        object_name=object_name,
-                        uploaded_by=current_user.id
-                    )
-                    
-                    db.add(new_media)
-                    db.flush()
-                    
-                    result.append({
-                        "id": new_media.id,
-                        "filename": file.filename,
-                        "file_url": file_url,
-                        "thumbnail_url": thumbnail_url,  # 前端展示仍可使用thumbnail_url
-                        "album": album or "默认相册",
-                        "success": True,
-                        "message": "照片上传成功"
-                    })
-                    logger.info(f"媒体记录创建成功: ID={new_media.id}")
-                except Exception as e:
-                    logger.error(f"创建媒体记录时出错: 文件名={file.filename}, 错误={str(e)}")
-                    result.append({
-                        "filename": file.filename,
-                        "success": False,
-                        "message": f"创建媒体记录失败: {str(e)}"
-                    })
+                result.append({
+                    "id": new_media.id,
+                    "filename": file.filename,
+                    "file_url": outcome["file_url"],
+                    "thumbnail_url": outcome["thumbnail_url"],  # 前端展示仍可使用thumbnail_url
+                    "album": album,
+                    "near_duplicates": near_duplicates,
+                    "success": True,
+                    "message": "照片上传成功"
+                })
+                logger.info(f"媒体记录创建成功: ID={new_media.id}")
             except Exception as e:
-                logger.error(f"处理照片时出现未处理的异常: 文件名={file.filename}, 错误={str(e)}")
+                logger.error(f"创建媒体记录时出错: 文件名={file.filename}, 错误={str(e)}")
                 result.append({
                     "filename": file.filename,
                     "success": False,
-                    "message": f"照片上传失败: {str(e)}"
+                    "message": f"创建媒体记录失败: {str(e)}"
                 })
         
-        db.commit()
+        if any(item.get("success") for item in result):
+            await ensure_album(db, actor_id, "photo", album)
+        await db.commit()
         logger.info(f"照片上传完成: 成功={len([r for r in result if r.get('success')])}, 失败={len([r for r in result if not r.get('success')])}")
         return result
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"照片上传API整体处理失败: 错误={str(e)}")
         # 返回详细的错误信息而不是抛出异常，这样前端可以更好地处理错误
         return [{"success": False, "message": f"服务器处理错误: {str(e)}"}]
 
 
+async def _store_performer_video(file: UploadFile, actor_id: str) -> dict:
+    """检查并保存演员自行上传的一个视频，返回失败信息或用于创建媒体记录的字段"""
+    # 读取文件内容
+    content = await file.read()
+    await file.seek(0)
+    
+    # 检查文件大小
+    if len(content) > MAX_VIDEO_SIZE:
+        return {
+            "filename": file.filename,
+            "success": False,
+            "message": f"文件过大，不能超过{MAX_VIDEO_SIZE / 1024 / 1024}MB"
+        }
+    
+    # 检查文件类型
+    mime_type = sniff_content_type(content)
+    if mime_type not in ALLOWED_VIDEO_TYPES:
+        return {
+            "filename": file.filename,
+            "success": False,
+            "message": f"文件类型错误，仅支持以下格式: {', '.join(ALLOWED_VIDEO_TYPES)}"
+        }
+    
+    # 生成唯一文件名
+    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+    filename = f"{actor_id}_video_{timestamp}_{uuid.uuid4()}.mp4"
+    
+    # 先保存到临时文件，再上传到存储后端
+    temp_file_path = await _write_temp_file(content, os.path.splitext(file.filename)[1] or '.mp4')
+    bucket_name = "actor-videos"
+    object_name = filename
+    try:
+        # 内容类型沿用上面检测的结果
+        file_url = await upload_file_to_minio(temp_file_path, bucket_name, object_name, mime_type)
+        thumbnail_url = get_storage_backend().url(bucket_name, f"thumb_{filename}.jpg")  # 默认缩略图URL
+    finally:
+        # 清理临时文件
+        if os.path.exists(temp_file_path):
+            os.unlink(temp_file_path)
+    
+    return {
+        "success": True,
+        "file_url": file_url,
+        "thumbnail_url": thumbnail_url,
+        "file_size": len(content),
+        "mime_type": mime_type,
+        "bucket_name": bucket_name,
+        "object_name": object_name
+    }
+
 @self_router.post("/videos", response_model=List[dict])
 async def performer_upload_videos(
     files: List[UploadFile] = File(...),
     category: Optional[str] = Form(None),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     authorization: Optional[str] = Header(None)
 ):
     """
@@ -968,7 +1678,7 @@ async def performer_upload_videos(
         )
     
     # 获取当前用户关联的演员
-    actor = db.query(Actor).filter(Actor.user_id == current_user.id).first()
+    actor = await db.scalar(select(Actor).where(Actor.user_id == current_user.id))
     if not actor:
         raise HTTPException(
             status_code=404,
@@ -978,7 +1688,7 @@ async def performer_upload_videos(
     actor_id = actor.id
     
     # 检查演员是否存在
-    db_actor = db.query(Actor).filter(Actor.id == actor_id).first()
+    db_actor = await db.scalar(select(Actor).where(Actor.id == actor_id))
     if not db_actor:
         raise HTTPException(
             status_code=404, 
@@ -986,10 +1696,10 @@ async def performer_upload_videos(
         )
     
     # 检查当前视频数量是否超过限制
-    current_videos_count = db.query(ActorMedia).filter(
+    current_videos_count = await db.scalar(select(func.count()).select_from(ActorMedia).where(
         ActorMedia.actor_id == actor_id,
         ActorMedia.type == "video"
-    ).count()
+    ))
     
     if current_videos_count + len(files) > MAX_VIDEOS_COUNT:
         raise HTTPException(
@@ -997,107 +1707,49 @@ async def performer_upload_videos(
             detail=f"视频数量超过限制，每个演员最多可以上传{MAX_VIDEOS_COUNT}个视频"
         )
     
+    # 并发处理每个文件（类型检查、保存、缩略图和上传），数据库记录随后依次写入
+    stored = await _gather_per_file(lambda file: _store_performer_video(file, actor_id), files)
+    
     # 上传结果
     result = []
+    category = album_name(category, "video")
     
-    for file in files:
+    for file, outcome in zip(files, stored):
+        if isinstance(outcome, Exception):
+            result.append({
+                "filename": file.filename,
+                "success": False,
+                "message": f"视频上传失败: {str(outcome)}"
+            })
+            continue
+        if not outcome["success"]:
+            result.append(outcome)
+            continue
+        
         try:
-            # 读取文件内容
-            content = await file.read()
-            await file.seek(0)
-            
-            # 检查文件大小
-            if len(content) > MAX_VIDEO_SIZE:
-                result.append({
-                    "filename": file.filename,
-                    "success": False,
-                    "message": f"文件过大，不能超过{MAX_VIDEO_SIZE / 1024 / 1024}MB"
-                })
-                continue
-            
-            # 检查文件类型
-            mime_type = magic.from_buffer(content, mime=True)
-            if mime_type not in ALLOWED_VIDEO_TYPES:
-                result.append({
-                    "filename": file.filename,
-                    "success": False,
-                    "message": f"文件类型错误，仅支持以下格式: {', '.join(ALLOWED_VIDEO_TYPES)}"
-                })
-                continue
-            
-            # 生成唯一文件名
-            timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-            filename = f"{actor_id}_video_{timestamp}_{uuid.uuid4()}.mp4"
-            
-            # 创建文件保存路径
-            use_minio = hasattr(settings, 'MINIO_URL') and settings.MINIO_URL
-            if use_minio:
-                # 使用MinIO服务
-                # 先保存到临时文件
-                with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1] or '.mp4') as temp_file:
-                    temp_file.write(content)
-                    temp_file_path = temp_file.name
-                
-                try:
-                    # 使用临时文件路径上传到MinIO
-                    file_url = await upload_file_to_minio(temp_file_path, "actor-videos", filename)
-                    
-                    # 处理路径，确保URL可访问
-                    if not file_url.startswith('http'):
-                        file_url = f"{settings.MINIO_EXTERNAL_URL}/actor-videos/{filename}"
-                    
-                    thumbnail_url = f"{settings.MINIO_EXTERNAL_URL}/actor-videos/thumb_{filename}.jpg"  # 默认缩略图URL
-                    bucket_name = "actor-videos"
-                    object_name = filename
-                finally:
-                    # 清理临时文件
-                    if os.path.exists(temp_file_path):
-                        os.unlink(temp_file_path)
-            else:
-                # 本地存储
-                media_root = Path(settings.MEDIA_ROOT) if hasattr(settings, 'MEDIA_ROOT') else Path("./media")
-                upload_dir = media_root / "videos" / actor_id
-                upload_dir.mkdir(parents=True, exist_ok=True)
-                
-                file_path = upload_dir / filename
-                async with aiofiles.open(file_path, 'wb') as f:
-                    await f.write(content)
-                
-                # 创建缩略图 - 先保存临时截图，然后使用它创建缩略图
-                thumb_filename = f"thumb_{filename}.jpg"
-                thumb_path = upload_dir / thumb_filename
-                # 这里可以集成视频缩略图生成逻辑，比如调用ffmpeg等
-                await create_video_thumbnail(file_path, thumb_path)  # 假设有这个函数
-                
-                # 文件URL (相对路径)
-                file_url = f"/media/videos/{actor_id}/{filename}"
-                thumbnail_url = f"/media/videos/{actor_id}/{thumb_filename}"
-                bucket_name = None
-                object_name = None
-            
             # 创建视频媒体记录
             new_media = ActorMedia(
                 actor_id=actor_id,
                 type="video",
-                file_path=file_url,
+                file_path=outcome["file_url"],
                 file_name=file.filename,
-                file_size=len(content),
-                mime_type=mime_type,
-                description=category or "默认视频",  # 使用description存储分类信息
-                bucket_name=bucket_name,
-                object_name=object_name,
+                file_size=outcome["file_size"],
+                mime_type=outcome["mime_type"],
+                album=category,
+                bucket_name=outcome["bucket_name"],
+                object_name=outcome["object_name"],
                 uploaded_by=current_user.id
             )
             
             db.add(new_media)
-            db.flush()
+            await db.flush()
             
             result.append({
                 "id": new_media.id,
                 "filename": file.filename,
-                "file_url": file_url,
-                "thumbnail_url": thumbnail_url,  # 前端展示仍可使用thumbnail_url
-                "category": category or "默认视频",
+                "file_url": outcome["file_url"],
+                "thumbnail_url": outcome["thumbnail_url"],  # 前端展示仍可使用thumbnail_url
+                "category": category,
                 "success": True,
                 "message": "视频上传成功"
             })
@@ -1109,7 +1761,9 @@ async def performer_upload_videos(
                 "message": f"视频上传失败: {str(e)}"
             })
     
-    db.commit()
+    if any(item.get("success") for item in result):
+        await ensure_album(db, actor_id, "video", category)
+    await db.commit()
     return result
 
 
@@ -1118,8 +1772,10 @@ async def get_performer_media(
     file_type: Optional[str] = None,
     album: Optional[str] = None,
     category: Optional[str] = None,
+    limit: int = Query(settings.MEDIA_PAGE_SIZE, ge=1, le=settings.MEDIA_PAGE_SIZE_MAX, description="每页数量"),
+    cursor: Optional[str] = Query(None, description="上一页返回的next_cursor"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     authorization: Optional[str] = Header(None)
 ):
     """
@@ -1127,6 +1783,8 @@ async def get_performer_media(
     
     - 仅限performer角色使用
     - 自动筛选当前登录的演员的媒体
+    - 照片和视频按上传时间倒序分页，next_cursor 不为空时把它作为cursor参数请求下一页；
+      头像和相册列表只在第一页返回
     """
     logger.info(f"获取演员媒体 - 用户: {current_user.username}, 角色: {current_user.role}, Token: {'已提供' if authorization else '未提供'}")
     
@@ -1139,7 +1797,7 @@ async def get_performer_media(
         )
     
     # 获取当前用户关联的演员
-    actor = db.query(Actor).filter(Actor.user_id == current_user.id).first()
+    actor = await db.scalar(select(Actor).where(Actor.user_id == current_user.id))
     if not actor and current_user.role == "performer":
         logger.error(f"未找到演员数据 - 用户ID: {current_user.id}")
         raise HTTPException(
@@ -1150,7 +1808,6 @@ async def get_performer_media(
     # 构建查询
     if current_user.role == "performer":
         actor_id = actor.id
-        query = db.query(ActorMedia).filter(ActorMedia.actor_id == actor_id)
     else:
         # 管理员或经纪人需要传递actor_id参数
         raise HTTPException(
@@ -1158,20 +1815,15 @@ async def get_performer_media(
             detail="管理员或经纪人需要使用'/actors/{actor_id}/media'端点"
         )
     
-    # 应用过滤条件
-    if file_type:
-        query = query.filter(ActorMedia.type == file_type)
-    
-    if album:
-        query = query.filter(ActorMedia.description.contains(album))
-    
-    if category:
-        query = query.filter(ActorMedia.description.contains(category))
-    
-    # 执行查询
+    # 执行查询，头像不参与分页
     try:
-        media_list = query.order_by(ActorMedia.created_at.desc()).all()
+        query = _media_list_query(actor_id, file_type, album, category, cursor)
+        if not file_type:
+            query = query.where(ActorMedia.type.in_(("photo", "video")))
+        media_list, next_cursor = await fetch_page(db, query, limit)
         logger.info(f"查询到{len(media_list)}个媒体文件")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"查询媒体文件时出错: {str(e)}")
         raise HTTPException(status_code=500, detail=f"查询媒体文件时出错: {str(e)}")
@@ -1185,52 +1837,62 @@ async def get_performer_media(
         "videos": [],
         "photo_albums": [],
         "video_categories": [],
-        "avatar": None
+        "albums": [],
+        "avatar": None,
+        "next_cursor": next_cursor
     }
     
-    photo_albums = set()
-    video_categories = set()
-    
     for media in media_list:
-        # 转换为前端友好格式
-        media_info = {
-            "id": media.id,
-            "file_type": media.type,
-            "file_url": media.file_path,
-            "thumbnail_url": media.file_path,
-            "file_name": media.file_name,
-            "file_size": media.file_size,
-            "mime_type": media.mime_type,
-            "created_at": media.created_at.isoformat() if media.created_at else None,
-            "updated_at": media.updated_at.isoformat() if media.updated_at else None,
-        }
+        media_info = _performer_media_info(media)
         
         # 根据类型分类
         if media.type == "photo":
-            if hasattr(media, 'description') and media.description:
-                media_info["album"] = media.description
-                photo_albums.add(media.description)
+            if media.album:
+                media_info["album"] = media.album
             result["photos"].append(media_info)
         elif media.type == "video":
-            if hasattr(media, 'description') and media.description:
-                media_info["category"] = media.description
-                video_categories.add(media.description)
+            if media.album:
+                media_info["category"] = media.album
             result["videos"].append(media_info)
         elif media.type == "avatar":
             result["avatar"] = media_info
     
-    # 添加相册和分类信息
-    result["photo_albums"] = list(photo_albums)
-    result["video_categories"] = list(video_categories)
+    if not cursor:
+        # 添加头像、相册和分类信息（按显示顺序）
+        if not file_type:
+            avatar = await db.scalar(select(ActorMedia).where(
+                ActorMedia.actor_id == actor_id,
+                ActorMedia.type == "avatar"
+            ).order_by(ActorMedia.created_at.desc(), ActorMedia.id.desc()).limit(1))
+            if avatar:
+                result["avatar"] = _performer_media_info(avatar)
+        
+        result["albums"] = await album_summaries(db, actor_id)
+        result["photo_albums"] = [item["name"] for item in result["albums"] if item["media_type"] == "photo"]
+        result["video_categories"] = [item["name"] for item in result["albums"] if item["media_type"] == "video"]
     
     return result
 
+def _performer_media_info(media: ActorMedia) -> dict:
+    """演员媒体列表中的一项，转换为前端友好格式"""
+    return {
+        "id": media.id,
+        "file_type": media.type,
+        "file_url": media.file_path,
+        **_variant_fields(media),
+        "file_name": media.file_name,
+        "file_size": media.file_size,
+        "mime_type": media.mime_type,
+        "created_at": media.created_at.isoformat() if media.created_at else None,
+        "updated_at": media.updated_at.isoformat() if media.updated_at else None,
+    }
+
 
 @self_router.delete("/{media_id}", response_model=dict)
 async def delete_performer_media(
     media_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     authorization: Optional[str] = Header(None)
 ):
     """
@@ -1250,7 +1912,7 @@ async def delete_performer_media(
         )
     
     # 获取当前用户关联的演员
-    actor = db.query(Actor).filter(Actor.user_id == current_user.id).first()
+    actor = await db.scalar(select(Actor).where(Actor.user_id == current_user.id))
     if not actor:
         raise HTTPException(
             status_code=404,
@@ -1260,10 +1922,10 @@ async def delete_performer_media(
     actor_id = actor.id
     
     # 获取要删除的媒体
-    media = db.query(ActorMedia).filter(
+    media = await db.scalar(select(ActorMedia).where(
         ActorMedia.id == media_id,
         ActorMedia.actor_id == actor_id
-    ).first()
+    ))
     
     if not media:
         raise HTTPException(
@@ -1271,9 +1933,11 @@ async def delete_performer_media(
             detail="未找到该媒体文件或无权限删除"
         )
     
-    # 删除媒体记录
-    db.delete(media)
-    db.commit()
+    # 删除媒体记录，存储的文件由后台清理协程删除
+    await _journal_media_objects(db, media)
+    await db.delete(media)
+    await db.commit()
+    storage_deletion_drainer.notify()
     
     return {
         "success": True,
@@ -1,12 +1,18 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict
-from sqlalchemy import func
+from sqlalchemy import func, select, delete, literal
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+import datetime
+import logging
 
 from app.core.database import get_db
 from app.models.actor import Actor
-from app.models.tag import Tag
-from app.schemas.tag import TagCreate, TagOut, TagUpdate, ActorTagsUpdate, ActorTagsOut
+from app.models.tag import Tag, actor_tag
+from app.models.user import User
+from app.schemas.tag import TagCreate, TagOut, TagUpdate, ActorTagsUpdate, ActorTagsOut, ActorTagsBulkUpdate, ActorTagsBulkOut
+from app.api.v1.dependencies import get_current_manager
+from app.api.v1.endpoints.actors.utils import build_actor_filter_conditions
 
 router = APIRouter()
 
@@ -105,6 +111,77 @@ def delete_tag(tag_id: int, db: Session = Depends(get_db)):
     return db_tag
 
 
+# 批量标签API
+@router.post("/bulk", response_model=ActorTagsBulkOut)
+def bulk_update_actor_tags(
+    bulk_data: ActorTagsBulkUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_manager)
+):
+    """
+    批量为演员添加或移除标签
+    
+    - action=add: 为所有匹配的演员添加指定标签（已有的标签不会重复添加）
+    - action=remove: 从所有匹配的演员移除指定标签
+    - 通过actor_ids指定演员，或通过filter按条件筛选，两者同时提供时取交集
+    - 经纪人只能操作自己旗下的演员
+    
+    整个操作在一个事务中以集合方式执行，不会逐个加载演员
+    """
+    if bulk_data.actor_ids is None and bulk_data.filter is None:
+        raise HTTPException(status_code=400, detail="必须提供actor_ids或filter")
+    
+    tag_ids = list(set(bulk_data.tag_ids))
+    if not tag_ids:
+        raise HTTPException(status_code=400, detail="标签列表不能为空")
+    
+    # 检查标签是否都存在
+    existing_count = db.query(func.count(Tag.id)).filter(Tag.id.in_(tag_ids)).scalar()
+    if existing_count != len(tag_ids):
+        raise HTTPException(status_code=400, detail="部分标签不存在")
+    
+    conditions = build_actor_filter_conditions(bulk_data.actor_ids, bulk_data.filter, current_user)
+    
+    try:
+        if bulk_data.action == "add":
+            # INSERT ... SELECT ... ON DUPLICATE KEY UPDATE，已存在的关联保持不变
+            matched_pairs = select(
+                Actor.id,
+                Tag.id,
+                literal(current_user.id),
+                literal(datetime.datetime.utcnow())
+            ).select_from(Actor).join(Tag, Tag.id.in_(tag_ids)).where(*conditions)
+            
+            stmt = mysql_insert(actor_tag).from_select(
+                ["actor_id", "tag_id", "created_by", "created_at"],
+                matched_pairs
+            )
+            stmt = stmt.on_duplicate_key_update(tag_id=stmt.inserted.tag_id)
+        else:
+            # 使用派生表包装子查询，避免筛选条件引用actor_tags时MySQL不允许在子查询中引用被删除的表
+            matched_subquery = select(Actor.id).where(*conditions).subquery()
+            matched_actors = select(matched_subquery.c.id)
+            stmt = delete(actor_tag).where(
+                actor_tag.c.tag_id.in_(tag_ids),
+                actor_tag.c.actor_id.in_(matched_actors)
+            )
+        
+        result = db.execute(stmt)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logging.error(f"批量更新演员标签失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"批量更新演员标签失败: {str(e)}")
+    
+    logging.info(f"批量更新演员标签: 操作={bulk_data.action}, 标签={tag_ids}, 影响行数={result.rowcount}")
+    
+    return {
+        "action": bulk_data.action,
+        "tag_ids": tag_ids,
+        "affected_rows": result.rowcount
+    }
+
+
 # 演员标签关联API
 @router.get("/{actor_id}/tags", response_model=ActorTagsOut)
 def get_actor_tags(actor_id: str, db: Session = Depends(get_db)):
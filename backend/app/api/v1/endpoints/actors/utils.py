@@ -0,0 +1,123 @@
+"""
+演员API共享工具函数
+"""
+import json
+import logging
+from typing import List, Optional, Tuple
+
+from sqlalchemy import exists
+
+from app.models.actor import Actor, ActorContractInfo
+from app.models.tag import actor_tag
+from app.models.user import User
+from app.schemas.actor import ActorBulkFilter
+
+# 中文性别到数据库枚举值的映射
+GENDER_MAPPING = {
+    '男': 'male',
+    '女': 'female',
+    '其他': 'other'
+}
+
+# 专业信息字段
+PROFESSIONAL_FIELDS = ['bio', 'skills', 'experience', 'education', 'awards', 'languages', 'current_rank', 'minimum_fee']
+PROFESSIONAL_JSON_FIELDS = ['skills', 'experience', 'education', 'awards', 'languages']
+
+# 联系信息字段
+CONTACT_FIELDS = ['phone', 'email', 'address', 'wechat', 'social_media', 'emergency_contact', 'emergency_phone']
+CONTACT_JSON_FIELDS = ['social_media']
+
+
+def split_actor_data(actor_data: dict) -> Tuple[dict, dict, dict]:
+    """
+    将ActorCreate的数据拆分为基本信息、专业信息和联系信息
+
+    - 中文性别会被转换为英文枚举值
+    - JSON字段会被序列化为字符串
+    - 返回 (基本信息, 专业信息, 联系信息)，基本信息中已移除专业和联系字段
+    """
+    actor_data = dict(actor_data)
+
+    if actor_data.get('gender') in GENDER_MAPPING:
+        actor_data['gender'] = GENDER_MAPPING[actor_data['gender']]
+
+    professional_info = {}
+    for field in PROFESSIONAL_FIELDS:
+        if field in actor_data:
+            professional_info[field] = _serialize_field(field, actor_data.pop(field), PROFESSIONAL_JSON_FIELDS)
+
+    contact_info = {}
+    for field in CONTACT_FIELDS:
+        if field in actor_data:
+            contact_info[field] = _serialize_field(field, actor_data.pop(field), CONTACT_JSON_FIELDS)
+
+    return actor_data, professional_info, contact_info
+
+
+def serialize_json_fields(data: dict, json_fields: List[str]) -> dict:
+    """序列化字典中的JSON字段"""
+    return {field: _serialize_field(field, value, json_fields) for field, value in data.items()}
+
+
+def _serialize_field(field: str, value, json_fields: List[str]):
+    """序列化JSON字段，失败时记录错误并返回None"""
+    if field in json_fields and value is not None:
+        try:
+            return json.dumps(value, ensure_ascii=False)
+        except Exception as e:
+            logging.error(f"JSON序列化字段 {field} 失败: {str(e)}")
+            return None
+    return value
+
+
+def build_actor_filter_conditions(
+    actor_ids: Optional[List[str]] = None,
+    actor_filter: Optional[ActorBulkFilter] = None,
+    current_user: Optional[User] = None
+) -> list:
+    """
+    构建批量操作使用的演员筛选条件
+
+    - actor_ids 和 actor_filter 同时提供时取交集
+    - 经纪人只能操作自己旗下的演员
+    """
+    conditions = []
+
+    if actor_ids is not None:
+        conditions.append(Actor.id.in_(actor_ids))
+
+    if actor_filter:
+        if actor_filter.status:
+            conditions.append(Actor.status == actor_filter.status)
+        if actor_filter.gender:
+            conditions.append(Actor.gender == GENDER_MAPPING.get(actor_filter.gender, actor_filter.gender))
+        if actor_filter.name:
+            conditions.append(Actor.real_name.like(f"%{actor_filter.name}%"))
+        if actor_filter.age_min is not None:
+            conditions.append(Actor.age >= actor_filter.age_min)
+        if actor_filter.age_max is not None:
+            conditions.append(Actor.age <= actor_filter.age_max)
+        if actor_filter.height_min is not None:
+            conditions.append(Actor.height >= actor_filter.height_min)
+        if actor_filter.height_max is not None:
+            conditions.append(Actor.height <= actor_filter.height_max)
+        if actor_filter.tag_id is not None:
+            conditions.append(exists().where(
+                actor_tag.c.actor_id == Actor.id,
+                actor_tag.c.tag_id == actor_filter.tag_id
+            ))
+        if actor_filter.agent_id is not None or actor_filter.contract_end_before is not None:
+            contract_conditions = [ActorContractInfo.actor_id == Actor.id]
+            if actor_filter.agent_id is not None:
+                contract_conditions.append(ActorContractInfo.agent_id == actor_filter.agent_id)
+            if actor_filter.contract_end_before is not None:
+                contract_conditions.append(ActorContractInfo.contract_end_date < actor_filter.contract_end_before)
+            conditions.append(exists().where(*contract_conditions))
+
+    if current_user is not None and current_user.role == "manager":
+        conditions.append(exists().where(
+            ActorContractInfo.actor_id == Actor.id,
+            ActorContractInfo.agent_id == current_user.id
+        ))
+
+    return conditions
@@ -0,0 +1,7 @@
+from fastapi import APIRouter
+from app.api.v1.endpoints.media import images
+
+router = APIRouter()
+
+# 注册按需缩放图片API
+router.include_router(images.router, tags=["媒体图片"])
@@ -0,0 +1,152 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import FileResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+import asyncio
+import logging
+import os
+import weakref
+
+from app.api.v1.dependencies import get_current_user_optional
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.models.media import ActorMedia
+from app.models.user import User
+from app.utils.file_utils import resize_image
+from app.utils.image_cache import DiskLRUCache
+from app.utils.image_processing import RESIZE_FORMATS, supported_variant_formats
+from app.utils.storage_backends import get_storage_backend, ObjectNotFound
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+RESIZE_FITS = ['contain', 'cover', 'fill']
+FORMAT_MIME_TYPES = {
+    'jpeg': 'image/jpeg',
+    'webp': 'image/webp',
+    'avif': 'image/avif',
+    'png': 'image/png',
+}
+# 缩放结果由媒体ID和参数唯一确定，内容不会变化；未公开的图片不允许共享缓存保存
+PUBLIC_CACHE_CONTROL = "public, max-age=31536000, immutable"
+PRIVATE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+# 缩放结果和从MinIO下载的原图共用一个磁盘LRU缓存
+_image_cache = DiskLRUCache(os.path.join(settings.MEDIA_ROOT, "cache", "img"), settings.IMAGE_CACHE_MAX_BYTES)
+
+# 同一个缓存键同时只生成一次，避免并发请求重复下载和缩放
+_key_locks = weakref.WeakValueDictionary()
+
+
+@router.get("/img/{media_id}")
+async def get_resized_image(
+    media_id: int,
+    request: Request,
+    w: Optional[int] = Query(None, ge=1, description="宽度(px)"),
+    h: Optional[int] = Query(None, ge=1, description="高度(px)"),
+    fit: str = Query("contain", description="缩放方式: contain/cover/fill"),
+    fmt: str = Query("jpeg", description="输出格式: jpeg/webp/png，服务器支持时可用avif"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Optional[User] = Depends(get_current_user_optional)
+):
+    """
+    按需缩放图片
+    
+    用于预生成变体未覆盖的尺寸。首次请求时从MinIO获取原图并在图片进程池中缩放，
+    结果保存在磁盘LRU缓存中，之后的相同请求直接从本地缓存发送文件
+    """
+    if not w and not h:
+        raise HTTPException(status_code=400, detail="至少需要指定宽度或高度")
+    if (w or 0) > settings.IMAGE_RESIZE_MAX_DIMENSION or (h or 0) > settings.IMAGE_RESIZE_MAX_DIMENSION:
+        raise HTTPException(status_code=400, detail=f"尺寸不能超过{settings.IMAGE_RESIZE_MAX_DIMENSION}px")
+    if fit not in RESIZE_FITS:
+        raise HTTPException(status_code=400, detail=f"不支持的缩放方式，仅支持: {', '.join(RESIZE_FITS)}")
+    if fmt != 'png' and fmt not in supported_variant_formats([fmt]):
+        raise HTTPException(status_code=400, detail=f"不支持的图片格式: {fmt}")
+    
+    media = await db.scalar(select(ActorMedia).where(ActorMedia.id == media_id))
+    if not media or media.type not in ('photo', 'avatar'):
+        raise HTTPException(status_code=404, detail="图片不存在")
+    if not media.is_public and current_user is None:
+        raise HTTPException(status_code=403, detail="该图片未公开")
+    
+    ext = RESIZE_FORMATS[fmt][1]
+    key = DiskLRUCache.make_key(media.id, media.object_name or media.file_path, w, h, fit, fmt, settings.IMAGE_VARIANT_QUALITY)
+    etag = f'"{key[:32]}"'
+    headers = {
+        "Cache-Control": PUBLIC_CACHE_CONTROL if media.is_public else PRIVATE_CACHE_CONTROL,
+        "ETag": etag
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    
+    path = _image_cache.get(key, ext)
+    if path is None:
+        async with _key_lock(key):
+            path = _image_cache.get(key, ext)
+            if path is None:
+                original_path = await _get_original(media)
+                temp_path = _image_cache.temp_path_for(key, ext)
+                try:
+                    await resize_image(original_path, temp_path, w, h, fit, fmt, settings.IMAGE_VARIANT_QUALITY)
+                except Exception as e:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+                    logger.error(f"缩放图片失败: 媒体ID={media_id}, 错误={str(e)}")
+                    raise HTTPException(status_code=422, detail=f"图片处理失败: {str(e)}")
+                path = await asyncio.to_thread(_image_cache.commit, key, ext, temp_path)
+    
+    # FileResponse在服务器支持时使用零拷贝方式发送文件
+    return FileResponse(path, media_type=FORMAT_MIME_TYPES[fmt], headers=headers)
+
+
+def _key_lock(key: str) -> asyncio.Lock:
+    lock = _key_locks.get(key)
+    if lock is None:
+        lock = asyncio.Lock()
+        _key_locks[key] = lock
+    return lock
+
+
+async def _get_original(media: ActorMedia) -> str:
+    """获取原图的本地路径，本地存储后端直接使用存储的文件，其他后端的原图只下载一次并保存在缓存中"""
+    source = media.object_name or media.file_path
+    ext = os.path.splitext(source)[1].lstrip('.').lower() or 'img'
+    
+    if not (media.bucket_name and media.object_name):
+        # 本地存储的文件，URL形如 /media/photos/...
+        media_url = f"{settings.MEDIA_URL}/"
+        if media.file_path and media.file_path.startswith(media_url):
+            local_path = os.path.join(settings.MEDIA_ROOT, media.file_path[len(media_url):])
+            if os.path.exists(local_path):
+                return local_path
+        raise HTTPException(status_code=404, detail="原图不存在")
+    
+    backend = get_storage_backend()
+    local_path = backend.local_path(media.bucket_name, media.object_name)
+    if local_path:
+        return local_path
+    
+    key = DiskLRUCache.make_key("original", media.id, media.object_name)
+    path = _image_cache.get(key, ext)
+    if path:
+        return path
+    
+    async with _key_lock(key):
+        path = _image_cache.get(key, ext)
+        if path:
+            return path
+        
+        temp_path = _image_cache.temp_path_for(key, ext)
+        try:
+            await backend.get_file(media.bucket_name, media.object_name, temp_path)
+        except Exception as e:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            if isinstance(e, ObjectNotFound):
+                raise HTTPException(status_code=404, detail="原图不存在")
+            logger.error(f"从存储获取原图失败: 媒体ID={media.id}, 错误={str(e)}")
+            raise HTTPException(status_code=502, detail="获取原图失败")
+        return await asyncio.to_thread(_image_cache.commit, key, ext, temp_path)
@@ -65,13 +65,10 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
     # 演员角色自动创建关联的演员资料
     if user.role == "performer":
         from app.models.actor import Actor, ActorProfessionalInfo, ActorContactInfo
-        import uuid
-        import datetime
+        from app.core.id_generator import generate_actor_id
         
         # 生成唯一ID
-        current_date = datetime.datetime.now().strftime('%Y%m%d')
-        random_str = str(uuid.uuid4())[:8]  # 取前8位作为随机字符
-        actor_id = f"AC{current_date}{random_str}"
+        actor_id = generate_actor_id()
         
         # 创建基本演员信息
         db_actor = Actor(
@@ -1,13 +1,18 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
+from typing import List, Optional
 import datetime
 import psutil
 import platform
 
 from app.core.config import settings
-from app.core.database import get_db
-from app.core.storage import get_minio_client
+from app.core.database import get_async_db
+from app.core.storage import storage_metrics
+from app.utils.storage_backends import get_storage_backend
+from app.utils import storage_reconcile
+from app.api.v1.dependencies import get_current_admin
+from app.models.user import User
 
 router = APIRouter()
 
@@ -53,7 +58,7 @@ async def get_system_info():
 
 
 @router.get("/health-check")
-async def health_check(db: Session = Depends(get_db)):
+async def health_check(db: AsyncSession = Depends(get_async_db)):
     """
     系统健康检查
     检查数据库和存储服务是否正常
@@ -71,7 +76,7 @@ async def health_check(db: Session = Depends(get_db)):
     # 检查数据库连接
     try:
         # 执行一个简单查询
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         health_status["services"]["database"] = {
             "status": "up",
             "message": "数据库连接正常"
@@ -83,13 +88,13 @@ async def health_check(db: Session = Depends(get_db)):
             "message": f"数据库连接失败: {str(e)}"
         }
     
-    # 检查MinIO存储服务
+    # 检查存储后端
     try:
-        minio_client = get_minio_client()
-        bucket_exists = minio_client.bucket_exists(settings.MINIO_BUCKET)
+        backend = get_storage_backend()
         health_status["services"]["storage"] = {
             "status": "up",
-            "message": f"存储服务连接正常，存储桶{settings.MINIO_BUCKET}{'存在' if bucket_exists else '不存在'}"
+            "backend": backend.name,
+            "message": await backend.check()
         }
     except Exception as e:
         health_status["status"] = "degraded"
@@ -107,4 +112,83 @@ async def health_check(db: Session = Depends(get_db)):
         "data": health_status,
         "timestamp": datetime.datetime.now().isoformat(),
         "request_id": "health_check_request"
-    } 
\ No newline at end of file
+    }
+
+
+@router.get("/storage-metrics")
+async def get_storage_metrics(current_user: User = Depends(get_current_admin)):
+    """
+    对象存储请求统计
+    按操作类型（put_object、stat_object、upload_file等）返回自进程启动以来的请求次数、错误数和耗时(毫秒)，
+    upload_file 为一次文件上传的总耗时，其余为单个S3请求的耗时
+    """
+    return {
+        "code": 200,
+        "message": "success",
+        "data": {
+            "pool_size": settings.MINIO_POOL_SIZE,
+            "operations": storage_metrics.snapshot()
+        },
+        "timestamp": datetime.datetime.now().isoformat(),
+        "request_id": "storage_metrics_request"
+    }
+
+
+@router.post("/storage-reconcile", status_code=status.HTTP_202_ACCEPTED)
+async def reconcile_storage(
+    background_tasks: BackgroundTasks,
+    bucket: Optional[List[str]] = Query(None, description="只对账指定的存储桶，默认为媒体存储桶和暂存存储桶"),
+    delete_orphans: bool = Query(False, description="删除孤立对象和临时文件，默认只报告"),
+    delete_dangling: bool = Query(False, description="删除引用已不存在对象的媒体记录"),
+    max_objects: Optional[int] = Query(None, ge=1, le=1000000, description="每个存储桶本次最多检查的对象数"),
+    restart: bool = Query(False, description="忽略检查点，从头开始"),
+    current_user: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    存储与数据库对账
+    在后台从上次的检查点继续，按对象键顺序检查存储桶中的对象和 actor_media 记录，报告孤立对象（没有记录引用）
+    和悬空记录（对象已不存在）。立即返回202，进度和结果由 GET /storage-reconcile 查询，
+    结果中 completed 为false时再次调用继续下一批。孤立对象写入删除日志后由后台清理协程删除。需要管理员权限
+    """
+    buckets = bucket or storage_reconcile.reconcile_buckets()
+    if storage_reconcile.is_running() or await storage_reconcile.locked_buckets(db, buckets):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="存储对账正在进行中"
+        )
+    
+    params = {
+        "buckets": buckets,
+        "delete_orphans": delete_orphans,
+        "delete_dangling": delete_dangling,
+        "max_objects": max_objects,
+        "restart": restart
+    }
+    run = storage_reconcile.start_run(params)
+    background_tasks.add_task(storage_reconcile.run_in_background, **params)
+    return {
+        "code": 202,
+        "message": "存储对账已开始",
+        "data": run,
+        "timestamp": datetime.datetime.now().isoformat(),
+        "request_id": "storage_reconcile_request"
+    }
+
+
+@router.get("/storage-reconcile")
+async def get_reconcile_status(
+    current_user: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    存储对账的状态
+    返回本进程最近一次后台对账的状态和报告，以及各存储桶的检查点（running 表示有进程正在对账该存储桶）。需要管理员权限
+    """
+    return {
+        "code": 200,
+        "message": "success",
+        "data": await storage_reconcile.reconcile_status(db),
+        "timestamp": datetime.datetime.now().isoformat(),
+        "request_id": "storage_reconcile_status_request"
+    }
@@ -1,6 +1,6 @@
 import os
 from pydantic_settings import BaseSettings
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pathlib import Path
 
 
@@ -22,6 +22,10 @@ class Settings(BaseSettings):
     MYSQL_PORT: str = "3306"
     MYSQL_DB: str = "actors_management"
     DATABASE_URI: Optional[str] = None
+    ASYNC_DATABASE_URI: Optional[str] = None
+    
+    # 媒体文件存储后端: minio（对象存储）、local（本地文件系统，单节点部署）、memory（进程内存，测试用）
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "minio")
     
     # MinIO设置
     MINIO_ROOT_USER: str = "minioadmin"
@@ -30,6 +34,17 @@ class Settings(BaseSettings):
     MINIO_BUCKET: str = "actors-media"
     MINIO_EXTERNAL_URL: str = os.getenv("MINIO_EXTERNAL_URL", "http://localhost:9000")  # 外部访问URL
     MINIO_DATA_DIR: Path = Path(os.getenv("MINIO_DATA_DIR", "./minio_data"))  # MinIO数据存储路径
+    MINIO_REGION: str = "us-east-1"  # 签发预签名请求时使用的区域
+    MINIO_UPLOAD_BUCKET: str = "actor-uploads"  # 客户端直传的暂存存储桶
+    # MinIO连接池：每个主机保持的连接数、连接/读取超时(秒)和失败重试次数（连接错误和5xx响应）
+    MINIO_POOL_SIZE: int = 32
+    MINIO_CONNECT_TIMEOUT: float = 5.0
+    MINIO_READ_TIMEOUT: float = 60.0
+    MINIO_MAX_RETRIES: int = 3
+    STORAGE_IO_WORKERS: int = 0  # 执行阻塞存储请求的线程数，0表示与MINIO_POOL_SIZE相同
+    PRESIGNED_UPLOAD_EXPIRES: int = 3600  # 预签名上传表单的有效期(秒)
+    UPLOAD_PART_SIZE: int = 8 * 1024 * 1024  # 续传上传拼接的MinIO分片大小，不能小于5MB
+    UPLOAD_SESSION_EXPIRES: int = 24 * 3600  # 续传上传会话的有效期(秒)
     
     # 系统信息
     SYSTEM_INFO: dict = {
@@ -49,9 +64,76 @@ class Settings(BaseSettings):
     # 允许的最大文件大小（字节）
     MAX_UPLOAD_SIZE: int = 100 * 1024 * 1024  # 100MB
     
+    # 一次请求上传多个文件时，同时处理的文件数
+    UPLOAD_CONCURRENCY: int = 4
+    
+    # 演员ID分配器每次从id_counters表预留的号段大小
+    ACTOR_ID_BLOCK_SIZE: int = 100
+    
+    # 图片处理进程池大小，0表示使用CPU核数
+    IMAGE_PROCESS_WORKERS: int = 0
+    
+    # 上传照片压缩后长边的最大像素，超过时缩小（JPEG可按比例缩小解码），0表示保持原尺寸
+    IMAGE_MAX_DIMENSION: int = 4096
+    
+    # 响应式图片变体：宽度阶梯(px)、输出格式和质量，格式可加入"avif"（需Pillow支持AVIF编码）
+    IMAGE_VARIANT_WIDTHS: List[int] = [160, 320, 640, 1280]
+    IMAGE_VARIANT_FORMATS: List[str] = ["webp", "jpeg"]
+    IMAGE_VARIANT_QUALITY: int = 80
+    
+    # 按需缩放图片接口：磁盘缓存容量上限(字节)和允许的最大尺寸(px)
+    IMAGE_CACHE_MAX_BYTES: int = 1024 * 1024 * 1024  # 1GB
+    IMAGE_RESIZE_MAX_DIMENSION: int = 4096
+    
+    # 视频转码：HLS档位(高度px)及对应的视频码率(kbps)、分段时长(秒)和单个视频的转码超时(秒)，
+    # 转码在媒体任务中进行，处理期间任务锁定时间会定期刷新，不受 MEDIA_JOB_LOCK_TIMEOUT 限制
+    VIDEO_HLS_RENDITIONS: List[int] = [360, 720]
+    VIDEO_HLS_BITRATES: Dict[str, int] = {"360": 800, "480": 1400, "720": 2800, "1080": 5000}
+    VIDEO_HLS_SEGMENT_SECONDS: int = 6
+    VIDEO_TRANSCODE_TIMEOUT: int = 420
+    # 拖动预览雪碧图：截帧间隔(秒)、每行帧数、每帧宽度(px)和最多帧数
+    VIDEO_SPRITE_INTERVAL: int = 5
+    VIDEO_SPRITE_COLUMNS: int = 10
+    VIDEO_SPRITE_TILE_WIDTH: int = 160
+    VIDEO_SPRITE_MAX_FRAMES: int = 100
+    
+    # 媒体流式读取接口（支持Range）每次从存储读取并转发的分块大小(字节)
+    MEDIA_STREAM_CHUNK_SIZE: int = 256 * 1024
+    
+    # 媒体列表分页：默认每页数量和允许的最大每页数量
+    MEDIA_PAGE_SIZE: int = 50
+    MEDIA_PAGE_SIZE_MAX: int = 200
+    
+    # 照片近似重复检测：感知哈希汉明距离不超过该值(0-64)视为近似重复
+    PHASH_DUPLICATE_THRESHOLD: int = 6
+    
+    # 媒体后台处理任务
+    MEDIA_JOB_WORKERS: int = 2  # 应用内工作协程数，0表示不在API进程中处理任务
+    MEDIA_JOB_MAX_ATTEMPTS: int = 3  # 最大尝试次数
+    MEDIA_JOB_RETRY_DELAY: int = 30  # 首次重试延迟(秒)，之后按指数退避
+    MEDIA_JOB_POLL_INTERVAL: float = 2.0  # 空闲时轮询任务表的间隔(秒)
+    MEDIA_JOB_LOCK_TIMEOUT: int = 600  # 处理中的任务超过该时间(秒)视为中断，可被重新领取
+    MEDIA_JOB_SWEEP_INTERVAL: int = 300  # 清理过期直传任务和续传会话的间隔(秒)
+    
+    # 存储对象的后台删除（storage_deletions日志）
+    STORAGE_DELETION_ENABLED: bool = True  # 是否在API进程中运行清理协程
+    STORAGE_DELETION_BATCH_SIZE: int = 500  # 每批删除的对象数
+    STORAGE_DELETION_RETRY_DELAY: int = 30  # 首次重试延迟(秒)，之后按指数退避
+    STORAGE_DELETION_MAX_DELAY: int = 3600  # 重试延迟的上限(秒)，失败的对象会一直重试
+    STORAGE_DELETION_POLL_INTERVAL: float = 10.0  # 空闲时轮询日志表的间隔(秒)
+    STORAGE_DELETION_LEASE: int = 300  # 领取一批对象后，其他进程在该时间(秒)内不会再次领取
+    
+    # 存储对账（孤立对象和悬空记录）
+    STORAGE_RECONCILE_BUCKETS: List[str] = ["actor-avatars", "actor-photos", "actor-videos"]  # 与actor_media对账的存储桶
+    STORAGE_RECONCILE_PAGE_SIZE: int = 1000  # 每批列举的对象数，每批完成后保存检查点
+    STORAGE_RECONCILE_MAX_OBJECTS: int = 100000  # 每次运行每个存储桶最多检查的对象数
+    STORAGE_RECONCILE_LOCK_TIMEOUT: int = 600  # 对账锁定超过该时间(秒)未刷新视为中断，可被重新锁定
+    STORAGE_RECONCILE_GRACE_PERIOD: int = 86400  # 最近该时间(秒)内修改的对象、创建的记录和临时文件不处理
+    
     def __init__(self, **data):
         super().__init__(**data)
         self.DATABASE_URI = f"mysql+pymysql://{self.MYSQL_USER}:{self.MYSQL_PASSWORD}@{self.MYSQL_HOST}:{self.MYSQL_PORT}/{self.MYSQL_DB}"
+        self.ASYNC_DATABASE_URI = f"mysql+aiomysql://{self.MYSQL_USER}:{self.MYSQL_PASSWORD}@{self.MYSQL_HOST}:{self.MYSQL_PORT}/{self.MYSQL_DB}"
 
     class Config:
         case_sensitive = True
@@ -0,0 +1,94 @@
+"""
+基于id_counters表的分段ID分配器（hi/lo算法）
+
+每个工作进程通过一次行锁从id_counters表预留一段连续的号码，之后在内存中依次分配，
+号码用完后再预留下一段。生成的ID整体单调递增，插入时落在聚簇索引的末尾，
+避免随机ID造成的页分裂和索引碎片。进程退出时未用完的号码会被丢弃，ID可能不连续。
+"""
+import datetime
+import logging
+import threading
+from typing import List, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.user import IDCounter
+
+logger = logging.getLogger(__name__)
+
+
+class IDBlockAllocator:
+    """分段ID分配器，线程安全"""
+
+    def __init__(self, counter_key: str, block_size: int, initial_value: int = 0):
+        self.counter_key = counter_key
+        self.block_size = block_size
+        self.initial_value = initial_value
+        self._lock = threading.Lock()
+        self._next_value = 0
+        self._block_end = 0  # 当前号段的结束值（不包含）
+
+    def allocate(self, count: int = 1) -> List[int]:
+        """分配count个单调递增的号码"""
+        values = []
+        with self._lock:
+            while len(values) < count:
+                if self._next_value >= self._block_end:
+                    # 批量导入等一次需要大量号码时，直接预留足够大的号段
+                    size = max(self.block_size, count - len(values))
+                    self._next_value, self._block_end = self._reserve_block(size)
+                
+                take = min(count - len(values), self._block_end - self._next_value)
+                values.extend(range(self._next_value, self._next_value + take))
+                self._next_value += take
+        return values
+
+    def _reserve_block(self, size: int) -> Tuple[int, int]:
+        """在独立事务中锁定计数器行并预留一段号码，返回 (起始值, 结束值)"""
+        db = SessionLocal()
+        try:
+            counter = self._lock_counter(db)
+            start = counter.current_value + 1
+            counter.current_value += size
+            db.commit()
+            logger.info(f"预留ID号段: {self.counter_key} [{start}, {start + size})")
+            return start, start + size
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _lock_counter(self, db) -> IDCounter:
+        query = select(IDCounter).where(IDCounter.counter_key == self.counter_key).with_for_update()
+        counter = db.execute(query).scalar_one_or_none()
+        if counter is not None:
+            return counter
+        
+        # 计数器不存在时创建，并发创建冲突时重新读取
+        try:
+            db.add(IDCounter(counter_key=self.counter_key, current_value=self.initial_value))
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+        return db.execute(query).scalar_one()
+
+
+# 演员ID分配器，初始值与init_database.py中的种子数据保持一致
+actor_id_allocator = IDBlockAllocator("actor", settings.ACTOR_ID_BLOCK_SIZE, initial_value=10000)
+
+
+def generate_actor_ids(count: int) -> List[str]:
+    """
+    批量生成演员ID: AC + 年月日 + 8位递增序号
+    """
+    current_date = datetime.datetime.now().strftime('%Y%m%d')
+    return [f"AC{current_date}{value:08d}" for value in actor_id_allocator.allocate(count)]
+
+
+def generate_actor_id() -> str:
+    """生成单个演员ID"""
+    return generate_actor_ids(1)[0]
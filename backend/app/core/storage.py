@@ -1,31 +1,274 @@
+"""
+对象存储（MinIO）客户端
+
+整个进程共用一个MinIO客户端和它的urllib3连接池，首次使用时创建，导入本模块时不连接MinIO。
+- 连接池大小、连接/读取超时和重试次数由 MINIO_POOL_SIZE、MINIO_*_TIMEOUT、MINIO_MAX_RETRIES 配置，
+  连接开启TCP keep-alive，空闲连接在请求之间复用
+- 指定了区域，签名请求前不需要向服务器查询存储桶所在区域
+- 已确认存在的存储桶缓存在内存中，上传时不再每次调用 bucket_exists
+- 每个S3请求按操作类型记录次数、错误数和耗时，通过 storage_metrics.snapshot() 查看
+
+minio客户端的请求都是阻塞的，异步代码通过 run_storage_io 或下面的异步函数（stat_object、
+get_object、fget_object、remove_object等）在专用的存储线程池中执行，不阻塞事件循环，
+也不占用 asyncio.to_thread 的默认线程池。线程数默认与连接池大小相同，每个线程都能拿到连接。
+"""
+import asyncio
+import functools
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Iterable, List
+from urllib.parse import urlsplit, parse_qs
+
+import urllib3
+from urllib3.connection import HTTPConnection
 from minio import Minio
+from minio.deleteobjects import DeleteObject
 from minio.error import S3Error
+
 from app.core.config import settings
-import logging
 
 logger = logging.getLogger(__name__)
 
-try:
-    # 初始化MinIO客户端
-    minio_client = Minio(
+_client = None
+_client_lock = threading.Lock()
+
+# 存储线程池，首次使用时创建
+_executor = None
+_executor_lock = threading.Lock()
+
+# 已确认存在的存储桶
+_known_buckets = set()
+_buckets_lock = threading.Lock()
+
+# make_bucket 时表示存储桶已经存在的错误码（并发创建时可能出现）
+BUCKET_EXISTS_CODES = ("BucketAlreadyOwnedByYou", "BucketAlreadyExists")
+
+
+class StorageMetrics:
+    """按操作类型统计的存储请求次数、错误数和耗时，线程安全"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, operation: str, seconds: float, ok: bool = True):
+        with self._lock:
+            stats = self._stats.setdefault(operation, {"count": 0, "errors": 0, "total": 0.0, "max": 0.0})
+            stats["count"] += 1
+            stats["total"] += seconds
+            stats["max"] = max(stats["max"], seconds)
+            if not ok:
+                stats["errors"] += 1
+
+    @contextmanager
+    def timed(self, operation: str):
+        """记录一段代码的耗时，抛出异常时计为错误"""
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.record(operation, time.perf_counter() - start, ok)
+
+    def snapshot(self) -> dict:
+        """各操作的次数、错误数、总耗时、平均耗时和最大耗时（毫秒）"""
+        with self._lock:
+            return {
+                operation: {
+                    "count": stats["count"],
+                    "errors": stats["errors"],
+                    "total_ms": round(stats["total"] * 1000, 2),
+                    "avg_ms": round(stats["total"] * 1000 / stats["count"], 2),
+                    "max_ms": round(stats["max"] * 1000, 2),
+                }
+                for operation, stats in sorted(self._stats.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+storage_metrics = StorageMetrics()
+
+
+def _operation_name(method: str, url: str) -> str:
+    """由S3请求的方法、路径和查询参数得到操作名"""
+    parts = urlsplit(url)
+    query = parse_qs(parts.query, keep_blank_values=True)
+    is_object = "/" in parts.path.strip("/")
+
+    if "location" in query:
+        return "get_bucket_location"
+    if "policy" in query:
+        return "get_bucket_policy" if method == "GET" else "set_bucket_policy"
+    if "delete" in query:
+        return "remove_objects"
+    if "uploads" in query:
+        return "create_multipart_upload"
+    if "partNumber" in query:
+        return "upload_part"
+    if "uploadId" in query:
+        return {"POST": "complete_multipart_upload", "DELETE": "abort_multipart_upload"}.get(method, "list_parts")
+    if is_object:
+        return {"GET": "get_object", "PUT": "put_object", "HEAD": "stat_object", "DELETE": "remove_object"}.get(method, method.lower())
+    return {"HEAD": "bucket_exists", "PUT": "make_bucket", "GET": "list_objects", "DELETE": "remove_bucket"}.get(method, method.lower())
+
+
+class _InstrumentedPoolManager(urllib3.PoolManager):
+    """记录每个S3请求耗时的连接池；流式读取的请求（get_object）只计到响应头返回为止，包含重试"""
+
+    def urlopen(self, method, url, redirect=True, **kw):
+        start = time.perf_counter()
+        ok = False
+        try:
+            response = super().urlopen(method, url, redirect=redirect, **kw)
+            ok = response.status < 500
+            return response
+        finally:
+            storage_metrics.record(_operation_name(method, url), time.perf_counter() - start, ok)
+
+
+def _create_client() -> Minio:
+    http_client = _InstrumentedPoolManager(
+        maxsize=settings.MINIO_POOL_SIZE,
+        timeout=urllib3.Timeout(connect=settings.MINIO_CONNECT_TIMEOUT, read=settings.MINIO_READ_TIMEOUT),
+        # 5xx重试用尽后返回最后一次的响应，由minio按响应内容抛出S3Error等异常，而不是urllib3的MaxRetryError；
+        # 连接失败重试用尽时仍抛出MaxRetryError
+        retries=urllib3.Retry(
+            total=settings.MINIO_MAX_RETRIES,
+            backoff_factor=0.2,
+            status_forcelist=[500, 502, 503, 504],
+            raise_on_status=False
+        ),
+        socket_options=HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    )
+    return Minio(
         settings.MINIO_URL,
         access_key=settings.MINIO_ROOT_USER,
         secret_key=settings.MINIO_ROOT_PASSWORD,
-        secure=False  # 本地开发环境通常不使用HTTPS
+        secure=False,  # 本地开发环境通常不使用HTTPS
+        region=settings.MINIO_REGION,
+        http_client=http_client
     )
-    
-    # 检查存储桶是否存在，如果不存在则创建
-    if not minio_client.bucket_exists(settings.MINIO_BUCKET):
-        minio_client.make_bucket(settings.MINIO_BUCKET)
-        logger.info(f"创建存储桶: {settings.MINIO_BUCKET}")
-    
-    logger.info("MinIO存储服务连接成功")
-    
-except S3Error as e:
-    logger.error(f"MinIO存储服务连接失败: {e}")
-    raise e
-
-
-def get_minio_client():
-    """获取MinIO客户端"""
-    return minio_client 
\ No newline at end of file
+
+
+def get_minio_client() -> Minio:
+    """获取进程共用的MinIO客户端，首次调用时创建"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _create_client()
+                logger.info(f"MinIO客户端已创建: {settings.MINIO_URL}, 连接池大小: {settings.MINIO_POOL_SIZE}")
+    return _client
+
+
+def ensure_bucket(bucket_name: str):
+    """确保存储桶存在，不存在时创建；确认过的存储桶不再向服务器查询"""
+    if bucket_name in _known_buckets:
+        return
+    client = get_minio_client()
+    if not client.bucket_exists(bucket_name):
+        try:
+            client.make_bucket(bucket_name)
+            logger.info(f"创建存储桶: {bucket_name}")
+        except S3Error as e:
+            if e.code not in BUCKET_EXISTS_CODES:
+                raise
+    with _buckets_lock:
+        _known_buckets.add(bucket_name)
+
+
+def forget_bucket(bucket_name: str):
+    """存储桶在外部被删除（请求返回NoSuchBucket）后清除缓存，下次使用时重新检查"""
+    with _buckets_lock:
+        _known_buckets.discard(bucket_name)
+
+
+def get_storage_executor() -> ThreadPoolExecutor:
+    """获取存储线程池，首次调用时创建"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = settings.STORAGE_IO_WORKERS or settings.MINIO_POOL_SIZE
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="storage-io")
+    return _executor
+
+
+def shutdown_storage_executor():
+    """关闭存储线程池（应用关闭时调用）"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+async def run_storage_io(func, *args, **kwargs):
+    """在存储线程池中执行阻塞的存储调用"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_storage_executor(), functools.partial(func, *args, **kwargs))
+
+
+async def bucket_exists(bucket_name: str) -> bool:
+    return await run_storage_io(get_minio_client().bucket_exists, bucket_name)
+
+
+async def stat_object(bucket_name: str, object_name: str):
+    return await run_storage_io(get_minio_client().stat_object, bucket_name, object_name)
+
+
+async def get_object(bucket_name: str, object_name: str, offset: int = 0, length: int = 0):
+    """返回未读取内容的响应对象，读取完后需要调用 close() 和 release_conn()"""
+    return await run_storage_io(get_minio_client().get_object, bucket_name, object_name, offset=offset, length=length)
+
+
+async def fget_object(bucket_name: str, object_name: str, file_path: str):
+    return await run_storage_io(get_minio_client().fget_object, bucket_name, object_name, file_path)
+
+
+async def remove_object(bucket_name: str, object_name: str):
+    await run_storage_io(get_minio_client().remove_object, bucket_name, object_name)
+
+
+async def remove_objects(bucket_name: str, object_names: Iterable[str]) -> List[str]:
+    """
+    批量删除多个对象（S3 DeleteObjects，每个请求最多1000个对象），返回删除失败的对象名
+
+    不存在的对象视为删除成功；单个对象删除失败不影响其他对象，失败原因记录在日志中
+    """
+    object_names = list(object_names)
+    if not object_names:
+        return []
+    return await run_storage_io(_remove_objects, bucket_name, object_names)
+
+
+def _remove_objects(bucket_name: str, object_names: List[str]) -> List[str]:
+    # remove_objects 返回惰性迭代器，迭代时才发送请求，只产生删除失败的对象
+    errors = get_minio_client().remove_objects(bucket_name, (DeleteObject(name) for name in object_names))
+    failed = []
+    try:
+        for error in errors:
+            if error.code == "NoSuchKey":
+                continue
+            logger.error(f"删除MinIO文件失败: {bucket_name}/{error.name}, 错误: {error.code} {error.message}")
+            failed.append(error.name)
+    except S3Error as e:
+        # 存储桶不存在时其中的对象也不存在
+        if e.code != "NoSuchBucket":
+            raise
+    return failed
+
+
+def __getattr__(name):
+    # 兼容 from app.core.storage import minio_client 的写法，访问时才创建客户端
+    if name == "minio_client":
+        return get_minio_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
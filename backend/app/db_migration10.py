@@ -0,0 +1,103 @@
+import logging
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def run_migrations():
+    """运行数据库迁移脚本 - 添加相册字段、相册表和媒体列表分页索引"""
+    try:
+        # 构建数据库URL
+        database_url = f"mysql+pymysql://{settings.MYSQL_USER}:{settings.MYSQL_PASSWORD}@{settings.MYSQL_HOST}:{settings.MYSQL_PORT}/{settings.MYSQL_DB}"
+        engine = create_engine(database_url)
+        conn = engine.connect()
+
+        logger.info("正在为媒体表添加album字段...")
+        try:
+            conn.execute(text("ALTER TABLE actor_media ADD COLUMN album VARCHAR(100) NULL COMMENT '照片所属相册或视频所属分类，对应media_albums.name' AFTER description;"))
+            conn.commit()
+            logger.info("album字段添加完成")
+        except Exception as e:
+            logger.warning(f"添加album字段时发生错误: {e}")
+
+        # 原来照片的相册和视频的分类保存在description中
+        logger.info("正在把description中的相册和分类复制到album字段...")
+        try:
+            result = conn.execute(text("UPDATE actor_media SET album = LEFT(TRIM(description), 100) WHERE type IN ('photo', 'video') AND album IS NULL AND description IS NOT NULL AND TRIM(description) <> '';"))
+            conn.commit()
+            logger.info(f"已更新{result.rowcount}条媒体记录")
+        except Exception as e:
+            logger.warning(f"复制相册和分类时发生错误: {e}")
+
+        # 没有相册或分类的媒体归入上传接口使用的默认相册和默认分类
+        logger.info("正在为没有相册的媒体设置默认相册...")
+        for media_type, default_album in [("photo", "默认相册"), ("video", "默认视频")]:
+            try:
+                result = conn.execute(
+                    text("UPDATE actor_media SET album = :album WHERE type = :type AND album IS NULL;"),
+                    {"album": default_album, "type": media_type}
+                )
+                conn.commit()
+                logger.info(f"已把{result.rowcount}条{media_type}记录归入{default_album}")
+            except Exception as e:
+                logger.warning(f"设置{media_type}默认相册时发生错误: {e}")
+
+        logger.info("正在创建媒体列表索引...")
+        for name, columns in [
+            ("ix_actor_media_listing", "actor_id, type, album, created_at"),
+            ("ix_actor_media_actor_created", "actor_id, created_at"),
+        ]:
+            try:
+                conn.execute(text(f"CREATE INDEX {name} ON actor_media ({columns});"))
+                conn.commit()
+                logger.info(f"索引{name}创建完成")
+            except Exception as e:
+                logger.warning(f"创建索引{name}时发生错误: {e}")
+
+        logger.info("正在创建相册表...")
+        try:
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS media_albums (
+                    id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+                    actor_id VARCHAR(20) NOT NULL,
+                    media_type ENUM('photo', 'video') NOT NULL,
+                    name VARCHAR(100) NOT NULL,
+                    sort_order INT NOT NULL DEFAULT 0 COMMENT '显示顺序，小的在前',
+                    cover_media_id INT NULL COMMENT '封面媒体，为空时使用相册中最新的媒体',
+                    created_at DATETIME NULL,
+                    updated_at DATETIME NULL,
+                    CONSTRAINT uq_media_albums_actor_type_name UNIQUE (actor_id, media_type, name),
+                    FOREIGN KEY (actor_id) REFERENCES actors(id) ON DELETE CASCADE,
+                    FOREIGN KEY (cover_media_id) REFERENCES actor_media(id) ON DELETE SET NULL
+                );
+            """))
+            conn.commit()
+            logger.info("相册表创建完成")
+        except Exception as e:
+            logger.warning(f"创建相册表时发生错误: {e}")
+
+        # 为已有的相册和分类创建相册记录，按首次上传时间排序
+        logger.info("正在为已有媒体创建相册记录...")
+        try:
+            result = conn.execute(text("""
+                INSERT IGNORE INTO media_albums (actor_id, media_type, name, sort_order, created_at, updated_at)
+                SELECT actor_id, type, album,
+                       ROW_NUMBER() OVER (PARTITION BY actor_id, type ORDER BY MIN(created_at), album),
+                       MIN(created_at), NOW()
+                FROM actor_media
+                WHERE type IN ('photo', 'video') AND album IS NOT NULL
+                GROUP BY actor_id, type, album;
+            """))
+            conn.commit()
+            logger.info(f"已创建{result.rowcount}个相册")
+        except Exception as e:
+            logger.warning(f"创建相册记录时发生错误: {e}")
+
+        conn.close()
+        logger.info("数据库迁移完成")
+    except Exception as e:
+        logger.error(f"数据库迁移失败: {e}")
+
+if __name__ == "__main__":
+    run_migrations()
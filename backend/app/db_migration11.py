@@ -0,0 +1,41 @@
+import logging
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def run_migrations():
+    """运行数据库迁移脚本 - 添加待删除存储对象日志表"""
+    try:
+        # 构建数据库URL
+        database_url = f"mysql+pymysql://{settings.MYSQL_USER}:{settings.MYSQL_PASSWORD}@{settings.MYSQL_HOST}:{settings.MYSQL_PORT}/{settings.MYSQL_DB}"
+        engine = create_engine(database_url)
+        conn = engine.connect()
+
+        logger.info("正在创建storage_deletions表...")
+        try:
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS storage_deletions (
+                    id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+                    bucket_name VARCHAR(100) NOT NULL,
+                    object_name VARCHAR(500) NOT NULL,
+                    attempts INT NOT NULL DEFAULT 0 COMMENT '已尝试删除的次数',
+                    last_error TEXT NULL COMMENT '最近一次删除失败的原因',
+                    available_at DATETIME NULL COMMENT '可以删除的时间，用于失败重试延迟',
+                    created_at DATETIME NULL,
+                    INDEX ix_storage_deletions_available (available_at)
+                );
+            """))
+            conn.commit()
+            logger.info("storage_deletions表创建完成")
+        except Exception as e:
+            logger.warning(f"创建storage_deletions表时发生错误: {e}")
+
+        conn.close()
+        logger.info("数据库迁移完成")
+    except Exception as e:
+        logger.error(f"数据库迁移失败: {e}")
+
+if __name__ == "__main__":
+    run_migrations()
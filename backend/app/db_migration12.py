@@ -0,0 +1,58 @@
+import logging
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def run_migrations():
+    """运行数据库迁移脚本 - 存储对账的对象键排序、索引和检查点表"""
+    try:
+        # 构建数据库URL
+        database_url = f"mysql+pymysql://{settings.MYSQL_USER}:{settings.MYSQL_PASSWORD}@{settings.MYSQL_HOST}:{settings.MYSQL_PORT}/{settings.MYSQL_DB}"
+        engine = create_engine(database_url)
+        conn = engine.connect()
+
+        # 对象键区分大小写，按字节排序后与对象存储的列举顺序一致，对账时才能归并
+        logger.info("正在修改object_name字段的排序规则...")
+        try:
+            conn.execute(text("ALTER TABLE actor_media MODIFY COLUMN object_name VARCHAR(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NULL COMMENT 'MinIO对象名称';"))
+            conn.commit()
+            logger.info("object_name字段修改完成")
+        except Exception as e:
+            logger.warning(f"修改object_name字段时发生错误: {e}")
+
+        logger.info("正在创建对象键索引...")
+        try:
+            conn.execute(text("CREATE INDEX ix_actor_media_bucket_object ON actor_media (bucket_name, object_name);"))
+            conn.commit()
+            logger.info("索引ix_actor_media_bucket_object创建完成")
+        except Exception as e:
+            logger.warning(f"创建索引ix_actor_media_bucket_object时发生错误: {e}")
+
+        logger.info("正在创建storage_reconcile_checkpoints表...")
+        try:
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS storage_reconcile_checkpoints (
+                    bucket_name VARCHAR(100) NOT NULL PRIMARY KEY,
+                    last_object_name VARCHAR(1024) NULL COMMENT '本轮已处理到的对象键，为空时从头开始',
+                    objects_scanned INT NOT NULL DEFAULT 0 COMMENT '本轮已检查的对象数',
+                    orphans_found INT NOT NULL DEFAULT 0 COMMENT '本轮发现的孤立对象数',
+                    dangling_found INT NOT NULL DEFAULT 0 COMMENT '本轮发现的悬空记录数',
+                    started_at DATETIME NULL COMMENT '本轮开始的时间',
+                    completed_at DATETIME NULL COMMENT '上一轮完成的时间',
+                    updated_at DATETIME NULL
+                );
+            """))
+            conn.commit()
+            logger.info("storage_reconcile_checkpoints表创建完成")
+        except Exception as e:
+            logger.warning(f"创建storage_reconcile_checkpoints表时发生错误: {e}")
+
+        conn.close()
+        logger.info("数据库迁移完成")
+    except Exception as e:
+        logger.error(f"数据库迁移失败: {e}")
+
+if __name__ == "__main__":
+    run_migrations()
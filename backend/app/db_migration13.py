@@ -0,0 +1,59 @@
+import logging
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def run_migrations():
+    """运行数据库迁移脚本 - 创建媒体后台处理任务表"""
+    try:
+        # 构建数据库URL
+        database_url = f"mysql+pymysql://{settings.MYSQL_USER}:{settings.MYSQL_PASSWORD}@{settings.MYSQL_HOST}:{settings.MYSQL_PORT}/{settings.MYSQL_DB}"
+        engine = create_engine(database_url)
+        conn = engine.connect()
+
+        # 包含db_migration6和db_migration8添加的字段：表不存在时那两个脚本的修改会失败，由这里一次建好；
+        # 表已存在时不做任何修改
+        logger.info("正在创建media_jobs表...")
+        try:
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS media_jobs (
+                    id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+                    actor_id VARCHAR(20) NOT NULL,
+                    job_type ENUM('photo', 'video') NOT NULL,
+                    status ENUM('awaiting_upload', 'pending', 'processing', 'completed', 'failed') NOT NULL DEFAULT 'pending',
+                    source_path VARCHAR(500) NULL COMMENT '待处理的原始文件路径',
+                    source_object VARCHAR(500) NULL COMMENT '客户端直传时暂存桶中的对象键，处理时下载到source_path',
+                    file_name VARCHAR(255) NULL COMMENT '上传时的原始文件名',
+                    file_size INT NULL COMMENT '文件大小(字节)',
+                    mime_type VARCHAR(100) NULL,
+                    content_hash VARCHAR(64) NULL COMMENT '原始文件内容的SHA-256',
+                    params TEXT NULL COMMENT '处理参数(JSON)',
+                    result TEXT NULL COMMENT '处理结果(JSON)',
+                    error TEXT NULL COMMENT '最近一次失败的错误信息',
+                    attempts INT NOT NULL DEFAULT 0 COMMENT '已尝试次数',
+                    media_id INT NULL,
+                    created_by INT NULL,
+                    available_at DATETIME NULL COMMENT '可被领取的时间，用于失败重试延迟',
+                    locked_at DATETIME NULL COMMENT '被工作进程领取的时间',
+                    created_at DATETIME NULL,
+                    updated_at DATETIME NULL,
+                    INDEX ix_media_jobs_status_available (status, available_at),
+                    CONSTRAINT fk_media_jobs_actor FOREIGN KEY (actor_id) REFERENCES actors (id) ON DELETE CASCADE,
+                    CONSTRAINT fk_media_jobs_media FOREIGN KEY (media_id) REFERENCES actor_media (id) ON DELETE SET NULL,
+                    CONSTRAINT fk_media_jobs_created_by FOREIGN KEY (created_by) REFERENCES users (id) ON DELETE SET NULL
+                );
+            """))
+            conn.commit()
+            logger.info("media_jobs表创建完成")
+        except Exception as e:
+            logger.warning(f"创建media_jobs表时发生错误: {e}")
+
+        conn.close()
+        logger.info("数据库迁移完成")
+    except Exception as e:
+        logger.error(f"数据库迁移失败: {e}")
+
+if __name__ == "__main__":
+    run_migrations()
@@ -0,0 +1,55 @@
+import logging
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def run_migrations():
+    """运行数据库迁移脚本 - 创建可续传上传会话表"""
+    try:
+        # 构建数据库URL
+        database_url = f"mysql+pymysql://{settings.MYSQL_USER}:{settings.MYSQL_PASSWORD}@{settings.MYSQL_HOST}:{settings.MYSQL_PORT}/{settings.MYSQL_DB}"
+        engine = create_engine(database_url)
+        conn = engine.connect()
+
+        # job_id 引用 media_jobs，需在db_migration13之后运行
+        logger.info("正在创建upload_sessions表...")
+        try:
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS upload_sessions (
+                    id VARCHAR(36) NOT NULL PRIMARY KEY COMMENT '上传会话ID(UUID)',
+                    actor_id VARCHAR(20) NOT NULL,
+                    media_type ENUM('photo', 'video') NOT NULL,
+                    status ENUM('uploading', 'completed', 'aborted') NOT NULL DEFAULT 'uploading',
+                    file_name VARCHAR(255) NULL COMMENT '上传时的原始文件名',
+                    mime_type VARCHAR(100) NULL,
+                    total_size INT NOT NULL COMMENT '文件总大小(字节)',
+                    `offset` INT NOT NULL DEFAULT 0 COMMENT '已接收的字节数',
+                    object_name VARCHAR(500) NOT NULL COMMENT '暂存桶中的对象键',
+                    multipart_upload_id VARCHAR(255) NULL COMMENT 'MinIO分片上传ID',
+                    parts TEXT NULL COMMENT '已上传的分片(JSON)，包含分片号、ETag和大小',
+                    params TEXT NULL COMMENT '处理参数(JSON)',
+                    job_id INT NULL COMMENT '上传完成后创建的处理任务',
+                    created_by INT NULL,
+                    expires_at DATETIME NOT NULL COMMENT '会话过期时间，过期后不能继续上传',
+                    created_at DATETIME NULL,
+                    updated_at DATETIME NULL,
+                    INDEX ix_upload_sessions_status_expires (status, expires_at),
+                    CONSTRAINT fk_upload_sessions_actor FOREIGN KEY (actor_id) REFERENCES actors (id) ON DELETE CASCADE,
+                    CONSTRAINT fk_upload_sessions_job FOREIGN KEY (job_id) REFERENCES media_jobs (id) ON DELETE SET NULL,
+                    CONSTRAINT fk_upload_sessions_created_by FOREIGN KEY (created_by) REFERENCES users (id) ON DELETE SET NULL
+                );
+            """))
+            conn.commit()
+            logger.info("upload_sessions表创建完成")
+        except Exception as e:
+            logger.warning(f"创建upload_sessions表时发生错误: {e}")
+
+        conn.close()
+        logger.info("数据库迁移完成")
+    except Exception as e:
+        logger.error(f"数据库迁移失败: {e}")
+
+if __name__ == "__main__":
+    run_migrations()
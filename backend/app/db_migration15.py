@@ -0,0 +1,35 @@
+import logging
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def run_migrations():
+    """运行数据库迁移脚本 - 存储对账检查点的锁定字段"""
+    try:
+        # 构建数据库URL
+        database_url = f"mysql+pymysql://{settings.MYSQL_USER}:{settings.MYSQL_PASSWORD}@{settings.MYSQL_HOST}:{settings.MYSQL_PORT}/{settings.MYSQL_DB}"
+        engine = create_engine(database_url)
+        conn = engine.connect()
+
+        # 需在db_migration12之后运行
+        logger.info("正在为storage_reconcile_checkpoints表添加锁定字段...")
+        for column, definition in [
+            ("locked_by", "VARCHAR(32) NULL COMMENT '正在对账的运行ID，为空时没有进行中的对账' AFTER completed_at"),
+            ("locked_at", "DATETIME NULL COMMENT '锁定时间，每批处理完成时刷新，超过 STORAGE_RECONCILE_LOCK_TIMEOUT 视为中断' AFTER locked_by"),
+        ]:
+            try:
+                conn.execute(text(f"ALTER TABLE storage_reconcile_checkpoints ADD COLUMN {column} {definition};"))
+                conn.commit()
+                logger.info(f"{column}字段添加完成")
+            except Exception as e:
+                logger.warning(f"添加{column}字段时发生错误: {e}")
+
+        conn.close()
+        logger.info("数据库迁移完成")
+    except Exception as e:
+        logger.error(f"数据库迁移失败: {e}")
+
+if __name__ == "__main__":
+    run_migrations()
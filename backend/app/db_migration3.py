@@ -0,0 +1,37 @@
+import logging
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def run_migrations():
+    """运行数据库迁移脚本 - 为演员标签关联表添加唯一约束"""
+    try:
+        # 构建数据库URL
+        database_url = f"mysql+pymysql://{settings.MYSQL_USER}:{settings.MYSQL_PASSWORD}@{settings.MYSQL_HOST}:{settings.MYSQL_PORT}/{settings.MYSQL_DB}"
+        engine = create_engine(database_url)
+        conn = engine.connect()
+
+        # 批量标签API依赖 (actor_id, tag_id) 唯一约束实现 INSERT ... ON DUPLICATE KEY UPDATE
+        logger.info("正在为演员标签关联表添加唯一约束...")
+        try:
+            # 先删除重复的关联记录，保留最早的一条
+            conn.execute(text("""
+                DELETE t1 FROM actor_tags t1
+                JOIN actor_tags t2
+                  ON t1.actor_id = t2.actor_id AND t1.tag_id = t2.tag_id AND t1.id > t2.id;
+            """))
+            conn.execute(text("ALTER TABLE actor_tags ADD UNIQUE KEY uq_actor_tags_actor_tag (actor_id, tag_id);"))
+            conn.commit()
+            logger.info("唯一约束添加完成")
+        except Exception as e:
+            logger.warning(f"添加唯一约束时发生错误: {e}")
+
+        conn.close()
+        logger.info("数据库迁移完成")
+    except Exception as e:
+        logger.error(f"数据库迁移失败: {e}")
+
+if __name__ == "__main__":
+    run_migrations()
@@ -0,0 +1,31 @@
+import logging
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def run_migrations():
+    """运行数据库迁移脚本 - 为演员表添加版本号字段"""
+    try:
+        # 构建数据库URL
+        database_url = f"mysql+pymysql://{settings.MYSQL_USER}:{settings.MYSQL_PASSWORD}@{settings.MYSQL_HOST}:{settings.MYSQL_PORT}/{settings.MYSQL_DB}"
+        engine = create_engine(database_url)
+        conn = engine.connect()
+
+        # PATCH接口通过版本号实现乐观并发控制
+        logger.info("正在为演员表添加version字段...")
+        try:
+            conn.execute(text("ALTER TABLE actors ADD COLUMN version INT NOT NULL DEFAULT 1 COMMENT '版本号，用于乐观并发控制';"))
+            conn.commit()
+            logger.info("version字段添加完成")
+        except Exception as e:
+            logger.warning(f"添加version字段时发生错误: {e}")
+
+        conn.close()
+        logger.info("数据库迁移完成")
+    except Exception as e:
+        logger.error(f"数据库迁移失败: {e}")
+
+if __name__ == "__main__":
+    run_migrations()
@@ -0,0 +1,39 @@
+import logging
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def run_migrations():
+    """运行数据库迁移脚本 - 添加内容哈希字段，用于媒体文件去重"""
+    try:
+        # 构建数据库URL
+        database_url = f"mysql+pymysql://{settings.MYSQL_USER}:{settings.MYSQL_PASSWORD}@{settings.MYSQL_HOST}:{settings.MYSQL_PORT}/{settings.MYSQL_DB}"
+        engine = create_engine(database_url)
+        conn = engine.connect()
+
+        logger.info("正在为媒体表添加content_hash字段...")
+        try:
+            conn.execute(text("ALTER TABLE actor_media ADD COLUMN content_hash VARCHAR(64) NULL COMMENT '原始文件内容的SHA-256，相同内容的记录共享存储对象' AFTER variants;"))
+            conn.execute(text("CREATE INDEX ix_actor_media_content_hash ON actor_media (content_hash);"))
+            conn.commit()
+            logger.info("content_hash字段添加完成")
+        except Exception as e:
+            logger.warning(f"添加content_hash字段时发生错误: {e}")
+
+        logger.info("正在为媒体处理任务表添加content_hash字段...")
+        try:
+            conn.execute(text("ALTER TABLE media_jobs ADD COLUMN content_hash VARCHAR(64) NULL COMMENT '原始文件内容的SHA-256' AFTER mime_type;"))
+            conn.commit()
+            logger.info("content_hash字段添加完成")
+        except Exception as e:
+            logger.warning(f"添加content_hash字段时发生错误: {e}")
+
+        conn.close()
+        logger.info("数据库迁移完成")
+    except Exception as e:
+        logger.error(f"数据库迁移失败: {e}")
+
+if __name__ == "__main__":
+    run_migrations()
@@ -0,0 +1,30 @@
+import logging
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def run_migrations():
+    """运行数据库迁移脚本 - 添加感知哈希字段，用于照片近似重复检测"""
+    try:
+        # 构建数据库URL
+        database_url = f"mysql+pymysql://{settings.MYSQL_USER}:{settings.MYSQL_PASSWORD}@{settings.MYSQL_HOST}:{settings.MYSQL_PORT}/{settings.MYSQL_DB}"
+        engine = create_engine(database_url)
+        conn = engine.connect()
+
+        logger.info("正在为媒体表添加phash字段...")
+        try:
+            conn.execute(text("ALTER TABLE actor_media ADD COLUMN phash VARCHAR(16) NULL COMMENT '照片的感知哈希(dHash)，用于检测近似重复' AFTER content_hash;"))
+            conn.commit()
+            logger.info("phash字段添加完成")
+        except Exception as e:
+            logger.warning(f"添加phash字段时发生错误: {e}")
+
+        conn.close()
+        logger.info("数据库迁移完成")
+    except Exception as e:
+        logger.error(f"数据库迁移失败: {e}")
+
+if __name__ == "__main__":
+    run_migrations()
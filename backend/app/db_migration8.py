@@ -0,0 +1,32 @@
+import logging
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def run_migrations():
+    """运行数据库迁移脚本 - 媒体处理任务支持客户端直传MinIO"""
+    try:
+        # 构建数据库URL
+        database_url = f"mysql+pymysql://{settings.MYSQL_USER}:{settings.MYSQL_PASSWORD}@{settings.MYSQL_HOST}:{settings.MYSQL_PORT}/{settings.MYSQL_DB}"
+        engine = create_engine(database_url)
+        conn = engine.connect()
+
+        logger.info("正在修改媒体处理任务表...")
+        try:
+            conn.execute(text("ALTER TABLE media_jobs MODIFY COLUMN status ENUM('awaiting_upload', 'pending', 'processing', 'completed', 'failed') NOT NULL DEFAULT 'pending';"))
+            conn.execute(text("ALTER TABLE media_jobs MODIFY COLUMN source_path VARCHAR(500) NULL COMMENT '待处理的原始文件路径';"))
+            conn.execute(text("ALTER TABLE media_jobs ADD COLUMN source_object VARCHAR(500) NULL COMMENT '客户端直传时暂存桶中的对象键，处理时下载到source_path' AFTER source_path;"))
+            conn.commit()
+            logger.info("媒体处理任务表修改完成")
+        except Exception as e:
+            logger.warning(f"修改媒体处理任务表时发生错误: {e}")
+
+        conn.close()
+        logger.info("数据库迁移完成")
+    except Exception as e:
+        logger.error(f"数据库迁移失败: {e}")
+
+if __name__ == "__main__":
+    run_migrations()
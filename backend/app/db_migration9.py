@@ -0,0 +1,30 @@
+import logging
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def run_migrations():
+    """运行数据库迁移脚本 - 添加视频转码结果字段"""
+    try:
+        # 构建数据库URL
+        database_url = f"mysql+pymysql://{settings.MYSQL_USER}:{settings.MYSQL_PASSWORD}@{settings.MYSQL_HOST}:{settings.MYSQL_PORT}/{settings.MYSQL_DB}"
+        engine = create_engine(database_url)
+        conn = engine.connect()
+
+        logger.info("正在为媒体表添加streaming字段...")
+        try:
+            conn.execute(text("ALTER TABLE actor_media ADD COLUMN streaming TEXT NULL COMMENT '视频转码结果(JSON)：HLS清单、各档位、封面和预览雪碧图' AFTER phash;"))
+            conn.commit()
+            logger.info("streaming字段添加完成")
+        except Exception as e:
+            logger.warning(f"添加streaming字段时发生错误: {e}")
+
+        conn.close()
+        logger.info("数据库迁移完成")
+    except Exception as e:
+        logger.error(f"数据库迁移失败: {e}")
+
+if __name__ == "__main__":
+    run_migrations()
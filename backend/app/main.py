@@ -43,12 +43,24 @@ async def startup_event():
     """应用启动时执行的操作"""
     print("正在启动应用...")
     
-    # 设置MinIO存储桶权限
-    setup_result = setup_minio_buckets()
-    if setup_result:
-        print("MinIO存储桶设置成功")
+    # 设置MinIO存储桶权限（其他存储后端不需要）
+    if settings.STORAGE_BACKEND == "minio":
+        setup_result = setup_minio_buckets()
+        if setup_result:
+            print("MinIO存储桶设置成功")
+        else:
+            print("警告：MinIO存储桶设置失败，媒体文件可能无法正常访问")
     else:
-        print("警告：MinIO存储桶设置失败，媒体文件可能无法正常访问")
+        print(f"使用存储后端: {settings.STORAGE_BACKEND}")
+    
+    # 启动媒体后台处理工作协程
+    from app.utils.media_jobs import media_job_pool
+    media_job_pool.start(settings.MEDIA_JOB_WORKERS)
+    
+    # 启动存储对象清理协程（删除 storage_deletions 日志中的对象）
+    if settings.STORAGE_DELETION_ENABLED:
+        from app.utils.storage_deletions import storage_deletion_drainer
+        storage_deletion_drainer.start()
     
     print(f"{settings.APP_NAME} 启动完成，版本: {settings.APP_VERSION}")
 
@@ -56,6 +68,26 @@ async def startup_event():
 async def shutdown_event():
     """应用关闭时执行的操作"""
     print("应用正在关闭...")
+    
+    # 停止媒体后台处理工作协程
+    from app.utils.media_jobs import media_job_pool
+    await media_job_pool.stop()
+    
+    # 停止存储对象清理协程
+    from app.utils.storage_deletions import storage_deletion_drainer
+    await storage_deletion_drainer.stop()
+    
+    # 释放异步数据库连接池（与API端点使用同一个模块实例）
+    from app.core.database import async_engine
+    await async_engine.dispose()
+    
+    # 关闭图片处理进程池
+    from app.utils.file_utils import shutdown_image_executor
+    shutdown_image_executor()
+    
+    # 关闭存储线程池
+    from app.core.storage import shutdown_storage_executor
+    shutdown_storage_executor()
 
 @app.get("/", include_in_schema=False)
 async def root():
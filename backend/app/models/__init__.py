@@ -1,4 +1,4 @@
 from .user import User, UserPermission, IDCounter
 from .actor import Actor, ActorProfessionalInfo, ActorContactInfo, ActorContractInfo, ActorStatusHistory
 from .tag import Tag
-from .media import ActorMedia 
\ No newline at end of file
+from .media import ActorMedia, MediaAlbum, MediaJob, UploadSession, StorageDeletion, StorageReconcileCheckpoint
\ No newline at end of file
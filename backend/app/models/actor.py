@@ -22,6 +22,7 @@ class Actor(Base):
     status = Column(Enum('active', 'inactive', 'suspended', 'retired', 'blacklisted', 'deleted', 
                         name='actor_status_enum'), nullable=False, default='active')
     avatar_url = Column(String(255), nullable=True)
+    version = Column(Integer, nullable=False, default=1, server_default='1', comment='版本号，用于乐观并发控制')
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
     
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, DateTime, Enum, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, DateTime, Enum, Text, Index, UniqueConstraint
+from sqlalchemy.dialects import mysql
 from sqlalchemy.orm import relationship
 import datetime
 from app.core.database import Base
@@ -7,6 +8,13 @@ from app.core.database import Base
 class ActorMedia(Base):
     """演员媒体文件模型"""
     __tablename__ = "actor_media"
+    __table_args__ = (
+        # 按相册/分类分页查询时为索引范围扫描；不筛选类型和相册时使用 (actor_id, created_at)
+        Index("ix_actor_media_listing", "actor_id", "type", "album", "created_at"),
+        Index("ix_actor_media_actor_created", "actor_id", "created_at"),
+        # 存储对账按对象键顺序读取存储桶中的记录
+        Index("ix_actor_media_bucket_object", "bucket_name", "object_name"),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     actor_id = Column(String(20), ForeignKey("actors.id", ondelete="CASCADE"), nullable=False)
@@ -16,13 +24,141 @@ class ActorMedia(Base):
     file_size = Column(Integer, nullable=True, comment='文件大小(字节)')
     mime_type = Column(String(100), nullable=True)
     description = Column(Text, nullable=True)
+    album = Column(String(100), nullable=True, comment='照片所属相册或视频所属分类，对应media_albums.name')
     is_public = Column(Boolean, default=True)
     bucket_name = Column(String(100), nullable=True, comment='MinIO bucket名称')
-    object_name = Column(String(255), nullable=True, comment='MinIO对象名称')
+    # 对象键区分大小写，按字节排序（与对象存储的列举顺序一致）
+    object_name = Column(
+        String(255).with_variant(mysql.VARCHAR(255, charset="utf8mb4", collation="utf8mb4_bin"), "mysql"),
+        nullable=True,
+        comment='MinIO对象名称'
+    )
+    variants = Column(Text, nullable=True, comment='响应式图片变体URL(JSON)，格式 -> 宽度 -> URL')
+    content_hash = Column(String(64), nullable=True, index=True, comment='原始文件内容的SHA-256，相同内容的记录共享存储对象')
+    phash = Column(String(16), nullable=True, comment='照片的感知哈希(dHash)，用于检测近似重复')
+    streaming = Column(Text, nullable=True, comment='视频转码结果(JSON)：HLS清单、各档位、封面和预览雪碧图')
     uploaded_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
     
     # 关系
     actor = relationship("Actor", back_populates="media")
-    uploader = relationship("User") 
\ No newline at end of file
+    uploader = relationship("User") 
+
+class MediaAlbum(Base):
+    """演员的照片相册和视频分类，记录显示顺序和封面
+
+    媒体通过 actor_media.album 按名称归属相册，上传时自动创建相册
+    """
+    __tablename__ = "media_albums"
+    __table_args__ = (
+        UniqueConstraint("actor_id", "media_type", "name", name="uq_media_albums_actor_type_name"),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    actor_id = Column(String(20), ForeignKey("actors.id", ondelete="CASCADE"), nullable=False)
+    media_type = Column(Enum('photo', 'video', name='media_album_type_enum'), nullable=False)
+    name = Column(String(100), nullable=False)
+    sort_order = Column(Integer, nullable=False, default=0, comment='显示顺序，小的在前')
+    cover_media_id = Column(Integer, ForeignKey("actor_media.id", ondelete="SET NULL"), nullable=True, comment='封面媒体，为空时使用相册中最新的媒体')
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+
+class MediaJob(Base):
+    """媒体后台处理任务模型
+
+    上传接口只保存原始文件并创建任务，由后台工作进程完成压缩、缩略图生成和MinIO上传
+    """
+    __tablename__ = "media_jobs"
+    __table_args__ = (
+        Index("ix_media_jobs_status_available", "status", "available_at"),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    actor_id = Column(String(20), ForeignKey("actors.id", ondelete="CASCADE"), nullable=False)
+    job_type = Column(Enum('photo', 'video', name='media_job_type_enum'), nullable=False)
+    status = Column(Enum('awaiting_upload', 'pending', 'processing', 'completed', 'failed', name='media_job_status_enum'), nullable=False, default='pending')
+    source_path = Column(String(500), nullable=True, comment='待处理的原始文件路径')
+    source_object = Column(String(500), nullable=True, comment='客户端直传时暂存桶中的对象键，处理时下载到source_path')
+    file_name = Column(String(255), nullable=True, comment='上传时的原始文件名')
+    file_size = Column(Integer, nullable=True, comment='文件大小(字节)')
+    mime_type = Column(String(100), nullable=True)
+    content_hash = Column(String(64), nullable=True, comment='原始文件内容的SHA-256')
+    params = Column(Text, nullable=True, comment='处理参数(JSON)')
+    result = Column(Text, nullable=True, comment='处理结果(JSON)')
+    error = Column(Text, nullable=True, comment='最近一次失败的错误信息')
+    attempts = Column(Integer, nullable=False, default=0, comment='已尝试次数')
+    media_id = Column(Integer, ForeignKey("actor_media.id", ondelete="SET NULL"), nullable=True)
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    available_at = Column(DateTime, default=datetime.datetime.utcnow, comment='可被领取的时间，用于失败重试延迟')
+    locked_at = Column(DateTime, nullable=True, comment='被工作进程领取的时间')
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+
+class UploadSession(Base):
+    """可续传的分块上传会话
+
+    客户端按顺序提交带偏移量的分块，服务端把分块拼接为MinIO分片上传的各个分片，
+    中断后可查询已接收的偏移量并从该位置继续上传
+    """
+    __tablename__ = "upload_sessions"
+    
+    id = Column(String(36), primary_key=True, comment='上传会话ID(UUID)')
+    actor_id = Column(String(20), ForeignKey("actors.id", ondelete="CASCADE"), nullable=False)
+    media_type = Column(Enum('photo', 'video', name='upload_session_media_type_enum'), nullable=False)
+    status = Column(Enum('uploading', 'completed', 'aborted', name='upload_session_status_enum'), nullable=False, default='uploading')
+    file_name = Column(String(255), nullable=True, comment='上传时的原始文件名')
+    mime_type = Column(String(100), nullable=True)
+    total_size = Column(Integer, nullable=False, comment='文件总大小(字节)')
+    offset = Column(Integer, nullable=False, default=0, comment='已接收的字节数')
+    object_name = Column(String(500), nullable=False, comment='暂存桶中的对象键')
+    multipart_upload_id = Column(String(255), nullable=True, comment='MinIO分片上传ID')
+    parts = Column(Text, nullable=True, comment='已上传的分片(JSON)，包含分片号、ETag和大小')
+    params = Column(Text, nullable=True, comment='处理参数(JSON)')
+    job_id = Column(Integer, ForeignKey("media_jobs.id", ondelete="SET NULL"), nullable=True, comment='上传完成后创建的处理任务')
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    expires_at = Column(DateTime, nullable=False, comment='会话过期时间，过期后不能继续上传')
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+
+class StorageDeletion(Base):
+    """待删除的存储对象日志
+
+    删除媒体记录时在同一事务中写入要删除的对象，由后台清理协程批量删除，
+    删除失败的对象按退避时间重试，不会因为请求中的删除失败而遗留在存储中
+    """
+    __tablename__ = "storage_deletions"
+    __table_args__ = (
+        Index("ix_storage_deletions_available", "available_at"),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    bucket_name = Column(String(100), nullable=False)
+    object_name = Column(String(500), nullable=False)
+    attempts = Column(Integer, nullable=False, default=0, comment='已尝试删除的次数')
+    last_error = Column(Text, nullable=True, comment='最近一次删除失败的原因')
+    available_at = Column(DateTime, default=datetime.datetime.utcnow, comment='可以删除的时间，用于失败重试延迟')
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+
+class StorageReconcileCheckpoint(Base):
+    """存储对账的检查点，每个存储桶一行
+
+    对账按对象键顺序分批进行，每批完成后记录最后处理的对象键，下次从该位置继续；
+    locked_by/locked_at 保证同一存储桶同时只有一个对账在运行
+    """
+    __tablename__ = "storage_reconcile_checkpoints"
+    
+    bucket_name = Column(String(100), primary_key=True)
+    last_object_name = Column(String(1024), nullable=True, comment='本轮已处理到的对象键，为空时从头开始')
+    objects_scanned = Column(Integer, nullable=False, default=0, comment='本轮已检查的对象数')
+    orphans_found = Column(Integer, nullable=False, default=0, comment='本轮发现的孤立对象数')
+    dangling_found = Column(Integer, nullable=False, default=0, comment='本轮发现的悬空记录数')
+    started_at = Column(DateTime, nullable=True, comment='本轮开始的时间')
+    completed_at = Column(DateTime, nullable=True, comment='上一轮完成的时间')
+    locked_by = Column(String(32), nullable=True, comment='正在对账的运行ID，为空时没有进行中的对账')
+    locked_at = Column(DateTime, nullable=True, comment='锁定时间，每批处理完成时刷新，超过 STORAGE_RECONCILE_LOCK_TIMEOUT 视为中断')
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Table, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, Table, DateTime, UniqueConstraint
 from sqlalchemy.orm import relationship
 import datetime
 from app.core.database import Base
@@ -11,7 +11,8 @@ actor_tag = Table(
     Column("actor_id", String(20), ForeignKey("actors.id", ondelete="CASCADE"), nullable=False),
     Column("tag_id", Integer, ForeignKey("tags.id", ondelete="CASCADE"), nullable=False),
     Column("created_by", Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True),
-    Column("created_at", DateTime, default=datetime.datetime.utcnow)
+    Column("created_at", DateTime, default=datetime.datetime.utcnow),
+    UniqueConstraint("actor_id", "tag_id", name="uq_actor_tags_actor_tag")
 )
 
 
@@ -103,6 +103,35 @@ class ActorContractInfoUpdate(ActorContractInfoBase):
     pass
 
 
+# 批量操作的演员筛选条件
+class ActorBulkFilter(BaseModel):
+    status: Optional[str] = None
+    gender: Optional[str] = None
+    agent_id: Optional[int] = None
+    tag_id: Optional[int] = None
+    name: Optional[str] = None  # 姓名模糊匹配
+    age_min: Optional[int] = None
+    age_max: Optional[int] = None
+    height_min: Optional[int] = None
+    height_max: Optional[int] = None
+    contract_end_before: Optional[date] = None  # 合同在此日期之前结束
+
+
+# 批量更新演员状态
+class ActorStatusBulkUpdate(BaseModel):
+    status: str
+    reason: Optional[str] = Field(None, max_length=255)
+    actor_ids: Optional[List[str]] = None  # 指定演员ID列表
+    filter: Optional[ActorBulkFilter] = None  # 或按条件筛选演员
+
+
+# 批量更新演员状态结果
+class ActorStatusBulkOut(BaseModel):
+    status: str
+    updated: int
+    history_records: int
+
+
 # 经纪人归属设置
 class ActorAgentAssignment(BaseModel):
     actor_id: str
@@ -123,6 +152,9 @@ class ActorOut(BaseModel):
     hip: Optional[int] = None
     status: str = "active"
     avatar_url: Optional[str] = None
+    avatar_variants: Optional[Dict[str, Dict[str, str]]] = None  # 头像响应式变体：格式 -> 宽度 -> URL
+    avatar_srcset: Optional[Dict[str, str]] = None
+    version: Optional[int] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
     user_id: Optional[int] = None
@@ -153,4 +185,27 @@ class ActorOut(BaseModel):
     total_count: Optional[int] = None
     
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+
+# 局部更新结果
+class ActorPatchOut(BaseModel):
+    id: str
+    version: int
+    updated_fields: List[str]
+
+
+# 批量导入单行错误
+class ActorImportError(BaseModel):
+    row: int
+    actor_id: Optional[str] = None
+    errors: List[str]
+
+
+# 批量导入结果
+class ActorImportResult(BaseModel):
+    total_rows: int = 0
+    imported: int = 0
+    failed: int = 0
+    actor_ids: List[str] = []
+    errors: List[ActorImportError] = []
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Literal, Optional
 from datetime import datetime
 
 class MediaResponse(BaseModel):
@@ -23,4 +23,58 @@ class MediaList(BaseModel):
     items: List[MediaResponse]
     
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class MediaAlbumUpdate(BaseModel):
+    """修改相册的显示顺序或封面"""
+    sort_order: Optional[int] = None
+    cover_media_id: Optional[int] = Field(None, description="封面媒体ID，设为null时使用相册中最新的媒体")
+
+class MediaJobOut(BaseModel):
+    """媒体后台处理任务状态"""
+    id: int
+    actor_id: str
+    job_type: str
+    status: str
+    file_name: Optional[str] = None
+    attempts: int = 0
+    media_id: Optional[int] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class PresignedUploadRequest(BaseModel):
+    """申请客户端直传MinIO"""
+    media_type: Literal['photo', 'video']
+    file_name: str
+    file_size: int = Field(..., gt=0, description="文件大小(字节)，预签名表单按此限制上传大小")
+    album: Optional[str] = None
+    category: Optional[str] = None
+
+class PresignedUploadOut(BaseModel):
+    """预签名上传表单，客户端把fields和file字段以multipart/form-data提交到url"""
+    job_id: int
+    object_name: str
+    url: str
+    fields: Dict[str, str]
+    expires_at: datetime
+    finalize_url: str
+
+class UploadSessionCreate(BaseModel):
+    """创建可续传的上传会话"""
+    actor_id: str
+    media_type: Literal['photo', 'video']
+    file_name: str
+    file_size: int = Field(..., gt=0, description="文件总大小(字节)")
+    album: Optional[str] = None
+    category: Optional[str] = None
+
+class UploadSessionOut(BaseModel):
+    """上传会话状态"""
+    upload_id: str
+    status: str
+    offset: int
+    total_size: int
+    expires_at: datetime
+    job: Optional[Dict[str, Any]] = None
@@ -1,5 +1,7 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Literal
+
+from app.schemas.actor import ActorBulkFilter
 
 
 class TagBase(BaseModel):
@@ -34,4 +36,19 @@ class ActorTagsOut(BaseModel):
     tags: List[TagOut]
     
     class Config:
-        orm_mode = True 
\ No newline at end of file
+        orm_mode = True
+
+
+# 批量添加/移除演员标签
+class ActorTagsBulkUpdate(BaseModel):
+    tag_ids: List[int]
+    action: Literal["add", "remove"] = "add"
+    actor_ids: Optional[List[str]] = None  # 指定演员ID列表
+    filter: Optional[ActorBulkFilter] = None  # 或按条件筛选演员
+
+
+# 批量标签操作结果
+class ActorTagsBulkOut(BaseModel):
+    action: str
+    tag_ids: List[int]
+    affected_rows: int
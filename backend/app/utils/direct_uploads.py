@@ -0,0 +1,99 @@
+"""
+客户端直传MinIO
+
+上传分两步：API签发带大小和类型限制的预签名POST表单，客户端把文件直接提交到MinIO的
+暂存存储桶(MINIO_UPLOAD_BUCKET)；随后调用finalize，服务端检查对象的大小和实际类型后
+把处理任务放入后台队列。文件内容不经过API进程，后台任务从暂存桶下载原始文件处理，
+完成后删除暂存对象。
+
+预签名使用以 MINIO_EXTERNAL_URL 为地址的客户端，签名中的主机名与客户端实际访问的地址一致；
+签名在本地计算，不需要连接MinIO。
+"""
+import datetime
+import os
+import uuid
+from typing import Dict, Tuple
+from urllib.parse import urlparse
+
+import magic
+from minio import Minio
+from minio.datatypes import PostPolicy
+
+from app.core.config import settings
+from app.core.storage import ensure_bucket
+
+_presign_client = None
+
+# 类型检测读取的对象头部字节数
+SNIFF_BYTES = 2048
+
+
+def get_presign_client() -> Minio:
+    """用于签发预签名请求的客户端，地址为客户端访问MinIO的外部地址"""
+    global _presign_client
+    if _presign_client is None:
+        external = urlparse(settings.MINIO_EXTERNAL_URL)
+        _presign_client = Minio(
+            external.netloc,
+            access_key=settings.MINIO_ROOT_USER,
+            secret_key=settings.MINIO_ROOT_PASSWORD,
+            secure=external.scheme == "https",
+            region=settings.MINIO_REGION  # 指定区域后签名不需要向服务器查询
+        )
+    return _presign_client
+
+
+def staging_object_name(actor_id: str, file_name: str) -> str:
+    """暂存对象键"""
+    return f"{actor_id}/{uuid.uuid4()}{os.path.splitext(file_name)[1].lower()}"
+
+
+def presigned_post(object_name: str, mime_type: str, max_size: int) -> Tuple[str, Dict[str, str], datetime.datetime]:
+    """
+    签发上传到暂存桶的预签名POST表单
+
+    返回 (提交地址, 表单字段, 过期时间)，表单限制了对象键、Content-Type和文件大小，
+    客户端需要把这些字段连同file字段一起以multipart/form-data提交
+    """
+    expires_at = datetime.datetime.utcnow() + datetime.timedelta(seconds=settings.PRESIGNED_UPLOAD_EXPIRES)
+    policy = PostPolicy(settings.MINIO_UPLOAD_BUCKET, expires_at)
+    policy.add_equals_condition("key", object_name)
+    policy.add_equals_condition("Content-Type", mime_type)
+    policy.add_content_length_range_condition(1, max_size)
+
+    fields = get_presign_client().presigned_post_policy(policy)
+    fields.update({"key": object_name, "Content-Type": mime_type})
+    url = f"{settings.MINIO_EXTERNAL_URL.rstrip('/')}/{settings.MINIO_UPLOAD_BUCKET}/"
+    return url, fields, expires_at
+
+
+def direct_upload_expired_before() -> datetime.datetime:
+    """创建时间早于该时间的直传任务已超过预签名表单的有效期，客户端无法再上传"""
+    return datetime.datetime.utcnow() - datetime.timedelta(seconds=settings.PRESIGNED_UPLOAD_EXPIRES)
+
+
+def ensure_upload_bucket():
+    """确保暂存存储桶存在"""
+    ensure_bucket(settings.MINIO_UPLOAD_BUCKET)
+
+
+def inspect_uploaded_object(minio_client, object_name: str) -> Tuple[int, str]:
+    """读取暂存对象的大小，并根据头部内容检测实际的MIME类型，对象不存在时抛出S3Error"""
+    stat = minio_client.stat_object(settings.MINIO_UPLOAD_BUCKET, object_name)
+    response = minio_client.get_object(settings.MINIO_UPLOAD_BUCKET, object_name, offset=0, length=SNIFF_BYTES)
+    try:
+        head = response.read()
+    finally:
+        response.close()
+        response.release_conn()
+    return stat.size, magic.from_buffer(head, mime=True)
+
+
+def download_staged_object(minio_client, object_name: str, file_path: str):
+    """把暂存对象下载到本地文件"""
+    minio_client.fget_object(settings.MINIO_UPLOAD_BUCKET, object_name, file_path)
+
+
+def remove_staged_object(minio_client, object_name: str):
+    """删除暂存对象"""
+    minio_client.remove_object(settings.MINIO_UPLOAD_BUCKET, object_name)
@@ -1,4 +1,5 @@
 import os
+import hashlib
 import magic
 import aiofiles
 from fastapi import UploadFile, HTTPException
@@ -9,22 +10,18 @@ from pathlib import Path
 import shutil
 import tempfile
 import io
-from minio import Minio
-from minio.error import S3Error
 from ..core.config import settings
+from ..core.storage import storage_metrics, run_storage_io
+from .storage_backends import get_storage_backend
+from .image_processing import compress_image_file, create_thumbnail_file, create_variant_files, resize_image_file, dhash_file, process_photo_file
+from .video_processing import ffmpeg_capabilities, probe_video, create_poster, create_hls_renditions, create_sprite
+from concurrent.futures import ProcessPoolExecutor
+import threading
 import uuid
 
-# 初始化MinIO客户端
-try:
-    minio_client = Minio(
-        settings.MINIO_URL,
-        access_key=settings.MINIO_ROOT_USER,
-        secret_key=settings.MINIO_ROOT_PASSWORD,
-        secure=False  # 本地开发环境通常不使用HTTPS
-    )
-except Exception as e:
-    print(f"MinIO客户端初始化失败: {e}")
-    minio_client = None
+# 图片处理进程池，解码、缩放和编码在子进程中完成，避免阻塞事件循环
+_image_executor = None
+_image_executor_lock = threading.Lock()
 
 # 确保媒体目录存在
 os.makedirs(settings.MEDIA_ROOT, exist_ok=True)
@@ -34,6 +31,26 @@ ALLOWED_IMAGE_TYPES = ["image/jpeg", "image/png", "image/gif", "image/webp", "im
 ALLOWED_VIDEO_TYPES = ["video/mp4", "video/quicktime", "video/x-msvideo", "video/3gpp", "video/x-matroska"]
 ALLOWED_MIME_TYPES = ALLOWED_IMAGE_TYPES + ALLOWED_VIDEO_TYPES
 
+# libmagic无法识别的HLS文件类型
+STREAMING_CONTENT_TYPES = {".m3u8": "application/vnd.apple.mpegurl", ".ts": "video/mp2t"}
+
+# 处理过程中生成的文件（压缩图、缩略图、变体、HLS输出）的类型由生成时的格式决定，上传时按扩展名确定，不再读取文件检测
+GENERATED_CONTENT_TYPES = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+    ".avif": "image/avif",
+    **STREAMING_CONTENT_TYPES,
+}
+
+# 检测内容类型时读取的文件头部字节数
+SNIFF_BYTES = 4096
+
+# libmagic和扩展名对同一格式的不同写法
+MIME_ALIASES = {"image/heif": "image/heic", "video/x-m4v": "video/mp4", "image/jpg": "image/jpeg"}
+
 def validate_file_type(filename, allowed_mime_types=None):
     """验证文件类型"""
     if not filename:
@@ -77,149 +94,254 @@ def validate_file_type(filename, allowed_mime_types=None):
     
     return mime_type
 
-async def upload_file_to_minio(file_path, bucket_name, object_name):
-    """上传文件到MinIO"""
-    if not minio_client:
-        raise Exception("MinIO客户端未初始化")
+def sniff_content_type(head: bytes) -> str:
+    """根据文件头部字节检测MIME类型"""
+    return magic.from_buffer(head[:SNIFF_BYTES], mime=True)
+
+def check_content_type(filename, head: bytes, allowed_mime_types=None) -> str:
+    """
+    根据文件头部检测实际类型，并与扩展名对应的类型交叉检查，返回文件的MIME类型
     
-    # 检查存储桶是否存在，不存在则创建
-    try:
-        if not minio_client.bucket_exists(bucket_name):
-            minio_client.make_bucket(bucket_name)
-    except S3Error as e:
-        raise Exception(f"无法创建存储桶: {e}")
+    扩展名不受支持、实际类型不在允许范围内、或实际类型与扩展名不是同一类（图片/视频）时抛出ValueError；
+    实际类型与扩展名一致时返回扩展名对应的类型，否则返回检测到的类型
+    """
+    declared = validate_file_type(filename, allowed_mime_types)
+    if not declared:
+        raise ValueError("不支持的文件类型")
     
-    # 上传文件
-    try:
-        with open(file_path, 'rb') as file_data:
-            file_stat = os.stat(file_path)
-            minio_client.put_object(
-                bucket_name, 
-                object_name, 
-                file_data, 
-                file_stat.st_size,
-                content_type=magic.from_file(file_path, mime=True)
-            )
-    except Exception as e:
-        raise Exception(f"上传文件失败: {e}")
+    sniffed = sniff_content_type(head)
+    actual = MIME_ALIASES.get(sniffed, sniffed)
+    if MIME_ALIASES.get(declared, declared) == actual:
+        return declared
+    
+    allowed = allowed_mime_types or ALLOWED_MIME_TYPES
+    for mime_type in allowed:
+        if MIME_ALIASES.get(mime_type, mime_type) == actual and mime_type.split('/')[0] == declared.split('/')[0]:
+            return mime_type
+    raise ValueError(f"文件内容与扩展名不符: {sniffed}")
+
+async def save_upload_file(file: UploadFile, directory, chunk_size: int = 1024 * 1024, allowed_mime_types=None):
+    """
+    分块保存上传文件到指定目录，文件名为UUID加原扩展名，写入的同时计算SHA-256
     
-    # 返回文件URL
-    return f"{settings.MINIO_EXTERNAL_URL}/{bucket_name}/{object_name}"
+    文件类型在写入前根据第一个分块检测（见 check_content_type），不合格时抛出ValueError且不写入文件。
+    返回 (文件路径, 文件大小, 内容哈希, MIME类型)
+    """
+    first_chunk = await file.read(chunk_size)
+    mime_type = check_content_type(file.filename, first_chunk, allowed_mime_types)
+    
+    os.makedirs(directory, exist_ok=True)
+    file_extension = os.path.splitext(file.filename or "")[1]
+    file_path = os.path.join(str(directory), f"{uuid.uuid4()}{file_extension}")
+    
+    file_size = 0
+    digest = hashlib.sha256()
+    chunk = first_chunk
+    async with aiofiles.open(file_path, 'wb') as out_file:
+        while chunk:
+            file_size += len(chunk)
+            digest.update(chunk)
+            await out_file.write(chunk)
+            chunk = await file.read(chunk_size)
+    
+    return file_path, file_size, digest.hexdigest(), mime_type
+
+async def upload_file_to_minio(file_path, bucket_name, object_name, content_type=None):
+    """
+    上传文件到存储后端（见 storage_backends，名称沿用MinIO），返回文件URL
+    
+    content_type: 上传原始文件时传入接收时检测到的类型；不传时按生成文件的扩展名确定，
+    都无法确定时才读取文件检测
+    """
+    content_type = (
+        content_type
+        or GENERATED_CONTENT_TYPES.get(os.path.splitext(file_path)[1].lower())
+        or await run_storage_io(magic.from_file, file_path, mime=True)
+    )
+    with storage_metrics.timed("upload_file"):
+        return await get_storage_backend().put_file(bucket_name, object_name, file_path, content_type)
+
+def get_image_executor() -> ProcessPoolExecutor:
+    """获取图片处理进程池，首次调用时创建"""
+    global _image_executor
+    with _image_executor_lock:
+        if _image_executor is None:
+            max_workers = settings.IMAGE_PROCESS_WORKERS or os.cpu_count() or 1
+            _image_executor = ProcessPoolExecutor(max_workers=max_workers)
+        return _image_executor
+
+
+def shutdown_image_executor():
+    """关闭图片处理进程池，应用关闭时调用"""
+    global _image_executor
+    with _image_executor_lock:
+        if _image_executor is not None:
+            _image_executor.shutdown(wait=True, cancel_futures=True)
+            _image_executor = None
+
+
+async def _run_in_image_executor(func, *args):
+    """在进程池中执行图片处理函数，不阻塞事件循环"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_image_executor(), func, *args)
+
 
 async def compress_image(file_path, quality=85):
-    """压缩图片"""
+    """压缩图片（在进程池中执行）"""
     # 检查文件是否存在
     if not os.path.exists(file_path):
         raise Exception("文件不存在")
     
-    # 处理HEIC/HEIF格式
-    _, ext = os.path.splitext(file_path)
-    ext = ext.lower()
+    return await _run_in_image_executor(compress_image_file, str(file_path), quality, settings.IMAGE_MAX_DIMENSION)
+
+async def process_photo(file_path, quality=85, thumbnail_size=(300, 300)):
+    """
+    一次解码完成照片的压缩图、缩略图、响应式变体和感知哈希（在进程池中执行）
     
-    if ext in ['.heic', '.heif']:
-        try:
-            # 转换HEIC/HEIF为JPG
-            output_path = os.path.splitext(file_path)[0] + '.jpg'
-            with Image.open(file_path) as img:
-                img.save(output_path, 'JPEG', quality=quality)
-            return output_path
-        except Exception as e:
-            raise Exception(f"转换HEIC图片失败: {e}")
+    返回 {"compressed", "thumbnail", "variants": [(宽度, 格式, 路径)], "phash"}，文件由调用方上传和删除
+    """
+    # 检查文件是否存在
+    if not os.path.exists(file_path):
+        raise Exception("文件不存在")
     
-    # 压缩其他格式图片
-    try:
-        output_path = os.path.splitext(file_path)[0] + '_compressed' + ext
-        with Image.open(file_path) as img:
-            # 转为RGB模式(去除透明通道)
-            if img.mode in ('RGBA', 'LA'):
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                background.paste(img, mask=img.split()[3])
-                img = background
-            
-            # 保存压缩后的图片
-            img.save(output_path, quality=quality, optimize=True)
-        
-        return output_path
-    except Exception as e:
-        raise Exception(f"压缩图片失败: {e}")
+    return await _run_in_image_executor(
+        process_photo_file, str(file_path), quality, settings.IMAGE_MAX_DIMENSION, thumbnail_size,
+        list(settings.IMAGE_VARIANT_WIDTHS), list(settings.IMAGE_VARIANT_FORMATS), settings.IMAGE_VARIANT_QUALITY
+    )
 
-async def create_thumbnail(file_path, size=(300, 300)):
-    """创建缩略图"""
+async def create_thumbnail(file_path, size=(300, 300), output_path=None):
+    """创建缩略图（在进程池中执行）"""
     # 检查文件是否存在
     if not os.path.exists(file_path):
         raise Exception("文件不存在")
     
-    # 创建缩略图
+    return await _run_in_image_executor(
+        create_thumbnail_file, str(file_path), size, str(output_path) if output_path else None
+    )
+
+async def resize_image(file_path, output_path, width=None, height=None, fit='contain', fmt='jpeg', quality=80):
+    """按指定尺寸缩放图片（在进程池中执行）"""
+    return await _run_in_image_executor(
+        resize_image_file, str(file_path), str(output_path), width, height, fit, fmt, quality
+    )
+
+async def perceptual_hash(file_path):
+    """计算图片的感知哈希（在进程池中执行），无法解码时返回None"""
     try:
-        # 生成缩略图文件名
-        thumbnail_path = os.path.splitext(file_path)[0] + '_thumbnail.jpg'
-        
-        with Image.open(file_path) as img:
-            # 转为RGB模式(去除透明通道)
-            if img.mode in ('RGBA', 'LA'):
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                background.paste(img, mask=img.split()[3])
-                img = background
-            
-            # 生成缩略图
-            img.thumbnail(size)
-            
-            # 保存缩略图
-            img.save(thumbnail_path, 'JPEG', quality=85, optimize=True)
-        
-        return thumbnail_path
+        return await _run_in_image_executor(dhash_file, str(file_path))
+    except Exception as e:
+        print(f"计算感知哈希失败: {e}")
+        return None
+
+async def generate_image_variants(file_path, bucket_name, object_prefix):
+    """
+    生成响应式图片变体并上传到MinIO
+    
+    对象名为 {object_prefix}/{宽度}w.{扩展名}，返回 {格式: {宽度: URL}}，
+    生成失败时返回None，不影响原图的上传
+    """
+    try:
+        outputs = await _run_in_image_executor(
+            create_variant_files, str(file_path),
+            list(settings.IMAGE_VARIANT_WIDTHS), list(settings.IMAGE_VARIANT_FORMATS), settings.IMAGE_VARIANT_QUALITY
+        )
     except Exception as e:
-        raise Exception(f"生成缩略图失败: {e}")
+        print(f"生成图片变体失败: {e}")
+        return None
+    
+    try:
+        return await upload_image_variants(outputs, bucket_name, object_prefix)
+    finally:
+        for _, _, path in outputs:
+            if os.path.exists(path):
+                os.remove(path)
+
+async def upload_image_variants(outputs, bucket_name, object_prefix):
+    """上传已生成的变体文件 [(宽度, 格式, 路径)]，返回 {格式: {宽度: URL}}"""
+    variants = {}
+    for width, fmt, path in outputs:
+        ext = os.path.splitext(path)[1]
+        url = await upload_file_to_minio(path, bucket_name, f"{object_prefix}/{width}w{ext}")
+        variants.setdefault(fmt, {})[str(width)] = url
+    return variants
+
+
+def streaming_fields(streaming):
+    """API中返回的视频播放信息：HLS清单URL、封面、预览雪碧图和时长"""
+    streaming = streaming or {}
+    return {
+        "manifest_url": streaming.get("manifest_url"),
+        "poster_url": streaming.get("poster_url"),
+        "sprite": streaming.get("sprite"),
+        "duration": streaming.get("duration")
+    }
+
+
+def build_srcset(variants):
+    """将变体映射转换为 {格式: "URL 160w, URL 320w"} 形式的srcset字符串"""
+    if not variants:
+        return None
+    return {
+        fmt: ", ".join(f"{url} {width}w" for width, url in sorted(urls.items(), key=lambda item: int(item[0])))
+        for fmt, urls in variants.items()
+    }
+
+
+def smallest_variant_url(variants, preferred_format="jpeg"):
+    """返回最小宽度的变体URL，优先使用兼容性最好的JPEG"""
+    if not variants:
+        return None
+    urls = variants.get(preferred_format) or next(iter(variants.values()))
+    if not urls:
+        return None
+    return urls[min(urls, key=int)]
+
+
+def variant_object_names(variants, bucket_name):
+    """从变体URL中解析出对象名，用于删除"""
+    prefix = get_storage_backend().url(bucket_name, "")
+    return [
+        url[len(prefix):]
+        for urls in (variants or {}).values()
+        for url in urls.values()
+        if url.startswith(prefix)
+    ]
 
 async def create_video_thumbnail(file_path, output_size=(480, 270)):
-    """从视频创建缩略图"""
+    """从视频创建缩略图，ffmpeg不可用或截图失败时使用默认缩略图"""
     # 检查文件是否存在
     if not os.path.exists(file_path):
         raise Exception("文件不存在")
     
-    # 检查ffmpeg是否可用
+    thumbnail_path = os.path.splitext(file_path)[0] + '_thumbnail.jpg'
+    
     try:
+        # ffmpeg的可用性只检测一次
+        if not (await ffmpeg_capabilities())["ffmpeg"]:
+            raise Exception("FFmpeg不可用")
+        
+        # -ss 放在 -i 之前，直接定位到1秒处而不是从头解码
+        command = [
+            "ffmpeg", "-y",
+            "-ss", "00:00:01",      # 从视频的1秒处开始
+            "-i", file_path,        # 输入文件
+            "-frames:v", "1",       # 只截取一帧
+            "-s", f"{output_size[0]}x{output_size[1]}",  # 设置输出尺寸
+            "-f", "image2",         # 输出格式
+            thumbnail_path          # 输出文件
+        ]
+        
         process = await asyncio.create_subprocess_exec(
-            "ffmpeg", "-version",
+            *command,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE
         )
-        await process.communicate()
-        ffmpeg_available = process.returncode == 0
-    except:
-        ffmpeg_available = False
-    
-    # 创建临时目录
-    temp_dir = tempfile.mkdtemp()
-    thumbnail_path = os.path.splitext(file_path)[0] + '_thumbnail.jpg'
-    
-    try:
-        if ffmpeg_available:
-            # 使用FFmpeg获取视频的第一帧
-            command = [
-                "ffmpeg",
-                "-i", file_path,        # 输入文件
-                "-ss", "00:00:01",      # 从视频的1秒处开始
-                "-frames:v", "1",       # 只截取一帧
-                "-s", f"{output_size[0]}x{output_size[1]}",  # 设置输出尺寸
-                "-f", "image2",         # 输出格式
-                thumbnail_path          # 输出文件
-            ]
-            
-            process = await asyncio.create_subprocess_exec(
-                *command,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await process.communicate()
-            
-            # 检查FFmpeg是否成功
-            if process.returncode != 0:
-                raise Exception(f"无法生成视频缩略图: {stderr.decode()}")
-        else:
-            # 如果ffmpeg不可用，使用默认缩略图
-            raise Exception("FFmpeg不可用")
+        
+        stdout, stderr = await process.communicate()
+        
+        # 检查FFmpeg是否成功（视频短于1秒时不会输出帧）
+        if process.returncode != 0 or not os.path.exists(thumbnail_path):
+            raise Exception(f"无法生成视频缩略图: {stderr.decode()}")
         
         return thumbnail_path
     except Exception as e:
@@ -234,6 +356,55 @@ async def create_video_thumbnail(file_path, output_size=(480, 270)):
         
         shutil.copy(default_thumbnail, thumbnail_path)
         return thumbnail_path
+
+async def transcode_video(file_path, bucket_name, object_prefix):
+    """
+    生成HLS多码率清单、封面和拖动预览雪碧图并上传到MinIO
+    
+    对象都在 {object_prefix}/ 下，返回写入 ActorMedia.streaming 的信息；
+    ffmpeg不可用或转码失败时返回None，不影响原视频的上传
+    """
+    capabilities = await ffmpeg_capabilities()
+    if not (capabilities["ffmpeg"] and capabilities["ffprobe"] and capabilities["h264_encoder"]):
+        return None
+    
+    output_dir = tempfile.mkdtemp(dir=settings.MEDIA_ROOT)
+    try:
+        probe = await probe_video(file_path)
+        renditions = await create_hls_renditions(file_path, output_dir, probe, capabilities["h264_encoder"])
+        poster_path = await create_poster(
+            file_path, os.path.join(output_dir, "poster.jpg"), at_seconds=min(1.0, probe["duration"] / 2)
+        )
+        try:
+            sprite = await create_sprite(file_path, os.path.join(output_dir, "sprite.jpg"), probe["duration"])
+        except Exception as e:
+            print(f"生成预览雪碧图失败: {e}")
+            sprite = None
+        
+        objects = []
+        urls = {}
+        for name in sorted(os.listdir(output_dir)):
+            object_name = f"{object_prefix}/{name}"
+            urls[name] = await upload_file_to_minio(os.path.join(output_dir, name), bucket_name, object_name)
+            objects.append(object_name)
+        
+        if sprite:
+            sprite["url"] = urls["sprite.jpg"]
+        return {
+            "manifest_url": urls["master.m3u8"],
+            "poster_url": urls[os.path.basename(poster_path)],
+            "duration": probe["duration"],
+            "width": probe["width"],
+            "height": probe["height"],
+            "renditions": [
+                {"height": r["height"], "width": r["width"], "bandwidth": r["bandwidth"], "url": urls[r["playlist"]]}
+                for r in renditions
+            ],
+            "sprite": sprite,
+            "objects": objects
+        }
+    except Exception as e:
+        print(f"视频转码失败: {e}")
+        return None
     finally:
-        # 清理临时目录
-        shutil.rmtree(temp_dir, ignore_errors=True) 
\ No newline at end of file
+        shutil.rmtree(output_dir, ignore_errors=True)
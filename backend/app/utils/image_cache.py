@@ -0,0 +1,101 @@
+"""
+按需缩放图片的磁盘LRU缓存
+
+缓存文件保存在 MEDIA_ROOT/cache 下，按键的哈希值分目录存放。
+命中时更新文件的修改时间，总大小超过上限时按修改时间从旧到新淘汰，
+淘汰到上限的90%以下，避免每次写入都触发扫描。
+"""
+import hashlib
+import logging
+import os
+import threading
+import uuid
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DiskLRUCache:
+    """有容量上限的磁盘LRU缓存，线程安全"""
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = None  # 首次使用时扫描目录得到
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """由缓存参数生成缓存键"""
+        return hashlib.sha256(":".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str, ext: str) -> str:
+        """缓存键对应的文件路径"""
+        return os.path.join(self.root, key[:2], f"{key}.{ext}")
+
+    def get(self, key: str, ext: str) -> Optional[str]:
+        """命中时返回文件路径并更新访问时间，未命中返回None"""
+        path = self.path_for(key, ext)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def temp_path_for(self, key: str, ext: str) -> str:
+        """写入缓存前使用的临时文件路径，每次调用都不同，写完后调用commit原子替换"""
+        path = self.path_for(key, ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return f"{path}.{uuid.uuid4().hex}.tmp"
+
+    def commit(self, key: str, ext: str, temp_path: str) -> str:
+        """把临时文件放入缓存，必要时淘汰旧文件，返回缓存文件路径"""
+        path = self.path_for(key, ext)
+        size = os.path.getsize(temp_path)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += size
+            if self._total_bytes > self.max_bytes:
+                self._evict(keep=path)
+        return path
+
+    def _scan_size(self) -> int:
+        total = 0
+        for entry in self._iter_files():
+            total += entry.stat().st_size
+        return total
+
+    def _iter_files(self):
+        if not os.path.isdir(self.root):
+            return
+        for sub in os.scandir(self.root):
+            if sub.is_dir():
+                for entry in os.scandir(sub.path):
+                    if entry.is_file() and not entry.name.endswith(".tmp"):
+                        yield entry
+
+    def _evict(self, keep: str):
+        """按修改时间从旧到新删除文件，直到总大小低于上限的90%"""
+        target = int(self.max_bytes * 0.9)
+        entries = sorted(
+            ((entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in self._iter_files()),
+        )
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except FileNotFoundError:
+                pass
+        self._total_bytes = total
+        logger.info(f"图片缓存淘汰{removed}个文件，当前大小: {total}字节")
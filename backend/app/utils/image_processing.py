@@ -0,0 +1,309 @@
+"""
+图片处理函数
+
+这些函数在进程池的子进程中执行，只接收文件路径并返回输出文件路径，
+不在进程间传递像素数据；模块只依赖Pillow（和可选的pillow-heif），子进程导入时开销很小。
+
+只需要小尺寸结果时先调用 Image.draft，JPEG在解码阶段按1/2、1/4、1/8缩小，
+避免完整解码几千万像素的手机照片；缩小时使用 reducing_gap 先做快速的整数倍缩小。
+"""
+import math
+import os
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+try:
+    # 注册HEIC/HEIF解码器，之后Image.open可以直接打开iPhone照片
+    from pillow_heif import register_heif_opener
+    register_heif_opener()
+except ImportError:
+    register_heif_opener = None
+
+# 响应式图片变体支持的输出格式: 格式名 -> (Pillow格式, 扩展名)
+VARIANT_FORMATS = {
+    'jpeg': ('JPEG', 'jpg'),
+    'webp': ('WEBP', 'webp'),
+    'avif': ('AVIF', 'avif'),
+}
+
+# 按需缩放接口支持的输出格式，额外支持保留透明通道的PNG
+RESIZE_FORMATS = {**VARIANT_FORMATS, 'png': ('PNG', 'png')}
+
+
+# 缩小时先用快速的整数倍缩小到目标尺寸的2倍左右，再用LANCZOS完成剩余部分
+REDUCING_GAP = 2.0
+
+# EXIF中的方向标签
+EXIF_ORIENTATION = 0x0112
+
+
+def _draft_for(img, size: Tuple[int, int]):
+    """
+    按目标尺寸请求缩小解码（目前对JPEG有效），解码结果的宽高都不小于size中较大的一边，
+    因此无论之后是否按EXIF旋转，都不会小于目标尺寸
+    """
+    bound = max(size)
+    img.draft('RGB', (bound, bound))
+
+
+def _draft_to_fit(img, box: Tuple[int, int]):
+    """
+    按"等比缩放到box以内"的结果请求缩小解码，解码结果不小于最终尺寸
+    
+    按两种方向（是否按EXIF旋转90度）分别计算缩放比例并取较大者，
+    例如 8000x6000 限制在 2048x2048 以内时按1/2解码为 4000x3000，而不是完整解码
+    """
+    width, height = img.size
+    ratio = max(min(box[0] / width, box[1] / height), min(box[0] / height, box[1] / width))
+    if ratio < 1:
+        img.draft('RGB', (math.ceil(width * ratio), math.ceil(height * ratio)))
+
+
+def _to_rgb(img):
+    """转为RGB模式(去除透明通道)"""
+    if img.mode in ('RGBA', 'LA'):
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1])
+        return background
+    return img
+
+
+def supported_variant_formats(formats: List[str]) -> List[str]:
+    """过滤出当前Pillow能够编码的变体格式（例如AVIF需要额外的编码器支持）"""
+    Image.init()
+    return [fmt for fmt in formats if fmt in VARIANT_FORMATS and VARIANT_FORMATS[fmt][0] in Image.SAVE]
+
+
+def compress_image_file(file_path: str, quality: int = 85, max_dimension: int = 0) -> str:
+    """
+    压缩图片，HEIC/HEIF格式转换为JPG，返回压缩后的文件路径
+
+    max_dimension大于0时长边缩小到不超过该值，JPEG原图可以按比例缩小解码
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+
+    if ext in ['.heic', '.heif']:
+        try:
+            # 转换HEIC/HEIF为JPG
+            output_path = os.path.splitext(file_path)[0] + '.jpg'
+            with Image.open(file_path) as img:
+                img = _limit_size(_prepare(img, max_dimension), max_dimension)
+                img.save(output_path, 'JPEG', quality=quality)
+            return output_path
+        except Exception as e:
+            raise Exception(f"转换HEIC图片失败: {e}")
+
+    # 压缩其他格式图片
+    try:
+        output_path = os.path.splitext(file_path)[0] + '_compressed' + ext
+        with Image.open(file_path) as img:
+            img = _limit_size(_prepare(img, max_dimension), max_dimension)
+            # 保存压缩后的图片
+            img.save(output_path, quality=quality, optimize=True)
+        return output_path
+    except Exception as e:
+        raise Exception(f"压缩图片失败: {e}")
+
+
+def _prepare(img, max_dimension: int = 0):
+    """解码前按尺寸上限请求缩小解码，然后按EXIF方向旋转并去除透明通道"""
+    if max_dimension and max(img.size) > max_dimension:
+        _draft_to_fit(img, (max_dimension, max_dimension))
+    # 没有旋转信息时exif_transpose也会复制一份完整图片，只在需要时调用
+    if img.getexif().get(EXIF_ORIENTATION, 1) != 1:
+        img = ImageOps.exif_transpose(img)
+    # 在文件关闭前完成解码
+    img.load()
+    return _to_rgb(img)
+
+
+def _limit_size(img, max_dimension: int):
+    """长边缩小到不超过max_dimension，0表示不限制"""
+    if max_dimension and max(img.size) > max_dimension:
+        img.thumbnail((max_dimension, max_dimension), Image.LANCZOS, reducing_gap=REDUCING_GAP)
+    return img
+
+
+def create_thumbnail_file(file_path: str, size=(300, 300), output_path: str = None) -> str:
+    """创建JPEG缩略图，返回缩略图文件路径"""
+    try:
+        # 生成缩略图文件名
+        thumbnail_path = output_path or os.path.splitext(file_path)[0] + '_thumbnail.jpg'
+
+        with Image.open(file_path) as img:
+            # 只按缩略图尺寸解码
+            _draft_to_fit(img, size)
+            img = _to_rgb(ImageOps.exif_transpose(img))
+            # 生成缩略图
+            img.thumbnail(size, Image.LANCZOS, reducing_gap=REDUCING_GAP)
+            # 保存缩略图
+            img.save(thumbnail_path, 'JPEG', quality=85, optimize=True)
+
+        return thumbnail_path
+    except Exception as e:
+        raise Exception(f"生成缩略图失败: {e}")
+
+
+def create_variant_files(file_path: str, widths: List[int], formats: List[str], quality: int = 80) -> List[Tuple[int, str, str]]:
+    """
+    按宽度阶梯生成响应式图片变体，返回 [(宽度, 格式, 文件路径)]
+
+    - 只解码一次，按最大档位缩小解码，从大到小依次缩放，每一级以上一级的结果为输入
+    - 不放大图片：阶梯中超过原图宽度的档位用原图宽度代替
+    """
+    with Image.open(file_path) as img:
+        if widths and max(widths) < img.size[0]:
+            _draft_for(img, (max(widths), max(widths)))
+        img = _to_rgb(ImageOps.exif_transpose(img))
+        return _save_variants(img, os.path.splitext(file_path)[0], widths, formats, quality)
+
+
+def _save_variants(img, stem: str, widths: List[int], formats: List[str], quality: int,
+                   levels: Optional[List] = None) -> List[Tuple[int, str, str]]:
+    """
+    把已解码的图片保存为各宽度、各格式的变体
+
+    levels不为None时，按从大到小的顺序收集各档位缩放后的图片，供调用方继续使用
+    """
+    formats = supported_variant_formats(formats)
+    outputs = []
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    original_width, original_height = img.size
+    targets = sorted({w for w in widths if w < original_width}, reverse=True)
+    if any(w >= original_width for w in widths):
+        targets.insert(0, original_width)
+
+    current = img
+    for width in targets:
+        height = max(1, round(original_height * width / original_width))
+        if current.size != (width, height):
+            current = current.resize((width, height), Image.LANCZOS, reducing_gap=REDUCING_GAP)
+        if levels is not None:
+            levels.append(current)
+        for fmt in formats:
+            pil_format, ext = VARIANT_FORMATS[fmt]
+            output_path = f"{stem}_{width}w.{ext}"
+            save_options = {'quality': quality}
+            if fmt == 'jpeg':
+                save_options.update(optimize=True, progressive=True)
+            elif fmt == 'webp':
+                save_options['method'] = 4
+            current.save(output_path, pil_format, **save_options)
+            outputs.append((width, fmt, output_path))
+
+    return outputs
+
+
+def process_photo_file(file_path: str, quality: int, max_dimension: int, thumbnail_size: Tuple[int, int],
+                       widths: List[int], formats: List[str], variant_quality: int) -> Dict:
+    """
+    上传照片的全部图片处理：压缩图、缩略图、响应式变体和感知哈希，原图只解码一次
+
+    返回 {"compressed": 路径, "thumbnail": 路径, "variants": [(宽度, 格式, 路径)], "phash": 哈希}
+    """
+    stem, ext = os.path.splitext(file_path)
+    ext = ext.lower()
+
+    with Image.open(file_path) as img:
+        img = _limit_size(_prepare(img, max_dimension), max_dimension)
+
+    # 压缩图：HEIC/HEIF转为JPEG，其他格式保持原格式
+    if ext in ['.heic', '.heif']:
+        compressed_path = stem + '.jpg'
+        img.save(compressed_path, 'JPEG', quality=quality)
+    else:
+        compressed_path = stem + '_compressed' + ext
+        img.save(compressed_path, quality=quality, optimize=True)
+
+    # 变体从大到小逐级缩放
+    levels = []
+    variants = _save_variants(img, stem, widths, formats, variant_quality, levels)
+
+    # 缩略图以不小于缩略图尺寸的最小档位为输入，感知哈希以最小档位为输入，都不再回到原图
+    ratio = min(thumbnail_size[0] / img.width, thumbnail_size[1] / img.height, 1)
+    source = img
+    for level in levels:
+        if level.width >= img.width * ratio and level.height >= img.height * ratio:
+            source = level
+    thumbnail = source.copy()
+    thumbnail.thumbnail(thumbnail_size, Image.LANCZOS, reducing_gap=REDUCING_GAP)
+    thumbnail_path = stem + '_thumbnail.jpg'
+    thumbnail.convert('RGB').save(thumbnail_path, 'JPEG', quality=85, optimize=True)
+
+    return {
+        "compressed": compressed_path,
+        "thumbnail": thumbnail_path,
+        "variants": variants,
+        "phash": _dhash(levels[-1] if levels else img),
+    }
+
+
+def resize_image_file(file_path: str, output_path: str, width: int = None, height: int = None,
+                      fit: str = 'contain', fmt: str = 'jpeg', quality: int = 80) -> str:
+    """
+    按指定尺寸缩放图片并保存为指定格式
+
+    - contain: 等比缩放到不超过给定尺寸
+    - cover: 等比缩放并居中裁剪到给定尺寸
+    - fill: 拉伸到给定尺寸
+    只给出宽或高时按原图比例计算另一边；不放大图片
+    """
+    pil_format, _ = RESIZE_FORMATS[fmt]
+
+    with Image.open(file_path) as img:
+        if width or height:
+            _draft_for(img, (width or 0, height or 0))
+        if pil_format == 'JPEG':
+            img = _to_rgb(img)
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+        elif img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA' if 'A' in img.getbands() or 'transparency' in img.info else 'RGB')
+
+        original_width, original_height = img.size
+        if width and not height:
+            height = round(original_height * width / original_width)
+        elif height and not width:
+            width = round(original_width * height / original_height)
+        width = max(1, min(width, original_width))
+        height = max(1, min(height, original_height))
+
+        if fit == 'cover':
+            img = ImageOps.fit(img, (width, height), Image.LANCZOS)
+        elif fit == 'fill':
+            img = img.resize((width, height), Image.LANCZOS)
+        else:
+            img = img.copy()
+            img.thumbnail((width, height), Image.LANCZOS, reducing_gap=REDUCING_GAP)
+
+        save_options = {'optimize': True} if pil_format == 'PNG' else {'quality': quality}
+        img.save(output_path, pil_format, **save_options)
+
+    return output_path
+
+
+def dhash_file(file_path: str, hash_size: int = 8) -> str:
+    """
+    计算图片的差异哈希(dHash)，返回16位十六进制字符串
+
+    缩放为 (hash_size+1) x hash_size 的灰度图，逐行比较相邻像素的亮度得到64位哈希，
+    对重新编码、缩放和轻微裁剪不敏感，汉明距离越小图片越相似
+    """
+    with Image.open(file_path) as img:
+        img.draft('L', (hash_size * 8, hash_size * 8))
+        return _dhash(ImageOps.exif_transpose(img), hash_size)
+
+
+def _dhash(img, hash_size: int = 8) -> str:
+    img = img.convert('L').resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = list(img.getdata())
+
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return f"{value:0{hash_size * hash_size // 4}x}"
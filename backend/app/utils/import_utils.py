@@ -0,0 +1,148 @@
+"""
+批量导入文件解析工具
+
+支持CSV、XLSX和JSONL格式，按行流式读取，不会一次性把整个文件加载到内存
+"""
+import csv
+import io
+import json
+import os
+import zipfile
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
+
+# 支持的导入文件格式
+SUPPORTED_IMPORT_FORMATS = {
+    '.csv': 'csv',
+    '.xlsx': 'xlsx',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+}
+
+# 列表类型字段，表格中可用 JSON 数组或以逗号/竖线分隔的字符串表示
+LIST_FIELDS = {'skills', 'experience', 'education', 'awards', 'languages'}
+
+# 字典类型字段，表格中使用 JSON 对象表示
+DICT_FIELDS = {'social_media'}
+
+# 数值类型字段，其余字段的数值（如XLSX中的电话号码）会被转换为字符串
+NUMERIC_FIELDS = {'age', 'height', 'weight', 'bust', 'waist', 'hip', 'minimum_fee', 'user_id'}
+
+
+def detect_import_format(filename: Optional[str]) -> Optional[str]:
+    """根据文件扩展名判断导入格式"""
+    if not filename:
+        return None
+    ext = os.path.splitext(filename)[1].lower()
+    return SUPPORTED_IMPORT_FORMATS.get(ext)
+
+
+def iter_import_rows(file_obj: BinaryIO, file_format: str) -> Iterator[Tuple[int, Any]]:
+    """
+    逐行读取导入文件
+
+    返回 (行号, 行数据) 迭代器。CSV/XLSX 的行号从表头下一行开始计算（即第2行），
+    JSONL 的行号从1开始；无法解析的 JSONL 行以异常对象作为行数据返回，由调用方记录错误
+    """
+    if file_format == 'csv':
+        yield from _iter_csv_rows(file_obj)
+    elif file_format == 'xlsx':
+        yield from _iter_xlsx_rows(file_obj)
+    elif file_format == 'jsonl':
+        yield from _iter_jsonl_rows(file_obj)
+    else:
+        raise ValueError(f"不支持的导入格式: {file_format}")
+
+
+def _iter_csv_rows(file_obj: BinaryIO) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    text_stream = io.TextIOWrapper(file_obj, encoding='utf-8-sig', newline='')
+    try:
+        reader = csv.DictReader(text_stream)
+        for row_number, row in enumerate(reader, start=2):
+            if not any(isinstance(value, str) and value.strip() for value in row.values()):
+                continue
+            yield row_number, row
+    finally:
+        # 避免关闭底层的上传文件
+        text_stream.detach()
+
+
+def _iter_xlsx_rows(file_obj: BinaryIO) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("服务器未安装openpyxl，无法导入XLSX文件")
+
+    try:
+        workbook = load_workbook(file_obj, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, KeyError, OSError) as e:
+        # 不是有效的XLSX（ZIP）文件或缺少工作簿内容
+        raise ValueError(f"XLSX文件已损坏或不是有效的XLSX文件: {e.__class__.__name__}")
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if not header:
+            return
+        columns = [str(col).strip() if col is not None else None for col in header]
+        for row_number, values in enumerate(rows, start=2):
+            if values is None or all(value is None for value in values):
+                continue
+            yield row_number, {col: value for col, value in zip(columns, values) if col}
+    finally:
+        workbook.close()
+
+
+def _iter_jsonl_rows(file_obj: BinaryIO) -> Iterator[Tuple[int, Any]]:
+    text_stream = io.TextIOWrapper(file_obj, encoding='utf-8-sig')
+    try:
+        for row_number, line in enumerate(text_stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield row_number, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield row_number, e
+    finally:
+        text_stream.detach()
+
+
+def normalize_import_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    将表格中的原始值转换为 ActorCreate 可接受的格式
+
+    - 去除列名和字符串值两端空白，空字符串视为未填写
+    - 列表字段支持 JSON 数组或以逗号/竖线分隔的字符串
+    - 字典字段需为 JSON 对象
+    """
+    normalized = {}
+    for key, value in row.items():
+        if key is None:
+            continue
+        key = str(key).strip()
+        if isinstance(value, str):
+            value = value.strip()
+            if value == '':
+                continue
+        if value is None:
+            continue
+
+        if key in LIST_FIELDS and isinstance(value, str):
+            value = _parse_list_value(value)
+        elif key in DICT_FIELDS and isinstance(value, str):
+            value = json.loads(value)
+        elif isinstance(value, float) and value.is_integer():
+            # XLSX 中的整数会被读成浮点数
+            value = int(value)
+
+        if key not in NUMERIC_FIELDS and not isinstance(value, (str, list, dict)):
+            value = str(value)
+
+        normalized[key] = value
+    return normalized
+
+
+def _parse_list_value(value: str):
+    if value.startswith('['):
+        return json.loads(value)
+    separator = '|' if '|' in value else ','
+    return [item.strip() for item in value.replace('，', ',').split(separator) if item.strip()]
@@ -0,0 +1,158 @@
+"""
+照片相册、视频分类和媒体列表的游标分页
+
+- 媒体通过 actor_media.album 归属相册，相册的显示顺序和封面记录在 media_albums 中
+- 媒体列表按 (created_at, id) 倒序分页，游标是上一页最后一条记录的这两个值，
+  下一页的查询是 (actor_id, type, album, created_at) 或 (actor_id, created_at) 索引上的范围扫描，
+  不随页数增加而变慢（OFFSET分页需要跳过前面所有记录）
+"""
+import base64
+import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, func, or_, and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.media import ActorMedia, MediaAlbum
+
+# 相册名称的最大长度，与 actor_media.album 一致
+ALBUM_NAME_MAX_LENGTH = 100
+
+# 未指定相册/分类时使用的名称
+DEFAULT_ALBUMS = {"photo": "默认相册", "video": "默认视频"}
+
+
+def album_name(name: Optional[str], media_type: Optional[str] = None) -> Optional[str]:
+    """规范化相册名称：去掉首尾空白并截断；为空时返回该类型的默认相册名（不指定类型时返回None）"""
+    name = (name or "").strip()[:ALBUM_NAME_MAX_LENGTH]
+    return name or DEFAULT_ALBUMS.get(media_type)
+
+
+async def ensure_album(db: AsyncSession, actor_id: str, media_type: str, name: Optional[str]) -> Optional[MediaAlbum]:
+    """获取相册，不存在时创建并排在已有相册之后；并发创建同名相册时使用已创建的记录"""
+    if not name or media_type not in DEFAULT_ALBUMS:
+        return None
+
+    query = select(MediaAlbum).where(
+        MediaAlbum.actor_id == actor_id,
+        MediaAlbum.media_type == media_type,
+        MediaAlbum.name == name
+    )
+    album = await db.scalar(query)
+    if album:
+        return album
+
+    last_order = await db.scalar(select(func.max(MediaAlbum.sort_order)).where(
+        MediaAlbum.actor_id == actor_id,
+        MediaAlbum.media_type == media_type
+    ))
+    album = MediaAlbum(
+        actor_id=actor_id,
+        media_type=media_type,
+        name=name,
+        sort_order=(last_order or 0) + 1
+    )
+    try:
+        async with db.begin_nested():
+            db.add(album)
+    except IntegrityError:
+        album = await db.scalar(query)
+    return album
+
+
+async def album_summaries(db: AsyncSession, actor_id: str, media_type: Optional[str] = None) -> List[dict]:
+    """
+    演员的相册列表（按显示顺序），包含媒体数量和封面
+
+    数量和每个相册最新的媒体ID由一次分组查询得到，分组列是 ix_actor_media_listing 索引的前缀
+    """
+    query = select(MediaAlbum).where(MediaAlbum.actor_id == actor_id)
+    if media_type:
+        query = query.where(MediaAlbum.media_type == media_type)
+    albums = (await db.scalars(query.order_by(MediaAlbum.media_type, MediaAlbum.sort_order, MediaAlbum.id))).all()
+    if not albums:
+        return []
+
+    stats_query = select(
+        ActorMedia.type, ActorMedia.album, func.count(), func.max(ActorMedia.id)
+    ).where(
+        ActorMedia.actor_id == actor_id,
+        ActorMedia.album.isnot(None)
+    ).group_by(ActorMedia.type, ActorMedia.album)
+    if media_type:
+        stats_query = stats_query.where(ActorMedia.type == media_type)
+    stats = {(row[0], row[1]): (row[2], row[3]) for row in (await db.execute(stats_query)).all()}
+
+    cover_ids = {
+        album.id: album.cover_media_id or stats.get((album.media_type, album.name), (0, None))[1]
+        for album in albums
+    }
+    covers: Dict[int, ActorMedia] = {}
+    wanted = {media_id for media_id in cover_ids.values() if media_id}
+    if wanted:
+        covers = {
+            media.id: media
+            for media in (await db.scalars(select(ActorMedia).where(ActorMedia.id.in_(wanted)))).all()
+        }
+
+    summaries = []
+    for album in albums:
+        cover = covers.get(cover_ids[album.id])
+        summaries.append({
+            "id": album.id,
+            "name": album.name,
+            "media_type": album.media_type,
+            "sort_order": album.sort_order,
+            "count": stats.get((album.media_type, album.name), (0, None))[0],
+            "cover_media_id": cover.id if cover else None,
+            "cover_url": cover.file_path if cover else None
+        })
+    return summaries
+
+
+def encode_cursor(media: ActorMedia) -> str:
+    """由一页最后一条记录生成下一页的游标，created_at 为空时时间部分留空"""
+    created_at = media.created_at.isoformat() if media.created_at else ""
+    raw = f"{created_at}|{media.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """解析游标，返回 (created_at, id)，created_at 可能为None，格式错误时抛出ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, media_id = raw.rsplit("|", 1)
+        return (datetime.datetime.fromisoformat(created_at) if created_at else None), int(media_id)
+    except Exception:
+        raise ValueError("无效的分页游标")
+
+
+def after_cursor(query, cursor: Optional[str]):
+    """
+    在按 (created_at, id) 倒序的查询上加游标条件，只返回游标之后的记录
+
+    倒序时 created_at 为空的记录排在最后（MySQL和SQLite相同），
+    所以有时间的游标之后还包括全部没有时间的记录
+    """
+    if not cursor:
+        return query
+    created_at, media_id = decode_cursor(cursor)
+    if created_at is None:
+        return query.where(ActorMedia.created_at.is_(None), ActorMedia.id < media_id)
+    return query.where(or_(
+        ActorMedia.created_at < created_at,
+        and_(ActorMedia.created_at == created_at, ActorMedia.id < media_id),
+        ActorMedia.created_at.is_(None)
+    ))
+
+
+async def fetch_page(db: AsyncSession, query, limit: int):
+    """按 (created_at, id) 倒序读取一页，多取一条判断是否还有下一页，返回 (记录列表, 下一页游标)"""
+    rows = (await db.scalars(
+        query.order_by(ActorMedia.created_at.desc(), ActorMedia.id.desc()).limit(limit + 1)
+    )).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1])
+    return rows, None
@@ -0,0 +1,504 @@
+"""
+媒体后台处理队列
+
+上传接口只把原始文件保存到 MEDIA_ROOT/incoming 并在 media_jobs 表中创建任务，
+随后立即返回（客户端直传MinIO的文件在处理时才从暂存桶下载，见 direct_uploads）。应用内的工作协程从表中领取任务（SELECT ... FOR UPDATE SKIP LOCKED），
+完成压缩、缩略图生成和MinIO上传后写入 actor_media 记录。
+
+任务保存在数据库中，应用重启后未完成的任务会被重新领取；
+处理中的任务如果超过 MEDIA_JOB_LOCK_TIMEOUT 仍未完成（例如进程崩溃），也会被重新领取。
+失败的任务按指数退避重试，超过 MEDIA_JOB_MAX_ATTEMPTS 次后标记为失败。
+超过预签名有效期仍未确认上传的直传任务由工作协程池定期标记为失败，并删除可能已上传的暂存对象；
+过期未完成的续传会话也在这里放弃，释放MinIO中的分片上传和本地缓冲文件（见 resumable_uploads）。
+"""
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import os
+import uuid
+from typing import Optional
+
+from sqlalchemy import select, update, or_, and_
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.storage import run_storage_io
+from app.models.media import ActorMedia, MediaJob, UploadSession
+from app.utils.file_utils import (
+    process_photo,
+    create_video_thumbnail,
+    upload_file_to_minio,
+    upload_image_variants,
+    transcode_video,
+    streaming_fields,
+    build_srcset
+)
+from app.utils.storage_backends import get_storage_backend
+from app.utils.media_refs import (
+    find_media_by_hash,
+    reference_fields,
+    content_object_name,
+    content_thumbnail_name,
+    content_variants_prefix,
+    content_streaming_prefix
+)
+from app.utils.media_albums import album_name, ensure_album
+from app.utils.near_duplicates import find_near_duplicates
+from app.utils.direct_uploads import download_staged_object, remove_staged_object, direct_upload_expired_before
+from app.utils.resumable_uploads import abort_multipart_upload, remove_buffer
+
+logger = logging.getLogger(__name__)
+
+# 各类型任务的目标存储桶
+JOB_BUCKETS = {'photo': 'actor-photos', 'video': 'actor-videos'}
+
+
+def get_incoming_dir() -> str:
+    """待处理原始文件的保存目录"""
+    incoming_dir = os.path.join(settings.MEDIA_ROOT, "incoming")
+    os.makedirs(incoming_dir, exist_ok=True)
+    return incoming_dir
+
+
+async def claim_next_job() -> Optional[MediaJob]:
+    """领取一个待处理任务，没有可领取的任务时返回None"""
+    now = datetime.datetime.utcnow()
+    stale_before = now - datetime.timedelta(seconds=settings.MEDIA_JOB_LOCK_TIMEOUT)
+
+    async with AsyncSessionLocal() as db:
+        job = await db.scalar(
+            select(MediaJob)
+            .where(or_(
+                and_(MediaJob.status == 'pending', MediaJob.available_at <= now),
+                and_(MediaJob.status == 'processing', MediaJob.locked_at < stale_before)
+            ))
+            .order_by(MediaJob.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        if job is None:
+            return None
+
+        if job.status == 'processing' and job.attempts >= settings.MEDIA_JOB_MAX_ATTEMPTS:
+            # 处理超时且已用完重试次数
+            job.status = 'failed'
+            job.error = job.error or "处理超时"
+            await db.commit()
+            _remove_files(job.source_path)
+            return None
+
+        job.status = 'processing'
+        job.locked_at = now
+        job.attempts += 1
+        await db.commit()
+        return job
+
+
+async def process_job(job: MediaJob):
+    """处理一个已领取的任务，成功时创建媒体记录，失败时安排重试"""
+    renewal = asyncio.create_task(_renew_lock(job.id))
+    try:
+        await _process_job(job)
+    finally:
+        renewal.cancel()
+
+
+async def _renew_lock(job_id: int):
+    """
+    处理期间定期刷新任务的 locked_at
+
+    视频的下载、转码和上传合计可能超过 MEDIA_JOB_LOCK_TIMEOUT，不刷新时任务会在处理中被重新领取；
+    进程崩溃后不再刷新，任务仍会在超时后被重新领取
+    """
+    while True:
+        await asyncio.sleep(settings.MEDIA_JOB_LOCK_TIMEOUT / 3)
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(MediaJob)
+                    .where(MediaJob.id == job_id, MediaJob.status == 'processing')
+                    .values(locked_at=datetime.datetime.utcnow())
+                )
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"刷新任务锁定时间失败: 任务ID={job_id}, 错误={str(e)}")
+
+
+async def _process_job(job: MediaJob):
+    params = json.loads(job.params) if job.params else {}
+    generated_files = []
+    try:
+        if not job.source_path:
+            await _download_source_object(job)
+        content_hash = job.content_hash or await asyncio.to_thread(_hash_file, job.source_path)
+        async with AsyncSessionLocal() as db:
+            existing = await find_media_by_hash(db, content_hash, JOB_BUCKETS[job.job_type])
+
+        if existing:
+            # 相同内容已存储过，直接引用已有对象
+            media_fields, result = _reference_existing(existing, job, params)
+        elif job.job_type == 'photo':
+            media_fields, result = await _process_photo(job, content_hash, params, generated_files)
+        else:
+            media_fields, result = await _process_video(job, content_hash, params, generated_files)
+    except Exception as e:
+        logger.error(f"媒体任务处理失败: 任务ID={job.id}, 第{job.attempts}次, 错误={str(e)}")
+        _remove_files(*generated_files)
+        await _fail_job(job, str(e))
+        return
+
+    try:
+        async with AsyncSessionLocal() as db:
+            media = ActorMedia(
+                actor_id=job.actor_id,
+                is_public=True,
+                uploaded_by=job.created_by,
+                **media_fields
+            )
+            if job.job_type == 'photo':
+                # 标记与该演员已有照片近似重复的情况
+                result["near_duplicates"] = await find_near_duplicates(db, job.actor_id, media.phash)
+            db.add(media)
+            await db.flush()
+            await ensure_album(db, job.actor_id, job.job_type, media.album)
+
+            result.update({"media_id": media.id, "uploaded_at": media.created_at.isoformat()})
+            await db.execute(
+                update(MediaJob)
+                .where(MediaJob.id == job.id)
+                .values(status='completed', media_id=media.id, result=json.dumps(result, ensure_ascii=False), error=None)
+            )
+            await db.commit()
+    except Exception as e:
+        logger.error(f"保存媒体记录失败: 任务ID={job.id}, 错误={str(e)}")
+        _remove_files(*generated_files)
+        await _fail_job(job, f"保存媒体记录失败: {str(e)}")
+        return
+
+    logger.info(f"媒体任务处理完成: 任务ID={job.id}, 媒体ID={result['media_id']}")
+    _remove_files(job.source_path, *generated_files)
+    if job.source_object:
+        await _remove_source_object(job)
+
+
+async def _download_source_object(job: MediaJob):
+    """客户端直传的任务：把暂存桶中的原始文件下载到本地，并记录路径供重试时复用"""
+    from app.core.storage import minio_client
+
+    ext = os.path.splitext(job.source_object)[1]
+    source_path = os.path.join(get_incoming_dir(), f"{uuid.uuid4()}{ext}")
+    await run_storage_io(download_staged_object, minio_client, job.source_object, source_path)
+    job.source_path = source_path
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(MediaJob).where(MediaJob.id == job.id).values(source_path=source_path))
+        await db.commit()
+
+
+async def _remove_source_object(job: MediaJob):
+    """删除暂存桶中已处理的原始文件"""
+    from app.core.storage import minio_client
+
+    try:
+        await run_storage_io(remove_staged_object, minio_client, job.source_object)
+    except Exception as e:
+        logger.warning(f"删除暂存对象失败: {job.source_object}, 错误={str(e)}")
+
+
+def _hash_file(path: str) -> str:
+    """计算文件的SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _reference_existing(existing: ActorMedia, job: MediaJob, params: dict):
+    """引用内容相同的已有媒体，跳过压缩和上传"""
+    label_key = "album" if job.job_type == 'photo' else "category"
+    label = album_name(params.get(label_key), job.job_type)
+    variants = json.loads(existing.variants) if existing.variants else None
+
+    media_fields = reference_fields(existing)
+    media_fields.update({"type": job.job_type, "album": label})
+    result = {
+        "url": existing.file_path,
+        "thumbnail_url": get_storage_backend().url(existing.bucket_name, content_thumbnail_name(existing.content_hash)),
+        "file_name": existing.file_name,
+        "file_size": existing.file_size,
+        "mime_type": existing.mime_type,
+        label_key: label,
+        "deduplicated": True,
+    }
+    if job.job_type == 'photo':
+        result.update({"variants": variants, "srcset": build_srcset(variants)})
+    else:
+        result.update(streaming_fields(json.loads(existing.streaming) if existing.streaming else None))
+    return media_fields, result
+
+
+async def _process_photo(job: MediaJob, content_hash: str, params: dict, generated_files: list):
+    """压缩照片、生成缩略图并上传到MinIO"""
+    album = album_name(params.get("album"), "photo")
+
+    # 一次解码生成压缩图、缩略图、响应式变体和感知哈希
+    processed = await process_photo(job.source_path)
+    compressed_filepath = processed["compressed"]
+    generated_files.extend([compressed_filepath, processed["thumbnail"]])
+    generated_files.extend(path for _, _, path in processed["variants"])
+
+    # 上传到MinIO，对象键由原始内容的哈希决定，重试时会覆盖同名对象
+    object_name = content_object_name("photos", content_hash, os.path.splitext(compressed_filepath)[1])
+    bucket_name = JOB_BUCKETS['photo']
+
+    # 上传原图
+    file_url = await upload_file_to_minio(compressed_filepath, bucket_name, object_name)
+
+    # 上传缩略图
+    thumbnail_url = await upload_file_to_minio(processed["thumbnail"], bucket_name, content_thumbnail_name(content_hash))
+
+    # 上传响应式变体
+    variants = await upload_image_variants(processed["variants"], bucket_name, content_variants_prefix(content_hash))
+    phash = processed["phash"]
+
+    media_fields = {
+        "type": "photo",
+        "file_name": os.path.basename(compressed_filepath),
+        "file_path": file_url,
+        "file_size": job.file_size,
+        "mime_type": job.mime_type,
+        "album": album,
+        "bucket_name": bucket_name,
+        "object_name": object_name,
+        "variants": json.dumps(variants) if variants else None,
+        "content_hash": content_hash,
+        "phash": phash,
+    }
+    result = {
+        "url": file_url,
+        "thumbnail_url": thumbnail_url,
+        "variants": variants,
+        "srcset": build_srcset(variants),
+        "file_name": media_fields["file_name"],
+        "file_size": job.file_size,
+        "mime_type": job.mime_type,
+        "album": album,
+    }
+    return media_fields, result
+
+
+async def _process_video(job: MediaJob, content_hash: str, params: dict, generated_files: list):
+    """生成视频缩略图并上传到MinIO"""
+    category = album_name(params.get("category"), "video")
+
+    # 生成视频缩略图
+    thumbnail_filepath = await create_video_thumbnail(job.source_path)
+    generated_files.append(thumbnail_filepath)
+
+    # 上传到MinIO，对象键由原始内容的哈希决定
+    object_name = content_object_name("videos", content_hash, os.path.splitext(job.source_path)[1])
+    bucket_name = JOB_BUCKETS['video']
+
+    # 上传视频，内容类型使用接收文件时检测的结果
+    file_url = await upload_file_to_minio(job.source_path, bucket_name, object_name, job.mime_type)
+
+    # 上传缩略图
+    thumbnail_url = await upload_file_to_minio(thumbnail_filepath, bucket_name, content_thumbnail_name(content_hash))
+
+    # 转码为HLS多码率版本，并生成封面和拖动预览雪碧图
+    streaming = await transcode_video(job.source_path, bucket_name, content_streaming_prefix(content_hash))
+
+    media_fields = {
+        "type": "video",
+        "file_name": os.path.basename(job.source_path),
+        "file_path": file_url,
+        "file_size": job.file_size,
+        "mime_type": job.mime_type,
+        "album": category,
+        "bucket_name": bucket_name,
+        "object_name": object_name,
+        "content_hash": content_hash,
+        "streaming": json.dumps(streaming) if streaming else None,
+    }
+    result = {
+        "url": file_url,
+        "thumbnail_url": thumbnail_url,
+        **streaming_fields(streaming),
+        "file_name": media_fields["file_name"],
+        "file_size": job.file_size,
+        "mime_type": job.mime_type,
+        "category": category,
+    }
+    return media_fields, result
+
+
+async def _fail_job(job: MediaJob, error: str):
+    """记录失败，未超过重试次数时按指数退避重新排队"""
+    values = {"error": error, "locked_at": None}
+    if job.attempts >= settings.MEDIA_JOB_MAX_ATTEMPTS:
+        values["status"] = 'failed'
+    else:
+        delay = settings.MEDIA_JOB_RETRY_DELAY * (2 ** (job.attempts - 1))
+        values["status"] = 'pending'
+        values["available_at"] = datetime.datetime.utcnow() + datetime.timedelta(seconds=delay)
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(MediaJob).where(MediaJob.id == job.id).values(**values))
+        await db.commit()
+
+    if values["status"] == 'failed':
+        _remove_files(job.source_path)
+        if job.source_object:
+            await _remove_source_object(job)
+
+
+async def expire_direct_uploads(limit: int = 100) -> int:
+    """把超过预签名有效期仍未确认上传的直传任务标记为失败并删除暂存对象，返回处理的任务数"""
+    async with AsyncSessionLocal() as db:
+        jobs = (await db.scalars(
+            select(MediaJob)
+            .where(MediaJob.status == 'awaiting_upload', MediaJob.created_at < direct_upload_expired_before())
+            .order_by(MediaJob.id)
+            .limit(limit)
+        )).all()
+
+        expired = []
+        for job in jobs:
+            # 条件更新，与同时进行的确认上传只有一个能改变任务状态
+            result = await db.execute(
+                update(MediaJob)
+                .where(MediaJob.id == job.id, MediaJob.status == 'awaiting_upload')
+                .values(status='failed', error="上传已过期")
+            )
+            if result.rowcount:
+                expired.append(job)
+        await db.commit()
+
+    for job in expired:
+        if job.source_object:
+            await _remove_source_object(job)
+    if expired:
+        logger.info(f"过期的直传任务已标记为失败: {len(expired)}个")
+    return len(expired)
+
+
+async def expire_upload_sessions(limit: int = 100) -> int:
+    """放弃超过有效期仍未完成的续传会话：释放MinIO中已上传的分片并删除本地缓冲，返回处理的会话数"""
+    async with AsyncSessionLocal() as db:
+        sessions = (await db.scalars(
+            select(UploadSession)
+            .where(UploadSession.status == 'uploading', UploadSession.expires_at < datetime.datetime.utcnow())
+            .order_by(UploadSession.expires_at)
+            .limit(limit)
+        )).all()
+
+        expired = []
+        for session in sessions:
+            # 条件更新，与同时提交的分块只有一个能改变会话状态
+            result = await db.execute(
+                update(UploadSession)
+                .where(UploadSession.id == session.id, UploadSession.status == 'uploading')
+                .values(status='aborted')
+            )
+            if result.rowcount:
+                expired.append(session)
+        await db.commit()
+
+    from app.core.storage import minio_client
+    for session in expired:
+        if session.multipart_upload_id:
+            try:
+                await run_storage_io(abort_multipart_upload, minio_client, session.object_name, session.multipart_upload_id)
+            except Exception as e:
+                logger.warning(f"放弃分片上传失败: {session.object_name}, 错误={str(e)}")
+        remove_buffer(session.id)
+    if expired:
+        logger.info(f"过期的续传会话已放弃: {len(expired)}个")
+    return len(expired)
+
+
+def _remove_files(*paths):
+    """删除本地文件，忽略不存在的文件"""
+    for path in paths:
+        if path and os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"删除本地文件失败: {path}, 错误={str(e)}")
+
+
+class MediaJobWorkerPool:
+    """应用内的媒体任务工作协程池"""
+
+    def __init__(self):
+        self._tasks = []
+        self._wakeup = asyncio.Event()
+
+    def start(self, workers: int):
+        """启动工作协程和过期清理协程，workers为0时不启动（由独立进程处理任务）"""
+        for i in range(workers):
+            self._tasks.append(asyncio.create_task(self._run(i)))
+        if workers:
+            self._tasks.append(asyncio.create_task(self._sweep()))
+            logger.info(f"媒体任务工作协程已启动: {workers}个")
+
+    async def stop(self):
+        """停止所有工作协程，正在处理的任务会在锁超时后被重新领取"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """有新任务时唤醒空闲的工作协程"""
+        self._wakeup.set()
+
+    async def _sweep(self):
+        while True:
+            try:
+                await expire_direct_uploads()
+            except Exception as e:
+                logger.error(f"清理过期直传任务失败: {str(e)}")
+            try:
+                await expire_upload_sessions()
+            except Exception as e:
+                logger.error(f"清理过期续传会话失败: {str(e)}")
+            await asyncio.sleep(settings.MEDIA_JOB_SWEEP_INTERVAL)
+
+    async def _run(self, worker_index: int):
+        while True:
+            try:
+                job = await claim_next_job()
+            except Exception as e:
+                logger.error(f"领取媒体任务失败: 工作协程={worker_index}, 错误={str(e)}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=settings.MEDIA_JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            try:
+                await process_job(job)
+            except Exception as e:
+                logger.error(f"媒体任务处理异常: 任务ID={job.id}, 错误={str(e)}")
+
+
+media_job_pool = MediaJobWorkerPool()
+
+
+async def _run_standalone():
+    media_job_pool.start(max(settings.MEDIA_JOB_WORKERS, 1))
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    # 作为独立的工作进程运行: python -m app.utils.media_jobs
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_run_standalone())
@@ -0,0 +1,168 @@
+"""
+内容寻址存储与媒体对象引用计数
+
+上传的文件按原始内容的SHA-256存放在内容寻址的对象键下（如 photos/sha256/ab/ab12...jpg），
+相同内容再次上传时不再压缩和上传，只新增一条引用同一对象的 actor_media 记录。
+对象的引用数即 content_hash 相同的记录数，删除记录时只有最后一个引用被删除才删除存储中的对象。
+没有 content_hash 的历史记录各自独占一个对象。
+"""
+import json
+import os
+import re
+from typing import Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.media import ActorMedia, MediaJob
+from app.utils.file_utils import variant_object_names
+
+# 内容寻址对象键中的内容哈希，原文件、缩略图、变体和转码结果的键都包含 sha256/{前两位}/{哈希}
+CONTENT_HASH_PATTERN = re.compile(r"(?:^|/)sha256/[0-9a-f]{2}/([0-9a-f]{64})")
+
+# 与引用的源记录共享的存储字段
+STORAGE_FIELDS = ['file_name', 'file_path', 'file_size', 'mime_type', 'bucket_name', 'object_name', 'variants', 'content_hash', 'phash', 'streaming']
+
+
+def content_object_name(prefix: str, content_hash: str, ext: str) -> str:
+    """内容寻址的对象键，按哈希前两位分目录"""
+    return f"{prefix}/sha256/{content_hash[:2]}/{content_hash}{ext}"
+
+
+def content_thumbnail_name(content_hash: str) -> str:
+    """内容寻址的缩略图对象键"""
+    return content_object_name("thumbnails", content_hash, ".jpg")
+
+
+def content_variants_prefix(content_hash: str) -> str:
+    """内容寻址的响应式变体对象键前缀"""
+    return content_object_name("variants", content_hash, "")
+
+
+def content_streaming_prefix(content_hash: str) -> str:
+    """内容寻址的视频转码结果（HLS清单、分段、封面和雪碧图）对象键前缀"""
+    return content_object_name("hls", content_hash, "")
+
+
+def legacy_thumbnail_name(object_name: str) -> Optional[str]:
+    """
+    内容寻址之前上传的缩略图对象键，与原文件按演员和相册分目录：
+    photos/{演员ID}/{相册}/x.jpg -> thumbnails/{演员ID}/{相册}/x_thumbnail.jpg
+    """
+    prefix, sep, rest = object_name.partition("/")
+    if prefix not in ("photos", "videos") or not sep:
+        return None
+    return f"thumbnails/{os.path.splitext(rest)[0]}_thumbnail.jpg"
+
+
+def object_content_hash(object_name: str) -> Optional[str]:
+    """内容寻址对象键对应的内容哈希，不是内容寻址的对象键返回None"""
+    match = CONTENT_HASH_PATTERN.search(object_name)
+    return match.group(1) if match else None
+
+
+def reference_fields(media: ActorMedia) -> dict:
+    """复制已有记录的存储字段，用于创建引用同一对象的新记录"""
+    return {field: getattr(media, field) for field in STORAGE_FIELDS}
+
+
+def media_object_names(media: ActorMedia) -> List[str]:
+    """媒体记录在存储中对应的所有对象：原文件、内容寻址的缩略图、响应式变体和视频转码结果"""
+    names = []
+    if media.object_name:
+        names.append(media.object_name)
+    if media.content_hash and media.type in ('photo', 'video'):
+        names.append(content_thumbnail_name(media.content_hash))
+    elif media.object_name and media.type in ('photo', 'video'):
+        legacy_thumbnail = legacy_thumbnail_name(media.object_name)
+        if legacy_thumbnail:
+            names.append(legacy_thumbnail)
+    if media.variants and media.bucket_name:
+        names.extend(variant_object_names(json.loads(media.variants), media.bucket_name))
+    if media.streaming:
+        names.extend(json.loads(media.streaming).get("objects", []))
+    return names
+
+
+async def find_media_by_hash(db: AsyncSession, content_hash: Optional[str], bucket_name: str) -> Optional[ActorMedia]:
+    """查找同一存储桶中内容相同的已有媒体记录"""
+    if not content_hash:
+        return None
+    return await db.scalar(
+        select(ActorMedia)
+        .where(ActorMedia.content_hash == content_hash, ActorMedia.bucket_name == bucket_name)
+        .order_by(ActorMedia.id)
+        .limit(1)
+    )
+
+
+def _other_references(media: ActorMedia):
+    return select(func.count()).select_from(ActorMedia).where(
+        ActorMedia.content_hash == media.content_hash,
+        ActorMedia.bucket_name == media.bucket_name,
+        ActorMedia.id != media.id
+    )
+
+
+async def releasable_object_names(db: AsyncSession, media: ActorMedia) -> List[str]:
+    """删除该记录后可以从存储中删除的对象，仍被其他记录引用时返回空列表"""
+    if media.content_hash and await db.scalar(_other_references(media)):
+        return []
+    return media_object_names(media)
+
+
+async def referenced_object_names(db: AsyncSession, bucket_name: str, object_names: Iterable[str]) -> Set[str]:
+    """
+    仍被使用的对象键：有媒体记录以它为原文件，或者是仍有媒体记录或未完成的处理任务引用的内容的派生对象
+
+    内容寻址的对象键在删除后会被相同内容的再次上传重新使用，删除前用它排除已被重新引用的对象
+    """
+    object_names = list(object_names)
+    hashes = {object_content_hash(name) for name in object_names} - {None}
+
+    referenced = set(await db.scalars(
+        select(ActorMedia.object_name)
+        .where(ActorMedia.bucket_name == bucket_name, ActorMedia.object_name.in_(object_names))
+    ))
+    live_hashes = set()
+    if hashes:
+        live_hashes.update(await db.scalars(
+            select(ActorMedia.content_hash)
+            .where(ActorMedia.bucket_name == bucket_name, ActorMedia.content_hash.in_(hashes))
+        ))
+        # 处理中的任务在保存媒体记录之前就会写入内容寻址的对象
+        live_hashes.update(await db.scalars(
+            select(MediaJob.content_hash)
+            .where(MediaJob.status.in_(('pending', 'processing')), MediaJob.content_hash.in_(hashes))
+        ))
+    referenced.update(name for name in object_names if object_content_hash(name) in live_hashes)
+    return referenced
+
+
+def releasable_actor_objects(db: Session, actor_id: str) -> Set[Tuple[str, str]]:
+    """
+    删除演员的所有媒体记录后可以从存储中删除的对象 {(存储桶, 对象键)}
+
+    仍被其他演员的记录引用的内容保留，引用情况由一次查询得到；
+    同一演员的多条记录可能引用同一对象，用集合去重；没有存储桶的旧记录按默认存储桶删除
+    """
+    media_files = db.query(ActorMedia).filter(ActorMedia.actor_id == actor_id).all()
+    hashes = {media.content_hash for media in media_files if media.content_hash}
+    shared = set()
+    if hashes:
+        shared = set(db.execute(
+            select(ActorMedia.content_hash, ActorMedia.bucket_name)
+            .where(ActorMedia.content_hash.in_(hashes), ActorMedia.actor_id != actor_id)
+            .distinct()
+        ).all())
+
+    objects = set()
+    for media in media_files:
+        if media.content_hash and (media.content_hash, media.bucket_name) in shared:
+            continue
+        # 没有记录存储桶的旧记录使用默认存储桶
+        bucket_name = media.bucket_name or settings.MINIO_BUCKET
+        objects.update((bucket_name, object_name) for object_name in media_object_names(media))
+    return objects
@@ -3,20 +3,18 @@
 设置MinIO存储桶权限为公共可访问
 """
 import json
-from minio import Minio
 from minio.error import S3Error
+from urllib3.exceptions import MaxRetryError
 from app.core.config import settings
+from app.core.storage import get_minio_client, ensure_bucket
 
 def setup_minio_buckets():
     """设置MinIO存储桶并配置公共访问权限"""
     try:
-        # 创建MinIO客户端
-        minio_client = Minio(
-            settings.MINIO_URL,
-            access_key=settings.MINIO_ROOT_USER,
-            secret_key=settings.MINIO_ROOT_PASSWORD,
-            secure=False  # 本地开发环境通常不使用HTTPS
-        )
+        minio_client = get_minio_client()
+        
+        # 默认存储桶（不设置公共访问）
+        ensure_bucket(settings.MINIO_BUCKET)
         
         # 要设置的存储桶列表
         buckets = [
@@ -28,10 +26,8 @@ def setup_minio_buckets():
         
         # 为每个存储桶设置公共访问策略
         for bucket_name in buckets:
-            # 检查存储桶是否存在，不存在则创建
-            if not minio_client.bucket_exists(bucket_name):
-                minio_client.make_bucket(bucket_name)
-                print(f"存储桶 {bucket_name} 创建成功")
+            # 检查存储桶是否存在，不存在则创建，确认后记入存储桶缓存
+            ensure_bucket(bucket_name)
             
             # 设置为公共可读的策略
             # 允许公共读取访问
@@ -53,7 +49,8 @@ def setup_minio_buckets():
         
         print("所有存储桶设置完成")
         return True
-    except S3Error as err:
+    except (S3Error, MaxRetryError) as err:
+        # MinIO无法连接时重试用尽后抛出MaxRetryError
         print(f"设置MinIO存储桶时出错: {err}")
         return False
 
@@ -0,0 +1,117 @@
+"""
+照片近似重复检测
+
+每张照片入库时计算64位差异哈希(dHash)，两张照片哈希的汉明距离不超过
+PHASH_DUPLICATE_THRESHOLD 即视为近似重复（重新裁剪、缩放或重新编码的同一张照片）。
+单个演员的照片最多几十张，上传时直接逐一比较；全库聚类使用BK树，
+每次查询只访问距离可能满足条件的子树。
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.media import ActorMedia
+
+
+def hamming_distance(a: str, b: str) -> int:
+    """两个十六进制哈希之间的汉明距离"""
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+class BKTree:
+    """按汉明距离组织的BK树，用于在大量哈希中查找距离不超过阈值的项"""
+
+    def __init__(self):
+        self._root = None  # [哈希, 项, {距离: 子节点}]
+
+    def add(self, phash: str, item):
+        node = [phash, item, {}]
+        if self._root is None:
+            self._root = node
+            return
+        current = self._root
+        while True:
+            distance = hamming_distance(phash, current[0])
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                return
+            current = child
+
+    def search(self, phash: str, max_distance: int) -> List[Tuple[int, object]]:
+        """返回 [(距离, 项)]，包含距离不超过max_distance的所有项"""
+        if self._root is None:
+            return []
+        matches = []
+        stack = [self._root]
+        while stack:
+            node_hash, item, children = stack.pop()
+            distance = hamming_distance(phash, node_hash)
+            if distance <= max_distance:
+                matches.append((distance, item))
+            # 三角不等式：只有边上的距离在 [d-r, d+r] 内的子树可能包含结果
+            for edge, child in children.items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    stack.append(child)
+        return matches
+
+
+async def find_near_duplicates(
+    db: AsyncSession,
+    actor_id: str,
+    phash: Optional[str],
+    threshold: Optional[int] = None,
+    exclude_media_id: Optional[int] = None
+) -> List[Dict]:
+    """查找演员已有照片中与给定哈希近似重复的照片，按距离从近到远排列"""
+    if not phash:
+        return []
+    if threshold is None:
+        threshold = settings.PHASH_DUPLICATE_THRESHOLD
+
+    rows = (await db.execute(
+        select(ActorMedia.id, ActorMedia.phash, ActorMedia.file_path)
+        .where(ActorMedia.actor_id == actor_id, ActorMedia.type == "photo", ActorMedia.phash.isnot(None))
+    )).all()
+
+    duplicates = []
+    for media_id, other_hash, file_path in rows:
+        if media_id == exclude_media_id:
+            continue
+        distance = hamming_distance(phash, other_hash)
+        if distance <= threshold:
+            duplicates.append({"media_id": media_id, "distance": distance, "file_path": file_path})
+    duplicates.sort(key=lambda item: (item["distance"], item["media_id"]))
+    return duplicates
+
+
+def cluster_near_duplicates(items: Iterable[Tuple[int, str]], threshold: int) -> List[List[int]]:
+    """
+    将 (媒体ID, 哈希) 按近似重复关系聚类，返回包含两张及以上照片的簇
+
+    近似重复关系按传递性合并（A≈B、B≈C 时A、B、C属于同一簇）
+    """
+    items = list(items)
+    parent = {media_id: media_id for media_id, _ in items}
+
+    def find(media_id):
+        while parent[media_id] != media_id:
+            parent[media_id] = parent[parent[media_id]]
+            media_id = parent[media_id]
+        return media_id
+
+    tree = BKTree()
+    for media_id, phash in items:
+        for _, other_id in tree.search(phash, threshold):
+            parent[find(media_id)] = find(other_id)
+        tree.add(phash, media_id)
+
+    clusters = {}
+    for media_id, _ in items:
+        clusters.setdefault(find(media_id), []).append(media_id)
+    return sorted(
+        (sorted(members) for members in clusters.values() if len(members) > 1),
+        key=lambda members: (-len(members), members[0])
+    )
@@ -0,0 +1,84 @@
+"""
+HTTP Range请求（206 Partial Content）的解析和分块读取
+
+只支持单个字节范围（bytes=start-end、bytes=start-、bytes=-suffix），
+包含多个范围时按不支持处理并返回完整内容，这是RFC 7233允许的做法。
+读取时按固定大小分块，MinIO对象只请求所需范围，内存占用与分块大小相当。
+"""
+from email.utils import format_datetime
+from typing import Iterator, Optional, Tuple
+
+
+class RangeNotSatisfiable(Exception):
+    """请求的范围超出内容长度，应返回416"""
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    解析Range请求头，返回闭区间 (start, end)
+
+    没有Range头、格式无法识别或包含多个范围时返回None（返回完整内容）；
+    范围在内容之外时抛出 RangeNotSatisfiable
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes="):].strip()
+    if "," in spec or "-" not in spec:
+        return None
+
+    first, last = (part.strip() for part in spec.split("-", 1))
+    try:
+        if not first:
+            # 最后N个字节
+            suffix = int(last)
+            if suffix <= 0 or size == 0:
+                raise RangeNotSatisfiable()
+            return max(size - suffix, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+def if_range_matches(header: Optional[str], etag: str, last_modified: Optional[str]) -> bool:
+    """If-Range与当前内容一致（或没有If-Range）时才按Range返回部分内容，弱ETag不参与比较"""
+    if not header:
+        return True
+    header = header.strip()
+    if header.startswith("W/"):
+        return False
+    return header == etag or (last_modified is not None and header == last_modified)
+
+
+def http_date(value) -> Optional[str]:
+    """datetime转为HTTP日期格式"""
+    return format_datetime(value, usegmt=True) if value else None
+
+
+def iter_object_range(response, chunk_size: int) -> Iterator[bytes]:
+    """按分块读取MinIO get_object的响应，读完或客户端断开后释放连接"""
+    try:
+        for chunk in response.stream(chunk_size):
+            yield chunk
+    finally:
+        response.close()
+        response.release_conn()
+
+
+def iter_file_range(path: str, start: int, end: int, chunk_size: int) -> Iterator[bytes]:
+    """按分块读取本地文件的闭区间 [start, end]"""
+    remaining = end - start + 1
+    with open(path, "rb") as f:
+        f.seek(start)
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
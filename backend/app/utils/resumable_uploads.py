@@ -0,0 +1,114 @@
+"""
+可续传的分块上传
+
+客户端先创建上传会话，然后按顺序PATCH带 Upload-Offset 的分块，中断后用HEAD查询
+已接收的偏移量再继续（与tus协议的核心部分一致）。
+
+收到的分块按其在文件中的位置写入本地缓冲文件 MEDIA_ROOT/uploads/{会话ID}.buf，
+未上传的字节每满 UPLOAD_PART_SIZE 或文件接收完毕时，从缓冲文件中逐个读出一个分片
+上传到MinIO暂存桶的分片上传中，上传完成后合并分片，按客户端直传的流程交给后台任务处理。
+
+会话记录中的 offset 和 parts 在每个分块处理后提交；缓冲文件中 [已上传分片的总大小, offset)
+范围内的字节有效，处理分块前先把缓冲文件截断到 offset，因此中途崩溃或连接断开后
+重发的字节不会重复写入。已上传分片对应的字节不再读取，缓冲文件不做压缩移位，
+分片上传和记录提交之间崩溃时缓冲文件仍然完整。
+"""
+import os
+from typing import AsyncIterator, List
+
+import aiofiles
+from minio.datatypes import Part
+from starlette.requests import ClientDisconnect
+
+from app.core.config import settings
+from app.core.storage import ensure_bucket
+
+
+def buffer_path(upload_id: str) -> str:
+    """会话的本地缓冲文件路径"""
+    directory = os.path.join(settings.MEDIA_ROOT, "uploads")
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"{upload_id}.buf")
+
+
+def uploaded_bytes(parts: List[dict]) -> int:
+    """已上传到MinIO的分片总大小"""
+    return sum(part["size"] for part in parts)
+
+
+def recoverable_offset(offset: int, parts: List[dict], path: str) -> int:
+    """
+    实际可以继续的偏移量
+
+    缓冲文件丢失或不完整时（例如换到了另一台服务器），退回到已上传分片的末尾
+    """
+    buffered = os.path.getsize(path) if os.path.exists(path) else 0
+    return min(offset, max(uploaded_bytes(parts), buffered))
+
+
+async def append_stream(path: str, offset: int, stream: AsyncIterator[bytes], max_bytes: int):
+    """
+    把请求体写入缓冲文件的offset位置，返回 (写入的字节数, 是否超出max_bytes)
+
+    写入前把缓冲文件截断到offset；客户端中途断开时保留已写入的部分
+    """
+    mode = 'r+b' if os.path.exists(path) else 'w+b'
+    received = 0
+    async with aiofiles.open(path, mode) as buffer:
+        await buffer.truncate(offset)
+        await buffer.seek(offset)
+        try:
+            async for chunk in stream:
+                if received + len(chunk) > max_bytes:
+                    chunk = chunk[:max_bytes - received]
+                    await buffer.write(chunk)
+                    received += len(chunk)
+                    return received, True
+                await buffer.write(chunk)
+                received += len(chunk)
+        except ClientDisconnect:
+            pass
+    return received, False
+
+
+def create_multipart_upload(minio_client, object_name: str, mime_type: str) -> str:
+    """在暂存桶中创建分片上传，返回分片上传ID"""
+    ensure_bucket(settings.MINIO_UPLOAD_BUCKET)
+    return minio_client._create_multipart_upload(
+        settings.MINIO_UPLOAD_BUCKET, object_name, {"Content-Type": mime_type}
+    )
+
+
+def upload_buffer_part(minio_client, object_name: str, multipart_upload_id: str, part_number: int,
+                       path: str, start: int, size: int) -> str:
+    """
+    把缓冲文件中从start开始的size个字节作为一个分片上传，返回分片的ETag
+
+    size 不超过 UPLOAD_PART_SIZE，每次只读入一个分片
+    """
+    with open(path, 'rb') as buffer:
+        buffer.seek(start)
+        data = buffer.read(size)
+    return minio_client._upload_part(
+        settings.MINIO_UPLOAD_BUCKET, object_name, data, None, multipart_upload_id, part_number
+    )
+
+
+def complete_multipart_upload(minio_client, object_name: str, multipart_upload_id: str, parts: List[dict]):
+    """合并已上传的分片"""
+    minio_client._complete_multipart_upload(
+        settings.MINIO_UPLOAD_BUCKET, object_name, multipart_upload_id,
+        [Part(part["part_number"], part["etag"]) for part in parts]
+    )
+
+
+def abort_multipart_upload(minio_client, object_name: str, multipart_upload_id: str):
+    """放弃分片上传，释放MinIO中已上传的分片"""
+    minio_client._abort_multipart_upload(settings.MINIO_UPLOAD_BUCKET, object_name, multipart_upload_id)
+
+
+def remove_buffer(upload_id: str):
+    """删除会话的本地缓冲文件"""
+    path = buffer_path(upload_id)
+    if os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,414 @@
+"""
+媒体文件的存储后端
+
+上传、读取、删除媒体文件都通过 get_storage_backend() 返回的后端进行，由 STORAGE_BACKEND 选择：
+- minio: MinIO对象存储（默认），阻塞的请求在存储线程池中执行
+- local: 本地文件系统，文件保存在 MEDIA_ROOT/objects/{存储桶}/{对象键}，通过 /media 静态文件挂载访问；
+  单节点部署时不经过MinIO的HTTP请求，上传用 copyfile（Linux上为sendfile）复制，
+  读取时直接返回文件路径，由 FileResponse 发送（服务器支持 pathsend 扩展时为零拷贝）
+- memory: 进程内存，用于测试和基准测试
+
+存储桶和对象键的含义在各后端中相同，数据库中的 bucket_name/object_name 不依赖后端；
+更换后端不会迁移已有文件。
+"""
+import abc
+import datetime
+import itertools
+import mimetypes
+import os
+import shutil
+import threading
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from minio.error import S3Error
+from urllib3.exceptions import MaxRetryError
+
+from app.core.config import settings
+from app.core.storage import (
+    get_minio_client,
+    ensure_bucket,
+    forget_bucket,
+    run_storage_io,
+    remove_objects
+)
+from app.utils.range_requests import iter_object_range, iter_file_range
+
+# 本地后端的对象目录（位于 MEDIA_ROOT 下，由 /media 静态文件挂载提供访问）
+LOCAL_OBJECTS_DIR = "objects"
+# 本地后端写入中的临时文件目录，位于存储根目录下；存储桶名不能以"."开头，不会与存储桶重名
+LOCAL_TEMP_DIR = ".tmp"
+
+
+class ObjectNotFound(Exception):
+    """对象不存在"""
+
+
+@dataclass
+class ObjectInfo:
+    """对象的元数据，etag不含引号"""
+    size: int
+    etag: str
+    last_modified: Optional[datetime.datetime] = None
+    content_type: Optional[str] = None
+
+
+class StorageBackend(abc.ABC):
+    """存储后端接口，异步方法不阻塞事件循环"""
+
+    name = ""
+    # 是否支持客户端直传（预签名POST表单和分片上传）
+    supports_direct_upload = False
+
+    @abc.abstractmethod
+    async def put_file(self, bucket_name: str, object_name: str, file_path: str, content_type: str) -> str:
+        """保存本地文件，返回访问URL"""
+
+    @abc.abstractmethod
+    async def get_file(self, bucket_name: str, object_name: str, file_path: str):
+        """把对象保存到本地文件，对象不存在时抛出ObjectNotFound"""
+
+    @abc.abstractmethod
+    async def stat(self, bucket_name: str, object_name: str) -> ObjectInfo:
+        """对象的元数据，对象不存在时抛出ObjectNotFound"""
+
+    @abc.abstractmethod
+    async def stream(self, bucket_name: str, object_name: str, start: int, length: int, chunk_size: int) -> Iterator[bytes]:
+        """从start开始读取length个字节，返回按chunk_size分块的迭代器"""
+
+    @abc.abstractmethod
+    async def delete(self, bucket_name: str, object_names: Iterable[str]) -> List[str]:
+        """删除对象（不存在的对象视为已删除），返回删除失败的对象键"""
+
+    @abc.abstractmethod
+    async def list_objects(self, bucket_name: str, start_after: Optional[str], limit: int) -> List[Tuple[str, ObjectInfo]]:
+        """
+        按对象键的字节顺序（与S3的列举顺序相同）列出 start_after 之后的最多 limit 个对象，
+        返回 [(对象键, 元数据)]，存储桶不存在时返回空列表
+        """
+
+    @abc.abstractmethod
+    def url(self, bucket_name: str, object_name: str) -> str:
+        """对象的访问URL"""
+
+    def presign(self, bucket_name: str, object_name: str, expires: int = 3600) -> str:
+        """有时效的下载URL，不需要签名的后端返回普通URL"""
+        return self.url(bucket_name, object_name)
+
+    def local_path(self, bucket_name: str, object_name: str) -> Optional[str]:
+        """对象在本地文件系统中的路径，可以直接发送文件；不是本地存储时返回None"""
+        return None
+
+    @abc.abstractmethod
+    async def check(self) -> str:
+        """健康检查，返回状态说明，服务不可用时抛出异常"""
+
+
+class MinioStorageBackend(StorageBackend):
+    """MinIO对象存储"""
+
+    name = "minio"
+    supports_direct_upload = True
+
+    async def put_file(self, bucket_name, object_name, file_path, content_type):
+        await run_storage_io(self._put_file, bucket_name, object_name, file_path, content_type)
+        return self.url(bucket_name, object_name)
+
+    @staticmethod
+    def _put_file(bucket_name, object_name, file_path, content_type):
+        # 存储桶是否存在只检查一次；存储桶在外部被删除时清除缓存，重新创建后再上传一次
+        for attempt in range(2):
+            try:
+                ensure_bucket(bucket_name)
+            except (S3Error, MaxRetryError) as e:
+                raise Exception(f"无法创建存储桶: {e}")
+
+            try:
+                get_minio_client().fput_object(bucket_name, object_name, file_path, content_type=content_type)
+                return
+            except S3Error as e:
+                if e.code == "NoSuchBucket" and attempt == 0:
+                    forget_bucket(bucket_name)
+                    continue
+                raise Exception(f"上传文件失败: {e}")
+            except Exception as e:
+                raise Exception(f"上传文件失败: {e}")
+
+    async def get_file(self, bucket_name, object_name, file_path):
+        try:
+            await run_storage_io(get_minio_client().fget_object, bucket_name, object_name, file_path)
+        except S3Error as e:
+            if e.code in ("NoSuchKey", "NoSuchBucket"):
+                raise ObjectNotFound(object_name)
+            raise
+
+    async def stat(self, bucket_name, object_name):
+        try:
+            stat = await run_storage_io(get_minio_client().stat_object, bucket_name, object_name)
+        except S3Error as e:
+            if e.code in ("NoSuchKey", "NoSuchBucket"):
+                raise ObjectNotFound(object_name)
+            raise
+        return ObjectInfo(stat.size, stat.etag, stat.last_modified, stat.content_type)
+
+    async def stream(self, bucket_name, object_name, start, length, chunk_size):
+        # 只请求需要的范围，响应体在迭代时按块读取
+        response = await run_storage_io(
+            get_minio_client().get_object, bucket_name, object_name, offset=start, length=length
+        )
+        return iter_object_range(response, chunk_size)
+
+    async def delete(self, bucket_name, object_names):
+        return await remove_objects(bucket_name, object_names)
+
+    async def list_objects(self, bucket_name, start_after, limit):
+        return await run_storage_io(self._list_objects, bucket_name, start_after, limit)
+
+    @staticmethod
+    def _list_objects(bucket_name, start_after, limit):
+        # 列举结果按页（每页最多1000个）懒加载，只读取需要的页
+        objects = get_minio_client().list_objects(bucket_name, recursive=True, start_after=start_after)
+        try:
+            return [
+                (obj.object_name, ObjectInfo(obj.size, (obj.etag or "").strip('"'), obj.last_modified))
+                for obj in itertools.islice(objects, limit)
+            ]
+        except S3Error as e:
+            if e.code == "NoSuchBucket":
+                return []
+            raise
+
+    def url(self, bucket_name, object_name):
+        return f"{settings.MINIO_EXTERNAL_URL}/{bucket_name}/{object_name}"
+
+    def presign(self, bucket_name, object_name, expires=3600):
+        from app.utils.direct_uploads import get_presign_client
+        return get_presign_client().presigned_get_object(
+            bucket_name, object_name, expires=datetime.timedelta(seconds=expires)
+        )
+
+    async def check(self):
+        exists = await run_storage_io(get_minio_client().bucket_exists, settings.MINIO_BUCKET)
+        return f"存储服务连接正常，存储桶{settings.MINIO_BUCKET}{'存在' if exists else '不存在'}"
+
+
+class LocalStorageBackend(StorageBackend):
+    """本地文件系统，适合单节点部署"""
+
+    name = "local"
+
+    def __init__(self, root: str, base_url: str):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip("/")
+
+    def _path(self, bucket_name: str, object_name: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, bucket_name, object_name))
+        # 对象键来自服务端生成的名字，这里仍然防止越出存储目录
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"无效的对象键: {object_name}")
+        return path
+
+    async def put_file(self, bucket_name, object_name, file_path, content_type):
+        await run_storage_io(self._put_file, self._path(bucket_name, object_name), file_path)
+        return self.url(bucket_name, object_name)
+
+    def _put_file(self, path, file_path):
+        # 先复制到临时文件再替换，读取方不会看到写了一半的文件；copyfile在Linux上使用sendfile，在内核中完成复制。
+        # 临时文件放在存储根目录的 .tmp 下（与对象在同一文件系统，os.replace 是原子的），
+        # 不在任何存储桶内，不会被列举为对象
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_dir = os.path.join(self.root, LOCAL_TEMP_DIR)
+        os.makedirs(temp_dir, exist_ok=True)
+        temp_path = os.path.join(temp_dir, f"{uuid.uuid4().hex}.tmp")
+        try:
+            shutil.copyfile(file_path, temp_path)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    async def get_file(self, bucket_name, object_name, file_path):
+        path = self._path(bucket_name, object_name)
+        if not os.path.isfile(path):
+            raise ObjectNotFound(object_name)
+        await run_storage_io(shutil.copyfile, path, file_path)
+
+    async def stat(self, bucket_name, object_name):
+        path = self._path(bucket_name, object_name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            raise ObjectNotFound(object_name)
+        return ObjectInfo(
+            size=stat.st_size,
+            etag=f"{stat.st_mtime_ns:x}-{stat.st_size:x}",
+            last_modified=datetime.datetime.fromtimestamp(stat.st_mtime, tz=datetime.timezone.utc),
+            content_type=mimetypes.guess_type(path)[0]
+        )
+
+    async def stream(self, bucket_name, object_name, start, length, chunk_size):
+        return iter_file_range(self._path(bucket_name, object_name), start, start + length - 1, chunk_size)
+
+    async def delete(self, bucket_name, object_names):
+        object_names = list(object_names)
+
+        def remove():
+            failed = []
+            for object_name in object_names:
+                try:
+                    os.remove(self._path(bucket_name, object_name))
+                except FileNotFoundError:
+                    pass
+                except (OSError, ValueError):
+                    failed.append(object_name)
+            return failed
+        return await run_storage_io(remove)
+
+    async def list_objects(self, bucket_name, start_after, limit):
+        return await run_storage_io(self._list_objects, bucket_name, start_after, limit)
+
+    def _list_objects(self, bucket_name, start_after, limit):
+        bucket_dir = os.path.join(self.root, bucket_name)
+        objects = []
+        for object_name, path in itertools.islice(self._walk_sorted(bucket_dir, "", start_after), limit):
+            stat = os.stat(path)
+            objects.append((object_name, ObjectInfo(
+                size=stat.st_size,
+                etag=f"{stat.st_mtime_ns:x}-{stat.st_size:x}",
+                last_modified=datetime.datetime.fromtimestamp(stat.st_mtime, tz=datetime.timezone.utc)
+            )))
+        return objects
+
+    def _walk_sorted(self, directory, prefix, start_after):
+        """
+        按对象键顺序逐个返回 directory 下 start_after 之后的 (对象键, 文件路径)
+
+        子目录 d 中的对象键都以 "d/" 开头，按 "d/" 与文件名一起排序即得到对象键顺序（如 a-b 排在 a/b 之前）；
+        整个子目录都在 start_after 之前时不进入，每次只读取当前路径上各级目录的目录项
+        """
+        try:
+            with os.scandir(directory) as it:
+                entries = [
+                    (prefix + entry.name + ("/" if entry.is_dir(follow_symlinks=False) else ""), entry)
+                    for entry in it
+                ]
+        except FileNotFoundError:
+            return
+        for key, entry in sorted(entries, key=lambda item: item[0]):
+            if key.endswith("/"):
+                if start_after is None or key > start_after or start_after.startswith(key):
+                    yield from self._walk_sorted(entry.path, key, start_after)
+            elif entry.is_file() and (start_after is None or key > start_after):
+                yield key, entry.path
+
+    def url(self, bucket_name, object_name):
+        return f"{self.base_url}/{bucket_name}/{object_name}"
+
+    def local_path(self, bucket_name, object_name):
+        path = self._path(bucket_name, object_name)
+        return path if os.path.isfile(path) else None
+
+    async def check(self):
+        os.makedirs(self.root, exist_ok=True)
+        if not os.access(self.root, os.W_OK):
+            raise Exception(f"存储目录不可写: {self.root}")
+        return f"本地存储目录可用: {self.root}"
+
+
+class MemoryStorageBackend(StorageBackend):
+    """进程内存中的存储，用于测试和基准测试"""
+
+    name = "memory"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.objects: Dict[Tuple[str, str], Tuple[bytes, ObjectInfo]] = {}
+
+    async def put_file(self, bucket_name, object_name, file_path, content_type):
+        with open(file_path, "rb") as f:
+            data = f.read()
+        info = ObjectInfo(
+            size=len(data),
+            etag=uuid.uuid4().hex,
+            last_modified=datetime.datetime.now(datetime.timezone.utc),
+            content_type=content_type
+        )
+        with self._lock:
+            self.objects[(bucket_name, object_name)] = (data, info)
+        return self.url(bucket_name, object_name)
+
+    def _get(self, bucket_name, object_name):
+        with self._lock:
+            entry = self.objects.get((bucket_name, object_name))
+        if entry is None:
+            raise ObjectNotFound(object_name)
+        return entry
+
+    async def get_file(self, bucket_name, object_name, file_path):
+        data, _ = self._get(bucket_name, object_name)
+        with open(file_path, "wb") as f:
+            f.write(data)
+
+    async def stat(self, bucket_name, object_name):
+        return self._get(bucket_name, object_name)[1]
+
+    async def stream(self, bucket_name, object_name, start, length, chunk_size):
+        data, _ = self._get(bucket_name, object_name)
+        end = start + length
+        return (data[offset:min(offset + chunk_size, end)] for offset in range(start, end, chunk_size))
+
+    async def delete(self, bucket_name, object_names):
+        with self._lock:
+            for object_name in object_names:
+                self.objects.pop((bucket_name, object_name), None)
+        return []
+
+    async def list_objects(self, bucket_name, start_after, limit):
+        with self._lock:
+            entries = [
+                (object_name, info) for (bucket, object_name), (_, info) in self.objects.items()
+                if bucket == bucket_name and (start_after is None or object_name > start_after)
+            ]
+        return sorted(entries, key=lambda entry: entry[0])[:limit]
+
+    def url(self, bucket_name, object_name):
+        return f"memory://{bucket_name}/{object_name}"
+
+    async def check(self):
+        return f"内存存储，对象数: {len(self.objects)}"
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def create_storage_backend(name: str) -> StorageBackend:
+    """按名称创建存储后端"""
+    if name == "minio":
+        return MinioStorageBackend()
+    if name == "local":
+        return LocalStorageBackend(
+            os.path.join(settings.MEDIA_ROOT, LOCAL_OBJECTS_DIR),
+            f"{settings.MEDIA_URL}/{LOCAL_OBJECTS_DIR}"
+        )
+    if name == "memory":
+        return MemoryStorageBackend()
+    raise ValueError(f"不支持的存储后端: {name}")
+
+
+def get_storage_backend() -> StorageBackend:
+    """获取 STORAGE_BACKEND 配置的存储后端，首次调用时创建"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_storage_backend(settings.STORAGE_BACKEND)
+    return _backend
+
+
+def set_storage_backend(backend: Optional[StorageBackend]):
+    """替换当前的存储后端（测试和基准测试中使用），传入None时下次按配置重新创建"""
+    global _backend
+    with _backend_lock:
+        _backend = backend
@@ -0,0 +1,184 @@
+"""
+存储对象的后台删除
+
+删除媒体记录时不在请求中删除存储对象，而是用 journal_deletions 在同一事务中把对象写入
+storage_deletions 日志：数据库回滚时日志也随之回滚，提交后对象一定会被删除。
+清理协程按存储桶分组批量删除（MinIO为DeleteObjects，每个请求最多1000个对象），
+删除成功的日志行被移除，失败的按指数退避重试。
+
+删除是幂等的（不存在的对象视为删除成功），多个进程同时清理时同一对象最多被重复删除一次。
+内容寻址的对象键会被相同内容的再次上传重新使用，删除前排除仍被媒体记录或处理中的任务引用的对象。
+"""
+import asyncio
+import datetime
+import logging
+from collections import defaultdict
+from typing import Iterable, List
+
+from sqlalchemy import select, delete, update
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.media import StorageDeletion
+from app.utils.media_refs import referenced_object_names
+from app.utils.storage_backends import get_storage_backend
+
+logger = logging.getLogger(__name__)
+
+
+def journal_deletions(db, bucket_name: str, object_names: Iterable[str]) -> int:
+    """
+    在当前事务中记录要删除的对象，返回记录的数量
+
+    db 可以是 Session 或 AsyncSession，由调用方提交；提交后调用 storage_deletion_drainer.notify() 尽快删除
+    """
+    rows = [
+        StorageDeletion(bucket_name=bucket_name, object_name=object_name)
+        for object_name in dict.fromkeys(object_names)
+    ]
+    db.add_all(rows)
+    return len(rows)
+
+
+async def claim_batch(limit: int) -> List[StorageDeletion]:
+    """领取一批到期的待删除对象，领取后在 STORAGE_DELETION_LEASE 秒内不会被其他进程再次领取"""
+    now = datetime.datetime.utcnow()
+    async with AsyncSessionLocal() as db:
+        rows = (await db.scalars(
+            select(StorageDeletion)
+            .where(StorageDeletion.available_at <= now)
+            .order_by(StorageDeletion.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )).all()
+        if not rows:
+            return []
+        await db.execute(
+            update(StorageDeletion)
+            .where(StorageDeletion.id.in_([row.id for row in rows]))
+            .values(
+                attempts=StorageDeletion.attempts + 1,
+                available_at=now + datetime.timedelta(seconds=settings.STORAGE_DELETION_LEASE)
+            )
+        )
+        await db.commit()
+        return list(rows)
+
+
+async def drain_batch() -> int:
+    """删除一批到期的对象，返回处理的对象数（包括删除失败的）"""
+    rows = await claim_batch(settings.STORAGE_DELETION_BATCH_SIZE)
+    if not rows:
+        return 0
+
+    by_bucket = defaultdict(list)
+    for row in rows:
+        by_bucket[row.bucket_name].append(row)
+
+    backend = get_storage_backend()
+    done_ids = []
+    failures = []
+    for bucket_name, bucket_rows in by_bucket.items():
+        # 已被重新引用的对象不删除，直接移除日志行
+        async with AsyncSessionLocal() as db:
+            referenced = await referenced_object_names(db, bucket_name, [row.object_name for row in bucket_rows])
+        if referenced:
+            logger.info(f"跳过仍被引用的存储对象: 存储桶={bucket_name}, 数量={len(referenced)}")
+            done_ids.extend(row.id for row in bucket_rows if row.object_name in referenced)
+            bucket_rows = [row for row in bucket_rows if row.object_name not in referenced]
+            if not bucket_rows:
+                continue
+        try:
+            failed = set(await backend.delete(bucket_name, [row.object_name for row in bucket_rows]))
+            error = "删除失败"
+        except Exception as e:
+            logger.error(f"批量删除存储对象失败: 存储桶={bucket_name}, 数量={len(bucket_rows)}, 错误={str(e)}")
+            failed = {row.object_name for row in bucket_rows}
+            error = str(e)
+        for row in bucket_rows:
+            if row.object_name in failed:
+                failures.append((row, error))
+            else:
+                done_ids.append(row.id)
+
+    now = datetime.datetime.utcnow()
+    async with AsyncSessionLocal() as db:
+        if done_ids:
+            await db.execute(delete(StorageDeletion).where(StorageDeletion.id.in_(done_ids)))
+        for row, error in failures:
+            # 领取时的UPDATE已同步到 row.attempts，包含本次尝试
+            delay = min(
+                settings.STORAGE_DELETION_RETRY_DELAY * (2 ** (row.attempts - 1)),
+                settings.STORAGE_DELETION_MAX_DELAY
+            )
+            await db.execute(
+                update(StorageDeletion)
+                .where(StorageDeletion.id == row.id)
+                .values(last_error=error, available_at=now + datetime.timedelta(seconds=delay))
+            )
+        await db.commit()
+
+    if failures:
+        logger.warning(f"存储对象删除: 成功{len(done_ids)}个, 失败{len(failures)}个，稍后重试")
+    else:
+        logger.info(f"存储对象删除: 成功{len(done_ids)}个")
+    return len(rows)
+
+
+class StorageDeletionDrainer:
+    """应用内的存储对象清理协程"""
+
+    def __init__(self):
+        self._task = None
+        self._loop = None
+        self._wakeup = asyncio.Event()
+
+    def start(self):
+        """启动清理协程"""
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._task = asyncio.create_task(self._run())
+            logger.info("存储对象清理协程已启动")
+
+    async def stop(self):
+        """停止清理协程，已领取但未完成的对象在领取超时后会被重新领取"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def notify(self):
+        """有新的待删除对象时唤醒清理协程，可以在同步接口的工作线程中调用"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _run(self):
+        while True:
+            try:
+                processed = await drain_batch()
+            except Exception as e:
+                logger.error(f"清理存储对象失败: {str(e)}")
+                processed = 0
+
+            # 一批处理满时可能还有到期的对象，立即继续
+            if processed >= settings.STORAGE_DELETION_BATCH_SIZE:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.STORAGE_DELETION_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+
+storage_deletion_drainer = StorageDeletionDrainer()
+
+
+async def _run_standalone():
+    storage_deletion_drainer.start()
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    # 作为独立的清理进程运行: python -m app.utils.storage_deletions
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_run_standalone())
@@ -0,0 +1,615 @@
+"""
+存储与数据库的对账和孤立对象清理
+
+上传失败、缩略图删除遗漏和URL修复脚本的改写等原因会使存储与 actor_media 记录不一致：
+- 孤立对象：存储中存在但没有记录引用，只占用空间
+- 悬空记录：记录引用的对象在存储中已不存在，前端显示为失效的图片或视频
+
+对账按存储桶进行：按对象键顺序列举存储桶，与按 object_name 排序的记录做归并连接，两边都按页读取，
+不需要把任何一边全部读入内存。内容寻址的派生对象（thumbnails/、variants/、hls/ 下的
+sha256/{前两位}/{哈希}...）按哈希归属，与按 content_hash 排序的记录归并；
+内容寻址之前的缩略图（*_thumbnail.jpg）按原文件名查找。
+
+每页处理完后把最后一个对象键保存为检查点（storage_reconcile_checkpoints），下次从检查点继续，
+一次运行每个存储桶最多检查 max_objects 个对象，百万级的存储桶可以分多次完成；到达末尾后清空检查点，
+下一轮从头开始。
+
+同一存储桶同时只有一个对账在运行：开始时锁定检查点行并写入运行ID，锁定在每批处理完成时刷新，
+多个进程（如多个API工作进程和命令行）之间也互斥；进程中断后超过 STORAGE_RECONCILE_LOCK_TIMEOUT 秒可被重新锁定。
+
+最近 STORAGE_RECONCILE_GRACE_PERIOD 秒内修改的对象和创建的记录不处理，避免与进行中的上传冲突。
+默认只报告；孤立对象写入 storage_deletions 日志，由清理协程删除；悬空记录连同不再被引用的派生对象一起删除。
+
+暂存存储桶（MINIO_UPLOAD_BUCKET）中没有未完成任务引用的对象，以及 MEDIA_ROOT 下上传和转码遗留的
+临时文件也一并清理。
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import os
+import re
+import shutil
+import uuid
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import select, func, or_, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.media import ActorMedia, MediaJob, UploadSession, StorageDeletion, StorageReconcileCheckpoint
+from app.utils.media_refs import releasable_object_names
+from app.utils.storage_backends import get_storage_backend, ObjectInfo
+from app.utils.storage_deletions import journal_deletions, storage_deletion_drainer
+
+logger = logging.getLogger(__name__)
+
+# 内容寻址的派生对象：缩略图、响应式变体和视频转码结果
+DERIVED_OBJECT = re.compile(r"^(thumbnails|variants|hls)/sha256/[0-9a-f]{2}/([0-9a-f]{64})")
+
+# 内容寻址之前的缩略图：thumbnails/{演员ID}/{相册}/x_thumbnail.jpg
+LEGACY_THUMBNAIL_SUFFIX = "_thumbnail.jpg"
+
+# 暂存对象仍可能被处理的任务状态
+ACTIVE_JOB_STATUSES = ('awaiting_upload', 'pending', 'processing')
+
+# 报告中列出的对象键和记录的最大数量
+SAMPLE_SIZE = 20
+
+# 当前进程中由API启动的后台对账的状态
+_last_run: dict = {}
+
+
+class ReconcileLocked(Exception):
+    """存储桶正在由其他进程对账"""
+
+
+def is_running() -> bool:
+    """当前进程中是否有正在进行的后台对账"""
+    return _last_run.get("status") == "running"
+
+
+async def _next(iterator):
+    try:
+        return await iterator.__anext__()
+    except StopAsyncIteration:
+        return None
+
+
+async def _referenced_names(db: AsyncSession, bucket_name: str, start_after: Optional[str], page_size: int):
+    """
+    按对象键顺序逐个返回存储桶中被记录引用的对象键 (对象键, 最早的记录创建时间)
+
+    按 (bucket_name, object_name) 索引分页读取；MySQL中 object_name 使用 utf8mb4_bin，与对象存储的列举顺序一致
+    """
+    while True:
+        query = select(ActorMedia.object_name, func.min(ActorMedia.created_at)).where(
+            ActorMedia.bucket_name == bucket_name,
+            ActorMedia.object_name.isnot(None)
+        )
+        if start_after is not None:
+            query = query.where(ActorMedia.object_name > start_after)
+        page = (await db.execute(
+            query.group_by(ActorMedia.object_name).order_by(ActorMedia.object_name).limit(page_size)
+        )).all()
+        for row in page:
+            if start_after is not None and row[0] <= start_after:
+                # 归并连接要求两边的顺序相同，顺序不一致时继续会把正常的对象当作孤立对象
+                raise RuntimeError(f"数据库中对象键的排序与存储不一致: {row[0]}，请先运行数据库迁移")
+            start_after = row[0]
+            yield row[0], row[1]
+        if len(page) < page_size:
+            return
+
+
+async def _referenced_hashes(db: AsyncSession, bucket_name: str, start_at: str, page_size: int):
+    """按顺序逐个返回存储桶中记录的内容哈希，从 start_at 开始（包含）"""
+    query = select(ActorMedia.content_hash).where(
+        ActorMedia.bucket_name == bucket_name,
+        ActorMedia.content_hash >= start_at
+    ).distinct().order_by(ActorMedia.content_hash)
+    last = None
+    while True:
+        page_query = query if last is None else query.where(ActorMedia.content_hash > last)
+        page = (await db.scalars(page_query.limit(page_size))).all()
+        for content_hash in page:
+            yield content_hash
+        if len(page) < page_size:
+            return
+        last = page[-1]
+
+
+async def _legacy_thumbnail_owners(db: AsyncSession, bucket_name: str, object_names: List[str]) -> Set[str]:
+    """内容寻址之前的缩略图中仍有原文件记录的缩略图对象键"""
+    stems = {}
+    for object_name in object_names:
+        if object_name.startswith("thumbnails/") and object_name.endswith(LEGACY_THUMBNAIL_SUFFIX):
+            stems[object_name[len("thumbnails/"):-len(LEGACY_THUMBNAIL_SUFFIX)]] = object_name
+    if not stems:
+        return set()
+
+    # 原文件的扩展名未知，按 photos|videos/{stem}. 前缀查找后再精确比较
+    conditions = [
+        ActorMedia.object_name.startswith(f"{prefix}/{stem}.", autoescape=True)
+        for stem in stems for prefix in ("photos", "videos")
+    ]
+    owned = set()
+    for original in (await db.scalars(
+        select(ActorMedia.object_name).where(ActorMedia.bucket_name == bucket_name, or_(*conditions))
+    )).all():
+        stem = os.path.splitext(original.partition("/")[2])[0]
+        if stem in stems:
+            owned.add(stems[stem])
+    return owned
+
+
+async def _active_staged_objects(db: AsyncSession) -> Set[str]:
+    """暂存存储桶中仍会被任务处理的对象，未完成的任务数量有限，一次读出"""
+    return set((await db.scalars(
+        select(MediaJob.source_object).where(
+            MediaJob.source_object.isnot(None),
+            MediaJob.status.in_(ACTIVE_JOB_STATUSES)
+        )
+    )).all())
+
+
+async def _journaled(db: AsyncSession, bucket_name: str, object_names: List[str]) -> Set[str]:
+    """已经在删除日志中等待删除的对象"""
+    if not object_names:
+        return set()
+    return set((await db.scalars(
+        select(StorageDeletion.object_name).where(
+            StorageDeletion.bucket_name == bucket_name,
+            StorageDeletion.object_name.in_(object_names)
+        )
+    )).all())
+
+
+async def _delete_dangling(db: AsyncSession, bucket_name: str, object_names: List[str]) -> int:
+    """删除引用已不存在对象的记录，不再被引用的派生对象写入删除日志，返回删除的记录数"""
+    media_list = (await db.scalars(
+        select(ActorMedia).where(ActorMedia.bucket_name == bucket_name, ActorMedia.object_name.in_(object_names))
+    )).all()
+    for media in media_list:
+        # 逐条删除并flush，同一内容的最后一条记录删除时才释放派生对象
+        journal_deletions(db, bucket_name, await releasable_object_names(db, media))
+        await db.delete(media)
+        await db.flush()
+    return len(media_list)
+
+
+def _lock_expired_before() -> datetime.datetime:
+    return datetime.datetime.utcnow() - datetime.timedelta(seconds=settings.STORAGE_RECONCILE_LOCK_TIMEOUT)
+
+
+async def _claim_checkpoint(db: AsyncSession, bucket_name: str, run_id: str) -> StorageReconcileCheckpoint:
+    """
+    锁定存储桶的检查点并写入运行ID，由调用方提交；已被其他未超时的对账锁定时抛出 ReconcileLocked
+
+    用 SELECT ... FOR UPDATE NOWAIT 读取检查点行，其他进程正在锁定同一行时立即失败而不是等待
+    """
+    try:
+        checkpoint = await db.scalar(
+            select(StorageReconcileCheckpoint)
+            .where(StorageReconcileCheckpoint.bucket_name == bucket_name)
+            .with_for_update(nowait=True)
+        )
+        if checkpoint is None:
+            checkpoint = StorageReconcileCheckpoint(bucket_name=bucket_name)
+            db.add(checkpoint)
+            await db.flush()
+    except (OperationalError, IntegrityError):
+        await db.rollback()
+        raise ReconcileLocked(bucket_name)
+
+    if checkpoint.locked_by and checkpoint.locked_at and checkpoint.locked_at > _lock_expired_before():
+        await db.rollback()
+        raise ReconcileLocked(bucket_name)
+    checkpoint.locked_by = run_id
+    checkpoint.locked_at = datetime.datetime.utcnow()
+    return checkpoint
+
+
+async def _renew_checkpoint(db: AsyncSession, checkpoint: StorageReconcileCheckpoint):
+    """在保存一批结果的事务中刷新锁定时间，锁定已超时并被其他对账取得时回滚本批并抛出 ReconcileLocked"""
+    bucket_name = checkpoint.bucket_name
+    result = await db.execute(
+        update(StorageReconcileCheckpoint)
+        .where(
+            StorageReconcileCheckpoint.bucket_name == bucket_name,
+            StorageReconcileCheckpoint.locked_by == checkpoint.locked_by
+        )
+        .values(locked_at=datetime.datetime.utcnow())
+    )
+    if result.rowcount == 0:
+        await db.rollback()
+        raise ReconcileLocked(bucket_name)
+
+
+async def _release_checkpoint(bucket_name: str, run_id: str):
+    """解除锁定，失败时等锁定超时"""
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(StorageReconcileCheckpoint)
+                .where(StorageReconcileCheckpoint.bucket_name == bucket_name, StorageReconcileCheckpoint.locked_by == run_id)
+                .values(locked_by=None, locked_at=None)
+            )
+            await db.commit()
+    except Exception as e:
+        logger.warning(f"解除存储对账锁定失败: {bucket_name}, 错误={str(e)}")
+
+
+async def locked_buckets(db: AsyncSession, buckets: List[str]) -> List[str]:
+    """正在被对账（锁定未超时）的存储桶"""
+    return list((await db.scalars(
+        select(StorageReconcileCheckpoint.bucket_name).where(
+            StorageReconcileCheckpoint.bucket_name.in_(buckets),
+            StorageReconcileCheckpoint.locked_by.isnot(None),
+            StorageReconcileCheckpoint.locked_at > _lock_expired_before()
+        )
+    )).all())
+
+
+def _modified_before(info: ObjectInfo, cutoff: datetime.datetime) -> bool:
+    if info.last_modified is None:
+        return False
+    last_modified = info.last_modified
+    if last_modified.tzinfo is not None:
+        last_modified = last_modified.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return last_modified < cutoff
+
+
+async def reconcile_bucket(
+    bucket_name: str,
+    delete_orphans: bool = False,
+    delete_dangling: bool = False,
+    max_objects: Optional[int] = None,
+    restart: bool = False
+) -> dict:
+    """
+    从检查点继续对账一个存储桶，返回本次运行的报告
+
+    - delete_orphans: 把孤立对象写入删除日志
+    - delete_dangling: 删除悬空记录
+    - max_objects: 本次最多检查的对象数，默认为 STORAGE_RECONCILE_MAX_OBJECTS
+    - restart: 忽略检查点，从头开始新一轮
+
+    存储桶正在由其他进程对账时抛出 ReconcileLocked
+    """
+    run_id = uuid.uuid4().hex
+    try:
+        return await _reconcile_bucket(bucket_name, run_id, delete_orphans, delete_dangling, max_objects, restart)
+    finally:
+        await _release_checkpoint(bucket_name, run_id)
+
+
+async def _reconcile_bucket(bucket_name, run_id, delete_orphans, delete_dangling, max_objects, restart) -> dict:
+    backend = get_storage_backend()
+    page_size = settings.STORAGE_RECONCILE_PAGE_SIZE
+    max_objects = max_objects or settings.STORAGE_RECONCILE_MAX_OBJECTS
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=settings.STORAGE_RECONCILE_GRACE_PERIOD)
+    is_upload_bucket = bucket_name == settings.MINIO_UPLOAD_BUCKET
+
+    report = {
+        "bucket": bucket_name,
+        "scanned": 0,
+        "orphans": 0,
+        "orphan_bytes": 0,
+        "orphans_deleted": 0,
+        "dangling": 0,
+        "dangling_deleted": 0,
+        "orphan_samples": [],
+        "dangling_samples": []
+    }
+
+    async with AsyncSessionLocal() as db:
+        checkpoint = await _claim_checkpoint(db, bucket_name, run_id)
+        if restart or checkpoint.last_object_name is None:
+            checkpoint.last_object_name = None
+            checkpoint.objects_scanned = 0
+            checkpoint.orphans_found = 0
+            checkpoint.dangling_found = 0
+            checkpoint.started_at = datetime.datetime.utcnow()
+        await db.commit()
+
+        start_after = checkpoint.last_object_name
+        active_staged = await _active_staged_objects(db) if is_upload_bucket else set()
+        references = _referenced_names(db, bucket_name, start_after, page_size)
+        reference = await _next(references)
+        hashes = None
+        hash_section = None
+        current_hash = None
+        finished = False
+
+        while report["scanned"] < max_objects:
+            requested = min(page_size, max_objects - report["scanned"])
+            page = await backend.list_objects(bucket_name, start_after, requested)
+            if not page:
+                finished = True
+                break
+
+            orphans: Dict[str, ObjectInfo] = {}
+            dangling = []
+            for object_name, info in page:
+                # 记录游标推进到当前对象，跳过的记录引用的对象在存储中不存在
+                while reference is not None and reference[0] < object_name:
+                    if reference[1] is None or reference[1] < cutoff:
+                        dangling.append(reference[0])
+                    reference = await _next(references)
+                if reference is not None and reference[0] == object_name:
+                    reference = await _next(references)
+                    continue
+
+                match = DERIVED_OBJECT.match(object_name)
+                if match:
+                    # 同一前缀下的派生对象按哈希顺序列举，进入新的前缀时重新读取哈希
+                    section, content_hash = match.groups()
+                    if section != hash_section:
+                        hash_section = section
+                        hashes = _referenced_hashes(db, bucket_name, content_hash, page_size)
+                        current_hash = await _next(hashes)
+                    while current_hash is not None and current_hash < content_hash:
+                        current_hash = await _next(hashes)
+                    if current_hash == content_hash:
+                        continue
+
+                if object_name in active_staged or not _modified_before(info, cutoff):
+                    continue
+                orphans[object_name] = info
+
+            report["scanned"] += len(page)
+            checkpoint.objects_scanned += len(page)
+            start_after = page[-1][0]
+            # 不满一页说明已经列举到存储桶末尾
+            finished = len(page) < requested
+
+            if orphans:
+                names = list(orphans)
+                excluded = await _legacy_thumbnail_owners(db, bucket_name, names) | await _journaled(db, bucket_name, names)
+                orphans = {name: info for name, info in orphans.items() if name not in excluded}
+            await _record_page(db, checkpoint, report, bucket_name, orphans, dangling, start_after, delete_orphans, delete_dangling)
+            if finished:
+                break
+
+        if finished and checkpoint.objects_scanned == 0 and reference is not None:
+            # 存储桶不存在或为空而数据库中有记录，多半是存储配置错误，不把所有记录当作悬空记录
+            report["error"] = "存储桶不存在或为空，但数据库中有引用该存储桶的记录，请检查存储配置"
+            logger.warning(f"存储对账 {bucket_name}: {report['error']}")
+            finished = False
+        elif finished:
+            # 列举到末尾后剩余的记录都是悬空记录
+            dangling = []
+            while reference is not None:
+                if reference[1] is None or reference[1] < cutoff:
+                    dangling.append(reference[0])
+                reference = await _next(references)
+            await _record_page(db, checkpoint, report, bucket_name, {}, dangling, None, delete_orphans, delete_dangling)
+            checkpoint.completed_at = datetime.datetime.utcnow()
+            await _renew_checkpoint(db, checkpoint)
+            await db.commit()
+
+        report.update({
+            "checkpoint": checkpoint.last_object_name,
+            "completed": finished,
+            "pass_scanned": checkpoint.objects_scanned,
+            "pass_orphans": checkpoint.orphans_found,
+            "pass_dangling": checkpoint.dangling_found,
+            "pass_started_at": checkpoint.started_at.isoformat() if checkpoint.started_at else None,
+            "last_completed_at": checkpoint.completed_at.isoformat() if checkpoint.completed_at else None
+        })
+
+    if report["orphans_deleted"] or report["dangling_deleted"]:
+        storage_deletion_drainer.notify()
+    logger.info(
+        f"存储对账 {bucket_name}: 检查{report['scanned']}个对象, 孤立对象{report['orphans']}个, "
+        f"悬空记录{report['dangling']}个, {'本轮完成' if finished else f'检查点 {start_after}'}"
+    )
+    return report
+
+
+async def _record_page(db, checkpoint, report, bucket_name, orphans, dangling, last_object_name, delete_orphans, delete_dangling):
+    """记录一页的结果，按需删除，并在同一事务中保存检查点"""
+    report["orphans"] += len(orphans)
+    report["orphan_bytes"] += sum(info.size or 0 for info in orphans.values())
+    report["dangling"] += len(dangling)
+    report["orphan_samples"].extend(list(orphans)[:SAMPLE_SIZE - len(report["orphan_samples"])])
+    report["dangling_samples"].extend(dangling[:SAMPLE_SIZE - len(report["dangling_samples"])])
+
+    if delete_orphans and orphans:
+        report["orphans_deleted"] += journal_deletions(db, bucket_name, orphans)
+    if delete_dangling and dangling:
+        report["dangling_deleted"] += await _delete_dangling(db, bucket_name, dangling)
+
+    checkpoint.last_object_name = last_object_name
+    checkpoint.orphans_found += len(orphans)
+    checkpoint.dangling_found += len(dangling)
+    await _renew_checkpoint(db, checkpoint)
+    await db.commit()
+
+
+def _stale(path: str, cutoff: float) -> bool:
+    try:
+        return os.path.getmtime(path) < cutoff
+    except FileNotFoundError:
+        return False
+
+
+def _sweep_temp_files(active_sources: Set[str], active_sessions: Set[str], delete: bool) -> dict:
+    """
+    MEDIA_ROOT 下遗留的临时文件：
+    - incoming/ 中没有未完成任务引用的原始文件
+    - uploads/ 中不属于进行中的上传会话的缓冲文件
+    - 视频转码的临时目录（tmp*）
+    """
+    cutoff = datetime.datetime.now().timestamp() - settings.STORAGE_RECONCILE_GRACE_PERIOD
+    media_root = str(settings.MEDIA_ROOT)
+    stale = []
+
+    incoming_dir = os.path.join(media_root, "incoming")
+    if os.path.isdir(incoming_dir):
+        for entry in os.scandir(incoming_dir):
+            if entry.is_file() and os.path.abspath(entry.path) not in active_sources and _stale(entry.path, cutoff):
+                stale.append(entry.path)
+
+    uploads_dir = os.path.join(media_root, "uploads")
+    if os.path.isdir(uploads_dir):
+        for entry in os.scandir(uploads_dir):
+            upload_id = entry.name[:-len(".buf")] if entry.name.endswith(".buf") else None
+            if entry.is_file() and upload_id not in active_sessions and _stale(entry.path, cutoff):
+                stale.append(entry.path)
+
+    if os.path.isdir(media_root):
+        for entry in os.scandir(media_root):
+            if entry.is_dir() and entry.name.startswith("tmp") and _stale(entry.path, cutoff):
+                stale.append(entry.path)
+
+    result = {"files": len(stale), "bytes": 0, "deleted": 0, "samples": stale[:SAMPLE_SIZE]}
+    for path in stale:
+        try:
+            if os.path.isdir(path):
+                result["bytes"] += sum(
+                    os.path.getsize(os.path.join(directory, name))
+                    for directory, _, names in os.walk(path) for name in names
+                )
+                if delete:
+                    shutil.rmtree(path)
+            else:
+                result["bytes"] += os.path.getsize(path)
+                if delete:
+                    os.remove(path)
+            if delete:
+                result["deleted"] += 1
+        except OSError as e:
+            logger.warning(f"删除临时文件失败: {path}, 错误={str(e)}")
+    return result
+
+
+async def sweep_temp_files(delete: bool = False) -> dict:
+    """清理 MEDIA_ROOT 下上传和转码遗留的临时文件，返回统计"""
+    async with AsyncSessionLocal() as db:
+        active_sources = {
+            os.path.abspath(path) for path in (await db.scalars(
+                select(MediaJob.source_path).where(
+                    MediaJob.source_path.isnot(None),
+                    MediaJob.status.in_(ACTIVE_JOB_STATUSES)
+                )
+            )).all()
+        }
+        active_sessions = set((await db.scalars(
+            select(UploadSession.id).where(UploadSession.status == 'uploading')
+        )).all())
+    return await asyncio.to_thread(_sweep_temp_files, active_sources, active_sessions, delete)
+
+
+def reconcile_buckets() -> List[str]:
+    """默认对账的存储桶：媒体存储桶和客户端直传的暂存存储桶"""
+    buckets = list(settings.STORAGE_RECONCILE_BUCKETS)
+    if get_storage_backend().supports_direct_upload:
+        buckets.append(settings.MINIO_UPLOAD_BUCKET)
+    return buckets
+
+
+async def run_reconciliation(
+    buckets: Optional[List[str]] = None,
+    delete_orphans: bool = False,
+    delete_dangling: bool = False,
+    max_objects: Optional[int] = None,
+    restart: bool = False,
+    temp_files: bool = True
+) -> dict:
+    """依次对账各存储桶并清理临时文件，正在由其他进程对账的存储桶跳过并在报告中注明"""
+    reports = []
+    for bucket_name in buckets or reconcile_buckets():
+        try:
+            reports.append(await reconcile_bucket(bucket_name, delete_orphans, delete_dangling, max_objects, restart))
+        except ReconcileLocked:
+            logger.warning(f"存储对账 {bucket_name}: 正在由其他进程对账，跳过")
+            reports.append({"bucket": bucket_name, "error": "该存储桶正在由其他进程对账"})
+    return {
+        "buckets": reports,
+        "temp_files": await sweep_temp_files(delete_orphans) if temp_files else None
+    }
+
+
+def start_run(params: dict) -> dict:
+    """记录由API启动的后台对账，返回状态；随后由 run_in_background 执行"""
+    _last_run.clear()
+    _last_run.update({
+        "status": "running",
+        "params": params,
+        "started_at": datetime.datetime.utcnow().isoformat(),
+        "finished_at": None,
+        "report": None,
+        "error": None
+    })
+    return dict(_last_run)
+
+
+async def run_in_background(**params):
+    """执行API启动的对账，结果保存在进程内供状态接口查询"""
+    try:
+        _last_run["report"] = await run_reconciliation(**params)
+        _last_run["status"] = "completed"
+    except Exception as e:
+        logger.error(f"存储对账失败: {str(e)}")
+        _last_run["error"] = str(e)
+        _last_run["status"] = "failed"
+    _last_run["finished_at"] = datetime.datetime.utcnow().isoformat()
+
+
+async def reconcile_status(db: AsyncSession) -> dict:
+    """当前进程中最近一次后台对账的状态和各存储桶的检查点"""
+    checkpoints = (await db.scalars(
+        select(StorageReconcileCheckpoint).order_by(StorageReconcileCheckpoint.bucket_name)
+    )).all()
+    expired_before = _lock_expired_before()
+    return {
+        "last_run": dict(_last_run) or None,
+        "checkpoints": [
+            {
+                "bucket": checkpoint.bucket_name,
+                "checkpoint": checkpoint.last_object_name,
+                "running": bool(checkpoint.locked_by and checkpoint.locked_at and checkpoint.locked_at > expired_before),
+                "pass_scanned": checkpoint.objects_scanned,
+                "pass_orphans": checkpoint.orphans_found,
+                "pass_dangling": checkpoint.dangling_found,
+                "pass_started_at": checkpoint.started_at.isoformat() if checkpoint.started_at else None,
+                "last_completed_at": checkpoint.completed_at.isoformat() if checkpoint.completed_at else None
+            }
+            for checkpoint in checkpoints
+        ]
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='存储与数据库对账，报告或清理孤立对象和悬空记录')
+    parser.add_argument('--bucket', action='append', help='只对账指定的存储桶，可以指定多次')
+    parser.add_argument('--delete-orphans', action='store_true', help='删除孤立对象和临时文件（默认只报告）')
+    parser.add_argument('--delete-dangling', action='store_true', help='删除引用已不存在对象的媒体记录')
+    parser.add_argument('--max-objects', type=int, help='每个存储桶本次最多检查的对象数')
+    parser.add_argument('--restart', action='store_true', help='忽略检查点，从头开始')
+    parser.add_argument('--no-temp-files', action='store_true', help='不检查MEDIA_ROOT下的临时文件')
+    return parser.parse_args()
+
+
+async def _run_cli(args):
+    report = await run_reconciliation(
+        buckets=args.bucket,
+        delete_orphans=args.delete_orphans,
+        delete_dangling=args.delete_dangling,
+        max_objects=args.max_objects,
+        restart=args.restart,
+        temp_files=not args.no_temp_files
+    )
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    # 作为命令行工具运行: python -m app.utils.storage_reconcile [--delete-orphans] ...
+    # 孤立对象写入删除日志后由API进程中的清理协程（或独立的清理进程）删除
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_run_cli(parse_args()))
@@ -0,0 +1,201 @@
+"""
+视频转码
+
+后台任务为每个视频生成：
+- HLS自适应码率清单：按 VIDEO_HLS_RENDITIONS 的高度阶梯生成H.264/AAC分段和master.m3u8，
+  只生成不高于原视频的档位（原视频低于最小档位时按原高度生成一个档位，不放大），
+  所有档位由一次ffmpeg调用输出，视频只解码一次
+- 封面：把 -ss 放在 -i 之前做输入端快速定位，只解码目标位置附近的帧
+- 拖动预览雪碧图：按固定间隔截帧拼成一张图，前端按时间计算所在的格子；
+  帧数达到上限时加大间隔，使雪碧图覆盖整个视频
+
+ffmpeg/ffprobe的可用性和编码器列表在首次使用时检测一次并缓存。
+"""
+import asyncio
+import json
+import logging
+import math
+import os
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_capabilities = None
+_capabilities_lock = asyncio.Lock()
+
+
+async def _run(*command, timeout: Optional[float] = None):
+    """执行命令，返回 (退出码, 标准输出, 标准错误)"""
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise Exception(f"命令执行超时: {command[0]}")
+    return process.returncode, stdout, stderr
+
+
+async def ffmpeg_capabilities() -> Dict:
+    """检测ffmpeg、ffprobe是否可用以及可用的H.264编码器，结果在进程内缓存"""
+    global _capabilities
+    if _capabilities is not None:
+        return _capabilities
+
+    async with _capabilities_lock:
+        if _capabilities is None:
+            capabilities = {"ffmpeg": False, "ffprobe": False, "h264_encoder": None}
+            try:
+                code, stdout, _ = await _run("ffmpeg", "-hide_banner", "-encoders", timeout=30)
+                if code == 0:
+                    capabilities["ffmpeg"] = True
+                    encoders = stdout.decode(errors="ignore")
+                    for encoder in ("libx264", "libopenh264", "h264"):
+                        if f" {encoder} " in encoders:
+                            capabilities["h264_encoder"] = encoder
+                            break
+            except Exception as e:
+                logger.warning(f"ffmpeg不可用: {str(e)}")
+            try:
+                code, _, _ = await _run("ffprobe", "-version", timeout=30)
+                capabilities["ffprobe"] = code == 0
+            except Exception as e:
+                logger.warning(f"ffprobe不可用: {str(e)}")
+            _capabilities = capabilities
+            logger.info(f"ffmpeg能力检测结果: {capabilities}")
+    return _capabilities
+
+
+async def probe_video(file_path: str) -> Dict:
+    """读取视频的时长(秒)、宽高和是否包含音轨"""
+    code, stdout, stderr = await _run(
+        "ffprobe", "-v", "error",
+        "-show_entries", "format=duration:stream=codec_type,width,height",
+        "-of", "json", file_path,
+        timeout=60
+    )
+    if code != 0:
+        raise Exception(f"无法读取视频信息: {stderr.decode(errors='ignore')}")
+
+    info = json.loads(stdout)
+    video_stream = next((s for s in info.get("streams", []) if s.get("codec_type") == "video"), None)
+    if video_stream is None:
+        raise Exception("文件中没有视频流")
+    return {
+        "duration": float(info.get("format", {}).get("duration") or 0),
+        "width": int(video_stream.get("width") or 0),
+        "height": int(video_stream.get("height") or 0),
+        "has_audio": any(s.get("codec_type") == "audio" for s in info.get("streams", [])),
+    }
+
+
+async def create_poster(file_path: str, output_path: str, at_seconds: float = 1.0, width: int = 1280) -> str:
+    """截取封面帧，-ss 在 -i 之前，ffmpeg直接定位到最近的关键帧而不是从头解码"""
+    code, _, stderr = await _run(
+        "ffmpeg", "-y", "-v", "error",
+        "-ss", f"{at_seconds:.3f}",
+        "-i", file_path,
+        "-frames:v", "1",
+        "-vf", f"scale='min({width},iw)':-2",
+        "-q:v", "3",
+        output_path,
+        timeout=60
+    )
+    if code != 0 or not os.path.exists(output_path):
+        raise Exception(f"无法生成视频封面: {stderr.decode(errors='ignore')}")
+    return output_path
+
+
+async def create_hls_renditions(file_path: str, output_dir: str, probe: Dict, encoder: str) -> List[Dict]:
+    """
+    生成HLS各档位的清单和分段，以及master.m3u8
+
+    返回生成的档位列表 [{"height", "bandwidth", "playlist"}]，文件都在output_dir中
+    """
+    heights = sorted({h for h in settings.VIDEO_HLS_RENDITIONS if h <= probe["height"]})
+    if not heights:
+        # 原视频低于最小档位时按原高度输出（H.264要求偶数），不放大
+        heights = [probe["height"] // 2 * 2 or min(settings.VIDEO_HLS_RENDITIONS)]
+    renditions = []
+    command = ["ffmpeg", "-y", "-v", "error", "-i", file_path]
+    for height in heights:
+        video_bitrate = settings.VIDEO_HLS_BITRATES.get(str(height), 800)
+        playlist = f"{height}p.m3u8"
+        command += [
+            "-map", "0:v:0",
+            *(["-map", "0:a:0"] if probe["has_audio"] else []),
+            "-vf", f"scale=-2:{height}",
+            "-c:v", encoder,
+            *(["-preset", "veryfast"] if encoder == "libx264" else []),
+            "-b:v", f"{video_bitrate}k",
+            "-maxrate", f"{int(video_bitrate * 1.2)}k",
+            "-bufsize", f"{video_bitrate * 2}k",
+            # 固定关键帧间隔，保证分段边界对齐
+            "-force_key_frames", f"expr:gte(t,n_forced*{settings.VIDEO_HLS_SEGMENT_SECONDS})",
+            *(["-c:a", "aac", "-b:a", "128k", "-ac", "2"] if probe["has_audio"] else []),
+            "-f", "hls",
+            "-hls_time", str(settings.VIDEO_HLS_SEGMENT_SECONDS),
+            "-hls_playlist_type", "vod",
+            "-hls_segment_filename", os.path.join(output_dir, f"{height}p_%04d.ts"),
+            os.path.join(output_dir, playlist),
+        ]
+        width = math.ceil(probe["width"] * height / probe["height"] / 2) * 2 if probe["height"] else 0
+        renditions.append({
+            "height": height,
+            "width": width,
+            "bandwidth": (video_bitrate + (128 if probe["has_audio"] else 0)) * 1000,
+            "playlist": playlist,
+        })
+
+    code, _, stderr = await _run(*command, timeout=settings.VIDEO_TRANSCODE_TIMEOUT)
+    if code != 0:
+        raise Exception(f"视频转码失败: {stderr.decode(errors='ignore')[-2000:]}")
+
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3"]
+    for rendition in renditions:
+        lines.append(
+            f"#EXT-X-STREAM-INF:BANDWIDTH={rendition['bandwidth']},RESOLUTION={rendition['width']}x{rendition['height']}"
+        )
+        lines.append(rendition["playlist"])
+    with open(os.path.join(output_dir, "master.m3u8"), "w") as master:
+        master.write("\n".join(lines) + "\n")
+    return renditions
+
+
+async def create_sprite(file_path: str, output_path: str, duration: float) -> Dict:
+    """
+    生成拖动预览雪碧图，每隔 VIDEO_SPRITE_INTERVAL 秒截取一帧，按 VIDEO_SPRITE_COLUMNS 列排列；
+    帧数超过 VIDEO_SPRITE_MAX_FRAMES 时改为按 时长/最多帧数 的间隔截帧
+
+    返回 {"interval", "columns", "rows", "tile_width", "count"}
+    """
+    interval = settings.VIDEO_SPRITE_INTERVAL
+    columns = settings.VIDEO_SPRITE_COLUMNS
+    tile_width = settings.VIDEO_SPRITE_TILE_WIDTH
+    count = max(1, min(math.ceil(duration / interval), settings.VIDEO_SPRITE_MAX_FRAMES))
+    if math.ceil(duration / interval) > settings.VIDEO_SPRITE_MAX_FRAMES:
+        # 保持固定间隔会只覆盖视频开头的一段
+        interval = round(duration / count, 3)
+    rows = math.ceil(count / columns)
+
+    code, _, stderr = await _run(
+        "ffmpeg", "-y", "-v", "error",
+        # 只解码关键帧，截帧间隔远大于关键帧间隔时画面足够接近
+        "-skip_frame", "nokey",
+        "-i", file_path,
+        "-vf", f"fps=1/{interval},scale={tile_width}:-2,tile={columns}x{rows}",
+        "-frames:v", "1",
+        "-vsync", "vfr",
+        "-q:v", "5",
+        output_path,
+        timeout=120
+    )
+    if code != 0 or not os.path.exists(output_path):
+        raise Exception(f"无法生成预览雪碧图: {stderr.decode(errors='ignore')}")
+    return {"interval": interval, "columns": columns, "rows": rows, "tile_width": tile_width, "count": count}
@@ -0,0 +1,167 @@
+"""
+测试夹具
+
+每个测试使用独立的SQLite数据库文件，同步和异步会话工厂（SessionLocal、AsyncSessionLocal）
+重新绑定到该数据库，业务代码中直接使用会话工厂的地方（后台任务、ID生成器等）也使用测试数据库。
+存储使用内存后端，不需要MinIO。
+"""
+import asyncio
+import os
+import sys
+import tempfile
+
+# 导入应用之前设置，config在导入时读取环境变量
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+os.environ.setdefault("MEDIA_ROOT", tempfile.mkdtemp(prefix="media-test-"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.mysql import Insert as MySQLInsert
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+import app.models  # noqa: F401  注册所有模型
+from app.api.v1.api import api_router
+from app.core.config import settings
+from app.core.database import Base, SessionLocal, AsyncSessionLocal
+from app.core.security import create_access_token
+from app.models.user import User
+from app.utils.storage_backends import MemoryStorageBackend, set_storage_backend
+
+
+@compiles(MySQLInsert, "sqlite")
+def _mysql_insert_on_sqlite(insert, compiler, **kw):
+    """业务代码中的 INSERT ... ON DUPLICATE KEY UPDATE 只用于跳过已存在的行，在SQLite上按 INSERT OR IGNORE 执行"""
+    insert = insert._clone()
+    insert._post_values_clause = None
+    return compiler.visit_insert(insert, **kw).replace("INSERT", "INSERT OR IGNORE", 1)
+
+
+def _enable_foreign_keys(dbapi_connection, _):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+@pytest.fixture
+def engines(tmp_path):
+    """绑定到测试数据库的同步和异步引擎"""
+    path = tmp_path / "test.db"
+    sync_engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    event.listen(sync_engine, "connect", _enable_foreign_keys)
+    # 异步连接不跨事件循环复用（TestClient和asyncio.run各自有事件循环）
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    event.listen(async_engine.sync_engine, "connect", _enable_foreign_keys)
+    Base.metadata.create_all(sync_engine)
+
+    SessionLocal.configure(bind=sync_engine)
+    AsyncSessionLocal.configure(bind=async_engine)
+    yield sync_engine, async_engine
+    asyncio.run(async_engine.dispose())
+    sync_engine.dispose()
+
+
+@pytest.fixture
+def db(engines):
+    """同步会话，用于准备数据和检查结果"""
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def storage():
+    """内存存储后端"""
+    backend = MemoryStorageBackend()
+    set_storage_backend(backend)
+    yield backend
+    set_storage_backend(None)
+
+
+@pytest.fixture
+def media_root(tmp_path, monkeypatch):
+    """独立的 MEDIA_ROOT"""
+    root = tmp_path / "media"
+    root.mkdir()
+    monkeypatch.setattr(settings, "MEDIA_ROOT", root)
+    return root
+
+
+@pytest.fixture
+def make_image(tmp_path):
+    """生成测试图片文件，返回路径"""
+    from PIL import Image
+
+    def make(name="photo.jpg", size=(800, 600), color=(200, 80, 40), fmt=None, **save_options):
+        path = tmp_path / name
+        img = Image.new("RGB", size, color)
+        # 左上角画一块不同颜色，使图片内容不对称
+        img.paste((20, 120, 220), (0, 0, size[0] // 3, size[1] // 3))
+        img.save(path, fmt, **save_options)
+        return path
+
+    return make
+
+
+@pytest.fixture
+def users(db):
+    """管理员、经纪人和演员账号"""
+    accounts = {}
+    for role in ("admin", "manager", "performer"):
+        user = User(username=role, password_hash="x", email=f"{role}@example.com", role=role)
+        db.add(user)
+        accounts[role] = user
+    db.commit()
+    return accounts
+
+
+@pytest.fixture
+def actor(db, users):
+    """属于演员账号的演员资料"""
+    from app.models.actor import Actor
+
+    record = Actor(id="A1", real_name="演员一", gender="female", status="active", user_id=users["performer"].id)
+    db.add(record)
+    db.commit()
+    return record
+
+
+@pytest.fixture
+def run_jobs(media_root):
+    """依次领取并处理所有可领取的媒体任务，返回处理的任务数"""
+    from app.utils import file_utils
+    from app.utils.media_jobs import claim_next_job, process_job
+
+    async def drain():
+        count = 0
+        while (job := await claim_next_job()) is not None:
+            await process_job(job)
+            count += 1
+        return count
+
+    yield lambda: asyncio.run(drain())
+    file_utils.shutdown_image_executor()
+
+
+class ApiClient(TestClient):
+    """以指定用户身份请求的测试客户端"""
+
+    def login(self, user: User):
+        self.headers["Authorization"] = f"Bearer {create_access_token({'sub': user.username})}"
+        return self
+
+    def logout(self):
+        self.headers.pop("Authorization", None)
+        return self
+
+
+@pytest.fixture
+def client(engines, storage, users):
+    """已登录为管理员的API客户端"""
+    app = FastAPI()
+    app.include_router(api_router, prefix=settings.API_V1_STR)
+    return ApiClient(app).login(users["admin"])
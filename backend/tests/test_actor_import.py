@@ -0,0 +1,83 @@
+"""批量导入演员（CSV/XLSX/JSONL）"""
+import io
+import json
+
+from openpyxl import Workbook
+from sqlalchemy import text
+
+from app.models.actor import Actor, ActorContractInfo
+
+IMPORT_URL = "/api/v1/actors/basic/import"
+
+
+def _csv(*rows):
+    return ("real_name,gender,age,skills\n" + "\n".join(rows) + "\n").encode("utf-8")
+
+
+def test_csv_import_reports_invalid_rows(client, db):
+    response = client.post(IMPORT_URL, files={"file": ("actors.csv", _csv("张三,male,20,唱歌|跳舞", "李四,unknown,21,", "王五,female,abc,"))})
+    assert response.status_code == 200
+    result = response.json()
+    assert result["total_rows"] == 3
+    assert result["imported"] == 1
+    assert [error["row"] for error in result["errors"]] == [3, 4]
+    assert db.query(Actor).count() == 1
+
+
+def test_rows_rejected_by_database_are_reported_individually(client, db, engines):
+    # 模拟数据库拒绝某一行（如约束或触发器），其余行仍应写入
+    with engines[0].begin() as conn:
+        conn.execute(text(
+            "CREATE TRIGGER reject_actor BEFORE INSERT ON actors WHEN NEW.real_name = '坏行' "
+            "BEGIN SELECT RAISE(ABORT, 'rejected'); END"
+        ))
+
+    response = client.post(IMPORT_URL, files={"file": ("actors.csv", _csv("甲,male,,", "坏行,male,,", "乙,female,,"))})
+    result = response.json()
+    assert response.status_code == 200
+    assert result["imported"] == 2
+    assert result["failed"] == 1
+    assert result["errors"][0]["row"] == 3
+    assert "rejected" in result["errors"][0]["errors"][0]
+    assert sorted(name for (name,) in db.query(Actor.real_name)) == ["乙", "甲"]
+
+
+def test_manager_import_assigns_contracts(client, db, users):
+    client.login(users["manager"])
+    response = client.post(IMPORT_URL, files={"file": ("actors.csv", _csv("甲,male,,", "乙,female,,"))})
+    assert response.json()["imported"] == 2
+    assert {row.agent_id for row in db.query(ActorContractInfo)} == {users["manager"].id}
+
+
+def test_xlsx_import(client, db):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["real_name", "gender", "phone"])
+    sheet.append(["张三", "male", 13800000000])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+
+    response = client.post(IMPORT_URL, files={"file": ("actors.xlsx", buffer.getvalue())})
+    assert response.json()["imported"] == 1
+
+
+def test_corrupt_xlsx_returns_400(client):
+    response = client.post(IMPORT_URL, files={"file": ("actors.xlsx", b"not a zip file")})
+    assert response.status_code == 400
+    assert "XLSX" in response.json()["detail"]
+
+
+def test_jsonl_import_reports_bad_lines(client):
+    content = "\n".join([json.dumps({"real_name": "甲", "gender": "male"}), "{bad json", json.dumps([1])])
+    result = client.post(IMPORT_URL, files={"file": ("actors.jsonl", content.encode())}).json()
+    assert result["imported"] == 1
+    assert [error["row"] for error in result["errors"]] == [2, 3]
+
+
+def test_unsupported_format(client):
+    assert client.post(IMPORT_URL, files={"file": ("actors.txt", b"x")}).status_code == 400
+
+
+def test_performer_cannot_import(client, users):
+    client.login(users["performer"])
+    assert client.post(IMPORT_URL, files={"file": ("actors.csv", _csv("甲,male,,"))}).status_code == 403
@@ -0,0 +1,140 @@
+from app.models.actor import Actor, ActorContactInfo, ActorContractInfo, ActorProfessionalInfo
+
+BASE_URL = "/api/v1/actors/basic"
+
+
+def _actor(db, actor_id, user=None, agent=None):
+    db.add(Actor(id=actor_id, real_name=actor_id, gender="female", status="active",
+                 user_id=user.id if user else None))
+    db.flush()
+    if agent is not None:
+        db.add(ActorContractInfo(actor_id=actor_id, agent_id=agent.id))
+    db.commit()
+
+
+def _actor_row(db, actor_id):
+    db.expire_all()
+    return db.get(Actor, actor_id)
+
+
+def test_get_returns_etag(client, db):
+    _actor(db, "A1")
+
+    resp = client.get(f"{BASE_URL}/A1")
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] == '"1"'
+
+
+def test_patch_updates_only_given_fields(client, db):
+    _actor(db, "A1")
+
+    resp = client.patch(f"{BASE_URL}/A1/basic-info", json={"stage_name": "小红", "gender": "女"},
+                        headers={"If-Match": '"1"'})
+    assert resp.status_code == 200
+    assert resp.json() == {"id": "A1", "version": 2, "updated_fields": ["stage_name", "gender"]}
+    assert resp.headers["ETag"] == '"2"'
+
+    actor = _actor_row(db, "A1")
+    assert actor.stage_name == "小红"
+    assert actor.gender == "female"
+    assert actor.real_name == "A1"
+    assert actor.version == 2
+
+
+def test_stale_version_conflicts(client, db):
+    _actor(db, "A1")
+    client.patch(f"{BASE_URL}/A1/basic-info", json={"age": 20}, headers={"If-Match": 'W/"1"'})
+
+    resp = client.patch(f"{BASE_URL}/A1/basic-info", json={"age": 30}, headers={"If-Match": '"1"'})
+    assert resp.status_code == 409
+    assert resp.headers["ETag"] == '"2"'
+    assert _actor_row(db, "A1").age == 20
+
+    # 也可以通过version参数提供版本号
+    resp = client.patch(f"{BASE_URL}/A1/basic-info?version=2", json={"age": 30})
+    assert resp.status_code == 200
+    assert _actor_row(db, "A1").age == 30
+
+
+def test_version_is_required(client, db):
+    _actor(db, "A1")
+
+    assert client.patch(f"{BASE_URL}/A1/basic-info", json={"age": 20}).status_code == 428
+    assert client.patch(f"{BASE_URL}/A1/basic-info", json={"age": 20},
+                        headers={"If-Match": "abc"}).status_code == 400
+    assert client.patch(f"{BASE_URL}/A1/basic-info", json={},
+                        headers={"If-Match": '"1"'}).status_code == 400
+    assert client.patch(f"{BASE_URL}/missing/basic-info", json={"age": 20},
+                        headers={"If-Match": '"1"'}).status_code == 404
+
+
+def test_permissions(client, db, users):
+    _actor(db, "A1", user=users["performer"], agent=users["manager"])
+    _actor(db, "A2")
+
+    client.login(users["performer"])
+    assert client.patch(f"{BASE_URL}/A2/basic-info", json={"age": 20},
+                        headers={"If-Match": '"1"'}).status_code == 403
+    assert client.patch(f"{BASE_URL}/A1/basic-info", json={"age": 20},
+                        headers={"If-Match": '"1"'}).status_code == 200
+
+    client.login(users["manager"])
+    assert client.patch(f"{BASE_URL}/A2/basic-info", json={"age": 21},
+                        headers={"If-Match": '"1"'}).status_code == 403
+    assert client.patch(f"{BASE_URL}/A1/basic-info", json={"age": 21},
+                        headers={"If-Match": '"2"'}).status_code == 200
+    assert _actor_row(db, "A2").version == 1
+
+
+def test_put_bumps_version(client, db):
+    _actor(db, "A1")
+
+    resp = client.put(f"{BASE_URL}/A1/basic-info", json={"age": 25})
+    assert resp.status_code == 200
+    assert _actor_row(db, "A1").version == 2
+
+
+
+def test_patch_professional_creates_missing_row(client, db):
+    _actor(db, "A1")
+
+    resp = client.patch(f"{BASE_URL}/A1/professional", json={"bio": "简介", "skills": ["唱歌"]},
+                        headers={"If-Match": '"1"'})
+    assert resp.status_code == 200
+    assert resp.json() == {"id": "A1", "version": 2, "updated_fields": ["bio", "skills"]}
+    assert _actor_row(db, "A1").version == 2
+    info = db.query(ActorProfessionalInfo).filter_by(actor_id="A1").one()
+    assert info.bio == "简介"
+    assert "唱歌" in info.skills
+
+    # 已有记录时只更新给定的字段
+    resp = client.patch(f"{BASE_URL}/A1/professional", json={"awards": ["最佳新人"]}, headers={"If-Match": '"2"'})
+    assert resp.status_code == 200
+    db.expire_all()
+    info = db.query(ActorProfessionalInfo).filter_by(actor_id="A1").one()
+    assert (info.bio, "最佳新人" in info.awards) == ("简介", True)
+
+
+def test_patch_contact_conflicts_and_permissions(client, db, users):
+    _actor(db, "A1", user=users["performer"])
+    _actor(db, "A2")
+    db.add(ActorContactInfo(actor_id="A1", phone="123"))
+    db.commit()
+
+    resp = client.patch(f"{BASE_URL}/A1/contact", json={"wechat": "wx"}, headers={"If-Match": '"1"'})
+    assert resp.status_code == 200
+    resp = client.patch(f"{BASE_URL}/A1/contact", json={"phone": "456"}, headers={"If-Match": '"1"'})
+    assert resp.status_code == 409
+    assert resp.headers["ETag"] == '"2"'
+
+    client.login(users["performer"])
+    assert client.patch(f"{BASE_URL}/A2/contact", json={"phone": "789"},
+                        headers={"If-Match": '"1"'}).status_code == 403
+    assert client.patch(f"{BASE_URL}/missing/contact", json={"phone": "789"},
+                        headers={"If-Match": '"1"'}).status_code == 404
+
+    db.expire_all()
+    info = db.query(ActorContactInfo).filter_by(actor_id="A1").one()
+    assert (info.phone, info.wechat) == ("123", "wx")
+    assert db.query(ActorContactInfo).filter_by(actor_id="A2").count() == 0
+    assert _actor_row(db, "A2").version == 1
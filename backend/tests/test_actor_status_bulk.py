@@ -0,0 +1,85 @@
+import datetime
+
+from app.models.actor import Actor, ActorContractInfo, ActorStatusHistory
+
+BULK_URL = "/api/v1/actors/basic/status/bulk"
+
+
+def _actor(db, actor_id, status="active", agent=None, contract_end=None):
+    db.add(Actor(id=actor_id, real_name=actor_id, gender="male", status=status))
+    db.flush()
+    if agent is not None or contract_end is not None:
+        db.add(ActorContractInfo(
+            actor_id=actor_id,
+            agent_id=agent.id if agent else None,
+            contract_end_date=contract_end,
+        ))
+    db.commit()
+
+
+def _statuses(db):
+    db.expire_all()
+    return {actor.id: actor.status for actor in db.query(Actor).all()}
+
+
+def test_updates_status_and_writes_history(client, db, users):
+    _actor(db, "A1")
+    _actor(db, "A2", status="inactive")
+    _actor(db, "A3", status="suspended")
+
+    resp = client.post(BULK_URL, json={
+        "status": "suspended",
+        "reason": "合同纠纷",
+        "actor_ids": ["A1", "A2", "A3"],
+    })
+    assert resp.status_code == 200
+    # 已经是目标状态的演员被跳过
+    assert resp.json() == {"status": "suspended", "updated": 2, "history_records": 2}
+    assert _statuses(db) == {"A1": "suspended", "A2": "suspended", "A3": "suspended"}
+
+    history = {h.actor_id: h for h in db.query(ActorStatusHistory).all()}
+    assert set(history) == {"A1", "A2"}
+    assert history["A1"].previous_status == "active"
+    assert history["A2"].previous_status == "inactive"
+    assert history["A1"].reason == "合同纠纷"
+    assert history["A1"].changed_by == users["admin"].id
+
+    # 版本号递增，使持有旧版本的编辑失效
+    assert db.get(Actor, "A1").version == 2
+    assert db.get(Actor, "A3").version == 1
+
+
+def test_suspends_expired_contracts(client, db):
+    today = datetime.date.today()
+    _actor(db, "A1", contract_end=today - datetime.timedelta(days=1))
+    _actor(db, "A2", contract_end=today + datetime.timedelta(days=30))
+
+    resp = client.post(BULK_URL, json={
+        "status": "suspended",
+        "filter": {"contract_end_before": today.isoformat()},
+    })
+    assert resp.status_code == 200
+    assert resp.json()["updated"] == 1
+    assert _statuses(db) == {"A1": "suspended", "A2": "active"}
+
+
+def test_manager_only_updates_own_actors(client, db, users):
+    _actor(db, "A1", agent=users["manager"])
+    _actor(db, "A2")
+
+    client.login(users["manager"])
+    resp = client.post(BULK_URL, json={"status": "inactive", "actor_ids": ["A1", "A2"]})
+    assert resp.status_code == 200
+    assert _statuses(db) == {"A1": "inactive", "A2": "active"}
+
+
+def test_rejects_bad_requests(client, db, users):
+    _actor(db, "A1")
+
+    assert client.post(BULK_URL, json={"status": "inactive"}).status_code == 400
+    assert client.post(BULK_URL, json={"status": "deleted", "actor_ids": ["A1"]}).status_code == 400
+    assert client.post(BULK_URL, json={"status": "unknown", "actor_ids": ["A1"]}).status_code == 400
+    assert _statuses(db) == {"A1": "active"}
+
+    client.login(users["performer"])
+    assert client.post(BULK_URL, json={"status": "inactive", "actor_ids": ["A1"]}).status_code == 403
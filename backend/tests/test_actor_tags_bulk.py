@@ -0,0 +1,101 @@
+import datetime
+
+from sqlalchemy import select
+
+from app.models.actor import Actor, ActorContractInfo
+from app.models.tag import Tag, actor_tag
+
+BULK_URL = "/api/v1/actors/tags/bulk"
+
+
+def _actor(db, actor_id, agent=None, contract_end=None):
+    db.add(Actor(id=actor_id, real_name=actor_id, gender="female", status="active"))
+    db.flush()
+    if agent is not None or contract_end is not None:
+        db.add(ActorContractInfo(
+            actor_id=actor_id,
+            agent_id=agent.id if agent else None,
+            contract_end_date=contract_end,
+        ))
+    db.commit()
+
+
+def _tags(db, *names):
+    tags = [Tag(name=name) for name in names]
+    db.add_all(tags)
+    db.commit()
+    return [tag.id for tag in tags]
+
+
+def _pairs(db):
+    return set(db.execute(select(actor_tag.c.actor_id, actor_tag.c.tag_id)).all())
+
+
+def test_add_is_idempotent(client, db):
+    _actor(db, "A1")
+    _actor(db, "A2")
+    t1, t2 = _tags(db, "古装", "动作")
+
+    resp = client.post(BULK_URL, json={"action": "add", "tag_ids": [t1, t2], "actor_ids": ["A1", "A2"]})
+    assert resp.status_code == 200
+    assert resp.json()["affected_rows"] == 4
+    assert _pairs(db) == {("A1", t1), ("A1", t2), ("A2", t1), ("A2", t2)}
+
+    # 已有的关联不会重复添加
+    resp = client.post(BULK_URL, json={"action": "add", "tag_ids": [t1], "actor_ids": ["A1", "A2"]})
+    assert resp.status_code == 200
+    db.expire_all()
+    assert len(_pairs(db)) == 4
+
+
+def test_remove(client, db):
+    _actor(db, "A1")
+    _actor(db, "A2")
+    t1, t2 = _tags(db, "古装", "动作")
+    client.post(BULK_URL, json={"action": "add", "tag_ids": [t1, t2], "actor_ids": ["A1", "A2"]})
+
+    resp = client.post(BULK_URL, json={"action": "remove", "tag_ids": [t1], "actor_ids": ["A1"]})
+    assert resp.status_code == 200
+    assert resp.json()["affected_rows"] == 1
+    db.expire_all()
+    assert _pairs(db) == {("A1", t2), ("A2", t1), ("A2", t2)}
+
+
+def test_filter_by_contract_end(client, db):
+    today = datetime.date.today()
+    _actor(db, "A1", contract_end=today - datetime.timedelta(days=10))
+    _actor(db, "A2", contract_end=today + datetime.timedelta(days=10))
+    _actor(db, "A3")
+    (t1,) = _tags(db, "待续约")
+
+    resp = client.post(BULK_URL, json={
+        "action": "add",
+        "tag_ids": [t1],
+        "filter": {"contract_end_before": today.isoformat()},
+    })
+    assert resp.status_code == 200
+    assert _pairs(db) == {("A1", t1)}
+
+
+def test_manager_only_touches_own_actors(client, db, users):
+    _actor(db, "A1", agent=users["manager"])
+    _actor(db, "A2", agent=users["admin"])
+    (t1,) = _tags(db, "新人")
+
+    client.login(users["manager"])
+    resp = client.post(BULK_URL, json={"action": "add", "tag_ids": [t1], "actor_ids": ["A1", "A2"]})
+    assert resp.status_code == 200
+    assert _pairs(db) == {("A1", t1)}
+
+
+def test_rejects_bad_requests(client, db, users):
+    _actor(db, "A1")
+    (t1,) = _tags(db, "古装")
+
+    assert client.post(BULK_URL, json={"tag_ids": [t1]}).status_code == 400
+    assert client.post(BULK_URL, json={"tag_ids": [], "actor_ids": ["A1"]}).status_code == 400
+    assert client.post(BULK_URL, json={"tag_ids": [t1, 999], "actor_ids": ["A1"]}).status_code == 400
+    assert _pairs(db) == set()
+
+    client.login(users["performer"])
+    assert client.post(BULK_URL, json={"tag_ids": [t1], "actor_ids": ["A1"]}).status_code == 403
@@ -0,0 +1,52 @@
+import inspect
+
+from app.api.v1.dependencies import get_current_user_optional
+from app.models.actor import Actor, ActorContractInfo
+
+
+def _actor(db, actor_id, agent=None):
+    db.add(Actor(id=actor_id, real_name=actor_id, gender="male", status="active"))
+    db.flush()
+    db.add(ActorContractInfo(actor_id=actor_id, agent_id=agent.id if agent else None))
+    db.commit()
+
+
+def test_health_check_uses_async_session(client):
+    resp = client.get("/api/v1/system/info/health-check")
+    assert resp.status_code == 200
+    services = resp.json()["data"]["services"]
+    assert services["database"]["status"] == "up"
+    assert services["storage"]["backend"] == "memory"
+
+
+def test_list_actors_without_agent(client, db, users):
+    _actor(db, "A1", agent=users["manager"])
+    _actor(db, "A2")
+    db.add(Actor(id="A3", real_name="A3", gender="female", status="active"))
+    db.commit()
+
+    resp = client.get("/api/v1/actors/basic/without-agent", params={"limit": 10})
+    assert resp.status_code == 200
+    assert sorted(actor["id"] for actor in resp.json()) == ["A2", "A3"]
+
+    resp = client.get("/api/v1/actors/basic/without-agent", params={"count_only": True})
+    assert resp.json()[0]["total_count"] == 2
+
+
+def test_optional_user_does_not_block_event_loop():
+    # 依赖中使用同步会话查询，必须是普通函数以便在线程池中执行
+    assert not inspect.iscoroutinefunction(get_current_user_optional)
+
+
+def test_optional_user_on_async_endpoint(client, db):
+    _actor(db, "A1")
+
+    assert client.get("/api/v1/actors/media/A1/media").status_code == 200
+
+    client.headers["Authorization"] = "Bearer invalid"
+    assert client.get("/api/v1/actors/media/A1/media").status_code == 200
+
+    client.logout()
+    resp = client.get("/api/v1/actors/media/A1/media")
+    assert resp.status_code == 200
+    assert resp.json()["items"] == []
@@ -0,0 +1,66 @@
+import asyncio
+
+from app.api.v1.endpoints.actors import media as media_endpoints
+from app.core.config import settings
+from app.models.media import ActorMedia, MediaJob
+
+
+def _files(*paths):
+    return [("files", (path.name, path.read_bytes(), "application/octet-stream")) for path in paths]
+
+
+def test_gather_per_file_bounds_concurrency(monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_CONCURRENCY", 2)
+    running = 0
+    peak = 0
+
+    async def handler(name):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if name == "bad":
+            raise ValueError("bad file")
+        return name.upper()
+
+    results = asyncio.run(media_endpoints._gather_per_file(handler, ["a", "bad", "c", "d", "e"]))
+    assert peak == 2
+    assert results[0] == "A"
+    assert isinstance(results[1], ValueError)
+    assert results[2:] == ["C", "D", "E"]
+
+
+def test_upload_photos_rejects_per_file(client, db, actor, make_image, tmp_path):
+    text_file = tmp_path / "notes.txt"
+    text_file.write_text("not an image")
+    photos = [make_image(f"p{i}.jpg", color=(i * 40, 0, 0)) for i in range(3)]
+
+    resp = client.post("/api/v1/actors/media/A1/media/photos", files=_files(photos[0], text_file, *photos[1:]))
+    assert resp.status_code == 202
+    body = resp.json()
+    assert [item["status"] for item in body] == ["pending", "rejected", "pending", "pending"]
+    assert body[1]["file_name"] == "notes.txt"
+    assert db.query(MediaJob).count() == 3
+
+
+def test_upload_with_only_rejected_files(client, db, actor, tmp_path):
+    text_file = tmp_path / "notes.txt"
+    text_file.write_text("not an image")
+
+    resp = client.post("/api/v1/actors/media/A1/media/photos", files=_files(text_file))
+    assert resp.status_code == 400
+    assert db.query(MediaJob).count() == 0
+
+
+def test_performer_photos_processed_concurrently(client, db, storage, users, actor, make_image, run_jobs):
+    client.login(users["performer"])
+    photos = [make_image(f"p{i}.jpg", color=(0, i * 60, 0)) for i in range(3)]
+
+    resp = client.post("/api/v1/actors/self-media/photos", files=_files(*photos))
+    assert resp.status_code == 200
+    assert all(item["success"] for item in resp.json())
+    media = db.query(ActorMedia).order_by(ActorMedia.id).all()
+    assert [m.file_name for m in media] == ["p0.jpg", "p1.jpg", "p2.jpg"]
+    for m in media:
+        assert (m.bucket_name, m.object_name) in storage.objects
@@ -0,0 +1,100 @@
+import asyncio
+import io
+
+import pytest
+from fastapi import UploadFile
+
+from app.models.media import ActorMedia, MediaJob
+from app.utils import file_utils
+from app.utils.file_utils import (
+    ALLOWED_IMAGE_TYPES,
+    check_content_type,
+    save_upload_file,
+    upload_file_to_minio,
+)
+
+
+@pytest.fixture
+def jpeg_bytes(make_image):
+    return make_image("p.jpg").read_bytes()
+
+
+@pytest.fixture
+def png_bytes(make_image):
+    return make_image("p.png").read_bytes()
+
+
+def test_matching_content_uses_declared_type(jpeg_bytes):
+    assert check_content_type("p.jpg", jpeg_bytes) == "image/jpeg"
+    assert check_content_type("P.JPEG", jpeg_bytes[:64]) == "image/jpeg"
+
+
+def test_mislabelled_image_gets_sniffed_type(png_bytes):
+    # 扩展名和实际格式同为图片时以实际格式为准
+    assert check_content_type("p.jpg", png_bytes, ALLOWED_IMAGE_TYPES) == "image/png"
+
+
+@pytest.mark.parametrize("filename, content", [
+    ("p.exe", b"MZ\x90\x00"),
+    ("p.jpg", b"#!/bin/sh\necho hello\n"),
+    ("p.mp4", None),
+])
+def test_rejected_content(filename, content, jpeg_bytes):
+    with pytest.raises(ValueError):
+        check_content_type(filename, jpeg_bytes if content is None else content)
+
+
+def test_disallowed_family_is_rejected(jpeg_bytes):
+    with pytest.raises(ValueError):
+        check_content_type("p.jpg", jpeg_bytes, ["video/mp4"])
+
+
+def test_save_detects_type_from_first_chunk(tmp_path, jpeg_bytes, monkeypatch):
+    sniffed = []
+    real_sniff = file_utils.sniff_content_type
+    monkeypatch.setattr(file_utils, "sniff_content_type", lambda head: sniffed.append(len(head)) or real_sniff(head))
+    upload = UploadFile(io.BytesIO(jpeg_bytes), filename="p.jpg")
+
+    path, size, _, mime_type = asyncio.run(save_upload_file(upload, tmp_path / "in", chunk_size=1024))
+    assert mime_type == "image/jpeg"
+    assert size == len(jpeg_bytes)
+    with open(path, "rb") as f:
+        assert f.read() == jpeg_bytes
+    # 只检测一次，只读取第一个分块
+    assert sniffed == [1024]
+
+
+def test_rejected_upload_writes_nothing(tmp_path):
+    upload = UploadFile(io.BytesIO(b"plain text " * 100), filename="p.jpg")
+
+    with pytest.raises(ValueError):
+        asyncio.run(save_upload_file(upload, tmp_path / "in"))
+    assert not (tmp_path / "in").exists()
+
+
+def test_generated_files_are_typed_by_extension(storage, tmp_path, monkeypatch):
+    monkeypatch.setattr(file_utils.magic, "from_file", lambda *args, **kwargs: pytest.fail("不应读取文件检测类型"))
+    for name, expected in [("t.webp", "image/webp"), ("index.m3u8", "application/vnd.apple.mpegurl"), ("s.ts", "video/mp2t")]:
+        path = tmp_path / name
+        path.write_bytes(b"data")
+        asyncio.run(upload_file_to_minio(str(path), "bucket", name))
+        assert storage.objects[("bucket", name)][1].content_type == expected
+
+    path = tmp_path / "original.bin"
+    path.write_bytes(b"data")
+    asyncio.run(upload_file_to_minio(str(path), "bucket", "original.bin", "video/mp4"))
+    assert storage.objects[("bucket", "original.bin")][1].content_type == "video/mp4"
+
+
+def test_upload_records_detected_type(client, db, storage, actor, png_bytes, run_jobs):
+    resp = client.post(
+        "/api/v1/actors/media/A1/media/photos",
+        files=[("files", ("a.png", png_bytes, "image/png")), ("files", ("b.jpg", b"not an image", "image/jpeg"))]
+    )
+    assert resp.status_code == 202
+    assert [item["status"] for item in resp.json()] == ["pending", "rejected"]
+    assert db.query(MediaJob).one().mime_type == "image/png"
+
+    run_jobs()
+    media = db.query(ActorMedia).one()
+    assert storage.objects[(media.bucket_name, media.object_name)][1].content_type == "image/png"
@@ -0,0 +1,128 @@
+import asyncio
+import datetime
+
+import pytest
+
+from app.api.v1.endpoints.actors import media as media_endpoints
+from app.core.config import settings
+from app.models.media import MediaJob
+from app.utils import media_jobs
+
+
+@pytest.fixture
+def staging(monkeypatch):
+    """暂存桶中的对象 {对象键: (大小, MIME类型)}，替代MinIO的读取和删除"""
+    objects = {}
+
+    def inspect(_client, object_name):
+        if object_name not in objects:
+            raise KeyError(object_name)
+        return objects[object_name]
+
+    def remove(_client, object_name):
+        objects.pop(object_name, None)
+
+    monkeypatch.setattr(media_endpoints, "inspect_uploaded_object", inspect)
+    monkeypatch.setattr(media_endpoints, "remove_staged_object", remove)
+    monkeypatch.setattr(media_jobs, "remove_staged_object", remove)
+    return objects
+
+
+def _awaiting_job(db, users, age=0, object_name="A1/x.jpg"):
+    job = MediaJob(
+        actor_id="A1", job_type="photo", status="awaiting_upload", source_object=object_name,
+        file_name="x.jpg", created_by=users["admin"].id,
+        created_at=datetime.datetime.utcnow() - datetime.timedelta(seconds=age)
+    )
+    db.add(job)
+    db.commit()
+    return job
+
+
+def _finalize(client, job):
+    return client.post(f"/api/v1/actors/media/jobs/{job.id}/finalize")
+
+
+def _status(db, job):
+    db.expire_all()
+    return db.get(MediaJob, job.id).status
+
+
+def test_finalize_queues_job(client, db, users, actor, staging):
+    job = _awaiting_job(db, users)
+    staging["A1/x.jpg"] = (1234, "image/jpeg")
+
+    resp = _finalize(client, job)
+    assert resp.status_code == 202
+    assert resp.json()["status"] == "pending"
+    assert resp.json()["file_size"] == 1234
+    assert _status(db, job) == "pending"
+
+    # 重复确认
+    assert _finalize(client, job).status_code == 409
+
+
+def test_finalize_rejects_wrong_content(client, db, users, actor, staging):
+    job = _awaiting_job(db, users)
+    staging["A1/x.jpg"] = (100, "application/x-msdownload")
+
+    resp = _finalize(client, job)
+    assert resp.status_code == 400
+    assert _status(db, job) == "failed"
+    assert "A1/x.jpg" not in staging
+
+
+def test_finalize_before_upload(client, db, users, actor, staging):
+    job = _awaiting_job(db, users)
+
+    assert _finalize(client, job).status_code == 400
+    assert _status(db, job) == "awaiting_upload"
+
+
+def test_finalize_after_expiry(client, db, users, actor, staging):
+    job = _awaiting_job(db, users, age=settings.PRESIGNED_UPLOAD_EXPIRES + 1)
+    staging["A1/x.jpg"] = (1234, "image/jpeg")
+
+    assert _finalize(client, job).status_code == 410
+    assert _status(db, job) == "failed"
+    assert not staging
+
+
+def test_finalize_loses_race_to_sweep(client, db, users, actor, staging, monkeypatch):
+    job = _awaiting_job(db, users)
+    staging["A1/x.jpg"] = (1234, "image/jpeg")
+    inspect = media_endpoints.inspect_uploaded_object
+
+    def inspect_while_expired(client_, object_name):
+        # 检查对象期间任务被过期清理处理
+        db.query(MediaJob).filter(MediaJob.id == job.id).update({"status": "failed"})
+        db.commit()
+        return inspect(client_, object_name)
+
+    monkeypatch.setattr(media_endpoints, "inspect_uploaded_object", inspect_while_expired)
+    assert _finalize(client, job).status_code == 409
+    assert _status(db, job) == "failed"
+
+
+def test_sweep_expires_awaiting_jobs(db, users, actor, staging):
+    old = _awaiting_job(db, users, age=settings.PRESIGNED_UPLOAD_EXPIRES + 1, object_name="A1/old.jpg")
+    fresh = _awaiting_job(db, users, object_name="A1/new.jpg")
+    staging.update({"A1/old.jpg": (1, "image/jpeg"), "A1/new.jpg": (1, "image/jpeg")})
+
+    assert asyncio.run(media_jobs.expire_direct_uploads()) == 1
+    assert _status(db, old) == "failed"
+    assert _status(db, fresh) == "awaiting_upload"
+    assert set(staging) == {"A1/new.jpg"}
+    assert asyncio.run(media_jobs.expire_direct_uploads()) == 0
+
+
+def test_expired_jobs_do_not_count_towards_quota(db, users, actor):
+    _awaiting_job(db, users, age=settings.PRESIGNED_UPLOAD_EXPIRES + 1)
+    _awaiting_job(db, users)
+
+    async def count():
+        from app.core.database import AsyncSessionLocal
+        async with AsyncSessionLocal() as session:
+            return await media_endpoints._count_media_with_pending_jobs(session, "A1", "photo")
+
+    assert asyncio.run(count()) == 1
@@ -0,0 +1,64 @@
+import re
+import threading
+
+from app.core.id_generator import IDBlockAllocator, generate_actor_ids
+from app.models.user import IDCounter
+
+
+def _counter(db, key):
+    db.expire_all()
+    return db.query(IDCounter).filter(IDCounter.counter_key == key).one().current_value
+
+
+def test_allocates_sequentially_across_blocks(db):
+    allocator = IDBlockAllocator("test", block_size=3, initial_value=100)
+
+    assert allocator.allocate(2) == [101, 102]
+    assert _counter(db, "test") == 103
+    # 号段用完后预留下一段
+    assert allocator.allocate(3) == [103, 104, 105]
+    assert _counter(db, "test") == 106
+
+
+def test_large_request_reserves_one_block(db):
+    allocator = IDBlockAllocator("test", block_size=3)
+
+    values = allocator.allocate(10)
+    assert values == list(range(1, 11))
+    assert _counter(db, "test") == 10
+
+
+def test_allocators_sharing_a_counter_do_not_overlap(db):
+    # 模拟两个工作进程
+    first = IDBlockAllocator("test", block_size=5)
+    second = IDBlockAllocator("test", block_size=5)
+
+    values = first.allocate(2) + second.allocate(2) + first.allocate(4) + second.allocate(4)
+    assert len(set(values)) == len(values)
+    assert _counter(db, "test") == 20
+
+
+def test_concurrent_threads_get_unique_values(db):
+    allocator = IDBlockAllocator("test", block_size=7)
+    results = []
+
+    def worker():
+        for _ in range(20):
+            results.extend(allocator.allocate(1))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(results) == list(range(1, 81))
+
+
+def test_actor_id_format(db, monkeypatch):
+    import app.core.id_generator as id_generator
+    monkeypatch.setattr(id_generator, "actor_id_allocator", IDBlockAllocator("actor", 100, initial_value=10000))
+
+    first, second = generate_actor_ids(2)
+    assert re.fullmatch(r"AC\d{8}00010001", first)
+    assert second[-8:] == "00010002"
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+from PIL import Image
+
+from app.core.config import settings
+from app.utils import file_utils
+
+
+@pytest.fixture(autouse=True)
+def image_executor(monkeypatch):
+    monkeypatch.setattr(settings, "IMAGE_PROCESS_WORKERS", 2)
+    yield
+    file_utils.shutdown_image_executor()
+
+
+def test_executor_is_shared_and_recreated_after_shutdown():
+    executor = file_utils.get_image_executor()
+    assert file_utils.get_image_executor() is executor
+    assert executor._max_workers == 2
+
+    file_utils.shutdown_image_executor()
+    assert file_utils.get_image_executor() is not executor
+
+
+def test_compress_runs_in_process_pool(make_image, monkeypatch):
+    monkeypatch.setattr(settings, "IMAGE_MAX_DIMENSION", 400)
+    path = make_image(size=(1000, 500))
+
+    output = asyncio.run(file_utils.compress_image(path, quality=70))
+    assert output.endswith("photo_compressed.jpg")
+    with Image.open(output) as img:
+        assert img.size == (400, 200)
+
+
+def test_thumbnail_respects_output_path(make_image, tmp_path):
+    path = make_image(size=(1200, 900))
+    output = tmp_path / "thumb.jpg"
+
+    result = asyncio.run(file_utils.create_thumbnail(path, (300, 300), output))
+    assert result == str(output)
+    with Image.open(output) as img:
+        assert img.size == (300, 225)
+
+
+def test_concurrent_jobs(make_image):
+    paths = [make_image(f"photo{i}.jpg", size=(640, 480)) for i in range(4)]
+
+    async def run():
+        return await asyncio.gather(*(file_utils.create_thumbnail(path, (100, 100)) for path in paths))
+
+    outputs = asyncio.run(run())
+    assert len(set(outputs)) == 4
+
+
+def test_errors_propagate_from_worker(tmp_path):
+    bad = tmp_path / "bad.jpg"
+    bad.write_bytes(b"not an image")
+
+    with pytest.raises(Exception, match="压缩图片失败"):
+        asyncio.run(file_utils.compress_image(bad))
+    with pytest.raises(Exception, match="文件不存在"):
+        asyncio.run(file_utils.compress_image(tmp_path / "missing.jpg"))
@@ -0,0 +1,87 @@
+from PIL import Image
+
+from app.utils.image_processing import (
+    EXIF_ORIENTATION,
+    _draft_to_fit,
+    compress_image_file,
+    create_thumbnail_file,
+    dhash_file,
+    process_photo_file,
+)
+from app.utils.near_duplicates import hamming_distance
+
+
+def _rotated_jpeg(make_image, size=(600, 400)):
+    """像素为横图、EXIF标记为顺时针旋转90度（方向6）的JPEG"""
+    exif = Image.Exif()
+    exif[EXIF_ORIENTATION] = 6
+    return make_image("rotated.jpg", size=size, exif=exif.tobytes())
+
+
+def test_draft_decodes_jpeg_at_reduced_scale(make_image):
+    path = make_image("large.jpg", size=(4000, 3000))
+
+    with Image.open(path) as img:
+        _draft_to_fit(img, (1024, 1024))
+        # 1/4解码为1000x750会小于最终尺寸1024x768，只能按1/2解码
+        assert img.size == (2000, 1500)
+
+    with Image.open(path) as img:
+        _draft_to_fit(img, (1000, 1000))
+        assert img.size == (1000, 750)
+
+    with Image.open(path) as img:
+        _draft_to_fit(img, (300, 300))
+        assert img.size == (500, 375)
+
+
+def test_draft_is_skipped_when_no_reduction_needed(make_image):
+    path = make_image("small.jpg", size=(800, 600))
+
+    with Image.open(path) as img:
+        _draft_to_fit(img, (4096, 4096))
+        assert img.size == (800, 600)
+
+
+def test_compress_caps_dimension_and_applies_orientation(make_image):
+    path = make_image("large.jpg", size=(6000, 3000))
+    with Image.open(compress_image_file(str(path), max_dimension=2048)) as img:
+        assert img.size == (2048, 1024)
+
+    with Image.open(compress_image_file(str(_rotated_jpeg(make_image)))) as img:
+        assert img.size == (400, 600)
+
+
+def test_thumbnail_fits_box(make_image):
+    path = make_image("large.jpg", size=(4000, 3000))
+
+    with Image.open(create_thumbnail_file(str(path), (300, 300))) as img:
+        assert img.size == (300, 225)
+
+
+def test_process_photo_file_outputs(make_image):
+    path = make_image("large.jpg", size=(3000, 2000))
+
+    result = process_photo_file(str(path), 85, 1500, (300, 300), [160, 640, 2000], ["jpeg"], 80)
+
+    with Image.open(result["compressed"]) as img:
+        assert img.size == (1500, 1000)
+    with Image.open(result["thumbnail"]) as img:
+        assert img.size == (300, 200)
+    # 超过压缩图宽度的档位用压缩图宽度代替
+    assert [width for width, _, _ in result["variants"]] == [1500, 640, 160]
+    for width, _, output in result["variants"]:
+        with Image.open(output) as img:
+            assert img.width == width
+    # 由最小档位计算的感知哈希与单独解码压缩图的结果一致或非常接近
+    assert hamming_distance(result["phash"], dhash_file(result["compressed"])) <= 2
+
+
+def test_process_photo_file_applies_orientation(make_image):
+    result = process_photo_file(str(_rotated_jpeg(make_image)), 85, 0, (300, 300), [160], ["jpeg"], 80)
+
+    with Image.open(result["compressed"]) as img:
+        assert img.size == (400, 600)
+    with Image.open(result["thumbnail"]) as img:
+        assert img.size == (200, 300)
+    assert result["variants"][0][0] == 160
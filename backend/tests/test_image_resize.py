@@ -0,0 +1,115 @@
+import asyncio
+import os
+import time
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from app.api.v1.endpoints.media import images
+from app.models.media import ActorMedia
+from app.utils.image_cache import DiskLRUCache
+
+
+@pytest.fixture
+def image_cache(tmp_path, monkeypatch):
+    cache = DiskLRUCache(str(tmp_path / "cache"), 10 * 1024 * 1024)
+    monkeypatch.setattr(images, "_image_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def photo(db, storage, actor, make_image):
+    """存储在内存后端中的照片"""
+    def make(is_public=True):
+        path = make_image(size=(800, 600))
+        storage.objects.clear()
+        asyncio.run(storage.put_file("actor-photos", "photos/p.jpg", str(path), "image/jpeg"))
+        media = ActorMedia(actor_id="A1", type="photo", file_name="p.jpg", file_path="memory://actor-photos/photos/p.jpg",
+                           bucket_name="actor-photos", object_name="photos/p.jpg", is_public=is_public)
+        db.add(media)
+        db.commit()
+        return media
+    return make
+
+
+def _write(path, size):
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+
+
+def test_temp_paths_are_unique(tmp_path):
+    cache = DiskLRUCache(str(tmp_path), 1024)
+    key = DiskLRUCache.make_key("a")
+
+    first, second = cache.temp_path_for(key, "jpg"), cache.temp_path_for(key, "jpg")
+    assert first != second
+    assert os.path.dirname(first) == os.path.dirname(cache.path_for(key, "jpg"))
+
+
+def test_lru_eviction(tmp_path):
+    cache = DiskLRUCache(str(tmp_path), 250)
+    keys = [DiskLRUCache.make_key(i) for i in range(3)]
+
+    for i, key in enumerate(keys[:2]):
+        temp = cache.temp_path_for(key, "jpg")
+        _write(temp, 100)
+        cache.commit(key, "jpg", temp)
+        os.utime(cache.path_for(key, "jpg"), (time.time() - 100 + i, time.time() - 100 + i))
+
+    # 访问第一个文件后，第二个文件成为最久未使用的
+    assert cache.get(keys[0], "jpg")
+    temp = cache.temp_path_for(keys[2], "jpg")
+    _write(temp, 100)
+    cache.commit(keys[2], "jpg", temp)
+
+    assert cache.get(keys[0], "jpg")
+    assert cache.get(keys[1], "jpg") is None
+    assert cache.get(keys[2], "jpg")
+
+
+def test_resize_is_cached(client, image_cache, photo):
+    media = photo()
+
+    resp = client.get(f"/api/v1/media/img/{media.id}", params={"w": 200, "fmt": "png"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "image/png"
+    assert resp.headers["cache-control"].startswith("public")
+    etag = resp.headers["etag"]
+    cached = list(image_cache._iter_files())
+    # 原图和缩放结果各一个
+    assert len(cached) == 2
+
+    assert Image.open(BytesIO(resp.content)).size == (200, 150)
+
+    resp = client.get(f"/api/v1/media/img/{media.id}", params={"w": 200, "fmt": "png"},
+                      headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert len(list(image_cache._iter_files())) == 2
+
+
+def test_private_media(client, image_cache, photo):
+    media = photo(is_public=False)
+
+    resp = client.get(f"/api/v1/media/img/{media.id}", params={"w": 100})
+    assert resp.status_code == 200
+    assert resp.headers["cache-control"].startswith("private")
+
+    resp = client.get(f"/api/v1/media/img/{media.id}", params={"w": 100},
+                      headers={"If-None-Match": resp.headers["etag"]})
+    assert resp.status_code == 304
+    assert resp.headers["cache-control"].startswith("private")
+
+    client.logout()
+    assert client.get(f"/api/v1/media/img/{media.id}", params={"w": 100}).status_code == 403
+
+
+def test_rejects_bad_parameters(client, image_cache, photo):
+    media = photo()
+    url = f"/api/v1/media/img/{media.id}"
+
+    assert client.get(url).status_code == 400
+    assert client.get(url, params={"w": 100, "fit": "stretch"}).status_code == 400
+    assert client.get(url, params={"w": 100, "fmt": "gif"}).status_code == 400
+    assert client.get(url, params={"w": 100000}).status_code == 400
+    assert client.get("/api/v1/media/img/999", params={"w": 100}).status_code == 404
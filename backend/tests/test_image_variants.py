@@ -0,0 +1,77 @@
+import json
+
+from PIL import Image
+
+from app.core.config import settings
+from app.models.media import ActorMedia
+from app.utils.file_utils import build_srcset, smallest_variant_url, variant_object_names
+from app.utils.image_processing import create_variant_files
+
+
+def test_variant_ladder_never_upscales(make_image):
+    path = make_image(size=(500, 250))
+
+    outputs = create_variant_files(str(path), [160, 320, 640, 1280], ["jpeg", "webp"])
+    assert sorted({width for width, _, _ in outputs}) == [160, 320, 500]
+    assert len(outputs) == 6
+    for width, fmt, output in outputs:
+        with Image.open(output) as img:
+            assert img.width == width
+            assert img.height == round(250 * width / 500)
+            assert img.format == {"jpeg": "JPEG", "webp": "WEBP"}[fmt]
+
+
+def test_unsupported_formats_are_skipped(make_image):
+    path = make_image(size=(400, 300))
+
+    outputs = create_variant_files(str(path), [160], ["jpeg", "bogus"])
+    assert [fmt for _, fmt, _ in outputs] == ["jpeg"]
+
+
+def test_srcset_and_smallest_variant():
+    variants = {
+        "webp": {"640": "w640", "160": "w160"},
+        "jpeg": {"1280": "j1280", "320": "j320"},
+    }
+    assert build_srcset(variants) == {"webp": "w160 160w, w640 640w", "jpeg": "j320 320w, j1280 1280w"}
+    assert smallest_variant_url(variants) == "j320"
+    assert smallest_variant_url({"webp": variants["webp"]}) == "w160"
+    assert build_srcset(None) is None
+    assert smallest_variant_url({}) is None
+
+
+def test_variant_object_names(storage):
+    variants = {"jpeg": {"160": storage.url("actor-photos", "v/160w.jpg"), "320": "https://elsewhere/x.jpg"}}
+    assert variant_object_names(variants, "actor-photos") == ["v/160w.jpg"]
+
+
+def test_photo_job_uploads_variants(client, db, storage, actor, make_image, run_jobs, monkeypatch):
+    monkeypatch.setattr(settings, "IMAGE_VARIANT_WIDTHS", [160, 320])
+    monkeypatch.setattr(settings, "IMAGE_VARIANT_FORMATS", ["jpeg"])
+    path = make_image(size=(800, 600))
+    with open(path, "rb") as f:
+        client.post("/api/v1/actors/media/A1/media/photos", files=[("files", ("p.jpg", f, "image/jpeg"))])
+    run_jobs()
+
+    media = db.query(ActorMedia).one()
+    variants = json.loads(media.variants)
+    assert set(variants["jpeg"]) == {"160", "320"}
+    for name in variant_object_names(variants, media.bucket_name):
+        assert (media.bucket_name, name) in storage.objects
+
+    item = client.get("/api/v1/actors/media/A1/media").json()["items"][0]
+    assert item["thumbnail_url"] == variants["jpeg"]["160"]
+    assert item["srcset"]["jpeg"].endswith("320w")
+
+
+def test_avatar_upload_returns_variants(client, storage, actor, make_image, media_root, monkeypatch):
+    monkeypatch.setattr(settings, "IMAGE_VARIANT_WIDTHS", [160])
+    monkeypatch.setattr(settings, "IMAGE_VARIANT_FORMATS", ["webp"])
+    path = make_image(size=(400, 400))
+    with open(path, "rb") as f:
+        resp = client.post("/api/v1/actors/media/A1/media/avatar", files={"file": ("a.jpg", f, "image/jpeg")})
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert set(body["variants"]["webp"]) == {"160"}
+    assert body["srcset"]["webp"].endswith("160w")
@@ -0,0 +1,111 @@
+import datetime
+
+import pytest
+from sqlalchemy import update
+
+from app.models.media import ActorMedia, MediaAlbum
+from app.utils.media_albums import decode_cursor, encode_cursor
+
+BASE = datetime.datetime(2026, 10, 1, 12, 0, 0)
+
+
+def _add_media(db, count, media_type="photo", album="默认相册", created_at=BASE, step=datetime.timedelta(minutes=-1)):
+    records = []
+    for i in range(count):
+        record = ActorMedia(
+            actor_id="A1", type=media_type, file_name=f"{media_type}{i}.jpg", file_path=f"/m/{media_type}{i}.jpg",
+            file_size=1, mime_type="image/jpeg", album=album,
+            created_at=created_at + step * i if created_at else None
+        )
+        db.add(record)
+        records.append(record)
+    db.commit()
+    if created_at is None:
+        db.execute(update(ActorMedia).where(ActorMedia.id.in_([r.id for r in records])).values(created_at=None))
+        db.commit()
+    return records
+
+
+def _all_pages(client, url, params):
+    ids, pages, cursor = [], 0, None
+    while True:
+        resp = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert resp.status_code == 200
+        body = resp.json()
+        ids += [item["id"] for item in body["items"]]
+        pages += 1
+        cursor = body["next_cursor"]
+        if not cursor:
+            return ids, pages
+
+
+def test_cursor_round_trip():
+    media = ActorMedia(id=7, created_at=BASE)
+    assert decode_cursor(encode_cursor(media)) == (BASE, 7)
+    assert decode_cursor(encode_cursor(ActorMedia(id=3, created_at=None))) == (None, 3)
+
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_pages_cover_every_item_once(client, db, actor):
+    # 相同时间的记录按ID区分
+    records = _add_media(db, 5, step=datetime.timedelta(0)) + _add_media(db, 4, created_at=BASE - datetime.timedelta(hours=1))
+
+    ids, pages = _all_pages(client, "/api/v1/actors/media/A1/media", {"limit": 2})
+    assert pages == 5
+    assert ids == sorted((r.id for r in records[:5]), reverse=True) + [r.id for r in records[5:]]
+
+
+def test_pages_include_items_without_created_at(client, db, actor):
+    dated = _add_media(db, 3)
+    undated = _add_media(db, 3, created_at=None)
+
+    ids, _ = _all_pages(client, "/api/v1/actors/media/A1/media", {"limit": 2})
+    # 没有上传时间的记录排在最后
+    assert ids == [r.id for r in dated] + sorted((r.id for r in undated), reverse=True)
+
+
+def test_invalid_cursor_is_rejected(client, actor):
+    resp = client.get("/api/v1/actors/media/A1/media", params={"cursor": "bad"})
+    assert resp.status_code == 400
+
+
+def test_self_media_pages(client, db, users, actor):
+    _add_media(db, 3)
+    _add_media(db, 2, media_type="video", album="默认视频")
+    db.add_all([
+        MediaAlbum(actor_id="A1", media_type="photo", name="默认相册"),
+        MediaAlbum(actor_id="A1", media_type="video", name="默认视频"),
+    ])
+    db.commit()
+    client.login(users["performer"])
+
+    first = client.get("/api/v1/actors/self-media/", params={"limit": 3}).json()
+    assert len(first["photos"]) + len(first["videos"]) == 3
+    assert first["albums"] and first["next_cursor"]
+
+    second = client.get("/api/v1/actors/self-media/", params={"limit": 3, "cursor": first["next_cursor"]}).json()
+    assert len(second["photos"]) + len(second["videos"]) == 2
+    assert second["next_cursor"] is None
+    seen = [item["id"] for page in (first, second) for item in page["photos"] + page["videos"]]
+    assert len(set(seen)) == 5
+
+
+def test_album_summaries(client, db, actor):
+    photos = _add_media(db, 3)
+    _add_media(db, 1, album="旅行")
+    db.add_all([
+        MediaAlbum(actor_id="A1", media_type="photo", name="默认相册", sort_order=2),
+        MediaAlbum(actor_id="A1", media_type="photo", name="旅行", sort_order=1),
+    ])
+    db.commit()
+
+    albums = client.get("/api/v1/actors/media/A1/albums").json()["albums"]
+    assert [(a["name"], a["count"]) for a in albums] == [("旅行", 1), ("默认相册", 3)]
+    # 没有指定封面时使用最新上传的媒体
+    assert albums[1]["cover_media_id"] == max(r.id for r in photos)
+
+    resp = client.patch(f"/api/v1/actors/media/A1/albums/{albums[1]['id']}", json={"cover_media_id": photos[2].id})
+    assert resp.status_code == 200
+    assert resp.json()["cover_media_id"] == photos[2].id
@@ -0,0 +1,84 @@
+import asyncio
+import hashlib
+
+from app.models.actor import Actor
+from app.models.media import ActorMedia, MediaJob, StorageDeletion
+from app.utils.media_refs import content_object_name, content_thumbnail_name, releasable_actor_objects
+from app.utils.storage_deletions import drain_batch
+
+
+def _upload_photo(client, actor_id, path):
+    with open(path, "rb") as f:
+        resp = client.post(f"/api/v1/actors/media/{actor_id}/media/photos",
+                           files=[("files", ("p.jpg", f, "image/jpeg"))])
+    assert resp.status_code == 202
+    return resp.json()[0]["job_id"]
+
+
+def _second_actor(db):
+    db.add(Actor(id="A2", real_name="演员二", gender="male", status="active"))
+    db.commit()
+
+
+def test_same_content_is_stored_once(client, db, storage, actor, make_image, run_jobs):
+    _second_actor(db)
+    path = make_image()
+
+    _upload_photo(client, "A1", path)
+    run_jobs()
+    objects_after_first = set(storage.objects)
+    job_id = _upload_photo(client, "A2", path)
+    run_jobs()
+
+    assert set(storage.objects) == objects_after_first
+    first, second = db.query(ActorMedia).order_by(ActorMedia.id).all()
+    assert first.object_name == second.object_name
+    assert first.object_name.startswith(f"photos/sha256/{first.content_hash[:2]}/{first.content_hash}")
+    assert second.actor_id == "A2"
+
+    resp = client.get(f"/api/v1/actors/media/jobs/{job_id}")
+    assert resp.json()["result"]["deduplicated"] is True
+
+
+def test_shared_objects_are_deleted_with_last_reference(client, db, storage, actor, make_image, run_jobs):
+    _second_actor(db)
+    path = make_image()
+    _upload_photo(client, "A1", path)
+    _upload_photo(client, "A2", path)
+    run_jobs()
+    first, second = db.query(ActorMedia).order_by(ActorMedia.id).all()
+
+    assert client.delete(f"/api/v1/actors/media/A1/media/{first.id}").status_code == 200
+    assert db.query(StorageDeletion).count() == 0
+
+    assert client.delete(f"/api/v1/actors/media/A2/media/{second.id}").status_code == 200
+    journaled = {row.object_name for row in db.query(StorageDeletion).all()}
+    assert second.object_name in journaled
+    assert content_thumbnail_name(second.content_hash) in journaled
+
+    asyncio.run(drain_batch())
+    assert not [key for key in storage.objects if key[0] == "actor-photos"]
+    db.expire_all()
+    assert db.query(StorageDeletion).count() == 0
+
+
+def test_releasable_actor_objects_keeps_shared_content(db, actor):
+    _second_actor(db)
+    shared = content_object_name("photos", "ab" * 32, ".jpg")
+    own = content_object_name("photos", "cd" * 32, ".jpg")
+    for actor_id, object_name, content_hash in [("A1", shared, "ab" * 32), ("A2", shared, "ab" * 32),
+                                                ("A1", own, "cd" * 32)]:
+        db.add(ActorMedia(actor_id=actor_id, type="photo", file_name="p.jpg", file_path="x",
+                          bucket_name="actor-photos", object_name=object_name, content_hash=content_hash))
+    db.commit()
+
+    objects = releasable_actor_objects(db, "A1")
+    assert objects == {("actor-photos", own), ("actor-photos", content_thumbnail_name("cd" * 32))}
+
+
+def test_job_hash_matches_upload(client, db, actor, make_image):
+    path = make_image()
+    job_id = _upload_photo(client, "A1", path)
+
+    job = db.get(MediaJob, job_id)
+    assert job.content_hash == hashlib.sha256(path.read_bytes()).hexdigest()
@@ -0,0 +1,116 @@
+import asyncio
+import datetime
+import json
+import os
+
+from app.core.config import settings
+from app.models.media import ActorMedia, MediaJob
+from app.utils.media_jobs import claim_next_job, process_job
+
+PHOTOS_URL = "/api/v1/actors/media/A1/media/photos"
+
+
+def _upload(client, path, album=None):
+    with open(path, "rb") as f:
+        data = {"album": album} if album else {}
+        return client.post(PHOTOS_URL, files=[("files", (os.path.basename(path), f, "image/jpeg"))], data=data)
+
+
+def _job(db, job_id):
+    db.expire_all()
+    return db.get(MediaJob, job_id)
+
+
+def test_upload_queues_job_and_worker_completes_it(client, db, storage, actor, make_image, run_jobs):
+    resp = _upload(client, make_image(), album="写真")
+    assert resp.status_code == 202
+    (accepted,) = resp.json()
+    assert accepted["status"] == "pending"
+
+    job = _job(db, accepted["job_id"])
+    assert job.params == json.dumps({"album": "写真"}, ensure_ascii=False)
+    assert os.path.exists(job.source_path)
+
+    assert run_jobs() == 1
+    job = _job(db, accepted["job_id"])
+    assert job.status == "completed"
+    assert not os.path.exists(job.source_path)
+
+    media = db.get(ActorMedia, job.media_id)
+    assert media.type == "photo"
+    assert media.album == "写真"
+    assert ("actor-photos", media.object_name) in storage.objects
+
+    resp = client.get(accepted["status_url"])
+    assert resp.status_code == 200
+    assert resp.json()["result"]["media_id"] == media.id
+
+
+def test_failed_job_is_retried_with_backoff(client, db, actor, media_root, monkeypatch):
+    monkeypatch.setattr(settings, "MEDIA_JOB_MAX_ATTEMPTS", 2)
+    source = media_root / "broken.jpg"
+    source.write_bytes(b"not an image")
+    db.add(MediaJob(actor_id="A1", job_type="photo", source_path=str(source), file_name="broken.jpg"))
+    db.commit()
+
+    job = asyncio.run(claim_next_job())
+    asyncio.run(process_job(job))
+    job = _job(db, job.id)
+    assert job.status == "pending"
+    assert job.attempts == 1
+    assert job.available_at > datetime.datetime.utcnow()
+    # 退避期间不会被领取
+    assert asyncio.run(claim_next_job()) is None
+
+    job.available_at = datetime.datetime.utcnow()
+    db.commit()
+    job = asyncio.run(claim_next_job())
+    asyncio.run(process_job(job))
+    job = _job(db, job.id)
+    assert job.status == "failed"
+    assert job.attempts == 2
+    assert job.error
+    assert not source.exists()
+
+
+def test_stale_processing_job_is_reclaimed(db, actor, media_root):
+    stale = datetime.datetime.utcnow() - datetime.timedelta(seconds=settings.MEDIA_JOB_LOCK_TIMEOUT + 1)
+    db.add(MediaJob(actor_id="A1", job_type="photo", status="processing", attempts=1, locked_at=stale))
+    db.add(MediaJob(actor_id="A1", job_type="photo", status="processing", attempts=1,
+                    locked_at=datetime.datetime.utcnow()))
+    db.commit()
+
+    job = asyncio.run(claim_next_job())
+    assert job.id == 1
+    assert job.attempts == 2
+    assert asyncio.run(claim_next_job()) is None
+
+
+def test_stale_job_out_of_attempts_fails(db, actor, media_root):
+    stale = datetime.datetime.utcnow() - datetime.timedelta(seconds=settings.MEDIA_JOB_LOCK_TIMEOUT + 1)
+    db.add(MediaJob(actor_id="A1", job_type="photo", status="processing",
+                    attempts=settings.MEDIA_JOB_MAX_ATTEMPTS, locked_at=stale))
+    db.commit()
+
+    assert asyncio.run(claim_next_job()) is None
+    job = _job(db, 1)
+    assert job.status == "failed"
+    assert job.error == "处理超时"
+
+
+def test_job_status_permissions(client, db, users, actor):
+    db.add(MediaJob(actor_id="A1", job_type="photo", created_by=users["admin"].id))
+    db.commit()
+
+    assert client.login(users["performer"]).get("/api/v1/actors/media/jobs/1").status_code == 200
+    assert client.login(users["manager"]).get("/api/v1/actors/media/jobs/1").status_code == 403
+    assert client.get("/api/v1/actors/media/jobs/99").status_code == 404
+
+
+def test_pending_jobs_count_towards_photo_quota(client, db, actor, make_image, monkeypatch):
+    from app.api.v1.endpoints.actors import media as media_endpoints
+    monkeypatch.setattr(media_endpoints, "MAX_PHOTOS_COUNT", 1)
+
+    assert _upload(client, make_image("a.jpg")).status_code == 202
+    resp = _upload(client, make_image("b.jpg", color=(0, 0, 0)))
+    assert resp.status_code == 400
@@ -0,0 +1,82 @@
+import random
+
+from PIL import Image
+
+from app.models.media import ActorMedia
+from app.utils.image_processing import dhash_file
+from app.utils.near_duplicates import BKTree, cluster_near_duplicates, hamming_distance
+
+
+def _flip(phash, bits):
+    value = int(phash, 16)
+    for bit in bits:
+        value ^= 1 << bit
+    return f"{value:016x}"
+
+
+def test_hamming_distance():
+    assert hamming_distance("0" * 16, "0" * 16) == 0
+    assert hamming_distance("0" * 16, "f" * 16) == 64
+    assert hamming_distance("00000000000000ff", "000000000000000f") == 4
+
+
+def test_bk_tree_matches_brute_force():
+    rng = random.Random(1)
+    hashes = [f"{rng.getrandbits(64):016x}" for _ in range(300)]
+    base = hashes[0]
+    hashes += [_flip(base, rng.sample(range(64), k)) for k in range(1, 12)]
+    tree = BKTree()
+    for i, phash in enumerate(hashes):
+        tree.add(phash, i)
+
+    for radius in (0, 5, 10):
+        expected = {i for i, phash in enumerate(hashes) if hamming_distance(base, phash) <= radius}
+        assert {item for _, item in tree.search(base, radius)} == expected
+
+
+def test_clusters_are_transitive():
+    a = "0" * 16
+    b = _flip(a, range(4))
+    c = _flip(b, range(4, 8))
+    far = "f" * 16
+
+    assert cluster_near_duplicates([(1, a), (2, b), (3, c), (4, far)], threshold=4) == [[1, 2, 3]]
+    assert cluster_near_duplicates([(1, a), (4, far)], threshold=4) == []
+
+
+def test_dhash_tolerates_reencoding_and_resizing(tmp_path):
+    # 从左到右变暗的渐变及其缩小、重新编码的副本，以及方向相反的渐变
+    gradient = Image.linear_gradient("L").rotate(90).resize((800, 600)).convert("RGB")
+    original, resized, mirrored = tmp_path / "a.jpg", tmp_path / "b.jpg", tmp_path / "c.jpg"
+    gradient.save(original)
+    gradient.resize((400, 300)).save(resized, quality=40)
+    gradient.transpose(Image.FLIP_LEFT_RIGHT).save(mirrored)
+
+    assert hamming_distance(dhash_file(str(original)), dhash_file(str(resized))) <= 4
+    assert hamming_distance(dhash_file(str(original)), dhash_file(str(mirrored))) > 32
+
+
+def test_upload_reports_near_duplicates(client, db, actor, make_image, run_jobs, tmp_path):
+    first = make_image(size=(800, 600))
+    second = tmp_path / "recompressed.jpg"
+    with Image.open(first) as img:
+        img.resize((640, 480)).save(second, quality=50)
+
+    for path in (first, second):
+        with open(path, "rb") as f:
+            client.post("/api/v1/actors/media/A1/media/photos", files=[("files", ("p.jpg", f, "image/jpeg"))])
+    run_jobs()
+
+    first_media, second_media = db.query(ActorMedia).order_by(ActorMedia.id).all()
+    assert first_media.phash and second_media.phash
+    resp = client.get("/api/v1/actors/media/jobs/2")
+    assert [item["media_id"] for item in resp.json()["result"]["near_duplicates"]] == [first_media.id]
+
+    resp = client.get("/api/v1/actors/media/duplicates", params={"actor_id": "A1"})
+    assert resp.status_code == 200
+    assert resp.json()["clusters"][0]["size"] == 2
+
+
+def test_duplicates_listing_is_admin_only(client, users):
+    client.login(users["manager"])
+    assert client.get("/api/v1/actors/media/duplicates").status_code == 403
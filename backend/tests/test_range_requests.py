@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from app.models.media import ActorMedia
+from app.utils.range_requests import RangeNotSatisfiable, if_range_matches, iter_file_range, parse_range
+
+DATA = bytes(range(256)) * 4  # 1024个字节
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=990-5000", (990, 999)),
+    ("bytes=0-0", (0, 0)),
+    ("bytes= 10 - 20 ", (10, 20)),
+])
+def test_parse_single_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", [None, "", "items=0-10", "bytes=0-10,20-30", "bytes=abc-", "bytes=10", "bytes=20-10"])
+def test_unsupported_ranges_return_full_content(header):
+    assert parse_range(header, 1000) is None
+
+
+@pytest.mark.parametrize("header, size", [("bytes=1000-", 1000), ("bytes=-0", 1000), ("bytes=-10", 0), ("bytes=0-", 0)])
+def test_unsatisfiable_ranges(header, size):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range(header, size)
+
+
+def test_if_range():
+    last_modified = "Mon, 19 Oct 2026 05:00:00 GMT"
+    assert if_range_matches(None, '"abc"', last_modified)
+    assert if_range_matches('"abc"', '"abc"', last_modified)
+    assert if_range_matches(last_modified, '"abc"', last_modified)
+    assert not if_range_matches('"old"', '"abc"', last_modified)
+    assert not if_range_matches('W/"abc"', '"abc"', last_modified)
+
+
+def test_iter_file_range(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(DATA)
+
+    chunks = list(iter_file_range(str(path), 10, 109, 32))
+    assert [len(chunk) for chunk in chunks] == [32, 32, 32, 4]
+    assert b"".join(chunks) == DATA[10:110]
+
+
+@pytest.fixture
+def video(db, storage, actor, tmp_path):
+    path = tmp_path / "v.mp4"
+    path.write_bytes(DATA)
+    url = asyncio.run(storage.put_file("actor-videos", "videos/v.mp4", str(path), "video/mp4"))
+    media = ActorMedia(
+        actor_id="A1", type="video", file_name="v.mp4", file_path=url, file_size=len(DATA),
+        mime_type="video/mp4", bucket_name="actor-videos", object_name="videos/v.mp4", is_public=True
+    )
+    db.add(media)
+    db.commit()
+    return media
+
+
+def _url(media):
+    return f"/api/v1/actors/media/{media.id}/stream"
+
+
+def test_stream_full_and_partial(client, video):
+    resp = client.get(_url(video))
+    assert resp.status_code == 200
+    assert resp.content == DATA
+    assert resp.headers["accept-ranges"] == "bytes"
+
+    resp = client.get(_url(video), headers={"Range": "bytes=100-199"})
+    assert resp.status_code == 206
+    assert resp.content == DATA[100:200]
+    assert resp.headers["content-range"] == "bytes 100-199/1024"
+    assert resp.headers["content-length"] == "100"
+
+    resp = client.get(_url(video), headers={"Range": "bytes=-24"})
+    assert resp.content == DATA[-24:]
+
+
+def test_stream_unsatisfiable_range(client, video):
+    resp = client.get(_url(video), headers={"Range": "bytes=5000-"})
+    assert resp.status_code == 416
+    assert resp.headers["content-range"] == "bytes */1024"
+
+
+def test_stream_if_range(client, video):
+    etag = client.head(_url(video)).headers["etag"]
+
+    resp = client.get(_url(video), headers={"Range": "bytes=0-9", "If-Range": etag})
+    assert resp.status_code == 206
+    resp = client.get(_url(video), headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert resp.status_code == 200
+    assert resp.content == DATA
+
+
+def test_stream_head_has_no_body(client, video):
+    resp = client.head(_url(video), headers={"Range": "bytes=0-9"})
+    assert resp.status_code == 206
+    assert resp.headers["content-length"] == "10"
+    assert resp.content == b""
+
+
+def test_private_media_requires_login(client, db, video):
+    video.is_public = False
+    db.commit()
+
+    assert client.logout().get(_url(video)).status_code == 403
@@ -0,0 +1,181 @@
+import asyncio
+import datetime
+import json
+import os
+
+import pytest
+
+from app.api.v1.endpoints.actors import media as media_endpoints
+from app.core import storage as storage_module
+from app.core.config import settings
+from app.models.media import MediaJob, UploadSession
+from app.utils import media_jobs
+from app.utils.resumable_uploads import buffer_path, recoverable_offset
+
+
+class FakeMultipartClient:
+    """记录分片上传调用的MinIO客户端替身"""
+
+    def __init__(self):
+        self.parts = {}
+        self.objects = {}
+        self.aborted = []
+        self.fail_parts = set()
+
+    def _upload_part(self, bucket, object_name, data, headers, upload_id, part_number):
+        if part_number in self.fail_parts:
+            raise ConnectionError("connection reset")
+        self.parts[(upload_id, part_number)] = data
+        return f"etag-{part_number}"
+
+    def _complete_multipart_upload(self, bucket, object_name, upload_id, parts):
+        self.objects[object_name] = b"".join(self.parts[(upload_id, part.part_number)] for part in parts)
+
+    def _abort_multipart_upload(self, bucket, object_name, upload_id):
+        self.aborted.append(upload_id)
+
+
+@pytest.fixture
+def minio(monkeypatch, media_root):
+    client = FakeMultipartClient()
+    monkeypatch.setattr(storage_module, "minio_client", client, raising=False)
+    monkeypatch.setattr(settings, "UPLOAD_PART_SIZE", 10)
+    monkeypatch.setattr(
+        media_endpoints, "inspect_uploaded_object",
+        lambda _client, object_name: (len(client.objects[object_name]), "image/jpeg")
+    )
+    monkeypatch.setattr(media_endpoints, "remove_staged_object", lambda _client, object_name: None)
+    return client
+
+
+def _session(db, users, total_size=25, expires_in=3600, upload_id="u1"):
+    session = UploadSession(
+        id=upload_id, actor_id="A1", media_type="photo", status="uploading", file_name="x.jpg",
+        mime_type="image/jpeg", total_size=total_size, offset=0, object_name=f"A1/{upload_id}.jpg",
+        multipart_upload_id=f"mp-{upload_id}", parts="[]", params="{}", created_by=users["admin"].id,
+        expires_at=datetime.datetime.utcnow() + datetime.timedelta(seconds=expires_in)
+    )
+    db.add(session)
+    db.commit()
+    return session
+
+
+def _patch(client, offset, body, upload_id="u1"):
+    return client.patch(
+        f"/api/v1/actors/media/uploads/{upload_id}", content=body, headers={"Upload-Offset": str(offset)}
+    )
+
+
+def _reload(db, upload_id="u1"):
+    db.expire_all()
+    return db.get(UploadSession, upload_id)
+
+
+DATA = bytes(range(65, 90))  # 25个字节
+
+
+def test_chunks_are_split_into_bounded_parts(client, db, users, actor, minio):
+    _session(db, users)
+
+    resp = _patch(client, 0, DATA[:7])
+    assert resp.status_code == 200
+    assert resp.headers["Upload-Offset"] == "7"
+    assert minio.parts == {}
+
+    resp = _patch(client, 7, DATA[7:18])
+    assert resp.headers["Upload-Offset"] == "18"
+    assert minio.parts == {("mp-u1", 1): DATA[:10]}
+
+    resp = _patch(client, 18, DATA[18:])
+    assert resp.status_code == 200
+    assert resp.json()["status"] == "completed"
+    assert resp.json()["job"]["status"] == "pending"
+    # 每个分片最多UPLOAD_PART_SIZE个字节，按文件中的位置读出
+    assert [minio.parts[("mp-u1", n)] for n in (1, 2, 3)] == [DATA[:10], DATA[10:20], DATA[20:]]
+    assert minio.objects["A1/u1.jpg"] == DATA
+    assert not os.path.exists(buffer_path("u1"))
+
+    session = _reload(db)
+    assert [part["size"] for part in json.loads(session.parts)] == [10, 10, 5]
+    assert db.get(MediaJob, session.job_id).file_size == 25
+
+
+def test_offset_mismatch_returns_current_offset(client, db, users, actor, minio):
+    _session(db, users)
+    _patch(client, 0, DATA[:5])
+
+    resp = _patch(client, 3, DATA[3:8])
+    assert resp.status_code == 409
+    assert resp.headers["Upload-Offset"] == "5"
+
+
+def test_failed_part_upload_keeps_buffer_for_retry(client, db, users, actor, minio):
+    _session(db, users)
+    minio.fail_parts.add(2)
+
+    resp = _patch(client, 0, DATA)
+    assert resp.status_code == 502
+    session = _reload(db)
+    assert session.offset == 25
+    assert [part["part_number"] for part in json.loads(session.parts)] == [1]
+
+    minio.fail_parts.clear()
+    resp = _patch(client, 25, b"")
+    assert resp.status_code == 200
+    assert minio.objects["A1/u1.jpg"] == DATA
+
+
+def test_session_changed_while_receiving_is_rejected(client, db, users, actor, minio, monkeypatch):
+    _session(db, users)
+    real_append = media_endpoints.append_stream
+
+    async def append_then_abort(*args):
+        result = await real_append(*args)
+        # 接收请求体期间会话没有被锁定，其他请求可以放弃它
+        db.query(UploadSession).filter_by(id="u1").update({"status": "aborted"})
+        db.commit()
+        return result
+
+    monkeypatch.setattr(media_endpoints, "append_stream", append_then_abort)
+    resp = _patch(client, 0, DATA[:12])
+    assert resp.status_code == 409
+    session = _reload(db)
+    assert session.status == "aborted"
+    assert session.offset == 0
+
+
+def test_concurrent_chunk_for_same_session_is_rejected(client, db, users, actor, minio):
+    _session(db, users)
+    lock = media_endpoints._upload_lock("u1")
+    asyncio.run(lock.acquire())
+    try:
+        assert _patch(client, 0, DATA[:5]).status_code == 409
+    finally:
+        lock.release()
+    assert _patch(client, 0, DATA[:5]).status_code == 200
+
+
+def test_recoverable_offset_uses_buffer_positions(media_root):
+    path = buffer_path("u1")
+    parts = [{"part_number": 1, "etag": "e", "size": 10}]
+    assert recoverable_offset(18, parts, path) == 10
+
+    with open(path, "wb") as f:
+        f.write(b"x" * 15)
+    assert recoverable_offset(18, parts, path) == 15
+    assert recoverable_offset(12, parts, path) == 12
+
+
+def test_expired_sessions_are_aborted(db, users, actor, minio):
+    _session(db, users, expires_in=-60, upload_id="old")
+    _session(db, users, upload_id="new")
+    for upload_id in ("old", "new"):
+        with open(buffer_path(upload_id), "wb") as f:
+            f.write(b"partial")
+
+    assert asyncio.run(media_jobs.expire_upload_sessions()) == 1
+    assert _reload(db, "old").status == "aborted"
+    assert _reload(db, "new").status == "uploading"
+    assert minio.aborted == ["mp-old"]
+    assert not os.path.exists(buffer_path("old"))
+    assert os.path.exists(buffer_path("new"))
@@ -0,0 +1,126 @@
+import asyncio
+import os
+import shutil
+
+import pytest
+
+from app.utils import storage_backends
+from app.utils.storage_backends import (
+    LocalStorageBackend,
+    MemoryStorageBackend,
+    ObjectNotFound,
+    StorageBackend,
+)
+
+
+@pytest.fixture
+def local(tmp_path):
+    return LocalStorageBackend(str(tmp_path / "objects"), "/media/objects")
+
+
+def _put(backend, bucket, name, data, tmp_path):
+    source = tmp_path / "source"
+    source.write_bytes(data)
+    return asyncio.run(backend.put_file(bucket, name, str(source), "application/octet-stream"))
+
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        StorageBackend()
+
+    class Incomplete(StorageBackend):
+        async def put_file(self, bucket_name, object_name, file_path, content_type):
+            return ""
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+@pytest.mark.parametrize("make", [lambda tmp_path: LocalStorageBackend(str(tmp_path / "objects"), "/m"), lambda _: MemoryStorageBackend()])
+def test_round_trip(make, tmp_path):
+    backend = make(tmp_path)
+    _put(backend, "b", "dir/a.bin", b"0123456789", tmp_path)
+
+    info = asyncio.run(backend.stat("b", "dir/a.bin"))
+    assert info.size == 10
+    assert b"".join(asyncio.run(backend.stream("b", "dir/a.bin", 2, 5, 2))) == b"23456"
+
+    target = tmp_path / "copy"
+    asyncio.run(backend.get_file("b", "dir/a.bin", str(target)))
+    assert target.read_bytes() == b"0123456789"
+
+    assert asyncio.run(backend.delete("b", ["dir/a.bin", "missing"])) == []
+    with pytest.raises(ObjectNotFound):
+        asyncio.run(backend.stat("b", "dir/a.bin"))
+
+
+@pytest.mark.parametrize("make", [lambda tmp_path: LocalStorageBackend(str(tmp_path / "objects"), "/m"), lambda _: MemoryStorageBackend()])
+def test_list_objects_in_key_order(make, tmp_path):
+    backend = make(tmp_path)
+    for name in ["a/b", "a-b", "c", "a/a"]:
+        _put(backend, "b", name, b"x", tmp_path)
+
+    # 按字节顺序 "-"(0x2d) 排在 "/"(0x2f) 之前
+    assert [name for name, _ in asyncio.run(backend.list_objects("b", None, 10))] == ["a-b", "a/a", "a/b", "c"]
+    assert [name for name, _ in asyncio.run(backend.list_objects("b", "a-b", 2))] == ["a/a", "a/b"]
+    assert asyncio.run(backend.list_objects("missing", None, 10)) == []
+
+
+def test_local_temp_files_are_outside_buckets(local, tmp_path, monkeypatch):
+    seen = {}
+    real_copyfile = shutil.copyfile
+
+    def copy_and_list(source, target):
+        real_copyfile(source, target)
+        # 复制完成、替换之前列举存储桶
+        seen["temp"] = target
+        seen["listed"] = [name for name, _ in local._list_objects("b", None, 10)]
+
+    monkeypatch.setattr(storage_backends.shutil, "copyfile", copy_and_list)
+    _put(local, "b", "x.jpg", b"data", tmp_path)
+
+    assert not seen["temp"].startswith(os.path.join(local.root, "b") + os.sep)
+    assert seen["listed"] == []
+    assert [name for name, _ in asyncio.run(local.list_objects("b", None, 10))] == ["x.jpg"]
+    assert os.listdir(os.path.join(local.root, storage_backends.LOCAL_TEMP_DIR)) == []
+
+
+def test_local_failed_copy_leaves_no_temp_file(local, tmp_path, monkeypatch):
+    def failing_copy(source, target):
+        with open(target, "wb") as f:
+            f.write(b"par")
+        raise OSError("disk full")
+
+    monkeypatch.setattr(storage_backends.shutil, "copyfile", failing_copy)
+    with pytest.raises(OSError):
+        _put(local, "b", "x.jpg", b"data", tmp_path)
+    assert os.listdir(os.path.join(local.root, storage_backends.LOCAL_TEMP_DIR)) == []
+    assert local.local_path("b", "x.jpg") is None
+
+
+def test_local_paths_and_urls(local, tmp_path):
+    assert _put(local, "b", "p/x.jpg", b"data", tmp_path) == "/media/objects/b/p/x.jpg"
+    assert local.local_path("b", "p/x.jpg") == os.path.join(local.root, "b", "p", "x.jpg")
+    assert local.local_path("b", "p/missing.jpg") is None
+    with pytest.raises(ValueError):
+        local.local_path("b", "../../etc/passwd")
+
+
+def test_local_listing_reads_only_needed_directories(local, tmp_path, monkeypatch):
+    names = [f"{d}/{i}.jpg" for d in ["a", "b", "c"] for i in range(3)] + ["a-b", "b/x/y.jpg"]
+    for name in names:
+        _put(local, "b", name, b"x", tmp_path)
+
+    # 分页列举的结果与全部对象键排序后一致
+    pages, start_after = [], None
+    while page := [name for name, _ in asyncio.run(local.list_objects("b", start_after, 4))]:
+        pages.append(page)
+        start_after = page[-1]
+    assert sum(pages, []) == sorted(names)
+
+    scanned = []
+    real_scandir = os.scandir
+    monkeypatch.setattr(storage_backends.os, "scandir", lambda path: scanned.append(os.path.basename(path)) or real_scandir(path))
+    assert [name for name, _ in asyncio.run(local.list_objects("b", "b/1.jpg", 2))] == ["b/2.jpg", "b/x/y.jpg"]
+    # 检查点之前的子目录和取满之后的子目录都不读取
+    assert scanned == ["b", "b", "x"]
@@ -0,0 +1,124 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from minio.error import S3Error
+from urllib3.exceptions import MaxRetryError
+
+from app.core import storage as storage_module
+from app.core.config import settings
+from app.core.storage import StorageMetrics, _operation_name, storage_metrics
+from app.utils.storage_backends import MinioStorageBackend
+
+ERROR_BODY = (
+    b'<?xml version="1.0" encoding="UTF-8"?><Error><Code>SlowDown</Code>'
+    b'<Message>Please reduce your request rate.</Message><Resource>/b/k</Resource>'
+    b'<RequestId>1</RequestId><HostId>h</HostId></Error>'
+)
+
+
+class _Unavailable(BaseHTTPRequestHandler):
+    """对每个请求都返回503的S3服务"""
+    requests = 0
+
+    def _reply(self):
+        type(self).requests += 1
+        self.send_response(503)
+        self.send_header("Content-Type", "application/xml")
+        self.send_header("Content-Length", str(len(ERROR_BODY)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(ERROR_BODY)
+
+    do_GET = do_PUT = do_HEAD = do_DELETE = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def minio_at(monkeypatch):
+    """让进程共用的MinIO客户端连接到指定地址"""
+    monkeypatch.setattr(settings, "MINIO_MAX_RETRIES", 1)
+    monkeypatch.setattr(settings, "MINIO_CONNECT_TIMEOUT", 1.0)
+    monkeypatch.setattr(storage_module, "_known_buckets", set())
+    storage_metrics.reset()
+
+    def connect(address):
+        monkeypatch.setattr(settings, "MINIO_URL", address)
+        monkeypatch.setattr(storage_module, "_client", storage_module._create_client())
+        return storage_module._client
+
+    yield connect
+    storage_metrics.reset()
+
+
+@pytest.fixture
+def unavailable_server():
+    _Unavailable.requests = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Unavailable)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_exhausted_5xx_retries_raise_s3_error(minio_at, unavailable_server):
+    client = minio_at(unavailable_server)
+
+    with pytest.raises(S3Error) as exc:
+        client.get_object("bucket", "key")
+    assert exc.value.code == "SlowDown"
+    # 首次请求和一次重试
+    assert _Unavailable.requests == 2
+    assert storage_metrics.snapshot()["get_object"]["errors"] == 1
+
+
+def test_connection_failure_is_reported_as_storage_error(minio_at, tmp_path):
+    minio_at("127.0.0.1:1")
+    path = tmp_path / "f.txt"
+    path.write_bytes(b"x")
+
+    with pytest.raises(MaxRetryError):
+        storage_module.get_minio_client().bucket_exists("bucket")
+    with pytest.raises(Exception, match="无法创建存储桶"):
+        MinioStorageBackend._put_file("bucket", "key", str(path), "text/plain")
+
+
+@pytest.mark.parametrize("method, url, operation", [
+    ("GET", "http://h/b/k", "get_object"),
+    ("PUT", "http://h/b/k", "put_object"),
+    ("HEAD", "http://h/b/k", "stat_object"),
+    ("HEAD", "http://h/b", "bucket_exists"),
+    ("GET", "http://h/b?location=", "get_bucket_location"),
+    ("POST", "http://h/b?delete=", "remove_objects"),
+    ("POST", "http://h/b/k?uploads=", "create_multipart_upload"),
+    ("PUT", "http://h/b/k?partNumber=1&uploadId=u", "upload_part"),
+    ("POST", "http://h/b/k?uploadId=u", "complete_multipart_upload"),
+    ("DELETE", "http://h/b/k?uploadId=u", "abort_multipart_upload"),
+])
+def test_operation_names(method, url, operation):
+    assert _operation_name(method, url) == operation
+
+
+def test_metrics_snapshot():
+    metrics = StorageMetrics()
+    metrics.record("put_object", 0.010)
+    metrics.record("put_object", 0.030, ok=False)
+    with pytest.raises(ValueError):
+        with metrics.timed("upload_file"):
+            raise ValueError()
+
+    snapshot = metrics.snapshot()
+    assert snapshot["put_object"] == {"count": 2, "errors": 1, "total_ms": 40.0, "avg_ms": 20.0, "max_ms": 30.0}
+    assert snapshot["upload_file"]["errors"] == 1
+
+
+def test_metrics_endpoint_is_admin_only(client, users):
+    resp = client.get("/api/v1/system/info/storage-metrics")
+    assert resp.status_code == 200
+    assert resp.json()["data"]["pool_size"] == settings.MINIO_POOL_SIZE
+
+    assert client.login(users["performer"]).get("/api/v1/system/info/storage-metrics").status_code == 403
+    assert client.logout().get("/api/v1/system/info/storage-metrics").status_code == 401
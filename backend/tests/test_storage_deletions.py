@@ -0,0 +1,183 @@
+import asyncio
+import datetime
+import json
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.core import database
+from app.core.config import settings
+from app.models.media import ActorMedia, StorageDeletion
+from app.utils.media_refs import content_object_name, content_streaming_prefix, content_thumbnail_name
+from app.utils.storage_deletions import claim_batch, drain_batch, journal_deletions
+
+HASH = "ab" * 32
+
+
+def _journal(db, bucket_name, names):
+    journal_deletions(db, bucket_name, names)
+    db.commit()
+
+
+def _put(storage, bucket_name, object_name, tmp_path):
+    path = tmp_path / "object"
+    path.write_bytes(b"data")
+    asyncio.run(storage.put_file(bucket_name, object_name, str(path), "application/octet-stream"))
+
+
+def _upload_photo(client, path):
+    with open(path, "rb") as f:
+        resp = client.post("/api/v1/actors/media/A1/media/photos", files=[("files", ("p.jpg", f, "image/jpeg"))])
+    assert resp.status_code == 202
+
+
+def test_drain_deletes_and_removes_rows(db, storage, tmp_path):
+    for name in ["a.jpg", "b.jpg"]:
+        _put(storage, "actor-photos", name, tmp_path)
+    _journal(db, "actor-photos", ["a.jpg", "b.jpg", "a.jpg"])
+    assert db.query(StorageDeletion).count() == 2
+
+    assert asyncio.run(drain_batch()) == 2
+    assert storage.objects == {}
+    db.expire_all()
+    assert db.query(StorageDeletion).count() == 0
+
+
+def test_failed_delete_is_retried_with_backoff(db, storage, monkeypatch):
+    async def failing_delete(bucket_name, object_names):
+        raise ConnectionError("storage unavailable")
+
+    monkeypatch.setattr(storage, "delete", failing_delete)
+    _journal(db, "actor-photos", ["a.jpg"])
+
+    for attempt, delay in [(1, settings.STORAGE_DELETION_RETRY_DELAY), (2, settings.STORAGE_DELETION_RETRY_DELAY * 2)]:
+        before = datetime.datetime.utcnow()
+        asyncio.run(drain_batch())
+        db.expire_all()
+        row = db.query(StorageDeletion).one()
+        assert row.attempts == attempt
+        assert row.last_error == "storage unavailable"
+        assert row.available_at >= before + datetime.timedelta(seconds=delay)
+        assert row.available_at <= datetime.datetime.utcnow() + datetime.timedelta(seconds=delay)
+        # 到期后再次尝试
+        row.available_at = before
+        db.commit()
+
+
+def test_partial_failure_keeps_failed_rows(db, storage, monkeypatch):
+    async def partly_failing_delete(bucket_name, object_names):
+        return ["b.jpg"]
+
+    monkeypatch.setattr(storage, "delete", partly_failing_delete)
+    _journal(db, "actor-photos", ["a.jpg", "b.jpg"])
+
+    asyncio.run(drain_batch())
+    db.expire_all()
+    row = db.query(StorageDeletion).one()
+    assert (row.object_name, row.last_error) == ("b.jpg", "删除失败")
+
+
+def test_claimed_rows_are_leased(db):
+    _journal(db, "actor-photos", ["a.jpg"])
+
+    before = datetime.datetime.utcnow()
+    assert [row.object_name for row in asyncio.run(claim_batch(10))] == ["a.jpg"]
+    assert asyncio.run(claim_batch(10)) == []
+
+    row = db.query(StorageDeletion).one()
+    assert row.available_at >= before + datetime.timedelta(seconds=settings.STORAGE_DELETION_LEASE)
+
+
+def test_rollback_leaves_no_rows(db, engines):
+    with database.SessionLocal() as session:
+        journal_deletions(session, "actor-photos", ["a.jpg"])
+        session.flush()
+        session.rollback()
+    assert db.query(StorageDeletion).count() == 0
+
+
+def test_failed_actor_deletion_leaves_no_rows(client, db, actor, monkeypatch):
+    db.add(ActorMedia(actor_id="A1", type="photo", file_name="p.jpg", file_path="x",
+                      bucket_name="actor-photos", object_name="photos/A1/p.jpg"))
+    db.commit()
+
+    def failing_commit(self):
+        raise RuntimeError("commit failed")
+
+    monkeypatch.setattr(Session, "commit", failing_commit)
+    with pytest.raises(RuntimeError):
+        client.delete("/api/v1/actors/deletion/A1", params={"delete_media": True})
+    monkeypatch.undo()
+
+    assert db.query(StorageDeletion).count() == 0
+    assert db.query(ActorMedia).count() == 1
+
+
+def test_actor_deletion_journals_all_objects(client, db, storage, actor):
+    photo = content_object_name("photos", HASH, ".jpg")
+    variant = content_object_name("variants", HASH, "/w640.webp")
+    segment = f"{content_streaming_prefix('cd' * 32)}/720p/0.ts"
+    db.add_all([
+        ActorMedia(actor_id="A1", type="photo", file_name="p.jpg", file_path="x", bucket_name="actor-photos",
+                   object_name=photo, content_hash=HASH,
+                   variants=json.dumps({"webp": {"640": storage.url("actor-photos", variant)}})),
+        ActorMedia(actor_id="A1", type="video", file_name="v.mp4", file_path="x", bucket_name="actor-videos",
+                   object_name=content_object_name("videos", "cd" * 32, ".mp4"), content_hash="cd" * 32,
+                   streaming=json.dumps({"objects": [segment]})),
+        # 内容寻址之前的记录，缩略图与原文件同名加 _thumbnail 后缀
+        ActorMedia(actor_id="A1", type="photo", file_name="old.jpg", file_path="x", bucket_name="actor-photos",
+                   object_name="photos/A1/默认相册/old.jpg"),
+        # 没有存储桶的旧记录使用默认存储桶
+        ActorMedia(actor_id="A1", type="avatar", file_name="a.jpg", file_path="x", object_name="avatars/A1.jpg"),
+    ])
+    db.commit()
+
+    resp = client.delete("/api/v1/actors/deletion/A1", params={"delete_media": True})
+    assert resp.status_code == 200
+
+    journaled = {(row.bucket_name, row.object_name) for row in db.query(StorageDeletion).all()}
+    assert journaled == {
+        ("actor-photos", photo),
+        ("actor-photos", content_thumbnail_name(HASH)),
+        ("actor-photos", variant),
+        ("actor-videos", content_object_name("videos", "cd" * 32, ".mp4")),
+        ("actor-videos", content_thumbnail_name("cd" * 32)),
+        ("actor-videos", segment),
+        ("actor-photos", "photos/A1/默认相册/old.jpg"),
+        ("actor-photos", "thumbnails/A1/默认相册/old_thumbnail.jpg"),
+        (settings.MINIO_BUCKET, "avatars/A1.jpg"),
+    }
+    # 媒体记录与删除日志在同一事务中删除
+    assert db.query(ActorMedia).count() == 0
+
+
+def test_reuploaded_content_is_not_deleted(client, db, storage, actor, make_image, run_jobs):
+    path = make_image()
+    _upload_photo(client, path)
+    run_jobs()
+    media = db.query(ActorMedia).one()
+    assert client.delete(f"/api/v1/actors/media/A1/media/{media.id}").status_code == 200
+
+    # 清理之前再次上传相同内容，写入同一个内容寻址的对象键
+    _upload_photo(client, path)
+    run_jobs()
+    asyncio.run(drain_batch())
+
+    db.expire_all()
+    media = db.query(ActorMedia).one()
+    assert (media.bucket_name, media.object_name) in storage.objects
+    assert (media.bucket_name, content_thumbnail_name(media.content_hash)) in storage.objects
+    assert db.query(StorageDeletion).count() == 0
+
+
+def test_pending_upload_keeps_content_objects(client, db, storage, actor, make_image, run_jobs):
+    path = make_image()
+    _upload_photo(client, path)
+    run_jobs()
+    media = db.query(ActorMedia).one()
+    assert client.delete(f"/api/v1/actors/media/A1/media/{media.id}").status_code == 200
+
+    # 相同内容的任务尚未保存媒体记录
+    _upload_photo(client, path)
+    asyncio.run(drain_batch())
+    assert (media.bucket_name, media.object_name) in storage.objects
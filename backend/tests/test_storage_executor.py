@@ -0,0 +1,71 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core import storage as storage_module
+from app.core.config import settings
+from app.core.storage import get_storage_executor, run_storage_io, shutdown_storage_executor
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    """每个测试使用新的存储线程池"""
+    shutdown_storage_executor()
+    monkeypatch.setattr(settings, "STORAGE_IO_WORKERS", 4)
+    yield
+    shutdown_storage_executor()
+
+
+def test_calls_run_on_storage_threads(executor):
+    def call(value, suffix=""):
+        return threading.current_thread().name, f"{value}{suffix}"
+
+    thread_name, result = asyncio.run(run_storage_io(call, "a", suffix="b"))
+    assert thread_name.startswith("storage-io")
+    assert result == "ab"
+
+
+def test_pool_size_defaults_to_connection_pool(monkeypatch, executor):
+    monkeypatch.setattr(settings, "STORAGE_IO_WORKERS", 0)
+    monkeypatch.setattr(settings, "MINIO_POOL_SIZE", 7)
+    assert get_storage_executor()._max_workers == 7
+
+
+def test_blocking_calls_run_concurrently_without_blocking_the_loop(executor):
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        start = time.perf_counter()
+        await asyncio.gather(*(run_storage_io(time.sleep, 0.2) for _ in range(4)))
+        elapsed = time.perf_counter() - start
+        task.cancel()
+        return elapsed, ticks
+
+    elapsed, ticks = asyncio.run(main())
+    # 4个线程同时执行，事件循环在等待期间继续运行
+    assert elapsed < 0.6
+    assert ticks >= 5
+
+
+def test_exceptions_propagate(executor):
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        asyncio.run(run_storage_io(fail))
+
+
+def test_pool_is_recreated_after_shutdown(executor):
+    first = get_storage_executor()
+    shutdown_storage_executor()
+    assert storage_module._executor is None
+    assert get_storage_executor() is not first
@@ -0,0 +1,275 @@
+import asyncio
+import datetime
+import os
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.models.media import ActorMedia, MediaJob, StorageDeletion, StorageReconcileCheckpoint, UploadSession
+from app.utils import storage_reconcile
+from app.utils.media_refs import content_object_name, content_thumbnail_name
+from app.utils.storage_backends import ObjectInfo
+from app.utils.storage_deletions import drain_batch
+from app.utils.storage_reconcile import ReconcileLocked, reconcile_bucket, sweep_temp_files
+
+BUCKET = "actor-photos"
+HASH = "ab" * 32
+OLD = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=2)
+
+
+@pytest.fixture
+def reconcile(storage, actor, monkeypatch):
+    """没有宽限期的对账，返回一次运行的报告"""
+    monkeypatch.setattr(settings, "STORAGE_RECONCILE_GRACE_PERIOD", -60)
+    monkeypatch.setattr(storage_reconcile, "_last_run", {})
+    return lambda bucket_name=BUCKET, **kwargs: asyncio.run(reconcile_bucket(bucket_name, **kwargs))
+
+
+def _put(storage, name, bucket_name=BUCKET, size=4):
+    storage.objects[(bucket_name, name)] = (b"x" * size, ObjectInfo(size=size, etag="e", last_modified=OLD))
+
+
+def _record(db, object_name, bucket_name=BUCKET, **fields):
+    media = ActorMedia(actor_id="A1", type="photo", file_name="p.jpg", file_path="x",
+                       bucket_name=bucket_name, object_name=object_name, **fields)
+    db.add(media)
+    db.commit()
+    return media
+
+
+def test_orphans_and_dangling_are_reported(db, storage, reconcile):
+    _put(storage, "photos/a.jpg")
+    _put(storage, "photos/orphan.jpg", size=10)
+    _record(db, "photos/a.jpg")
+    _record(db, "photos/missing.jpg")
+
+    report = reconcile()
+    assert report["scanned"] == 2
+    assert report["completed"] is True
+    assert (report["orphans"], report["orphan_bytes"], report["orphan_samples"]) == (1, 10, ["photos/orphan.jpg"])
+    assert (report["dangling"], report["dangling_samples"]) == (1, ["photos/missing.jpg"])
+
+    # 默认只报告
+    assert (BUCKET, "photos/orphan.jpg") in storage.objects
+    assert db.query(ActorMedia).count() == 2
+    assert db.query(StorageDeletion).count() == 0
+
+
+def test_recent_objects_and_records_are_skipped(db, storage, reconcile, monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_RECONCILE_GRACE_PERIOD", 86400)
+    storage.objects[(BUCKET, "photos/new.jpg")] = (b"x", ObjectInfo(
+        size=1, etag="e", last_modified=datetime.datetime.now(datetime.timezone.utc)
+    ))
+    _put(storage, "photos/old.jpg")
+    _record(db, "photos/missing.jpg")
+
+    report = reconcile()
+    assert report["orphan_samples"] == ["photos/old.jpg"]
+    assert report["dangling"] == 0
+
+
+def test_derived_and_legacy_objects_follow_their_originals(db, storage, reconcile):
+    other = "cd" * 32
+    _record(db, content_object_name("photos", HASH, ".jpg"), content_hash=HASH)
+    _record(db, "photos/A1/默认相册/old.jpg")
+    kept = [
+        content_object_name("photos", HASH, ".jpg"),
+        content_thumbnail_name(HASH),
+        content_object_name("variants", HASH, "/w640.webp"),
+        content_object_name("hls", HASH, "/index.m3u8"),
+        "photos/A1/默认相册/old.jpg",
+        "thumbnails/A1/默认相册/old_thumbnail.jpg",
+    ]
+    orphaned = [
+        content_thumbnail_name(other),
+        content_object_name("variants", other, "/w640.webp"),
+        "thumbnails/A1/默认相册/gone_thumbnail.jpg",
+    ]
+    for name in kept + orphaned:
+        _put(storage, name)
+
+    report = reconcile()
+    assert sorted(report["orphan_samples"]) == sorted(orphaned)
+    assert report["dangling"] == 0
+
+
+def test_checkpoint_resume(db, storage, reconcile, monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_RECONCILE_PAGE_SIZE", 2)
+    names = [f"photos/{i}.jpg" for i in range(5)]
+    for name in names:
+        _put(storage, name)
+    _record(db, "photos/3.jpg")
+    _record(db, "photos/9.jpg")
+
+    first = reconcile(max_objects=3)
+    assert (first["scanned"], first["completed"], first["checkpoint"]) == (3, False, names[2])
+    assert first["orphans"] == 3
+    assert first["dangling"] == 0
+
+    second = reconcile(max_objects=3)
+    assert (second["scanned"], second["completed"], second["checkpoint"]) == (2, True, None)
+    assert (second["orphans"], second["dangling_samples"]) == (1, ["photos/9.jpg"])
+    assert (second["pass_scanned"], second["pass_orphans"], second["pass_dangling"]) == (5, 4, 1)
+    assert second["last_completed_at"]
+
+    # 完成后下一轮从头开始
+    assert reconcile(max_objects=2)["orphan_samples"] == names[:2]
+    assert reconcile(max_objects=2, restart=True)["orphan_samples"] == names[:2]
+
+
+def test_empty_bucket_does_not_mark_records_dangling(db, storage, reconcile):
+    _record(db, "photos/a.jpg")
+
+    report = reconcile(delete_dangling=True)
+    assert "error" in report
+    assert report["completed"] is False
+    assert report["dangling"] == 0
+    assert db.query(ActorMedia).count() == 1
+
+
+def test_out_of_order_keys_stop_reconciliation():
+    class Rows:
+        def __init__(self, rows):
+            self.rows = rows
+
+        def all(self):
+            return self.rows
+
+    class FakeSession:
+        # 数据库排序不区分大小写时 "a" 排在 "B" 之前
+        async def execute(self, query):
+            return Rows([("a", None), ("B", None)])
+
+    async def consume():
+        return [row async for row in storage_reconcile._referenced_names(FakeSession(), BUCKET, None, 10)]
+
+    with pytest.raises(RuntimeError, match="排序"):
+        asyncio.run(consume())
+
+
+def test_staged_objects_of_active_jobs_are_kept(db, storage, reconcile):
+    upload_bucket = settings.MINIO_UPLOAD_BUCKET
+    db.add(MediaJob(actor_id="A1", job_type="photo", status="pending", source_object="staged/active.jpg"))
+    db.add(MediaJob(actor_id="A1", job_type="photo", status="completed", source_object="staged/done.jpg"))
+    db.commit()
+    for name in ["staged/active.jpg", "staged/done.jpg", "staged/unknown.jpg"]:
+        _put(storage, name, bucket_name=upload_bucket)
+
+    report = reconcile(upload_bucket)
+    assert report["orphan_samples"] == ["staged/done.jpg", "staged/unknown.jpg"]
+
+
+def test_delete_flags(db, storage, reconcile):
+    _put(storage, "photos/orphan.jpg")
+    _put(storage, "photos/journaled.jpg")
+    _put(storage, content_thumbnail_name(HASH))
+    _record(db, content_object_name("photos", HASH, ".jpg"), content_hash=HASH)
+    db.add(StorageDeletion(bucket_name=BUCKET, object_name="photos/journaled.jpg"))
+    db.commit()
+
+    report = reconcile(delete_orphans=True, delete_dangling=True)
+    assert report["orphans_deleted"] == 1
+    assert report["dangling_deleted"] == 1
+    # 已在删除日志中的对象不重复记录；悬空记录的缩略图不再被引用，一并删除
+    journaled = sorted(row.object_name for row in db.query(StorageDeletion).all())
+    assert journaled == sorted([
+        "photos/journaled.jpg", "photos/orphan.jpg",
+        content_object_name("photos", HASH, ".jpg"), content_thumbnail_name(HASH)
+    ])
+    assert db.query(ActorMedia).count() == 0
+
+    asyncio.run(drain_batch())
+    assert [key for key in storage.objects if key[0] == BUCKET] == []
+
+
+def test_locked_bucket_is_skipped(db, storage, reconcile):
+    _put(storage, "photos/a.jpg")
+    db.add(StorageReconcileCheckpoint(bucket_name=BUCKET, locked_by="other", locked_at=datetime.datetime.utcnow()))
+    db.commit()
+
+    with pytest.raises(ReconcileLocked):
+        reconcile()
+    result = asyncio.run(storage_reconcile.run_reconciliation(buckets=[BUCKET], temp_files=False))
+    assert result["buckets"] == [{"bucket": BUCKET, "error": "该存储桶正在由其他进程对账"}]
+
+    # 锁定超时后可以重新锁定，完成后解除锁定
+    checkpoint = db.get(StorageReconcileCheckpoint, BUCKET)
+    checkpoint.locked_at = datetime.datetime.utcnow() - datetime.timedelta(seconds=settings.STORAGE_RECONCILE_LOCK_TIMEOUT + 1)
+    db.commit()
+    assert reconcile()["completed"] is True
+    db.expire_all()
+    assert db.get(StorageReconcileCheckpoint, BUCKET).locked_by is None
+
+
+def test_lost_lock_rolls_back_the_page(db, storage, reconcile, monkeypatch):
+    _put(storage, "photos/orphan.jpg")
+    real_record_page = storage_reconcile._record_page
+
+    async def stolen(db_session, checkpoint, *args):
+        # 本批处理期间锁定超时并被其他对账取得
+        checkpoint.locked_by = "other"
+        await real_record_page(db_session, checkpoint, *args)
+
+    monkeypatch.setattr(storage_reconcile, "_record_page", stolen)
+    with pytest.raises(ReconcileLocked):
+        reconcile(delete_orphans=True)
+    assert db.query(StorageDeletion).count() == 0
+
+
+def test_temp_file_sweep(db, media_root, actor):
+    (media_root / "incoming").mkdir()
+    (media_root / "uploads").mkdir()
+    active_source = media_root / "incoming" / "active.jpg"
+    stale_source = media_root / "incoming" / "stale.jpg"
+    active_buffer = media_root / "uploads" / "u1.buf"
+    stale_buffer = media_root / "uploads" / "u2.buf"
+    transcode_dir = media_root / "tmpabc"
+    transcode_dir.mkdir()
+    recent = media_root / "incoming" / "recent.jpg"
+    for path in [active_source, stale_source, active_buffer, stale_buffer, transcode_dir / "seg.ts", recent]:
+        path.write_bytes(b"data")
+    old = time.time() - 2 * 86400
+    for path in [active_source, stale_source, active_buffer, stale_buffer, transcode_dir]:
+        os.utime(path, (old, old))
+
+    db.add(MediaJob(actor_id="A1", job_type="photo", status="processing", source_path=str(active_source)))
+    db.add(UploadSession(id="u1", actor_id="A1", media_type="photo", total_size=4, object_name="staged/u1",
+                         expires_at=datetime.datetime.utcnow() + datetime.timedelta(hours=1)))
+    db.commit()
+
+    report = asyncio.run(sweep_temp_files())
+    assert report["files"] == 3
+    assert report["bytes"] == 12
+    assert report["deleted"] == 0
+
+    report = asyncio.run(sweep_temp_files(delete=True))
+    assert report["deleted"] == 3
+    assert sorted(p.name for p in media_root.rglob("*") if p.is_file()) == ["active.jpg", "recent.jpg", "u1.buf"]
+
+
+def test_endpoint_runs_in_background(client, db, storage, users, reconcile):
+    _put(storage, "photos/orphan.jpg")
+
+    resp = client.post("/api/v1/system/info/storage-reconcile", params={"bucket": BUCKET})
+    assert resp.status_code == 202
+    assert resp.json()["data"]["status"] == "running"
+
+    status = client.get("/api/v1/system/info/storage-reconcile").json()["data"]
+    assert status["last_run"]["status"] == "completed"
+    assert status["last_run"]["report"]["buckets"][0]["orphans"] == 1
+    assert status["checkpoints"][0]["bucket"] == BUCKET
+    assert status["checkpoints"][0]["running"] is False
+
+
+def test_endpoint_conflicts_and_permissions(client, db, users, reconcile):
+    db.add(StorageReconcileCheckpoint(bucket_name=BUCKET, locked_by="other", locked_at=datetime.datetime.utcnow()))
+    db.commit()
+    assert client.post("/api/v1/system/info/storage-reconcile", params={"bucket": BUCKET}).status_code == 409
+
+    storage_reconcile.start_run({})
+    assert client.post("/api/v1/system/info/storage-reconcile", params={"bucket": "actor-videos"}).status_code == 409
+
+    client.login(users["performer"])
+    assert client.post("/api/v1/system/info/storage-reconcile").status_code == 403
+    assert client.get("/api/v1/system/info/storage-reconcile").status_code == 403
@@ -0,0 +1,82 @@
+import asyncio
+import datetime
+
+import pytest
+
+from app.core.config import settings
+from app.models.media import MediaJob
+from app.utils import media_jobs, video_processing
+
+
+@pytest.fixture
+def ffmpeg(monkeypatch):
+    """记录ffmpeg命令并创建输出文件，替代真实的子进程"""
+    commands = []
+
+    async def run(*command, timeout=None):
+        commands.append({"args": list(command), "timeout": timeout})
+        with open(command[-1], "wb") as output:
+            output.write(b"out")
+        return 0, b"", b""
+
+    monkeypatch.setattr(video_processing, "_run", run)
+    return commands
+
+
+def _option(args, name):
+    return args[args.index(name) + 1]
+
+
+def test_sprite_keeps_fixed_interval_for_short_videos(ffmpeg, tmp_path):
+    sprite = asyncio.run(video_processing.create_sprite("in.mp4", str(tmp_path / "sprite.jpg"), duration=42))
+
+    assert sprite["interval"] == settings.VIDEO_SPRITE_INTERVAL
+    assert sprite["count"] == 9
+    assert sprite["rows"] == 1
+    assert _option(ffmpeg[0]["args"], "-vf").startswith(f"fps=1/{settings.VIDEO_SPRITE_INTERVAL},")
+
+
+def test_sprite_interval_spreads_frames_over_long_videos(ffmpeg, tmp_path):
+    # 默认间隔5秒、最多100帧时只能覆盖前500秒
+    sprite = asyncio.run(video_processing.create_sprite("in.mp4", str(tmp_path / "sprite.jpg"), duration=1800))
+
+    assert sprite["count"] == settings.VIDEO_SPRITE_MAX_FRAMES
+    assert sprite["interval"] == 18
+    assert sprite["interval"] * sprite["count"] >= 1800
+    assert _option(ffmpeg[0]["args"], "-vf").startswith("fps=1/18.0,")
+
+
+def test_hls_only_generates_renditions_up_to_source_height(ffmpeg, tmp_path):
+    probe = {"duration": 10, "width": 1280, "height": 720, "has_audio": True}
+    renditions = asyncio.run(video_processing.create_hls_renditions("in.mp4", str(tmp_path), probe, "libx264"))
+
+    assert [r["height"] for r in renditions] == [360, 720]
+    assert (tmp_path / "master.m3u8").read_text().count("#EXT-X-STREAM-INF") == 2
+
+
+def test_hls_does_not_upscale_small_sources(ffmpeg, tmp_path):
+    probe = {"duration": 10, "width": 427, "height": 241, "has_audio": False}
+    renditions = asyncio.run(video_processing.create_hls_renditions("in.mp4", str(tmp_path), probe, "libx264"))
+
+    assert [(r["width"], r["height"]) for r in renditions] == [(426, 240)]
+    assert _option(ffmpeg[0]["args"], "-vf") == "scale=-2:240"
+    assert "RESOLUTION=426x240" in (tmp_path / "master.m3u8").read_text()
+
+
+def test_lock_is_renewed_while_processing(db, users, actor, monkeypatch):
+    monkeypatch.setattr(settings, "MEDIA_JOB_LOCK_TIMEOUT", 0.06)
+    stale = datetime.datetime.utcnow() - datetime.timedelta(minutes=5)
+    job = MediaJob(actor_id="A1", job_type="video", status="processing", locked_at=stale, attempts=1)
+    db.add(job)
+    db.commit()
+
+    async def slow_job(_job):
+        await asyncio.sleep(0.1)
+        # 处理中的任务没有超时，不会被其他工作协程重新领取
+        assert await media_jobs.claim_next_job() is None
+
+    monkeypatch.setattr(media_jobs, "_process_job", slow_job)
+    asyncio.run(media_jobs.process_job(job))
+
+    db.expire_all()
+    assert db.get(MediaJob, job.id).locked_at > stale
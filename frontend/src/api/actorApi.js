@@ -351,10 +351,10 @@ export const updateActorContactInfo = async (actorId, data) => {
   }
 };
 
-// 获取演员媒体列表
-export const getActorMedia = async (actorId) => {
+// 获取演员媒体列表的一页（接口按游标分页，next_cursor 不为空时作为 params.cursor 读取下一页）
+export const getActorMedia = async (actorId, params = {}) => {
   try {
-    const response = await api.get(`/actors/media/${actorId}/media`);
+    const response = await api.get(`/actors/media/${actorId}/media`, { params });
     return response.data;
   } catch (error) {
     console.error(`获取演员媒体失败 (ID: ${actorId}):`, error);
@@ -576,7 +576,7 @@ export const uploadSelfVideos = async (formData) => {
   }
 };
 
-// 获取演员自己的媒体列表
+// 获取演员自己的媒体列表的一页（next_cursor 不为空时作为 params.cursor 读取下一页，头像和相册只在第一页返回）
 export const getSelfMedia = async (params = {}) => {
   try {
     console.log('正在获取个人媒体列表，参数:', params);
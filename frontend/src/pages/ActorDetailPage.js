@@ -32,7 +32,12 @@ const ActorDetailPage = () => {
     setMediaLoading(true);
     try {
       console.log('获取演员媒体列表，演员ID:', actorId);
-      const mediaResponse = await getActorMedia(actorId);
+      // 详情页只预览最新的6张照片和2个视频，按类型各读取一页，多取一条用于判断是否显示"查看全部"
+      const [photoPage, videoPage] = await Promise.all([
+        getActorMedia(actorId, { file_type: 'photo', limit: 7 }),
+        getActorMedia(actorId, { file_type: 'video', limit: 3 })
+      ]);
+      const mediaResponse = { items: [...(photoPage.items || []), ...(videoPage.items || [])] };
       console.log('媒体列表响应:', mediaResponse);
       
       // 处理响应数据，确保它是一个数组
@@ -581,7 +586,7 @@ const ActorDetailPage = () => {
                           <div style={{ textAlign: 'center', marginTop: '16px' }}>
                             <Link to={`/actors/${actorId}/upload-media`}>
                               <Button type="link">
-                                查看全部 ({media.filter(item => item.type === 'photo' || (item.mime_type && item.mime_type.startsWith('image') && item.type !== 'avatar')).length}张)
+                                查看全部
                               </Button>
                             </Link>
                           </div>
@@ -675,7 +680,7 @@ const ActorDetailPage = () => {
                           <div style={{ textAlign: 'center', marginTop: '16px' }}>
                             <Link to={`/actors/${actorId}/upload-media`}>
                               <Button type="link">
-                                查看全部 ({media.filter(item => item.type === 'video' || (item.mime_type && item.mime_type.startsWith('video'))).length}个)
+                                查看全部
                               </Button>
                             </Link>
                           </div>
@@ -59,6 +59,9 @@ const ActorMediaUploadPage = () => {
   const [actor, setActor] = useState(null);
   const [media, setMedia] = useState([]);
   const [loading, setLoading] = useState(true);
+  // 媒体列表按游标分页，nextCursor不为空时还有下一页
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   
   // 分别管理三种不同类型的媒体上传状态
   const [avatarUploading, setAvatarUploading] = useState(false);
@@ -106,13 +109,14 @@ const ActorMediaUploadPage = () => {
     }
   };
 
-  const fetchActorMedia = async () => {
+  // 读取媒体列表的第一页，传入cursor时读取下一页并追加到已有列表
+  const fetchActorMedia = async (cursor = null) => {
     try {
       console.log('获取演员媒体列表，演员ID:', actorId);
       const mediaUrl = `/actors/media/${actorId}/media`;
       console.log('请求媒体列表URL:', mediaUrl);
       
-      const response = await api.get(mediaUrl);
+      const response = { data: await getActorMedia(actorId, cursor ? { cursor } : {}) };
       console.log('媒体列表响应:', response.data);
       
       // 处理响应数据，确保它是一个数组
@@ -156,10 +160,14 @@ const ActorMediaUploadPage = () => {
       });
       
       console.log('处理后的媒体列表:', mediaList);
-      setMedia(mediaList);
+      setMedia(cursor ? (prev) => prev.concat(mediaList) : mediaList);
+      setNextCursor(response.data?.next_cursor || null);
     } catch (error) {
       console.error('获取演员媒体资料失败:', error);
       message.error('获取媒体列表失败');
+      if (cursor) {
+        return;
+      }
       
       // 尝试备用路径
       try {
@@ -214,6 +222,13 @@ const ActorMediaUploadPage = () => {
     setLoading(false);
   };
 
+  // 加载下一页媒体
+  const loadMoreMedia = async () => {
+    setLoadingMore(true);
+    await fetchActorMedia(nextCursor);
+    setLoadingMore(false);
+  };
+
   // 头像上传处理
   const handleAvatarUpload = async () => {
     if (!avatarFile) {
@@ -721,6 +736,12 @@ const ActorMediaUploadPage = () => {
         <Empty description="暂无媒体资料" />
       )}
       
+      {nextCursor && (
+        <div style={{ textAlign: 'center', marginTop: 16 }}>
+          <Button onClick={loadMoreMedia} loading={loadingMore}>加载更多</Button>
+        </div>
+      )}
+      
       <Divider />
       
       <div style={{ textAlign: 'center', marginTop: 20 }}>
@@ -26,6 +26,8 @@ const ActorSelfMediaPage = () => {
   
   const [loading, setLoading] = useState(true);
   const [mediaData, setMediaData] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [activeTab, setActiveTab] = useState('photos');
   
   const [photoFiles, setPhotoFiles] = useState([]);
@@ -64,6 +66,7 @@ const ActorSelfMediaPage = () => {
       const data = await getSelfMedia();
       console.log('获取媒体数据成功:', data);
       setMediaData(data);
+      setNextCursor(data.next_cursor || null);
     } catch (error) {
       console.error('获取媒体数据失败:', error);
       
@@ -81,6 +84,25 @@ const ActorSelfMediaPage = () => {
     }
   };
 
+  // 加载下一页照片和视频，头像和相册列表沿用第一页的数据
+  const loadMoreMedia = async () => {
+    setLoadingMore(true);
+    try {
+      const data = await getSelfMedia({ cursor: nextCursor });
+      setMediaData(prev => ({
+        ...prev,
+        photos: [...(prev.photos || []), ...(data.photos || [])],
+        videos: [...(prev.videos || []), ...(data.videos || [])]
+      }));
+      setNextCursor(data.next_cursor || null);
+    } catch (error) {
+      console.error('加载更多媒体失败:', error);
+      message.error('加载更多媒体失败，请稍后再试');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   // 头像上传
   const handleAvatarUpload = async () => {
     if (!avatarFile) {
@@ -391,6 +413,11 @@ const ActorSelfMediaPage = () => {
                   ) : (
                     <Empty description="暂无照片" />
                   )}
+                  {nextCursor && (
+                    <div style={{ textAlign: 'center', marginTop: 16 }}>
+                      <Button onClick={loadMoreMedia} loading={loadingMore}>加载更多</Button>
+                    </div>
+                  )}
                 </>
               )
             },
@@ -570,6 +597,11 @@ const ActorSelfMediaPage = () => {
                   ) : (
                     <Empty description="暂无视频" />
                   )}
+                  {nextCursor && (
+                    <div style={{ textAlign: 'center', marginTop: 16 }}>
+                      <Button onClick={loadMoreMedia} loading={loadingMore}>加载更多</Button>
+                    </div>
+                  )}
                 </>
               )
             },
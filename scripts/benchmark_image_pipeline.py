@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+照片处理流水线基准测试
+
+对比两种处理方式的耗时、CPU时间和峰值内存：
+- baseline: 压缩、缩略图、响应式变体和感知哈希各自全分辨率解码一次原图
+- pipeline: process_photo_file，JPEG按目标尺寸缩小解码，原图只解码一次
+
+每次测量在独立子进程中执行，峰值内存（ru_maxrss）互不影响。
+不指定图片时生成 12MP 和 48MP 的合成JPEG。
+
+用法:
+    python scripts/benchmark_image_pipeline.py
+    python scripts/benchmark_image_pipeline.py --rounds 5 photo1.jpg photo2.heic
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+SYNTHETIC_SIZES = {"12MP": (4000, 3000), "48MP": (8000, 6000)}
+MAX_DIMENSION = 4096
+THUMBNAIL_SIZE = (300, 300)
+VARIANT_WIDTHS = [320, 640, 1280]
+VARIANT_FORMATS = ["webp", "jpeg"]
+
+
+def make_synthetic_jpeg(path, size):
+    """生成带渐变和噪声的JPEG，避免纯色图片压缩和解码过快"""
+    from PIL import Image
+
+    gradient = Image.linear_gradient("L").resize(size)
+    noise = Image.effect_noise(size, 64)
+    img = Image.merge("RGB", (gradient, noise, gradient.transpose(Image.FLIP_LEFT_RIGHT)))
+    img.save(path, "JPEG", quality=92)
+
+
+def run_baseline(file_path):
+    """改造前的做法：每个步骤都重新打开并全分辨率解码原图"""
+    from PIL import Image
+    from app.utils.image_processing import _dhash, _to_rgb
+
+    stem, ext = os.path.splitext(file_path)
+
+    with Image.open(file_path) as img:
+        img = _to_rgb(img)
+        img.thumbnail((MAX_DIMENSION, MAX_DIMENSION), Image.LANCZOS)
+        img.save(stem + "_compressed" + ext, quality=85, optimize=True)
+
+    with Image.open(file_path) as img:
+        img = _to_rgb(img)
+        img.thumbnail(THUMBNAIL_SIZE, Image.LANCZOS)
+        img.save(stem + "_thumbnail.jpg", "JPEG", quality=85, optimize=True)
+
+    with Image.open(file_path) as img:
+        img = _to_rgb(img)
+        for width in VARIANT_WIDTHS:
+            resized = img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+            for fmt in VARIANT_FORMATS:
+                resized.save(f"{stem}_{width}w.{fmt}", fmt.upper(), quality=80)
+
+    with Image.open(file_path) as img:
+        _dhash(_to_rgb(img))
+
+
+def run_pipeline(file_path):
+    """process_photo_file：一次缩小解码完成全部输出"""
+    from app.utils.image_processing import process_photo_file
+
+    process_photo_file(file_path, 85, MAX_DIMENSION, THUMBNAIL_SIZE, VARIANT_WIDTHS, VARIANT_FORMATS, 80)
+
+
+def measure(mode, source_path):
+    """在子进程中执行一次，返回 (耗时, CPU时间, 峰值内存KB)"""
+    work_dir = tempfile.mkdtemp(prefix="bench_")
+    try:
+        file_path = os.path.join(work_dir, os.path.basename(source_path))
+        shutil.copyfile(source_path, file_path)
+        runner = run_baseline if mode == "baseline" else run_pipeline
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        runner(file_path)
+        cpu = time.process_time() - cpu_start
+        wall = time.perf_counter() - wall_start
+        return wall, cpu, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def benchmark(label, path, rounds):
+    print(f"\n{label}: {path}")
+    ctx = multiprocessing.get_context("spawn")
+    for mode in ("baseline", "pipeline"):
+        walls, cpus, rss = [], [], []
+        for _ in range(rounds):
+            # 每次测量使用新进程，峰值内存不受之前测量的影响
+            with ctx.Pool(1) as pool:
+                wall, cpu, maxrss = pool.apply(measure, (mode, path))
+            walls.append(wall)
+            cpus.append(cpu)
+            rss.append(maxrss)
+        print(f"  {mode:<9} 耗时中位数: {statistics.median(walls) * 1000:8.1f}ms  "
+              f"CPU时间中位数: {statistics.median(cpus) * 1000:8.1f}ms  "
+              f"峰值内存: {max(rss) / 1024:7.1f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="照片处理流水线基准测试")
+    parser.add_argument("images", nargs="*", help="要测试的图片，不指定时使用合成的12MP/48MP JPEG")
+    parser.add_argument("--rounds", type=int, default=3, help="每种方式的测量次数")
+    args = parser.parse_args()
+
+    temp_dir = None
+    if args.images:
+        targets = [(os.path.basename(path), path) for path in args.images]
+    else:
+        temp_dir = tempfile.mkdtemp(prefix="bench_src_")
+        targets = []
+        # 在子进程中生成，避免主进程的峰值内存被子进程继承而计入测量结果
+        with multiprocessing.get_context("spawn").Pool(1) as pool:
+            for label, size in SYNTHETIC_SIZES.items():
+                path = os.path.join(temp_dir, f"synthetic_{label}.jpg")
+                pool.apply(make_synthetic_jpeg, (path, size))
+                targets.append((label, path))
+
+    try:
+        for label, path in targets:
+            benchmark(label, path, args.rounds)
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
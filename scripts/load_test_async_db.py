@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+异步数据库端点并发压测脚本
+
+在发送慢查询请求的同时并发请求异步端点，统计吞吐量和延迟，
+用于确认慢查询不会阻塞事件循环。
+
+用法:
+    python scripts/load_test_async_db.py --base-url http://localhost:8002 --actor-id AC2025010100010000
+"""
+import argparse
+import statistics
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def fetch(url, token=None):
+    """请求一次URL，返回耗时（秒），失败时返回None"""
+    request = urllib.request.Request(url)
+    if token:
+        request.add_header("Authorization", f"Bearer {token}")
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            response.read()
+    except Exception as e:
+        print(f"请求失败: {url} - {e}")
+        return None
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="异步数据库端点并发压测")
+    parser.add_argument("--base-url", default="http://localhost:8002")
+    parser.add_argument("--actor-id", required=True, help="用于查询媒体列表的演员ID")
+    parser.add_argument("--token", default=None, help="访问令牌")
+    parser.add_argument("--requests", type=int, default=500, help="总请求数")
+    parser.add_argument("--concurrency", type=int, default=50, help="并发数")
+    parser.add_argument("--slow-requests", type=int, default=5, help="同时发送的慢查询请求数（不分页的未签约演员列表）")
+    args = parser.parse_args()
+
+    api = f"{args.base_url}/api/v1"
+    fast_urls = [
+        f"{api}/system/info/health-check",
+        f"{api}/actors/media/{args.actor_id}/media",
+    ]
+    slow_url = f"{api}/actors/basic/without-agent?limit=100000"
+
+    with ThreadPoolExecutor(max_workers=args.concurrency + args.slow_requests) as executor:
+        slow_futures = [executor.submit(fetch, slow_url, args.token) for _ in range(args.slow_requests)]
+
+        start = time.perf_counter()
+        futures = [
+            executor.submit(fetch, fast_urls[i % len(fast_urls)], args.token)
+            for i in range(args.requests)
+        ]
+        latencies = [f.result() for f in futures]
+        elapsed = time.perf_counter() - start
+
+        slow_latencies = [f.result() for f in slow_futures]
+
+    ok = sorted(latency for latency in latencies if latency is not None)
+    if not ok:
+        print("所有请求均失败")
+        return
+
+    print(f"总请求: {args.requests}, 成功: {len(ok)}, 并发: {args.concurrency}, 慢查询: {args.slow_requests}")
+    print(f"吞吐量: {len(ok) / elapsed:.1f} req/s")
+    print(f"延迟 p50: {statistics.median(ok) * 1000:.1f}ms, "
+          f"p95: {ok[int(len(ok) * 0.95) - 1] * 1000:.1f}ms, 最大: {ok[-1] * 1000:.1f}ms")
+    slow_ok = [latency for latency in slow_latencies if latency is not None]
+    if slow_ok:
+        print(f"慢查询平均耗时: {statistics.mean(slow_ok) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
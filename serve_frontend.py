@@ -5,6 +5,7 @@
 import http.server
 import socketserver
 import os
+import shutil
 import sys
 import urllib.request
 import urllib.error
@@ -12,6 +13,9 @@ import urllib.error
 # 默认端口
 PORT = 8001
 
+# 代理MinIO响应时每次转发的字节数
+PROXY_CHUNK_SIZE = 256 * 1024
+
 # 检查命令行参数
 if len(sys.argv) > 1:
     try:
@@ -160,8 +164,8 @@ class ProxyHandler(http.server.SimpleHTTPRequestHandler):
                 
                 self.end_headers()
                 
-                # 复制响应体
-                self.wfile.write(response.read())
+                # 分块复制响应体，Range请求的206响应只转发请求的部分，不把整个对象读入内存
+                shutil.copyfileobj(response, self.wfile, PROXY_CHUNK_SIZE)
         
         except urllib.error.HTTPError as e:
             self.send_response(e.code)